@@ -1,13 +1,17 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import WeeklyAvailability, Appointment, AvailabilityOverride
+from .models import WeeklyAvailability, Appointment, AvailabilityOverride, WaitlistEntry, HolidayCalendar, CalendarClosure, SchedulingPolicy, CapacitySnapshot, AppointmentDailyRollup, AppointmentChange, CalendarFeed, ExternalCalendar
 
 @admin.register(WeeklyAvailability)
 class WeeklyAvailabilityAdmin(admin.ModelAdmin):
     list_display = ('lawyer', 'day_of_week', 'start_time', 'end_time')
     list_filter = ('day_of_week',)
 
+@admin.register(SchedulingPolicy)
+class SchedulingPolicyAdmin(admin.ModelAdmin):
+    list_display = ('lawyer', 'slot_minutes', 'buffer_before_minutes', 'buffer_after_minutes', 'max_appointments_per_day', 'min_notice_minutes')
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ('client', 'lawyer', 'start', 'end', 'status')
@@ -17,3 +21,50 @@ class AppointmentAdmin(admin.ModelAdmin):
 class AvailabilityOverrideAdmin(admin.ModelAdmin):
     list_display = ('lawyer', 'date', 'start_time', 'end_time', 'is_all_day')
     list_filter = ('date', 'is_all_day')
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('client', 'lawyer', 'window_start', 'window_end', 'status')
+    list_filter = ('status',)
+
+class CalendarClosureInline(admin.TabularInline):
+    model = CalendarClosure
+    extra = 1
+
+@admin.register(HolidayCalendar)
+class HolidayCalendarAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind')
+    list_filter = ('kind',)
+    filter_horizontal = ('subscribers',)
+    inlines = [CalendarClosureInline]
+
+@admin.register(CapacitySnapshot)
+class CapacitySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'first_day', 'last_day', 'duration_ms', 'created_at')
+    exclude = ('report',) # Large; read it through the admin capacity API
+
+@admin.register(AppointmentDailyRollup)
+class AppointmentDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('lawyer', 'date', 'status', 'count', 'booked_minutes', 'amount_cents')
+    list_filter = ('status', 'date')
+
+@admin.register(AppointmentChange)
+class AppointmentChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'appointment_id', 'change_type', 'status', 'changed_at')
+    list_filter = ('change_type',)
+    search_fields = ('appointment_id',)
+
+@admin.register(CalendarFeed)
+class CalendarFeedAdmin(admin.ModelAdmin):
+    list_display = ('lawyer', 'version', 'changed_at', 'created_at')
+    exclude = ('token',) # Secret; lawyers rotate it themselves
+    readonly_fields = ('lawyer', 'version', 'changed_at')
+
+    def has_add_permission(self, request):
+        return False # Created through the lawyer's calendar-feed endpoint
+
+@admin.register(ExternalCalendar)
+class ExternalCalendarAdmin(admin.ModelAdmin):
+    list_display = ('name', 'lawyer', 'url', 'synced_at', 'last_error')
+    search_fields = ('name', 'url')
+    exclude = ('content_hash',)
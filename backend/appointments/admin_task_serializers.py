@@ -29,8 +29,25 @@ class CrontabScheduleSerializer(serializers.ModelSerializer):
 
 # We will define PeriodicTaskSerializer later, as it's more complex. 
 
-# Import Celery app instance from your project's Celery configuration
-from config.celery import app as celery_app
+# Memoized snapshot of the registered Celery tasks (shared by every serializer instance)
+from .task_utils import get_task_registry_snapshot
+
+# Flat equivalents of IntervalScheduleSerializer(...).data / CrontabScheduleSerializer(...).data.
+# PeriodicTaskSerializer.to_representation runs once per row in list views, so it builds these dicts
+# directly instead of instantiating a nested serializer (and its deep-copied fields) for every row.
+def interval_details(interval):
+    return {'id': interval.id, 'every': interval.every, 'period': interval.period}
+
+def crontab_details(crontab):
+    return {
+        'id': crontab.id,
+        'minute': crontab.minute,
+        'hour': crontab.hour,
+        'day_of_week': crontab.day_of_week,
+        'day_of_month': crontab.day_of_month,
+        'month_of_year': crontab.month_of_year,
+        'timezone': str(crontab.timezone),
+    }
 
 class PeriodicTaskSerializer(serializers.ModelSerializer):
     # Schedule fields: allow null and not required, as only one can be active.
@@ -85,12 +102,10 @@ class PeriodicTaskSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Dynamically populate choices for the 'task' field from registered Celery tasks.
-        # Excludes Celery's internal tasks for clarity.
+        # Excludes Celery's internal tasks for clarity. The names come from the cached registry
+        # snapshot, so constructing a serializer no longer re-sorts the registry.
         if 'task' in self.fields:
-            self.fields['task'].choices = [
-                (task_name, task_name) for task_name in sorted(celery_app.tasks.keys()) 
-                if not task_name.startswith('celery.')
-            ]
+            get_task_registry_snapshot().apply_to_choice_field(self.fields['task'])
 
     def get_schedule_display(self, obj):
         if obj.interval:
@@ -162,9 +177,9 @@ class PeriodicTaskSerializer(serializers.ModelSerializer):
         
         # Add detailed representation of the active schedule type for clarity
         if instance.interval:
-            representation['interval_details'] = IntervalScheduleSerializer(instance.interval).data
+            representation['interval_details'] = interval_details(instance.interval)
         elif instance.crontab:
-            representation['crontab_details'] = CrontabScheduleSerializer(instance.crontab).data
+            representation['crontab_details'] = crontab_details(instance.crontab)
         # Add for solar, clocked if used
         
         # Ensure args and kwargs are consistently represented as list/dict (or None)
@@ -4,7 +4,10 @@ from .admin_task_views import (
     IntervalScheduleViewSet, 
     CrontabScheduleViewSet, 
     PeriodicTaskViewSet,
-    TriggerTaskView
+    TriggerTaskView,
+    TriggeredTaskStatusView,
+    TaskMetricsListView,
+    TaskMetricsDetailView
 )
 
 # Create a router and register our viewsets with it.
@@ -17,4 +20,7 @@ router.register(r'periodic-tasks', PeriodicTaskViewSet, basename='periodic-task'
 urlpatterns = [
     path('', include(router.urls)),
     path('trigger-task/', TriggerTaskView.as_view(), name='trigger-task'),
+    path('trigger-task/<str:task_id>/', TriggeredTaskStatusView.as_view(), name='triggered-task-status'),
+    path('metrics/', TaskMetricsListView.as_view(), name='task-metrics'),
+    path('metrics/<str:task_name>/', TaskMetricsDetailView.as_view(), name='task-metrics-detail'),
 ] 
\ No newline at end of file
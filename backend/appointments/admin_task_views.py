@@ -6,7 +6,12 @@ from .admin_task_serializers import IntervalScheduleSerializer, CrontabScheduleS
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from celery import current_app # Using current_app is generally preferred for tasks
+from django.urls import reverse
+from celery import states
+from . import task_metrics
+from .task_utils import get_registered_task_names, PROGRESS_STATE
 
 class IntervalScheduleViewSet(viewsets.ModelViewSet):
     """
@@ -56,6 +61,7 @@ class TriggerTaskView(APIView):
         "kwargs": {"keyword_arg1": "value1"}
     }
     'args' and 'kwargs' are optional.
+    Responds with the queued task's id; poll TriggeredTaskStatusView (trigger-task/<task_id>/) for its state.
     """
     permission_classes = [permissions.IsAdminUser]
 
@@ -76,18 +82,25 @@ class TriggerTaskView(APIView):
                  return Response({"error": "'kwargs' must be a dictionary."}, status=status.HTTP_400_BAD_REQUEST)
 
             # Check if the task exists in the current Celery app's registry
+            # (get_registered_task_names() also makes sure the app's task modules are imported).
+            available_tasks = get_registered_task_names()
             if task_name not in current_app.tasks:
-                available_tasks = [name for name in sorted(current_app.tasks.keys()) if not name.startswith('celery.')]
+                available_tasks = list(available_tasks)
                 return Response(
                     {"error": f"Task '{task_name}' not found. Available tasks include: {available_tasks}"},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Asynchronously send the task to the Celery workers
-            current_app.send_task(name=task_name, args=task_args, kwargs=task_kwargs)
+            # Asynchronously send the task to the Celery workers.
+            # Keep the id so the admin can poll TriggeredTaskStatusView for its state/progress.
+            async_result = current_app.send_task(name=task_name, args=task_args, kwargs=task_kwargs)
             
             return Response(
-                {"message": f"Task '{task_name}' has been successfully queued."}, 
+                {
+                    "message": f"Task '{task_name}' has been successfully queued.",
+                    "task_id": async_result.id,
+                    "status_url": reverse('triggered-task-status', kwargs={'task_id': async_result.id}),
+                }, 
                 status=status.HTTP_202_ACCEPTED
             )
         except Exception as e:
@@ -97,4 +110,78 @@ class TriggerTaskView(APIView):
             return Response(
                 {"error": f"Failed to trigger task '{task_name}'. Please check server logs."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            ) 
\ No newline at end of file
+            )
+
+class TriggeredTaskStatusView(APIView):
+    """
+    Returns the state of a task queued through TriggerTaskView, read from the result backend.
+    Costs a single result-backend read (one Redis GET) and no database queries.
+    States: PENDING (unknown or not started yet), STARTED, PROGRESS, RETRY, SUCCESS, FAILURE, REVOKED.
+    Tasks declared with ignore_result=True never leave PENDING.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, task_id, *args, **kwargs):
+        try:
+            meta = current_app.backend.get_task_meta(task_id)
+        except Exception as e:
+            print(f"Error reading result backend for task {task_id}: {e}")
+            return Response({"error": "Result backend is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        task_state = meta.get('status', states.PENDING)
+        date_done = meta.get('date_done')
+        response_data = {
+            "task_id": task_id,
+            "state": task_state,
+            "date_done": date_done.isoformat() if hasattr(date_done, 'isoformat') else date_done,
+        }
+        result = meta.get('result')
+        if task_state == PROGRESS_STATE:
+            response_data["progress"] = result
+        elif task_state == states.SUCCESS:
+            response_data["result"] = result
+        elif task_state in states.PROPAGATE_STATES or task_state == states.RETRY:
+            response_data["error"] = repr(result)
+        return Response(response_data)
+
+class TaskMetricsListView(APIView):
+    """
+    Returns runtime and queue-wait percentiles (p50/p95/p99, milliseconds) and error rates
+    for every task that reported metrics in the last `hours` hours (query param, default 24).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        window_hours = _parse_window_hours(request)
+        if window_hours is None:
+            return Response({"error": f"'hours' must be an integer between 1 and {settings.TASK_METRICS_RETENTION_HOURS}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            metrics = task_metrics.get_task_metrics(task_metrics.get_task_names(), window_hours)
+        except Exception as e:
+            print(f"Error reading task metrics: {e}")
+            return Response({"error": "Task metrics store is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"window_hours": window_hours, "tasks": metrics})
+
+class TaskMetricsDetailView(APIView):
+    """Same as TaskMetricsListView, for a single task name."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, task_name, *args, **kwargs):
+        window_hours = _parse_window_hours(request)
+        if window_hours is None:
+            return Response({"error": f"'hours' must be an integer between 1 and {settings.TASK_METRICS_RETENTION_HOURS}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            metrics = task_metrics.get_task_metrics([task_name], window_hours)[0]
+        except Exception as e:
+            print(f"Error reading task metrics for {task_name}: {e}")
+            return Response({"error": "Task metrics store is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"window_hours": window_hours, **metrics})
+
+def _parse_window_hours(request):
+    try:
+        window_hours = int(request.query_params.get('hours', 24))
+    except (TypeError, ValueError):
+        return None
+    if not 1 <= window_hours <= settings.TASK_METRICS_RETENTION_HOURS:
+        return None
+    return window_hours
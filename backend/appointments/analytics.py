@@ -0,0 +1,186 @@
+"""
+Daily appointment rollups (AppointmentDailyRollup): per lawyer, local day and status, the number of
+appointments, booked minutes and amount paid, so analytics never scan Appointment.
+
+Rollups are maintained incrementally: every appointment write applies +1/-1 deltas to the affected rows in
+the same transaction (appointments/signals.py for save/delete, record_created() for bulk_create), and marks
+the (lawyer, day) dirty in Redis (`analytics:dirty_days`). reconcile_dirty_days() (nightly Celery task)
+recomputes only those days from Appointment, repairing drift from writes that bypass the ORM. A write that
+commits while its day is being recomputed marks the day dirty again, so the next run converges.
+rebuild_all() recomputes everything (initial backfill).
+
+Days already archived out of Appointment (appointments/partitions.py) aren't recomputed: their rollups are final.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import redis
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from config.redis_client import get_redis_client
+from .models import Appointment, AppointmentDailyRollup
+
+logger = logging.getLogger(__name__)
+
+DIRTY_DAYS_KEY = 'analytics:dirty_days'
+RECONCILE_BATCH_SIZE = 500
+REBUILD_BATCH_SIZE = 5000
+
+
+def appointment_state(instance):
+    """
+    (lawyer_id, start, end, status, amount_cents) of an Appointment, read from the instance's loaded values
+    (never triggers a query for deferred fields); None if any of them isn't loaded.
+    """
+    values = instance.__dict__
+    try:
+        return (values['lawyer_id'], values['start'], values['end'], values['status'], values['amount_cents'])
+    except KeyError:
+        return None
+
+
+def _contribution(state):
+    """The rollup key and (count, minutes, amount) an appointment state adds."""
+    lawyer_id, start, end, status, amount_cents = state
+    minutes = int((end - start).total_seconds() // 60)
+    return (lawyer_id, timezone.localtime(start).date(), status), (1, minutes, amount_cents or 0)
+
+
+def record_change(old_state, new_state):
+    """Applies the deltas of an appointment going from old_state to new_state (either may be None)."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        key, values = _contribution(state)
+        for index, value in enumerate(values):
+            deltas[key][index] += sign * value
+    _apply(deltas)
+
+
+def record_created(appointments):
+    """Rollup deltas for appointments saved without signals (bulk_create)."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for appointment in appointments:
+        key, values = _contribution(appointment_state(appointment))
+        for index, value in enumerate(values):
+            deltas[key][index] += value
+    _apply(deltas)
+
+
+def _apply(deltas):
+    changed = {key: values for key, values in deltas.items() if any(values)}
+    for (lawyer_id, day, status), (count, minutes, amount) in changed.items():
+        key = {'lawyer_id': lawyer_id, 'date': day, 'status': status}
+        increments = {
+            'count': F('count') + count,
+            'booked_minutes': F('booked_minutes') + minutes,
+            'amount_cents': F('amount_cents') + amount,
+        }
+        if AppointmentDailyRollup.objects.filter(**key).update(**increments) or count < 0:
+            continue # Removals never create rows (e.g. the lawyer and their rollups are being deleted)
+        try:
+            with transaction.atomic(): # Savepoint: a concurrent first write for the same key may win
+                AppointmentDailyRollup.objects.create(**key, count=count, booked_minutes=minutes, amount_cents=amount)
+        except IntegrityError:
+            AppointmentDailyRollup.objects.filter(**key).update(**increments)
+    if changed:
+        mark_dirty({(lawyer_id, day) for lawyer_id, day, _ in changed})
+
+
+def mark_dirty(lawyer_days):
+    members = [f'{lawyer_id}:{day.isoformat()}' for lawyer_id, day in lawyer_days]
+
+    def add():
+        try:
+            get_redis_client().sadd(DIRTY_DAYS_KEY, *members)
+        except redis.RedisError as e:
+            # The deltas are applied; only the nightly double-check of these days is lost
+            logger.warning("Could not mark %s rollup day(s) dirty: %s", len(members), e)
+
+    transaction.on_commit(add)
+
+
+def _aggregate(appointments):
+    """Rollup rows computed from an Appointment queryset: {(lawyer_id, date, status): (count, minutes, amount)}."""
+    rows = appointments.annotate(day=TruncDate('start')).values('lawyer_id', 'day', 'status').annotate(
+        appointment_count=Count('id'),
+        duration=Sum(ExpressionWrapper(F('end') - F('start'), output_field=DurationField())),
+        amount=Sum('amount_cents'),
+    ).order_by()
+    return {
+        (row['lawyer_id'], row['day'], row['status']): (
+            row['appointment_count'], int(row['duration'].total_seconds() // 60) if row['duration'] else 0, row['amount'] or 0,
+        )
+        for row in rows.iterator()
+    }
+
+
+def _rollup_rows(aggregated):
+    return [
+        AppointmentDailyRollup(lawyer_id=lawyer_id, date=day, status=status, count=count, booked_minutes=minutes, amount_cents=amount)
+        for (lawyer_id, day, status), (count, minutes, amount) in aggregated.items()
+    ]
+
+
+def recompute(lawyer_days):
+    """Replaces the rollups of the given (lawyer_id, date) pairs with values computed from Appointment."""
+    lawyers_by_day = defaultdict(set)
+    for lawyer_id, day in lawyer_days:
+        lawyers_by_day[day].add(lawyer_id)
+    appointment_filter, rollup_filter = Q(), Q()
+    for day, lawyer_ids in lawyers_by_day.items():
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        day_end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        appointment_filter |= Q(lawyer_id__in=lawyer_ids, start__gte=day_start, start__lt=day_end)
+        rollup_filter |= Q(lawyer_id__in=lawyer_ids, date=day)
+
+    aggregated = _aggregate(Appointment.objects.filter(appointment_filter))
+    with transaction.atomic():
+        AppointmentDailyRollup.objects.filter(rollup_filter).delete()
+        AppointmentDailyRollup.objects.bulk_create(_rollup_rows(aggregated))
+    return len(aggregated)
+
+
+def reconcile_dirty_days(batch_size=RECONCILE_BATCH_SIZE):
+    """Recomputes the rollups of every (lawyer, day) marked dirty since the last run. Returns the number of days."""
+    reconciled = 0
+    while True:
+        try:
+            members = get_redis_client().spop(DIRTY_DAYS_KEY, batch_size)
+        except redis.RedisError as e:
+            logger.warning("Could not read dirty rollup days: %s", e)
+            break
+        if not members:
+            break
+        lawyer_days = set()
+        for member in members:
+            lawyer_id, day = (member.decode() if isinstance(member, bytes) else member).split(':')
+            lawyer_days.add((int(lawyer_id), datetime.strptime(day, '%Y-%m-%d').date()))
+        try:
+            recompute(lawyer_days)
+        except Exception:
+            mark_dirty(lawyer_days) # Try again on the next run
+            raise
+        reconciled += len(lawyer_days)
+    return reconciled
+
+
+def rebuild_all():
+    """
+    Recomputes every rollup from Appointment (initial backfill), keeping the rollups of days before the
+    oldest appointment (archived history). Returns the number of rollup rows.
+    """
+    first_start = Appointment.objects.aggregate(first_start=Min('start'))['first_start']
+    if first_start is None:
+        return 0
+    aggregated = _aggregate(Appointment.objects.all())
+    rows = _rollup_rows(aggregated)
+    with transaction.atomic():
+        AppointmentDailyRollup.objects.filter(date__gte=timezone.localtime(first_start).date()).delete()
+        AppointmentDailyRollup.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+    return len(rows)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import AppointmentDailyRollup
+
+DEFAULT_RANGE_DAYS = 30
+MAX_LAWYERS = 100
+LAWYER_ORDERINGS = ('count', 'booked_minutes', 'amount_cents')
+TOTALS = {'count': Sum('count'), 'booked_minutes': Sum('booked_minutes'), 'amount_cents': Sum('amount_cents')}
+
+
+def _date_range(request):
+    """(first_day, last_day) from ?start=&end= (YYYY-MM-DD, default the last 30 days), or an error Response."""
+    try:
+        last_day = parse_date(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+        first_day = (
+            parse_date(request.query_params['start']) if 'start' in request.query_params
+            else last_day - timedelta(days=DEFAULT_RANGE_DAYS - 1) if last_day else None
+        )
+    except ValueError: # Well formed but invalid, e.g. 2026-02-30
+        first_day = last_day = None
+    if first_day is None or last_day is None:
+        return None, Response({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+    if first_day > last_day:
+        return None, Response({'error': 'start must not be after end.'}, status=status.HTTP_400_BAD_REQUEST)
+    return (first_day, last_day), None
+
+
+class AppointmentAnalyticsView(APIView):
+    """
+    Appointment counts, booked minutes and amounts per status and per day, served from the daily rollups
+    (appointments/analytics.py), so the cost depends on the range, not on the appointment history.
+    Query params: `start`, `end` (YYYY-MM-DD, default the last 30 days), optional `lawyer_id`.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, *args, **kwargs):
+        date_range, error = _date_range(request)
+        if error:
+            return error
+        rollups = AppointmentDailyRollup.objects.filter(date__range=date_range)
+        lawyer_id = request.query_params.get('lawyer_id')
+        if lawyer_id:
+            if not lawyer_id.isdigit():
+                return Response({'error': 'lawyer_id must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            rollups = rollups.filter(lawyer_id=int(lawyer_id))
+
+        totals = {row.pop('status'): row for row in rollups.values('status').annotate(**TOTALS).order_by('status')}
+        daily = list(rollups.values('date', 'status').annotate(**TOTALS).order_by('date', 'status'))
+        return Response({
+            'start': date_range[0],
+            'end': date_range[1],
+            'totals': totals,
+            'daily': daily,
+        })
+
+
+class LawyerAnalyticsView(APIView):
+    """
+    Lawyers ranked by appointments, booked minutes or amount over a date range, from the daily rollups.
+    Query params: `start`, `end` (YYYY-MM-DD, default the last 30 days), `status` (default all but cancelled),
+    `order` (count, booked_minutes or amount_cents; default count), `limit` (default 20, at most 100).
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, *args, **kwargs):
+        date_range, error = _date_range(request)
+        if error:
+            return error
+        order = request.query_params.get('order', 'count')
+        if order not in LAWYER_ORDERINGS:
+            return Response({'error': f"order must be one of {', '.join(LAWYER_ORDERINGS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), MAX_LAWYERS)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = AppointmentDailyRollup.objects.filter(date__range=date_range)
+        status_param = request.query_params.get('status')
+        rollups = rollups.filter(status=status_param) if status_param else rollups.exclude(status='cancelled')
+        lawyers = rollups.values('lawyer_id').annotate(**TOTALS).order_by(f'-{order}', 'lawyer_id')[:max(limit, 0)]
+        return Response({
+            'start': date_range[0],
+            'end': date_range[1],
+            'lawyers': list(lawyers),
+        })
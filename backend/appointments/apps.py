@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AppointmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appointments'
+
+    def ready(self):
+        # Connects the Celery signal handlers that feed the task metrics store.
+        import appointments.task_metrics  # noqa: F401
+        # Invalidates cached holiday calendars and scheduling rules when they change; keeps appointment rollups current.
+        import appointments.signals  # noqa: F401
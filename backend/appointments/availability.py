@@ -0,0 +1,47 @@
+"""
+Batch availability checks for many candidate slots of one lawyer (e.g. the occurrences of a series booking).
+
+find_conflicts() loads everything that can block the candidates once for the whole date range
+(appointments/scheduling.py: cached rules plus a fixed number of queries) and evaluates each candidate with
+the same per-day pass that available_slots uses, so every conflicting candidate gets the exact reasons.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .scheduling import load_schedule
+
+
+def series_occurrences(first_start, first_end, count, interval_weeks=1):
+    """
+    (start, end) of `count` occurrences repeating every `interval_weeks` weeks at the same local wall-clock
+    time as the first one (so "Tuesdays 10:00" stays 10:00 across DST changes).
+    """
+    local_start, local_end = timezone.localtime(first_start), timezone.localtime(first_end)
+    duration = local_end - local_start
+    occurrences = []
+    for index in range(count):
+        naive_start = local_start.replace(tzinfo=None) + timedelta(weeks=index * interval_weeks)
+        start = timezone.make_aware(naive_start)
+        occurrences.append((start, start + duration))
+    return occurrences
+
+
+def find_conflicts(lawyer, candidates, exclude_reservation_ids=(), now=None, notice_from=None):
+    """
+    Returns {candidate index: sorted list of reasons} for the `candidates` [(start, end)] that can't be
+    booked with `lawyer` (reasons are defined in appointments/scheduling.py). Candidates that are fine are
+    absent. The number of queries doesn't depend on the number of candidates.
+    """
+    if not candidates:
+        return {}
+    days = [timezone.localtime(start).date() for start, _ in candidates]
+    schedule = load_schedule(
+        lawyer, min(days), max(days), now=now, notice_from=notice_from, exclude_reservation_ids=exclude_reservation_ids
+    )
+    conflicts = {}
+    for index, (start, end) in enumerate(candidates):
+        reasons = schedule.slot_conflicts(start, end)
+        if reasons:
+            conflicts[index] = reasons
+    return conflicts
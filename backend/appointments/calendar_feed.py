@@ -0,0 +1,134 @@
+"""
+Private per-lawyer iCalendar (RFC 5545) feeds of appointments, for calendar apps that poll a URL.
+
+Each lawyer's CalendarFeed holds a secret token (the feed URL) and a version that bump() advances after
+every committed change to the lawyer's appointments (called from appointments/changes.py, which sees all
+of them). The feed view (calendar_feed_views.py) derives ETag/Last-Modified from that row, so an unchanged
+poll costs one indexed query and a 304. Otherwise the events are streamed: appointments starting in the
+window (CALENDAR_FEED_PAST_DAYS back to CALENDAR_FEED_FUTURE_DAYS ahead) are read with a chunked iterator
+and written out in ~64 KB pieces, so memory doesn't grow with the number of appointments.
+
+Client names are part of each event but don't bump the version: a renamed client shows up with the
+lawyer's next appointment change.
+"""
+import secrets
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Appointment, CalendarFeed
+
+FLUSH_BYTES = 64 * 1024
+ITERATOR_CHUNK_SIZE = 2000
+EVENT_STATUS = {'pending': 'TENTATIVE', 'confirmed': 'CONFIRMED', 'cancelled': 'CANCELLED'}
+
+
+def new_token():
+    return secrets.token_urlsafe(32)
+
+
+def bump(lawyer_ids):
+    """Advances the feed version of the given lawyers once the current transaction commits."""
+    lawyer_ids = set(lawyer_ids)
+
+    def advance():
+        CalendarFeed.objects.filter(lawyer_id__in=lawyer_ids).update(version=F('version') + 1, changed_at=timezone.now())
+
+    # After commit: a poll in between sees the new appointments under the old version at worst, which the
+    # next poll corrects. Bumping first could cache the old appointments under the new version.
+    transaction.on_commit(advance)
+
+
+def window(today=None):
+    """(first instant, last instant) of the appointment starts included in feeds."""
+    today = today or timezone.localdate()
+    first_day = today - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+    last_day = today + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS)
+    return (
+        timezone.make_aware(datetime.combine(first_day, time.min)),
+        timezone.make_aware(datetime.combine(last_day, time.min)),
+    )
+
+
+def validators(feed, window_start):
+    """(ETag, Last-Modified) of a feed. Both move when the version does and when the window moves (daily)."""
+    etag = f'"{feed.lawyer_id}-{feed.version}-{window_start:%Y%m%d}"'
+    window_moved_at = window_start + timedelta(days=settings.CALENDAR_FEED_PAST_DAYS) # Today's local midnight
+    return etag, max(feed.changed_at, window_moved_at)
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Encodes a content line, folded into 75-octet lines as RFC 5545 requires (never inside a UTF-8 character)."""
+    data = line.encode()
+    if len(data) <= 75:
+        return data + b'\r\n'
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        cut = limit
+        while data[cut] & 0xC0 == 0x80: # Continuation byte: back up to the start of the character
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = 74 # Continuation lines start with a space
+    parts.append(data)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(appointment_id, start, end, status, updated_at, first_name, last_name, username):
+    client = f'{first_name} {last_name}'.strip() or username
+    stamp = _utc(updated_at)
+    return b''.join(_fold(line) for line in (
+        'BEGIN:VEVENT',
+        f'UID:appointment-{appointment_id}@{settings.CALENDAR_FEED_UID_DOMAIN}',
+        f'DTSTAMP:{stamp}',
+        f'LAST-MODIFIED:{stamp}',
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(end)}',
+        f'SUMMARY:{_escape(f"Consultation with {client}")}',
+        f'STATUS:{EVENT_STATUS.get(status, "CONFIRMED")}',
+        'TRANSP:OPAQUE',
+        'END:VEVENT',
+    ))
+
+
+def iter_ics(lawyer_id, window_start, window_end):
+    """The lawyer's feed as encoded chunks, reading appointments lazily."""
+    queryset = Appointment.objects.filter(lawyer_id=lawyer_id, start__gte=window_start, start__lt=window_end)
+    # Pick the database now (as exports do): the response is consumed after the view returned
+    rows = queryset.using(queryset.db).order_by('start', 'id').values_list(
+        'id', 'start', 'end', 'status', 'updated_at',
+        'client__user__first_name', 'client__user__last_name', 'client__user__username',
+    ).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+    chunk = [b''.join(_fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Aavukat Pro//Appointments//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:Appointments',
+        f'REFRESH-INTERVAL;VALUE=DURATION:PT{settings.CALENDAR_FEED_MAX_AGE_SECONDS // 60}M',
+        f'X-PUBLISHED-TTL:PT{settings.CALENDAR_FEED_MAX_AGE_SECONDS // 60}M',
+    ))]
+    size = len(chunk[0])
+    for row in rows:
+        event = _event(*row)
+        chunk.append(event)
+        size += len(event)
+        if size >= FLUSH_BYTES:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    chunk.append(_fold('END:VCALENDAR'))
+    yield b''.join(chunk)
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.http import HttpResponseNotFound, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from . import calendar_feed
+from .models import CalendarFeed
+
+
+@require_safe
+def calendar_feed_view(request, token):
+    """
+    A lawyer's iCalendar feed, authenticated by the secret token in its URL (calendar apps can't send
+    Cognito tokens). A plain Django view, so polls skip DRF's authentication and negotiation: an unchanged
+    feed costs one indexed query and a 304 (If-None-Match / If-Modified-Since).
+    """
+    feed = CalendarFeed.objects.filter(token=token).only('lawyer_id', 'version', 'changed_at').first()
+    if feed is None:
+        return HttpResponseNotFound('Unknown calendar feed.')
+    window_start, window_end = calendar_feed.window()
+    etag, last_modified = calendar_feed.validators(feed, window_start)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified.timestamp()),
+        'Cache-Control': f'private, max-age={settings.CALENDAR_FEED_MAX_AGE_SECONDS}',
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+
+    response = StreamingHttpResponse(
+        calendar_feed.iter_ics(feed.lawyer_id, window_start, window_end) if request.method == 'GET' else iter(()),
+        content_type='text/calendar; charset=utf-8',
+        headers=headers,
+    )
+    response['Content-Disposition'] = 'inline; filename="appointments.ics"'
+    return response
@@ -0,0 +1,103 @@
+"""
+Closed days from shared HolidayCalendars, merged per lawyer at read time.
+
+Each calendar's closures are cached in Redis as one compact value (`holiday_calendar:<id>:dates`: the sorted
+date ordinals packed as uint32), so a lookup is one subscription query plus one MGET, however many
+lawyers subscribe. Closure writes invalidate their calendar's entry (appointments/signals.py).
+"""
+import bisect
+import heapq
+import logging
+from array import array
+from datetime import date
+
+import redis
+
+from config.redis_client import get_cached, invalidate_cached, set_cached
+from .models import CalendarClosure, HolidayCalendar
+
+logger = logging.getLogger(__name__)
+
+DATES_KEY = 'holiday_calendar:{}:dates'
+CACHE_TTL_SECONDS = 24 * 3600
+
+
+class ClosedDates:
+    """Sorted, de-duplicated date ordinals; `day in closed` is a binary search."""
+    __slots__ = ('ordinals',)
+
+    def __init__(self, ordinals=()):
+        self.ordinals = ordinals
+
+    def __contains__(self, day):
+        ordinal = day.toordinal()
+        index = bisect.bisect_left(self.ordinals, ordinal)
+        return index < len(self.ordinals) and self.ordinals[index] == ordinal
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def between(self, first_day, last_day):
+        """Closed dates from first_day to last_day, inclusive."""
+        low = bisect.bisect_left(self.ordinals, first_day.toordinal())
+        high = bisect.bisect_right(self.ordinals, last_day.toordinal())
+        return [date.fromordinal(ordinal) for ordinal in self.ordinals[low:high]]
+
+
+def calendar_dates(calendar_ids):
+    """{calendar id: array of sorted date ordinals}, from Redis where cached, else one query for the rest."""
+    calendar_ids = sorted(set(calendar_ids))
+    if not calendar_ids:
+        return {}
+    keys = [DATES_KEY.format(calendar_id) for calendar_id in calendar_ids]
+    try:
+        cached = get_cached(keys)
+    except redis.RedisError as e:
+        logger.warning("Holiday calendar cache unavailable: %s", e)
+        cached = [(None, None)] * len(keys)
+
+    result, generations = {}, {}
+    for calendar_id, (raw, generation) in zip(calendar_ids, cached):
+        generations[calendar_id] = generation
+        if raw is not None:
+            result[calendar_id] = array('I')
+            result[calendar_id].frombytes(raw)
+    missing = [calendar_id for calendar_id in calendar_ids if calendar_id not in result]
+    if missing:
+        for calendar_id in missing:
+            result[calendar_id] = array('I')
+        for calendar_id, day in CalendarClosure.objects.filter(calendar_id__in=missing).order_by('calendar_id', 'date').values_list('calendar_id', 'date'):
+            result[calendar_id].append(day.toordinal())
+        entries = [
+            (DATES_KEY.format(calendar_id), result[calendar_id].tobytes(), generations[calendar_id])
+            for calendar_id in missing if generations[calendar_id] is not None
+        ]
+        try:
+            if entries:
+                set_cached(entries, CACHE_TTL_SECONDS) # Skipped for calendars invalidated meanwhile
+        except redis.RedisError as e:
+            logger.warning("Could not cache holiday calendars %s: %s", missing, e)
+    return result
+
+
+def closed_dates(lawyer) -> ClosedDates:
+    """All days closed by the calendars `lawyer` subscribes to."""
+    calendar_ids = HolidayCalendar.subscribers.through.objects.filter(
+        lawyerprofile_id=lawyer.id
+    ).values_list('holidaycalendar_id', flat=True)
+    per_calendar = calendar_dates(calendar_ids).values()
+    if len(per_calendar) == 1:
+        return ClosedDates(next(iter(per_calendar)))
+    merged = array('I')
+    for ordinal in heapq.merge(*per_calendar):
+        if not merged or merged[-1] != ordinal:
+            merged.append(ordinal)
+    return ClosedDates(merged)
+
+
+def invalidate_calendar(calendar_id):
+    try:
+        invalidate_cached(DATES_KEY.format(calendar_id), CACHE_TTL_SECONDS)
+    except redis.RedisError as e:
+        # Stale closures would be served until the TTL runs out
+        logger.warning("Could not invalidate holiday calendar %s: %s", calendar_id, e)
@@ -0,0 +1,296 @@
+"""
+Firm-wide capacity and utilization reports (admin capacity API and the daily CapacitySnapshot).
+
+Instead of calling available_slots per lawyer, build_report() loads weekly rules, overrides, holiday
+calendar closures and appointments for all lawyers with a few bulk queries per chunk of lawyers, lays them
+out as lawyers × 15-minute-quanta NumPy matrices (open hours, booked time) and reduces those into:
+- utilization (booked / open hours) and free capacity per lawyer, per day and per ISO week,
+- a weekday × time-of-day heatmap of open and booked lawyer-hours, and the busiest quanta (peak demand).
+
+Quanta are local wall-clock times (settings.TIME_ZONE); on DST change days the skipped or repeated hour is
+clipped. Slot reservations are short-lived holds and aren't counted, and SchedulingPolicy buffers and daily
+maxima aren't applied: "open" is the time a lawyer's weekly hours make available.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db.models import Func, IntegerField
+from django.utils import timezone
+
+from users.models import LawyerProfile
+from .models import Appointment, AvailabilityOverride, CalendarClosure, HolidayCalendar, WeeklyAvailability, MAX_APPOINTMENT_DURATION
+
+QUANTUM_MINUTES = 15
+QUANTA_PER_DAY = 24 * 60 // QUANTUM_MINUTES
+QUANTUM_HOURS = QUANTUM_MINUTES / 60
+LAWYER_CHUNK_SIZE = 2000 # Bounds memory: a chunk's matrices are chunk × days × 96 bytes each
+PEAK_COUNT = 10
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _start_quantum(value):
+    return (value.hour * 60 + value.minute) // QUANTUM_MINUTES
+
+
+def _end_quantum(value):
+    return -(-(value.hour * 60 + value.minute) // QUANTUM_MINUTES) # Rounded up
+
+
+class EpochSeconds(Func):
+    """
+    Seconds since the Unix epoch of a datetime column, computed by the database: avoids converting hundreds
+    of thousands of rows into aware datetimes in Python.
+    """
+    function = 'UNIX_TIMESTAMP' # MySQL
+    output_field = IntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(EXTRACT(EPOCH FROM %(expressions)s) AS bigint)', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="CAST(strftime('%%%%s', %(expressions)s) AS integer)", **extra_context)
+
+
+def _ranges_mask(shape, rows, starts, ends):
+    """
+    Boolean matrix of `shape` (rows × ... × quanta) with [starts, ends) set along the last axis for each row.
+    `rows` is a tuple of index arrays for the leading axes. Built with a difference array and one cumsum.
+    """
+    *leading, width = shape
+    diff = np.zeros((*leading, width + 1), dtype=np.int16)
+    if len(starts):
+        np.add.at(diff, (*rows, starts), 1)
+        np.add.at(diff, (*rows, ends), -1)
+    return np.cumsum(diff, axis=-1, dtype=np.int16)[..., :width] > 0
+
+
+class CapacityMatrices:
+    """
+    One chunk of lawyers over the report's days: `open` and `booked` are lawyers × days × quanta booleans.
+    """
+
+    def __init__(self, lawyer_ids, open_quanta, booked_quanta):
+        self.lawyer_ids = lawyer_ids
+        self.open = open_quanta
+        self.booked = booked_quanta
+
+
+class CapacityLoader:
+    """Bulk-loads the inputs for every lawyer between first_day and last_day (local dates)."""
+
+    def __init__(self, first_day, last_day):
+        self.first_day = first_day
+        self.days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        self.weekdays = np.array([day.weekday() for day in self.days], dtype=np.int8)
+        day_starts = [timezone.make_aware(datetime.combine(day, time.min)) for day in self.days]
+        day_starts.append(timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min)))
+        self.range_start, self.range_end = day_starts[0], day_starts[-1]
+        self.day_start_epochs = np.array([int(moment.timestamp()) for moment in day_starts], dtype=np.int64)
+        self.calendar_closed = self._load_calendar_closures()
+
+    def _load_calendar_closures(self):
+        """{calendar id: boolean array over the report's days}, for calendars with closures in range."""
+        closed = {}
+        for calendar_id, day in CalendarClosure.objects.filter(
+            date__gte=self.days[0], date__lte=self.days[-1]
+        ).values_list('calendar_id', 'date'):
+            closed.setdefault(calendar_id, np.zeros(len(self.days), dtype=bool))[(day - self.first_day).days] = True
+        return closed
+
+    def load(self, lawyer_ids) -> CapacityMatrices:
+        """Matrices for `lawyer_ids`, a sorted array of consecutive lawyer ids (every lawyer between the first and last)."""
+        low, high = int(lawyer_ids[0]), int(lawyer_ids[-1])
+        lawyer_count, day_count = len(lawyer_ids), len(self.days)
+
+        def rows_of(ids):
+            return np.searchsorted(lawyer_ids, np.array(ids, dtype=np.int64))
+
+        # Weekly hours: a lawyers × 7 × quanta template, tiled over the days by weekday
+        weekly = list(WeeklyAvailability.objects.filter(lawyer_id__gte=low, lawyer_id__lte=high).values_list(
+            'lawyer_id', 'day_of_week', 'start_time', 'end_time'
+        ))
+        template = _ranges_mask(
+            (lawyer_count, 7, QUANTA_PER_DAY),
+            (rows_of([rule[0] for rule in weekly]), np.array([rule[1] for rule in weekly], dtype=np.int64)),
+            np.array([_start_quantum(rule[2]) for rule in weekly], dtype=np.int64),
+            np.array([_end_quantum(rule[3]) for rule in weekly], dtype=np.int64),
+        )
+        open_quanta = template[:, self.weekdays, :]
+
+        # Overrides: all-day ones close the day, timed ones block their quanta
+        day_closed = np.zeros((lawyer_count, day_count), dtype=bool)
+        all_day, timed = [], []
+        for lawyer_id, day, start_time, end_time, is_all_day in AvailabilityOverride.objects.filter(
+            lawyer_id__gte=low, lawyer_id__lte=high, date__gte=self.days[0], date__lte=self.days[-1]
+        ).values_list('lawyer_id', 'date', 'start_time', 'end_time', 'is_all_day'):
+            if is_all_day:
+                all_day.append((lawyer_id, (day - self.first_day).days))
+            elif start_time and end_time:
+                timed.append((lawyer_id, (day - self.first_day).days, _start_quantum(start_time), _end_quantum(end_time)))
+        if all_day:
+            day_closed[rows_of([block[0] for block in all_day]), [block[1] for block in all_day]] = True
+        if timed:
+            open_quanta &= ~_ranges_mask(
+                open_quanta.shape,
+                (rows_of([block[0] for block in timed]), np.array([block[1] for block in timed], dtype=np.int64)),
+                np.array([block[2] for block in timed], dtype=np.int64),
+                np.array([block[3] for block in timed], dtype=np.int64),
+            )
+
+        # Holiday calendars the lawyers subscribe to
+        if self.calendar_closed:
+            for lawyer_id, calendar_id in HolidayCalendar.subscribers.through.objects.filter(
+                lawyerprofile_id__gte=low, lawyerprofile_id__lte=high, holidaycalendar_id__in=list(self.calendar_closed)
+            ).values_list('lawyerprofile_id', 'holidaycalendar_id'):
+                day_closed[np.searchsorted(lawyer_ids, lawyer_id)] |= self.calendar_closed[calendar_id]
+        open_quanta[day_closed] = False
+
+        booked_quanta = self._booked(lawyer_ids, low, high).reshape(lawyer_count, day_count, QUANTA_PER_DAY)
+        return CapacityMatrices(lawyer_ids, open_quanta, booked_quanta)
+
+    def _booked(self, lawyer_ids, low, high):
+        """Lawyers × (days · quanta) booleans: appointments on one flat timeline, so they can span midnight."""
+        appointments = Appointment.objects.filter(
+            lawyer_id__gte=low,
+            lawyer_id__lte=high,
+            start__lt=self.range_end,
+            end__gt=self.range_start,
+            start__gt=self.range_start - MAX_APPOINTMENT_DURATION, # Partition pruning, see MAX_APPOINTMENT_DURATION
+            status__in=['pending', 'confirmed'],
+        ).values_list('lawyer_id', EpochSeconds('start'), EpochSeconds('end'))
+        rows = np.array(list(appointments), dtype=np.int64).reshape(-1, 3)
+        day_starts = self.day_start_epochs
+        starts = np.clip(rows[:, 1], day_starts[0], day_starts[-1])
+        ends = np.clip(rows[:, 2], day_starts[0], day_starts[-1])
+
+        # Epoch seconds -> flat local quantum index (day * 96 + quantum), via each local day's start
+        start_days = np.clip(np.searchsorted(day_starts, starts, side='right') - 1, 0, len(self.days) - 1)
+        end_days = np.clip(np.searchsorted(day_starts, ends, side='left') - 1, 0, len(self.days) - 1)
+        quantum_seconds = QUANTUM_MINUTES * 60
+        start_quanta = np.minimum((starts - day_starts[start_days]) // quantum_seconds, QUANTA_PER_DAY - 1)
+        end_quanta = np.minimum(np.ceil((ends - day_starts[end_days]) / quantum_seconds), QUANTA_PER_DAY)
+        return _ranges_mask(
+            (len(lawyer_ids), len(self.days) * QUANTA_PER_DAY),
+            (np.searchsorted(lawyer_ids, rows[:, 0]),),
+            (start_days * QUANTA_PER_DAY + start_quanta).astype(np.int64),
+            (end_days * QUANTA_PER_DAY + end_quanta).astype(np.int64),
+        )
+
+
+def _hours(quanta):
+    return np.round(quanta * QUANTUM_HOURS, 2).tolist()
+
+
+def _utilization(booked, available):
+    booked, available = np.asarray(booked, dtype=np.float64), np.asarray(available, dtype=np.float64)
+    ratio = np.divide(booked, available, out=np.full(available.shape, np.nan), where=available > 0)
+    return [None if np.isnan(value) else value for value in np.round(ratio, 4).ravel().tolist()]
+
+
+def _summary(available, booked, outside):
+    return {
+        'available_hours': round(available * QUANTUM_HOURS, 2),
+        'booked_hours': round(booked * QUANTUM_HOURS, 2),
+        'free_hours': round((available - booked) * QUANTUM_HOURS, 2),
+        'booked_outside_hours': round(outside * QUANTUM_HOURS, 2),
+        'utilization': round(booked / available, 4) if available else None,
+    }
+
+
+def build_report(first_day, last_day, include_lawyers=True) -> dict:
+    """
+    Capacity report for every lawyer from first_day to last_day (local dates, inclusive).
+    Hours are open hours (`available`), booked time inside them (`booked`), open but unbooked (`free`) and
+    booked time outside open hours (appointments kept after the hours changed or an override was added).
+    """
+    loader = CapacityLoader(first_day, last_day)
+    day_count = len(loader.days)
+    all_ids = np.array(list(LawyerProfile.objects.order_by('id').values_list('id', flat=True)), dtype=np.int64)
+
+    day_available = np.zeros(day_count, dtype=np.int64)
+    day_booked = np.zeros(day_count, dtype=np.int64)
+    day_outside = np.zeros(day_count, dtype=np.int64)
+    quantum_available = np.zeros((day_count, QUANTA_PER_DAY), dtype=np.int64) # Lawyers open, per day and quantum
+    quantum_booked = np.zeros((day_count, QUANTA_PER_DAY), dtype=np.int64)
+    lawyer_available, lawyer_booked = [], []
+
+    for offset in range(0, len(all_ids), LAWYER_CHUNK_SIZE):
+        matrices = loader.load(all_ids[offset:offset + LAWYER_CHUNK_SIZE])
+        booked_open = matrices.booked & matrices.open
+        per_day_open = matrices.open.sum(axis=2, dtype=np.int32)     # lawyers × days
+        per_day_booked = booked_open.sum(axis=2, dtype=np.int32)
+        day_available += per_day_open.sum(axis=0)
+        day_booked += per_day_booked.sum(axis=0)
+        day_outside += (matrices.booked & ~matrices.open).sum(axis=(0, 2))
+        quantum_available += matrices.open.sum(axis=0, dtype=np.int32)
+        quantum_booked += booked_open.sum(axis=0, dtype=np.int32)
+        lawyer_available.append(per_day_open.sum(axis=1))
+        lawyer_booked.append(per_day_booked.sum(axis=1))
+
+    # Weekday × time-of-day heatmap
+    heat_available = np.zeros((7, QUANTA_PER_DAY), dtype=np.int64)
+    heat_booked = np.zeros((7, QUANTA_PER_DAY), dtype=np.int64)
+    np.add.at(heat_available, loader.weekdays, quantum_available)
+    np.add.at(heat_booked, loader.weekdays, quantum_booked)
+
+    # Busiest quanta: most lawyers booked at the same time
+    flat_booked = quantum_booked.ravel()
+    peak_indexes = np.argsort(-flat_booked, kind='stable')[:PEAK_COUNT] # Earliest first among ties
+    peaks = []
+    for index in peak_indexes.tolist():
+        if not flat_booked[index]:
+            break
+        day_index, quantum = divmod(index, QUANTA_PER_DAY)
+        start = datetime.combine(loader.days[day_index], time.min) + timedelta(minutes=quantum * QUANTUM_MINUTES)
+        peaks.append({
+            'start': start.isoformat(timespec='minutes'),
+            'booked_lawyers': int(flat_booked[index]),
+            'open_lawyers': int(quantum_available.ravel()[index]),
+        })
+
+    week_keys = ['{}-W{:02d}'.format(*day.isocalendar()[:2]) for day in loader.days]
+    weeks = sorted(set(week_keys))
+    week_index = np.searchsorted(np.array(weeks), np.array(week_keys))
+    week_available = np.bincount(week_index, weights=day_available, minlength=len(weeks))
+    week_booked = np.bincount(week_index, weights=day_booked, minlength=len(weeks))
+    week_outside = np.bincount(week_index, weights=day_outside, minlength=len(weeks))
+
+    report = {
+        'first_day': first_day.isoformat(),
+        'last_day': last_day.isoformat(),
+        'quantum_minutes': QUANTUM_MINUTES,
+        'lawyers': len(all_ids),
+        'totals': _summary(int(day_available.sum()), int(day_booked.sum()), int(day_outside.sum())),
+        'daily': _rows('date', [day.isoformat() for day in loader.days], day_available, day_booked, day_outside),
+        'weekly': _rows('week', weeks, week_available, week_booked, week_outside),
+        'heatmap': {
+            'weekdays': WEEKDAYS,
+            'times': [f'{minutes // 60:02d}:{minutes % 60:02d}' for minutes in range(0, 24 * 60, QUANTUM_MINUTES)],
+            'available_hours': _hours(heat_available),
+            'booked_hours': _hours(heat_booked),
+            'utilization': np.reshape(_utilization(heat_booked, heat_available), heat_booked.shape).tolist(),
+        },
+        'peaks': peaks,
+    }
+    if include_lawyers:
+        available = np.concatenate(lawyer_available) if lawyer_available else np.zeros(0, dtype=np.int64)
+        booked = np.concatenate(lawyer_booked) if lawyer_booked else np.zeros(0, dtype=np.int64)
+        report['per_lawyer'] = [
+            {'lawyer_id': lawyer_id, 'available_hours': available_hours, 'booked_hours': booked_hours, 'utilization': utilization}
+            for lawyer_id, available_hours, booked_hours, utilization in zip(
+                all_ids.tolist(), _hours(available), _hours(booked), _utilization(booked, available)
+            )
+        ]
+    return report
+
+
+def _rows(key, labels, available, booked, outside):
+    return [
+        {key: label, 'available_hours': available_hours, 'booked_hours': booked_hours, 'free_hours': free_hours,
+         'booked_outside_hours': outside_hours, 'utilization': utilization}
+        for label, available_hours, booked_hours, free_hours, outside_hours, utilization in zip(
+            labels, _hours(available), _hours(booked), _hours(np.asarray(available) - np.asarray(booked)),
+            _hours(outside), _utilization(booked, available),
+        )
+    ]
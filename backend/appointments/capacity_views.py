@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import capacity
+from .models import CapacitySnapshot
+
+
+class CapacityReportView(APIView):
+    """
+    Computes the firm-wide capacity report (appointments/capacity.py) on demand.
+    Query params: `start` (YYYY-MM-DD, default today), `days` (default settings.CAPACITY_SNAPSHOT_DAYS,
+    at most settings.CAPACITY_REPORT_MAX_DAYS), `include_lawyers=0` to leave out the per-lawyer rows.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, *args, **kwargs):
+        start_param = request.query_params.get('start')
+        try:
+            first_day = parse_date(start_param) if start_param else timezone.localdate()
+        except ValueError: # Well formed but invalid, e.g. 2026-02-30
+            first_day = None
+        if first_day is None:
+            return Response({'error': 'start must be a date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = int(request.query_params.get('days', settings.CAPACITY_SNAPSHOT_DAYS))
+        except ValueError:
+            return Response({'error': 'days must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= settings.CAPACITY_REPORT_MAX_DAYS:
+            return Response(
+                {'error': f'days must be between 1 and {settings.CAPACITY_REPORT_MAX_DAYS}.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        include_lawyers = request.query_params.get('include_lawyers', '1') != '0'
+        report = capacity.build_report(first_day, first_day + timedelta(days=days - 1), include_lawyers=include_lawyers)
+        return Response(report)
+
+
+class CapacitySnapshotView(APIView):
+    """
+    Returns the latest precomputed capacity snapshot (build_capacity_snapshot_task), or the one taken on
+    `?date=YYYY-MM-DD`. `include_lawyers=0` leaves out the per-lawyer rows.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, *args, **kwargs):
+        snapshots = CapacitySnapshot.objects.all()
+        date_param = request.query_params.get('date')
+        if date_param:
+            try:
+                snapshot_date = parse_date(date_param)
+            except ValueError:
+                snapshot_date = None
+            if snapshot_date is None:
+                return Response({'error': 'date must be a date (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+            snapshots = snapshots.filter(date=snapshot_date)
+        snapshot = snapshots.first()
+        if snapshot is None:
+            return Response({'error': 'No capacity snapshot found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        report = snapshot.report
+        if request.query_params.get('include_lawyers', '1') == '0':
+            report = {key: value for key, value in report.items() if key != 'per_lawyer'}
+        return Response({
+            'date': snapshot.date,
+            'created_at': snapshot.created_at,
+            'duration_ms': snapshot.duration_ms,
+            'report': report,
+        })
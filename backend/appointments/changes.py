@@ -0,0 +1,181 @@
+"""
+Appointment change feed: every insert, update and delete of an Appointment appends an AppointmentChange in
+the same transaction (appointments/signals.py for save/delete, record_created() for bulk_create), so billing
+and CRM systems sync with GET /api/admin/appointments/changes/?since=<cursor> at a cost proportional to the
+number of changes, not to the size of the Appointment table.
+
+Changes are read in (transaction_id, id) order, and the cursor is that pair. Ids are handed out at insert
+but become visible at commit, so reading by id alone could skip a change whose transaction commits after a
+later id was read. On PostgreSQL each change records txid_current(), and the feed only returns changes of
+transactions older than every transaction still in progress (txid_snapshot_xmin): nothing can commit
+before the returned cursor any more. Other backends serialize writers, so their transaction_id is 0 and id
+order is commit order.
+
+Every recorded change also bumps the lawyer's calendar feed version (appointments/calendar_feed.py).
+
+prune() deletes the oldest changes, always a prefix of the feed, and records the last deleted cursor in Redis
+(`appointment_changes:pruned_through`). A cursor has expired only if it is older than that: a consumer that
+already read past every deleted change keeps syncing, even if the change its cursor names is gone.
+
+Appointments that existed before the feed was introduced appear once they change, so consumers start
+with one full export (appointments/exports.py). Writes that bypass the ORM don't appear in the feed; that
+includes archiving old partitions (appointments/partitions.py), which is not a change to the appointments.
+"""
+import logging
+import re
+
+import redis
+from django.db import connections
+from django.db.models import BigIntegerField, BooleanField, Func
+from django.db.models.expressions import RawSQL
+
+from config.redis_client import get_redis_client
+from . import calendar_feed
+from .models import Appointment, AppointmentChange
+
+logger = logging.getLogger(__name__)
+
+PRUNED_KEY = 'appointment_changes:pruned_through' # Cursor of the last pruned change
+
+# Appointment values carried by every change, as attribute names
+FEED_FIELDS = (
+    'lawyer_id', 'client_id', 'start', 'end', 'status', 'payment_status', 'stripe_payment_intent_id',
+    'amount_cents', 'series_id',
+)
+CURSOR_PATTERN = re.compile(r'^(\d+)-(\d+)$')
+CHANGE_COLUMNS = ('id', 'transaction_id', 'appointment_id', 'change_type', 'changed_fields', *FEED_FIELDS, 'changed_at')
+
+
+class CurrentTransactionId(Func):
+    """txid_current() on PostgreSQL; 0 elsewhere."""
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return '0', []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'txid_current()', []
+
+
+def tracked_state(instance):
+    """The FEED_FIELDS values loaded on an Appointment (never queries deferred fields), or None if any isn't loaded."""
+    values = instance.__dict__
+    try:
+        return {field: values[field] for field in FEED_FIELDS}
+    except KeyError:
+        return None
+
+
+def _change(appointment_id, change_type, state, changed_fields=None):
+    return AppointmentChange(
+        transaction_id=CurrentTransactionId(), appointment_id=appointment_id, change_type=change_type,
+        changed_fields=changed_fields, **state,
+    )
+
+
+def record_save(instance, old_state, created):
+    """Appends the change made by saving `instance`; old_state is its tracked_state() when it was loaded."""
+    new_state = tracked_state(instance)
+    if new_state is None: # Saved with deferred fields: read back what was written
+        new_state = Appointment.objects.filter(pk=instance.pk).values(*FEED_FIELDS).first()
+        if new_state is None:
+            return
+    if created:
+        change = _change(instance.pk, 'created', new_state)
+    elif old_state is None:
+        change = _change(instance.pk, 'updated', new_state) # Previous values unknown
+    else:
+        changed_fields = [field for field in FEED_FIELDS if old_state[field] != new_state[field]]
+        if not changed_fields:
+            return
+        cancelled = 'status' in changed_fields and new_state['status'] == 'cancelled'
+        change = _change(instance.pk, 'cancelled' if cancelled else 'updated', new_state, changed_fields)
+    change.save()
+    calendar_feed.bump({new_state['lawyer_id'], (old_state or new_state)['lawyer_id']})
+
+
+def record_delete(instance, state):
+    state = state or tracked_state(instance)
+    if state is not None:
+        _change(instance.pk, 'deleted', state).save()
+        calendar_feed.bump([state['lawyer_id']])
+
+
+def record_created(appointments):
+    """Changes for appointments saved without signals (bulk_create)."""
+    AppointmentChange.objects.bulk_create(
+        [_change(appointment.pk, 'created', tracked_state(appointment)) for appointment in appointments]
+    )
+    calendar_feed.bump({appointment.lawyer_id for appointment in appointments})
+
+
+def parse_cursor(value):
+    """(transaction_id, id) from a cursor string, or None if it isn't one."""
+    match = CURSOR_PATTERN.match(value or '')
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def format_cursor(transaction_id, change_id):
+    return f'{transaction_id}-{change_id}'
+
+
+def _after(cursor):
+    """Condition for changes after `cursor` in feed order (a row comparison, which uses the cursor index on PostgreSQL)."""
+    return RawSQL('(transaction_id, id) > (%s, %s)', cursor, output_field=BooleanField())
+
+
+def cursor_expired(cursor):
+    """True if changes after `cursor` were pruned (its consumer has to resync from scratch)."""
+    try:
+        pruned_through = get_redis_client().get(PRUNED_KEY)
+    except redis.RedisError as e:
+        logger.warning("Could not read the pruned appointment changes cursor: %s", e)
+        pruned_through = None
+    pruned_through = parse_cursor(pruned_through.decode()) if pruned_through else None
+    if pruned_through is not None:
+        return cursor < pruned_through
+    # Unknown (never pruned, or the key was lost): valid if the change it names is still there, as deletions are a prefix
+    return not AppointmentChange.objects.filter(id=cursor[1]).exists()
+
+
+def changes_since(cursor, limit):
+    """
+    (changes, next_cursor, has_more): up to `limit` changes after `cursor` (None for the beginning) that
+    are final, as dicts with a `cursor` each. next_cursor is the last change's cursor (or `cursor`).
+    """
+    queryset = AppointmentChange.objects.order_by('transaction_id', 'id')
+    if cursor is not None:
+        queryset = queryset.filter(_after(cursor)) # PostgreSQL walks the (transaction_id, id) index from the cursor
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = queryset.filter(transaction_id__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+    rows = list(queryset.values(*CHANGE_COLUMNS)[:limit + 1])
+    has_more = len(rows) > limit
+    changes = []
+    for row in rows[:limit]:
+        row['cursor'] = format_cursor(row.pop('transaction_id'), row['id'])
+        changes.append(row)
+    next_cursor = changes[-1]['cursor'] if changes else (format_cursor(*cursor) if cursor else None)
+    return changes, next_cursor, has_more
+
+
+def prune(older_than, batch_size=10_000):
+    """
+    Deletes changes up to the last one (in feed order) recorded before `older_than`, in batches, after
+    recording its cursor for cursor_expired(). Returns how many were deleted.
+    """
+    last = (
+        AppointmentChange.objects.filter(changed_at__lt=older_than)
+        .order_by('-transaction_id', '-id').values_list('transaction_id', 'id').first()
+    )
+    if last is None:
+        return 0
+    # Recorded first: if it can't be, nothing is deleted (consumers would otherwise miss changes unnoticed)
+    get_redis_client().set(PRUNED_KEY, format_cursor(*last))
+    deleted = 0
+    while True:
+        ids = list(
+            AppointmentChange.objects.exclude(_after(last)).order_by('transaction_id', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += AppointmentChange.objects.filter(id__in=ids).delete()[0]
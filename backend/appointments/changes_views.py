@@ -0,0 +1,38 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import changes
+
+
+class AppointmentChangesView(APIView):
+    """
+    Changes feed for incremental sync of appointments (appointments/changes.py): inserts, updates,
+    cancellations and deletions in commit order, each with the appointment's values after the change.
+    Start without `since`, then pass the returned `next_cursor` as `?since=`; `has_more` says whether to
+    fetch again right away. `limit` defaults to (and is capped at) APPOINTMENT_CHANGES_PAGE_SIZE.
+    Answers 410 when changes after the cursor were pruned.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, *args, **kwargs):
+        cursor = None
+        if request.query_params.get('since'):
+            cursor = changes.parse_cursor(request.query_params['since'])
+            if cursor is None:
+                return Response({'error': 'since must be a cursor returned by this endpoint.'}, status=status.HTTP_400_BAD_REQUEST)
+            if changes.cursor_expired(cursor):
+                return Response(
+                    {'error': 'The cursor has expired; resync from the full appointment list and start again without since.'},
+                    status=status.HTTP_410_GONE,
+                )
+        try:
+            limit = min(int(request.query_params.get('limit', settings.APPOINTMENT_CHANGES_PAGE_SIZE)), settings.APPOINTMENT_CHANGES_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results, next_cursor, has_more = changes.changes_since(cursor, limit)
+        return Response({'changes': results, 'next_cursor': next_cursor, 'has_more': has_more})
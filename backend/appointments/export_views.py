@@ -0,0 +1,62 @@
+import uuid
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import exports
+from .tasks import export_dataset_task
+
+
+class ExportView(APIView):
+    """
+    Streams an export of `dataset` (appointments or users) as CSV (default) or NDJSON (`?output=ndjson`).
+    Filters: appointments take `start`, `end` (YYYY-MM-DD, inclusive), `lawyer_id`, `status`; users take
+    `role`, `start`, `end` (date joined). With `?async=1` the export is written to a gzip file by a Celery
+    task instead: the response holds the task id and status URL, whose result names the file to download
+    from ExportFileView.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, dataset, *args, **kwargs):
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.OUTPUTS:
+            return Response({'error': f"output must be one of {', '.join(exports.OUTPUTS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        params = {key: value for key, value in request.query_params.items() if key not in ('output', 'async')}
+
+        if request.query_params.get('async') == '1':
+            try:
+                exports.export_rows(dataset, params) # Validate before queueing; nothing is fetched yet
+            except exports.ExportError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            filename = exports.export_filename(dataset, output, uuid.uuid4().hex)
+            async_result = export_dataset_task.delay(dataset, params, output, filename)
+            return Response({
+                'task_id': async_result.id,
+                'filename': filename,
+                'status_url': reverse('triggered-task-status', kwargs={'task_id': async_result.id}),
+                'download_url': reverse('export-file', kwargs={'filename': filename}),
+            }, status=status.HTTP_202_ACCEPTED)
+
+        try:
+            chunks = exports.stream(dataset, params, output)
+        except exports.ExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(chunks, content_type=exports.OUTPUTS[output])
+        filename = f"{dataset}-{timezone.now().strftime('%Y%m%d-%H%M%S')}.{output}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ExportFileView(APIView):
+    """Downloads a gzip export file written by export_dataset_task."""
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, filename, *args, **kwargs):
+        path = exports.file_path(filename)
+        if path is None:
+            return Response({'error': 'Export file not found or not finished yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/gzip')
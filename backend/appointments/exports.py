@@ -0,0 +1,220 @@
+"""
+Streaming exports of appointments and user profiles for admins, as CSV or NDJSON.
+
+Rows are read with `.values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE)` (a server-side cursor on
+PostgreSQL), encoded and yielded in ~64 KB pieces, so memory stays flat however many rows are exported.
+Exports are streamed by ExportView (appointments/export_views.py) or, for very large ones, written to a
+gzip file in settings.EXPORTS_DIR by export_dataset_task.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from users.models import UserProfile
+from .models import Appointment
+
+try:
+    import orjson
+except ImportError: # Optional dependency
+    orjson = None
+
+OUTPUTS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+FLUSH_BYTES = 64 * 1024
+FILENAME_PATTERN = re.compile(r'^[a-z]+-\d{8}-\d{6}-[0-9a-f]{8}\.(csv|ndjson)\.gz$')
+
+
+class ExportError(ValueError):
+    """Invalid export parameters; the message is safe to show to the admin."""
+
+
+def _day_start(value, name):
+    try:
+        day = parse_date(value)
+    except ValueError: # Well formed but invalid, e.g. 2026-02-30
+        day = None
+    if day is None:
+        raise ExportError(f'{name} must be a date (YYYY-MM-DD).')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _appointments(params):
+    """Appointments filtered by `start`/`end` (local dates, inclusive, on the appointment start), `lawyer_id`, `status`."""
+    queryset = Appointment.objects.all()
+    if params.get('start'):
+        queryset = queryset.filter(start__gte=_day_start(params['start'], 'start')) # On `start`: prunes older partitions
+    if params.get('end'):
+        queryset = queryset.filter(start__lt=_day_start(params['end'], 'end') + timedelta(days=1))
+    if params.get('lawyer_id'):
+        if not str(params['lawyer_id']).isdigit():
+            raise ExportError('lawyer_id must be an integer.')
+        queryset = queryset.filter(lawyer_id=int(params['lawyer_id']))
+    if params.get('status'):
+        statuses = [status for status, _ in Appointment.STATUS_CHOICES]
+        if params['status'] not in statuses:
+            raise ExportError(f"status must be one of {', '.join(statuses)}.")
+        queryset = queryset.filter(status=params['status'])
+    return queryset.order_by('start', 'id')
+
+
+def _users(params):
+    """User profiles filtered by `role` and `start`/`end` (local dates the account was created, inclusive)."""
+    queryset = UserProfile.objects.all()
+    if params.get('role'):
+        roles = [role for role, _ in UserProfile.ROLE_CHOICES]
+        if params['role'] not in roles:
+            raise ExportError(f"role must be one of {', '.join(roles)}.")
+        queryset = queryset.filter(role=params['role'])
+    if params.get('start'):
+        queryset = queryset.filter(user__date_joined__gte=_day_start(params['start'], 'start'))
+    if params.get('end'):
+        queryset = queryset.filter(user__date_joined__lt=_day_start(params['end'], 'end') + timedelta(days=1))
+    return queryset.order_by('id')
+
+
+# name: (queryset builder, [(column, field path)]). Home address and date of birth are left out of user exports.
+DATASETS = {
+    'appointments': (_appointments, [
+        ('id', 'id'),
+        ('lawyer_id', 'lawyer_id'),
+        ('lawyer_username', 'lawyer__user_profile__user__username'),
+        ('client_id', 'client_id'),
+        ('client_username', 'client__user__username'),
+        ('start', 'start'),
+        ('end', 'end'),
+        ('status', 'status'),
+        ('payment_status', 'payment_status'),
+        ('amount_cents', 'amount_cents'),
+        ('series_id', 'series_id'),
+        ('created_at', 'created_at'),
+    ]),
+    'users': (_users, [
+        ('id', 'id'),
+        ('user_id', 'user_id'),
+        ('username', 'user__username'),
+        ('email', 'user__email'),
+        ('first_name', 'user__first_name'),
+        ('last_name', 'user__last_name'),
+        ('role', 'role'),
+        ('phone_number', 'phone_number'),
+        ('nationality', 'nationality'),
+        ('spoken_language', 'spoken_language'),
+        ('time_zone', 'time_zone'),
+        ('is_initial_profile_complete', 'is_initial_profile_complete'),
+        ('date_joined', 'user__date_joined'),
+    ]),
+}
+
+
+def export_rows(dataset, params):
+    """(columns, lazy row iterator) for `dataset` filtered by `params`. Raises ExportError for bad parameters."""
+    if dataset not in DATASETS:
+        raise ExportError(f"Unknown export '{dataset}'; choose one of {', '.join(DATASETS)}.")
+    build_queryset, columns = DATASETS[dataset]
+    queryset = build_queryset(params)
+    # Pick the database now: replica routing (config/db_routers.py) only applies while the view runs, and
+    # a StreamingHttpResponse is consumed after it returned
+    queryset = queryset.using(queryset.db)
+    rows = queryset.values_list(*[path for _, path in columns]).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    return [name for name, _ in columns], rows
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value # Keep spreadsheets from evaluating user-entered text as formulas
+    return value
+
+
+def iter_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(columns, rows):
+    chunk = []
+    size = 0
+    for row in rows:
+        record = dict(zip(columns, row))
+        if orjson is not None:
+            line = orjson.dumps(record, option=orjson.OPT_UTC_Z) + b'\n'
+        else:
+            line = json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n'
+        chunk.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    yield b''.join(chunk)
+
+
+ENCODERS = {'csv': iter_csv, 'ndjson': iter_ndjson}
+
+
+def stream(dataset, params, output):
+    """Encoded byte chunks of the export. Raises ExportError right away for bad parameters."""
+    columns, rows = export_rows(dataset, params)
+    return ENCODERS[output](columns, rows)
+
+
+def export_filename(dataset, output, token):
+    return f"{dataset}-{timezone.now().strftime('%Y%m%d-%H%M%S')}-{token[:8]}.{output}.gz"
+
+
+def write_file(dataset, params, output, filename, progress=None):
+    """
+    Writes the export gzip-compressed to settings.EXPORTS_DIR/filename (through a temporary file, so a
+    partial export is never served). Returns the number of bytes before compression.
+    """
+    os.makedirs(settings.EXPORTS_DIR, exist_ok=True)
+    path = os.path.join(settings.EXPORTS_DIR, filename)
+    written = 0
+    with gzip.open(path + '.part', 'wb') as file:
+        for chunk in stream(dataset, params, output):
+            file.write(chunk)
+            written += len(chunk)
+            if progress:
+                progress(written)
+    os.replace(path + '.part', path)
+    return written
+
+
+def delete_expired_files(max_age_hours):
+    """Deletes export files older than max_age_hours. Returns how many were deleted."""
+    if not os.path.isdir(settings.EXPORTS_DIR):
+        return 0
+    cutoff = timezone.now().timestamp() - max_age_hours * 3600
+    deleted = 0
+    for entry in os.scandir(settings.EXPORTS_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            deleted += 1
+    return deleted
+
+
+def file_path(filename):
+    """Path of a finished export file, or None if the name isn't one export_filename() produces or it doesn't exist."""
+    if not FILENAME_PATTERN.match(filename):
+        return None
+    path = os.path.join(settings.EXPORTS_DIR, filename)
+    return path if os.path.isfile(path) else None
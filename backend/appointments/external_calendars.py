@@ -0,0 +1,492 @@
+"""
+Busy time from lawyers' other calendars (court dates, meetings), imported from iCalendar (RFC 5545) data:
+a file the lawyer uploads, or a URL fetched by sync_external_calendars_task.
+
+All components of an event (one UID: the master and its RECURRENCE-ID overrides) are stored as one
+ExternalBusyEvent with its SEQUENCE and a digest of the components (without DTSTAMP, which exporters rewrite
+every time), and their occurrences as ExternalBusyInterval rows. A re-sync compares (SEQUENCE, digest) per
+UID and only rewrites the events that changed, appeared or disappeared; a download identical to the last one
+isn't parsed at all.
+
+Recurrences (RRULE, RDATE, EXDATE) are expanded lazily with dateutil.rrule in the event's wall-clock time,
+only up to the booking horizon (EXTERNAL_CALENDAR_HORIZON_DAYS ahead) plus EXPAND_AHEAD. Recurring events
+keep their source, so refresh_horizon() extends them as days pass without the original data (uploads).
+Rules repeating more often than hourly are rejected, and an event expands to at most MAX_OCCURRENCES
+occurrences (after at most MAX_RULE_STEPS steps through its rules), so one file can't tie up a worker.
+
+TZIDs are read as IANA zone names; other names (Windows zones, custom VTIMEZONEs) fall back to the project's
+time zone, as do floating times. Cancelled and transparent (free) events don't block anything.
+"""
+import hashlib
+import ipaddress
+import logging
+import re
+import socket
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+from urllib.parse import urljoin, urlsplit
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import requests
+from requests.adapters import HTTPAdapter
+from dateutil.rrule import rruleset, rrulestr
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExternalBusyEvent, ExternalBusyInterval, ExternalCalendar, MAX_BUSY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+EXPAND_AHEAD = timedelta(days=30) # Recurring events are expanded this far past the horizon, so they're re-expanded monthly
+MAX_REDIRECTS = 5
+BATCH_SIZE = 1000
+RULE_FREQUENCIES = ('HOURLY', 'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY') # MINUTELY and SECONDLY aren't busy time
+MAX_OCCURRENCES = 5000 # Per event in the window; more than 10 a day over the horizon
+MAX_RULE_STEPS = 100000 # Occurrences iterated per event, including those before the window (about 0.5 s)
+IGNORED_PROPERTIES = ('DTSTAMP',) # Rewritten on every export, even when the event didn't change
+DURATION_PATTERN = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+
+class ExternalCalendarError(Exception):
+    """Calendar data that can't be fetched or read; the message is meant for the lawyer."""
+
+
+def horizon(now=None):
+    """(start, end) of the period whose busy time is stored: today's local midnight to the booking horizon."""
+    start = timezone.make_aware(datetime.combine(timezone.localdate(now), time.min))
+    return start, start + timedelta(days=settings.EXTERNAL_CALENDAR_HORIZON_DAYS)
+
+
+# Parsing
+
+def _content_lines(text):
+    """Unfolded content lines (RFC 5545 3.1)."""
+    lines = []
+    for line in re.split(r'\r?\n', text):
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def _property(line):
+    """(NAME, {PARAMETER: value}, value) of a content line, or None if it isn't one."""
+    head, separator, value = line.partition(':')
+    if '"' in head: # A quoted parameter value may contain ':'
+        quoted = False
+        for index, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ':' and not quoted:
+                head, separator, value = line[:index], ':', line[index + 1:]
+                break
+        else:
+            return None
+    if not separator:
+        return None
+    name, *parameters = head.split(';')
+    params = {}
+    for parameter in parameters:
+        key, _, parameter_value = parameter.partition('=')
+        params[key.upper()] = parameter_value.strip('"')
+    return name.upper(), params, value
+
+
+def split_events(content):
+    """
+    {uid: source} for the VEVENTs in ICS bytes, where source is the event's components as unfolded lines
+    (nested components such as VALARM and the IGNORED_PROPERTIES left out).
+    """
+    text = content.decode('utf-8-sig', errors='replace')
+    lines = _content_lines(text)
+    if not lines or lines[0].upper() != 'BEGIN:VCALENDAR':
+        raise ExternalCalendarError('Not an iCalendar (.ics) file.')
+    events = {}
+    component, depth, uid = None, 0, None
+    for line in lines:
+        upper = line[:6].upper()
+        if component is None:
+            if line.upper() == 'BEGIN:VEVENT':
+                component, depth, uid = [line], 0, None
+            continue
+        if upper == 'BEGIN:':
+            depth += 1
+        elif upper == 'END:VE' and depth == 0:
+            component.append(line)
+            if uid is None:
+                uid = 'digest:' + hashlib.sha1('\r\n'.join(component).encode()).hexdigest()
+            events.setdefault(uid, []).extend(component)
+            component = None
+        elif upper[:4] == 'END:':
+            depth -= 1
+        elif depth == 0:
+            name = line.split(':', 1)[0].split(';', 1)[0].upper()
+            if name in IGNORED_PROPERTIES:
+                continue
+            if name == 'UID':
+                uid = line.split(':', 1)[1] if ':' in line else ''
+                if len(uid) > 255:
+                    uid = 'digest:' + hashlib.sha1(uid.encode()).hexdigest()
+            component.append(line)
+    return {uid: '\r\n'.join(source) for uid, source in events.items()}
+
+
+def _components(source):
+    """The VEVENT components of an event's source, as {NAME: [(params, value)]}."""
+    components = []
+    for line in source.split('\r\n'):
+        upper = line.upper()
+        if upper == 'BEGIN:VEVENT':
+            components.append({})
+        elif upper != 'END:VEVENT':
+            parsed = _property(line)
+            if parsed is not None:
+                name, params, value = parsed
+                components[-1].setdefault(name, []).append((params, value))
+    return components
+
+
+def _first(component, name):
+    values = component.get(name)
+    return values[0] if values else (None, None)
+
+
+def _zone(params):
+    tzid = params.get('TZID')
+    if tzid:
+        try:
+            return ZoneInfo(tzid.lstrip('/'))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_default_timezone()
+
+
+def _times(params, value):
+    """[(naive wall-clock datetime, zone)] of a DATE or DATE-TIME property, plus whether it holds dates."""
+    is_date = params.get('VALUE', '').upper() == 'DATE' or len(value.split(',')[0].strip()) == 8
+    zone = _zone(params)
+    times = []
+    for item in value.split(','):
+        item = item.strip()
+        if len(item) == 8:
+            times.append((datetime(int(item[:4]), int(item[4:6]), int(item[6:8])), timezone.get_default_timezone()))
+        elif len(item) >= 15 and item[8] == 'T':
+            naive = datetime(int(item[:4]), int(item[4:6]), int(item[6:8]), int(item[9:11]), int(item[11:13]), min(int(item[13:15]), 59))
+            times.append((naive, dt_timezone.utc if item.endswith('Z') else zone))
+        else:
+            raise ValueError(f'Invalid date-time {item!r}')
+    return times, is_date
+
+
+def _time(params, value):
+    """(naive wall-clock datetime, zone, is_date) of a single-valued DATE or DATE-TIME property."""
+    times, is_date = _times(params, value)
+    return times[0] + (is_date,)
+
+
+def _in_zone(naive, from_zone, to_zone):
+    if from_zone is to_zone:
+        return naive
+    return naive.replace(tzinfo=from_zone).astimezone(to_zone).replace(tzinfo=None)
+
+
+def _duration(value):
+    match = DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f'Invalid duration {value!r}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == '-' else duration
+
+
+def _blocks(component):
+    status = (_first(component, 'STATUS')[1] or '').upper()
+    transparency = (_first(component, 'TRANSP')[1] or '').upper()
+    return status != 'CANCELLED' and transparency != 'TRANSPARENT'
+
+
+def _start_and_duration(component):
+    """(naive start, zone, duration) of a component; raises ValueError if it has no usable DTSTART."""
+    params, value = _first(component, 'DTSTART')
+    if value is None:
+        raise ValueError('Missing DTSTART')
+    start, zone, is_date = _time(params, value)
+    end_params, end_value = _first(component, 'DTEND')
+    if end_value is not None:
+        end, end_zone, _ = _time(end_params, end_value)
+        duration = _in_zone(end, end_zone, zone) - start
+    elif _first(component, 'DURATION')[1] is not None:
+        duration = _duration(_first(component, 'DURATION')[1])
+    else:
+        duration = timedelta(days=1) if is_date else timedelta(0)
+    return start, zone, duration
+
+
+def _rule(value, dtstart, zone):
+    """A dateutil rrule for an RRULE value, in naive wall-clock time of `zone` (UNTIL converted to it)."""
+    parts = []
+    for part in value.split(';'):
+        key, _, part_value = part.partition('=')
+        if key.upper() == 'FREQ' and part_value.upper() not in RULE_FREQUENCIES:
+            raise ValueError(f'Unsupported recurrence frequency {part_value!r}')
+        if key.upper() == 'UNTIL':
+            until, until_zone, is_date = _time({}, part_value)
+            until = datetime.combine(until.date(), time.max) if is_date else _in_zone(until, until_zone, zone)
+            part_value = until.strftime('%Y%m%dT%H%M%S')
+        parts.append(f'{key}={part_value}')
+    return rrulestr(';'.join(parts), dtstart=dtstart)
+
+
+def expand(source, window_start, window_end):
+    """
+    (intervals, recurring): the busy (start, end) periods of an event overlapping [window_start, window_end),
+    split into pieces of at most MAX_BUSY_INTERVAL, and whether the event recurs. Raises ValueError for
+    events that can't be read.
+    """
+    components = _components(source)
+    masters = [component for component in components if 'RECURRENCE-ID' not in component]
+    overrides = [component for component in components if 'RECURRENCE-ID' in component]
+    occurrences = []
+    recurring = False
+    if masters:
+        master = masters[0]
+        start, zone, duration = _start_and_duration(master)
+        recurring = 'RRULE' in master or 'RDATE' in master
+        if not recurring:
+            starts = [start]
+        else:
+            rules = rruleset()
+            for _, value in master.get('RRULE', ()):
+                rules.rrule(_rule(value, start, zone))
+            for params, value in master.get('RDATE', ()):
+                if params.get('VALUE', '').upper() != 'PERIOD':
+                    for naive, value_zone in _times(params, value)[0]:
+                        rules.rdate(_in_zone(naive, value_zone, zone))
+            for params, value in master.get('EXDATE', ()):
+                for naive, value_zone in _times(params, value)[0]:
+                    rules.exdate(_in_zone(naive, value_zone, zone))
+            for override in overrides: # Replaced (or cancelled) occurrences
+                naive, value_zone, _ = _time(*_first(override, 'RECURRENCE-ID'))
+                rules.exdate(_in_zone(naive, value_zone, zone))
+            rules.rdate(start) # DTSTART is always the first occurrence, even if the rule doesn't match it
+            # Lazy: the rules are only iterated up to the window's end, and at most MAX_RULE_STEPS times
+            since = (window_start - max(duration, timedelta(0))).astimezone(zone).replace(tzinfo=None)
+            until = window_end.astimezone(zone).replace(tzinfo=None)
+            starts = []
+            for occurrence in islice(rules, MAX_RULE_STEPS):
+                if occurrence > until or len(starts) >= MAX_OCCURRENCES:
+                    break
+                if occurrence >= since:
+                    starts.append(occurrence)
+        if _blocks(master):
+            occurrences.extend((occurrence, zone, duration) for occurrence in starts)
+    for override in overrides:
+        if _blocks(override):
+            start, zone, duration = _start_and_duration(override)
+            occurrences.append((start, zone, duration))
+
+    intervals = []
+    for naive_start, zone, duration in occurrences:
+        start, end = naive_start.replace(tzinfo=zone), (naive_start + duration).replace(tzinfo=zone)
+        if end <= start or end <= window_start or start >= window_end:
+            continue
+        while start < end:
+            piece_end = min(end, start + MAX_BUSY_INTERVAL)
+            intervals.append((start, piece_end))
+            start = piece_end
+    return intervals, recurring
+
+
+def _sequence(source):
+    for line in source.split('\r\n'):
+        if line[:9].upper() == 'SEQUENCE:' or line[:9].upper() == 'SEQUENCE;':
+            value = line.split(':', 1)[-1].strip()
+            return int(value) if value.isdigit() else 0
+    return 0
+
+
+# Syncing
+
+def _intervals(event, source, lawyer_id, window_start, window_end):
+    """ExternalBusyIntervals of an event (none if it can't be read); sets event.expanded_until and source."""
+    try:
+        intervals, recurring = expand(source, window_start, window_end)
+    except (ValueError, OverflowError) as e:
+        logger.info("Skipping unreadable event %s of external calendar %s: %s", event.uid, event.calendar_id, e)
+        intervals, recurring = [], False
+    event.source = source if recurring else ''
+    event.expanded_until = window_end if recurring else None
+    return [ExternalBusyInterval(event=event, lawyer_id=lawyer_id, start=start, end=end) for start, end in intervals]
+
+
+@transaction.atomic
+def sync_content(calendar, content, now=None):
+    """
+    Applies ICS bytes to `calendar`, rewriting only the events whose SEQUENCE or content changed.
+    Returns counts of the events added, updated, removed and unchanged, and of the intervals written.
+    """
+    calendar = ExternalCalendar.objects.select_for_update().get(id=calendar.id) # One sync per calendar at a time
+    window_start, horizon_end = horizon(now)
+    window_end = horizon_end + EXPAND_AHEAD
+    content_hash = hashlib.sha256(content).hexdigest()
+    counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'intervals': 0}
+    if content_hash == calendar.content_hash:
+        counts.update(unchanged=calendar.events.count(), intervals=refresh_horizon(calendar, now))
+        ExternalCalendar.objects.filter(id=calendar.id).update(synced_at=timezone.now(), last_error='')
+        return counts
+
+    sources = split_events(content)
+    stored = {uid: (event_id, sequence, digest) for uid, event_id, sequence, digest in calendar.events.values_list('uid', 'id', 'sequence', 'digest')}
+    added, updated, intervals = [], [], []
+    for uid, source in sources.items():
+        digest = hashlib.sha1(source.encode()).hexdigest()
+        sequence = _sequence(source)
+        if uid in stored and stored[uid][1:] == (sequence, digest):
+            counts['unchanged'] += 1
+            continue
+        if uid in stored:
+            event = ExternalBusyEvent(id=stored[uid][0], calendar=calendar, uid=uid, sequence=sequence, digest=digest)
+            updated.append(event)
+        else:
+            event = ExternalBusyEvent(calendar=calendar, uid=uid, sequence=sequence, digest=digest)
+            added.append(event)
+        intervals.append((event, source))
+    removed = [event_id for uid, (event_id, _, _) in stored.items() if uid not in sources]
+
+    if removed:
+        ExternalBusyEvent.objects.filter(id__in=removed).delete()
+    if updated:
+        ExternalBusyInterval.objects.filter(event_id__in=[event.id for event in updated]).delete()
+    new_intervals = []
+    for event, source in intervals:
+        new_intervals.extend(_intervals(event, source, calendar.lawyer_id, window_start, window_end))
+    ExternalBusyEvent.objects.bulk_create(added, batch_size=BATCH_SIZE)
+    ExternalBusyEvent.objects.bulk_update(updated, ['sequence', 'digest', 'source', 'expanded_until'], batch_size=BATCH_SIZE)
+    for interval in new_intervals:
+        interval.event_id = interval.event.id # Set by bulk_create above
+    ExternalBusyInterval.objects.bulk_create(new_intervals, batch_size=BATCH_SIZE)
+
+    counts.update(added=len(added), updated=len(updated), removed=len(removed), intervals=len(new_intervals))
+    counts['intervals'] += refresh_horizon(calendar, now)
+    ExternalCalendar.objects.filter(id=calendar.id).update(content_hash=content_hash, synced_at=timezone.now(), last_error='')
+    return counts
+
+
+def refresh_horizon(calendar, now=None):
+    """
+    Re-expands the calendar's recurring events that were stored up to before the current horizon, from their
+    saved source, and drops intervals that ended before today. Returns the number of intervals written.
+    """
+    window_start, horizon_end = horizon(now)
+    window_end = horizon_end + EXPAND_AHEAD
+    ExternalBusyInterval.objects.filter(lawyer_id=calendar.lawyer_id, end__lte=window_start, event__calendar=calendar).delete()
+    events = list(calendar.events.filter(expanded_until__lt=horizon_end).exclude(source=''))
+    if not events:
+        return 0
+    ExternalBusyInterval.objects.filter(event__in=events).delete()
+    new_intervals = []
+    for event in events:
+        new_intervals.extend(_intervals(event, event.source, calendar.lawyer_id, window_start, window_end))
+    ExternalBusyEvent.objects.bulk_update(events, ['source', 'expanded_until'], batch_size=BATCH_SIZE)
+    ExternalBusyInterval.objects.bulk_create(new_intervals, batch_size=BATCH_SIZE)
+    return len(new_intervals)
+
+
+# Fetching
+
+def normalize_url(url):
+    """webcal:// (as calendar apps publish them) is fetched over https."""
+    url = url.strip()
+    return 'https://' + url[len('webcal://'):] if url.lower().startswith('webcal://') else url
+
+
+def check_url(url):
+    """
+    Raises ExternalCalendarError unless `url` is http(s) on a public address (see EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS).
+    Returns the checked address to connect to, or None if private URLs are allowed and nothing was resolved.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ExternalCalendarError('Calendar URLs must start with https://, http:// or webcal://.')
+    if settings.EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS:
+        return None
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        addresses = [info[4][0].split('%')[0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)]
+    except (socket.gaierror, UnicodeError):
+        raise ExternalCalendarError(f'Unknown host {parts.hostname}.')
+    # The server fetches these URLs: don't let them reach internal services
+    if not addresses or not all(ipaddress.ip_address(address).is_global for address in addresses):
+        raise ExternalCalendarError('Calendar URLs must point to a public server.')
+    return addresses[0]
+
+
+class PinnedHostAdapter(HTTPAdapter):
+    """Sends requests made to an IP address with TLS (SNI, certificate check) for `hostname`, as if made to hostname."""
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.update(server_hostname=self.hostname, assert_hostname=self.hostname) # Dropped by urllib3 for http://
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _pinned_url(parts, address):
+    """`parts` (a urlsplit result) with the host replaced by `address`; credentials and port are kept."""
+    userinfo, _, _ = parts.netloc.rpartition('@')
+    netloc = f'[{address}]' if ':' in address else address
+    if parts.port:
+        netloc += f':{parts.port}'
+    return parts._replace(netloc=f'{userinfo}@{netloc}' if userinfo else netloc).geturl()
+
+
+def fetch(url):
+    """The data at `url`, following redirects to public addresses only; at most EXTERNAL_CALENDAR_MAX_BYTES."""
+    url = normalize_url(url)
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            address = check_url(url)
+            request_url, headers = url, {'Accept': 'text/calendar'}
+            with requests.Session() as session:
+                if address is not None: # Connect to the address just checked: resolving again could give another (DNS rebinding)
+                    parts = urlsplit(url)
+                    session.mount(f'{parts.scheme}://', PinnedHostAdapter(parts.hostname))
+                    request_url, headers['Host'] = _pinned_url(parts, address), parts.netloc.rpartition('@')[2]
+                response = session.get(
+                    request_url, stream=True, allow_redirects=False, timeout=settings.EXTERNAL_CALENDAR_FETCH_TIMEOUT_SECONDS,
+                    headers=headers,
+                )
+                with response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers['Location'])
+                        continue
+                    response.raise_for_status()
+                    chunks, size = [], 0
+                    for chunk in response.iter_content(64 * 1024):
+                        size += len(chunk)
+                        if size > settings.EXTERNAL_CALENDAR_MAX_BYTES:
+                            raise ExternalCalendarError(f'The calendar is larger than {settings.EXTERNAL_CALENDAR_MAX_BYTES // 2**20} MB.')
+                        chunks.append(chunk)
+                    return b''.join(chunks)
+    except requests.RequestException as e:
+        raise ExternalCalendarError(f'Could not download the calendar: {e}'[:255]) from e
+    raise ExternalCalendarError('Too many redirects.')
+
+
+def sync_calendar(calendar, now=None):
+    """Fetches a URL calendar and applies it (or, for uploads, extends recurring events). Errors are saved on the calendar."""
+    if not calendar.url:
+        with transaction.atomic():
+            return {'intervals': refresh_horizon(calendar, now)}
+    try:
+        return sync_content(calendar, fetch(calendar.url), now=now)
+    except ExternalCalendarError as e:
+        logger.warning("Could not sync external calendar %s: %s", calendar.id, e)
+        ExternalCalendar.objects.filter(id=calendar.id).update(last_error=str(e)[:255])
+        return None
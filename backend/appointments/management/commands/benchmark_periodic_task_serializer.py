@@ -0,0 +1,88 @@
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import IntervalSchedule, CrontabSchedule, PeriodicTask
+from rest_framework import serializers
+
+from appointments.admin_task_serializers import (
+    PeriodicTaskSerializer, IntervalScheduleSerializer, CrontabScheduleSerializer
+)
+from appointments.task_utils import get_registered_task_names
+
+
+class LegacyPeriodicTaskSerializer(PeriodicTaskSerializer):
+    """The previous behaviour, kept here as the baseline: choices rebuilt per instance, nested serializers per row."""
+
+    def __init__(self, *args, **kwargs):
+        serializers.ModelSerializer.__init__(self, *args, **kwargs)
+        if 'task' in self.fields:
+            from config.celery import app as celery_app
+            self.fields['task'].choices = [
+                (task_name, task_name) for task_name in sorted(celery_app.tasks.keys())
+                if not task_name.startswith('celery.')
+            ]
+
+    def to_representation(self, instance):
+        representation = serializers.ModelSerializer.to_representation(self, instance)
+        if instance.interval:
+            representation['interval_details'] = IntervalScheduleSerializer(instance.interval).data
+        elif instance.crontab:
+            representation['crontab_details'] = CrontabScheduleSerializer(instance.crontab).data
+        representation['args'] = instance.args
+        representation['kwargs'] = instance.kwargs
+        return representation
+
+
+class Command(BaseCommand):
+    help = (
+        'Microbenchmark for PeriodicTaskSerializer: serializes N in-memory periodic tasks (no database access) '
+        'with the legacy nested path and with the current flattened path, and compares timings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000, help='Number of periodic tasks to serialize.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per serializer; the median is reported.')
+        parser.add_argument('--instantiations', type=int, default=2000, help='Number of standalone serializer constructions to time.')
+
+    def handle(self, *args, **options):
+        periodic_tasks = self._build_tasks(options['tasks'])
+        get_registered_task_names() # Warm the registry snapshot like a long-running process would
+
+        for label, serializer_class in (('legacy', LegacyPeriodicTaskSerializer), ('current', PeriodicTaskSerializer)):
+            list_times = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                serializer_class(periodic_tasks, many=True).data
+                list_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for _ in range(options['instantiations']):
+                serializer_class()
+            init_time = time.perf_counter() - started
+
+            list_median = median(list_times)
+            self.stdout.write(
+                f"{label:>8}: list of {len(periodic_tasks)} in {list_median * 1000:.1f} ms "
+                f"({len(periodic_tasks) / list_median:,.0f} rows/s), "
+                f"{options['instantiations']} constructions in {init_time * 1000:.1f} ms"
+            )
+
+    def _build_tasks(self, count):
+        task_names = list(get_registered_task_names()) or ['appointments.cleanup_expired_reservations_task']
+        interval = IntervalSchedule(id=1, every=10, period=IntervalSchedule.MINUTES)
+        crontab = CrontabSchedule(id=2, minute='0', hour='3', day_of_week='*', day_of_month='*', month_of_year='*')
+        periodic_tasks = []
+        for i in range(count):
+            uses_interval = i % 2 == 0
+            periodic_tasks.append(PeriodicTask(
+                id=i + 1,
+                name=f'benchmark-task-{i}',
+                task=task_names[i % len(task_names)],
+                interval=interval if uses_interval else None,
+                crontab=None if uses_interval else crontab,
+                args='[]',
+                kwargs='{"grace_period_minutes": 60}',
+                enabled=True,
+            ))
+        return periodic_tasks
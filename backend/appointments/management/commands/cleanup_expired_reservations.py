@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from appointments.models import SlotReservation
+from appointments.models import SlotReservation, WaitlistEntry
+from appointments.waitlist import queue_freed_slot
 from datetime import timedelta
 
 class Command(BaseCommand):
@@ -35,11 +36,15 @@ class Command(BaseCommand):
         if count > 0:
             for reservation in expired_reservations:
                 self.stdout.write(
-                    self.style.WARNING(f'Deleting expired reservation ID {reservation.id} for lawyer {reservation.lawyer_id}, client {reservation.client_profile_id} (expired at {reservation.reserved_until.strftime('%Y-%m-%d %H:%M:%S %Z')}).')
+                    self.style.WARNING(f'Deleting expired reservation ID {reservation.id} for lawyer {reservation.lawyer_id}, client {reservation.client_profile_id} (expired at {reservation.reserved_until.strftime("%Y-%m-%d %H:%M:%S %Z")}).')
                 )
             
             # Perform the deletion
+            freed = list(expired_reservations.values_list('id', 'lawyer_id', 'start_time', 'end_time'))
+            WaitlistEntry.objects.filter(offer_reservation_id__in=[row[0] for row in freed], status='offered').update(status='lapsed')
             deleted_count, _ = expired_reservations.delete()
+            for _, lawyer_id, start_time, end_time in freed:
+                queue_freed_slot(lawyer_id, start_time, end_time) # Offered to waitlisted clients by the next cleanup task run
             
             self.stdout.write(self.style.SUCCESS(f'Successfully deleted {deleted_count} expired slot reservation(s).'))
         else:
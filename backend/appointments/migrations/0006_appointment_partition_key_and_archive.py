@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_slotreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('lawyer_id', models.BigIntegerField()),
+                ('client_id', models.BigIntegerField()),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('status', models.CharField(max_length=15)),
+                ('created_at', models.DateTimeField()),
+                ('stripe_payment_intent_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('payment_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='stripe_payment_intent_id',
+            field=models.CharField(blank=True, help_text='Stripe PaymentIntent ID', max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['lawyer', 'start'], name='appointment_lawyer_start_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(fields=('stripe_payment_intent_id', 'start'), name='appointment_unique_pi_start'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentarchive',
+            index=models.Index(fields=['lawyer_id', 'start'], name='appointmentarchive_lawyer_idx'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+"""
+Converts appointments_appointment into a table range-partitioned by month on `start` (PostgreSQL only;
+a no-op on other databases). The table is rebuilt: constraints and indexes are read from the catalog
+and recreated on the new table, rows are copied over, and the id sequence continues where it was.
+The primary key becomes (id, start) because PostgreSQL requires the partition key in unique constraints.
+
+The partition helpers are copied from appointments/partitions.py as they were when this migration was
+written, so later changes there (or to settings) don't alter it. maintain_appointment_partitions_task
+creates partitions further ahead afterwards.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+TABLE = 'appointments_appointment'
+OLD_TABLE = f'{TABLE}_old'
+DEFAULT_PARTITION = f'{TABLE}_default'
+MONTHS_AHEAD = 3 # Monthly partitions created ahead of the current month
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def _is_partitioned(cursor):
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [TABLE])
+    return cursor.fetchone()[0]
+
+
+def _definitions(cursor, table):
+    """Non-primary-key constraints and standalone indexes of `table`, as (name, definition) pairs."""
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f', 'c')",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+        [table, table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [table])
+    primary_key = cursor.fetchone()[0]
+    return constraints, indexes, primary_key
+
+
+def _rebuild(cursor, partitioned):
+    constraints, indexes, primary_key = _definitions(cursor, TABLE)
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+    # Free the names (index names are schema-wide) before recreating them on the new table
+    for name, _ in constraints:
+        cursor.execute(f'ALTER TABLE {OLD_TABLE} DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    cursor.execute(f'ALTER TABLE {OLD_TABLE} DROP CONSTRAINT "{primary_key}"')
+
+    partition_clause = ' PARTITION BY RANGE (start)' if partitioned else ''
+    sequence = f'{TABLE}_part_id_seq' if partitioned else f'{TABLE}_id_seq'
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE}){partition_clause}")
+    cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {TABLE}.id")
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    key_columns = 'id, start' if partitioned else 'id'
+    cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ({key_columns})')
+    for name, definition in constraints:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+    for _, definition in indexes:
+        cursor.execute(definition) # pg_indexes definitions already name the original table
+
+    if partitioned:
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+        cursor.execute(f"SELECT MIN(start) FROM {OLD_TABLE}")
+        oldest = cursor.fetchone()[0]
+        now = datetime.now(dt_timezone.utc)
+        month = _month_start(min(oldest, now) if oldest else now)
+        last = _add_months(_month_start(now), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {_partition_name(month)} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [month.isoformat(), _add_months(month, 1).isoformat()],
+            )
+            month = _add_months(month, 1)
+
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+    cursor.execute(f"SELECT setval('{sequence}', COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}")
+    cursor.execute(f"DROP TABLE {OLD_TABLE}")
+
+
+def partition_appointments(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            _rebuild(cursor, partitioned=True)
+
+
+def unpartition_appointments(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            _rebuild(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_partition_key_and_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_appointments, unpartition_appointments),
+    ]
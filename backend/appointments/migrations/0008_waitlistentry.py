@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+        ('appointments', '0007_partition_appointment_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('window_end', models.DateTimeField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('booked', 'Booked'), ('lapsed', 'Lapsed'), ('expired', 'Expired')], default='waiting', max_length=10)),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='users.userprofile')),
+                ('lawyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='users.lawyerprofile')),
+                ('offer_reservation', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='appointments.slotreservation')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['lawyer', 'status', 'window_start'], name='waitlist_lawyer_window_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+        ('appointments', '0008_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_start', models.DateTimeField()),
+                ('first_end', models.DateTimeField()),
+                ('interval_weeks', models.PositiveSmallIntegerField(default=1)),
+                ('count', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(choices=[('reserved', 'Reserved'), ('booked', 'Booked'), ('failed', 'Failed')], default='reserved', max_length=10)),
+                ('stripe_payment_intent_id', models.CharField(help_text='One PaymentIntent for all occurrences.', max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='users.userprofile')),
+                ('lawyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='users.lawyerprofile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.bookingseries'),
+        ),
+        migrations.AddField(
+            model_name='slotreservation',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='appointments.bookingseries'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+        ('appointments', '0009_bookingseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidayCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('kind', models.CharField(choices=[('firm', 'Firm holidays'), ('court', 'Court closures')], default='firm', max_length=10)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('subscribers', models.ManyToManyField(blank=True, related_name='holiday_calendars', to='users.lawyerprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CalendarClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closures', to='appointments.holidaycalendar')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('calendar', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:43
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+        ('appointments', '0010_holidaycalendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulingPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=60, help_text='Length of an appointment.', validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(480)])),
+                ('buffer_before_minutes', models.PositiveSmallIntegerField(default=0, help_text='Free time kept before each appointment.')),
+                ('buffer_after_minutes', models.PositiveSmallIntegerField(default=0, help_text='Free time kept after each appointment.')),
+                ('max_appointments_per_day', models.PositiveSmallIntegerField(blank=True, help_text='Empty for no limit.', null=True)),
+                ('min_notice_minutes', models.PositiveIntegerField(default=0, help_text='How far ahead a slot must be booked.')),
+                ('lawyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scheduling_policy', to='users.lawyerprofile')),
+            ],
+        ),
+    ]
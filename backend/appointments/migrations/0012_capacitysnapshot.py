@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0011_schedulingpolicy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CapacitySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('first_day', models.DateField()),
+                ('last_day', models.DateField()),
+                ('report', models.JSONField()),
+                ('duration_ms', models.PositiveIntegerField(help_text='Time taken to build the report.')),
+                ('created_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+        ('appointments', '0012_capacitysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='amount_cents',
+            field=models.PositiveIntegerField(blank=True, help_text='Amount paid for this appointment, in cents', null=True),
+        ),
+        migrations.AddField(
+            model_name='appointmentarchive',
+            name='amount_cents',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AppointmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=15)),
+                ('count', models.IntegerField(default=0)),
+                ('booked_minutes', models.BigIntegerField(default=0)),
+                ('amount_cents', models.BigIntegerField(default=0)),
+                ('lawyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_rollups', to='users.lawyerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'status'], name='appointment_rollup_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='appointmentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('lawyer', 'date', 'status'), name='appointment_rollup_unique_key'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0013_appointmentdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='AppointmentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField(default=0)),
+                ('appointment_id', models.BigIntegerField()),
+                ('change_type', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('cancelled', 'Cancelled'), ('deleted', 'Deleted')], max_length=10)),
+                ('changed_fields', models.JSONField(blank=True, null=True)),
+                ('lawyer_id', models.BigIntegerField()),
+                ('client_id', models.BigIntegerField()),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('status', models.CharField(max_length=15)),
+                ('payment_status', models.CharField(blank=True, max_length=50, null=True)),
+                ('stripe_payment_intent_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('amount_cents', models.PositiveIntegerField(blank=True, null=True)),
+                ('series_id', models.BigIntegerField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['transaction_id', 'id'], name='appointment_change_cursor_idx'), models.Index(fields=['appointment_id'], name='appointment_change_appt_idx'), models.Index(fields=['changed_at'], name='appointment_change_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_lawyer_import'),
+        ('appointments', '0014_appointment_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lawyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_feed', to='users.lawyerprofile')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_lawyer_import'),
+        ('appointments', '0015_calendarfeed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('url', models.CharField(blank=True, max_length=1000)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lawyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='external_calendars', to='users.lawyerprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExternalBusyEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.CharField(max_length=255)),
+                ('sequence', models.IntegerField(default=0)),
+                ('digest', models.CharField(max_length=40)),
+                ('source', models.TextField(blank=True)),
+                ('expanded_until', models.DateTimeField(blank=True, null=True)),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='appointments.externalcalendar')),
+            ],
+            options={
+                'unique_together': {('calendar', 'uid')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExternalBusyInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intervals', to='appointments.externalbusyevent')),
+                ('lawyer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.lawyerprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lawyer', 'start', 'end'], name='external_busy_lawyer_idx')],
+            },
+        ),
+    ]
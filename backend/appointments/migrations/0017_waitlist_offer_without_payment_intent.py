@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+def clear_placeholder_payment_intents(apps, schema_editor):
+    # Unclaimed waitlist offers used to carry a "waitlist_<entry>_<timestamp>" placeholder
+    SlotReservation = apps.get_model('appointments', 'SlotReservation')
+    SlotReservation.objects.filter(stripe_payment_intent_id__startswith='waitlist_').update(stripe_payment_intent_id=None)
+
+
+def restore_placeholder_payment_intents(apps, schema_editor):
+    SlotReservation = apps.get_model('appointments', 'SlotReservation')
+    for reservation in SlotReservation.objects.filter(stripe_payment_intent_id__isnull=True):
+        reservation.stripe_payment_intent_id = f'waitlist_{reservation.id}_{reservation.created_at.timestamp()}'
+        reservation.save(update_fields=['stripe_payment_intent_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0016_external_calendars'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='slotreservation',
+            name='stripe_payment_intent_id',
+            field=models.CharField(blank=True, help_text='Links reservation to a Stripe PaymentIntent. Empty for a waitlist offer until the client claims it.', max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(clear_placeholder_payment_intents, restore_placeholder_payment_intents),
+    ]
@@ -1,8 +1,16 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 # Import the new profile models from the 'users' app
 from users.models import UserProfile, LawyerProfile as NewLawyerProfile
+from datetime import timedelta
+
+# Upper bound on an appointment's length. Overlap queries use it as a lower bound on `start`
+# (start > range_start - MAX_APPOINTMENT_DURATION), which lets PostgreSQL prune old partitions.
+MAX_APPOINTMENT_DURATION = timedelta(hours=24)
+# Longest stored ExternalBusyInterval; longer external events are stored in pieces, for the same reason.
+MAX_BUSY_INTERVAL = timedelta(hours=24)
 
 class WeeklyAvailability(models.Model):
     # Point to the new LawyerProfile from the 'users' app
@@ -27,6 +35,23 @@ class WeeklyAvailability(models.Model):
         # Access user through user_profile linkage
         return f"{self.lawyer.user_profile.user.username} - {self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
 
+class SchedulingPolicy(models.Model):
+    """
+    Per-lawyer booking rules, applied identically when listing slots and when validating a booking
+    (see appointments/scheduling.py). Lawyers without a policy get the defaults: back-to-back 1-hour slots.
+    """
+    lawyer = models.OneToOneField(NewLawyerProfile, on_delete=models.CASCADE, related_name='scheduling_policy')
+    slot_minutes = models.PositiveSmallIntegerField(
+        default=60, validators=[MinValueValidator(5), MaxValueValidator(8 * 60)], help_text="Length of an appointment."
+    )
+    buffer_before_minutes = models.PositiveSmallIntegerField(default=0, help_text="Free time kept before each appointment.")
+    buffer_after_minutes = models.PositiveSmallIntegerField(default=0, help_text="Free time kept after each appointment.")
+    max_appointments_per_day = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Empty for no limit.")
+    min_notice_minutes = models.PositiveIntegerField(default=0, help_text="How far ahead a slot must be booked.")
+
+    def __str__(self):
+        return f"{self.lawyer.user_profile.user.username} - {self.slot_minutes} min slots"
+
 class AvailabilityOverride(models.Model):
     # Point to the new LawyerProfile from the 'users' app
     lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='availability_overrides')
@@ -47,6 +72,59 @@ class AvailabilityOverride(models.Model):
             return f"{lawyer_username} - {self.date} (All Day) - {self.description or 'Blocked'}"
         return f"{lawyer_username} - {self.date} {self.start_time}-{self.end_time} - {self.description or 'Blocked'}"
 
+class HolidayCalendar(models.Model):
+    """
+    A shared set of closure days (firm holidays, a jurisdiction's court closures) that lawyers subscribe to.
+    A closure is stored once per calendar, not as an AvailabilityOverride per lawyer; see appointments/calendars.py.
+    """
+    KIND_CHOICES = [
+        ('firm', 'Firm holidays'),
+        ('court', 'Court closures'),
+    ]
+    name = models.CharField(max_length=100, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='firm')
+    description = models.CharField(max_length=255, blank=True)
+    subscribers = models.ManyToManyField(NewLawyerProfile, related_name='holiday_calendars', blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+class CalendarClosure(models.Model):
+    """ One closed day in a HolidayCalendar (all day, in the project's time zone). """
+    calendar = models.ForeignKey(HolidayCalendar, on_delete=models.CASCADE, related_name='closures')
+    date = models.DateField()
+    description = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ('calendar', 'date')
+
+    def __str__(self):
+        return f"{self.calendar.name} - {self.date} - {self.description or 'Closed'}"
+
+class BookingSeries(models.Model):
+    """
+    A recurring booking (`count` occurrences every `interval_weeks` weeks, starting at first_start/first_end),
+    reserved as a whole and paid with a single PaymentIntent. Occurrences are SlotReservations, then Appointments.
+    """
+    STATUS_CHOICES = [
+        ('reserved', 'Reserved'),   # Occurrences are held while the client pays
+        ('booked', 'Booked'),       # Appointments were created
+        ('failed', 'Failed'),       # Payment failed or a conflict appeared; reservations were released
+    ]
+    lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='booking_series')
+    client = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='booking_series')
+    first_start = models.DateTimeField()
+    first_end = models.DateTimeField()
+    interval_weeks = models.PositiveSmallIntegerField(default=1)
+    count = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='reserved')
+    stripe_payment_intent_id = models.CharField(max_length=255, unique=True, help_text="One PaymentIntent for all occurrences.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Series {self.id}: {self.count} x every {self.interval_weeks} week(s) from {self.first_start} ({self.status})"
+
 class Appointment(models.Model):
     # Point to the new LawyerProfile and UserProfile from the 'users' app
     lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='appointments_as_lawyer')
@@ -62,8 +140,21 @@ class Appointment(models.Model):
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pending') # Increased max_length
     created_at = models.DateTimeField(auto_now_add=True)
     # Stripe Payment Info
-    stripe_payment_intent_id = models.CharField(max_length=255, blank=True, null=True, unique=True, help_text="Stripe PaymentIntent ID")
+    # Unique together with `start` only: on PostgreSQL the table is range-partitioned by month on `start`
+    # (see appointments/partitions.py), and unique constraints there must include the partition key.
+    stripe_payment_intent_id = models.CharField(max_length=255, blank=True, null=True, help_text="Stripe PaymentIntent ID")
     payment_status = models.CharField(max_length=50, blank=True, null=True, help_text="Latest known payment status from Stripe")
+    amount_cents = models.PositiveIntegerField(null=True, blank=True, help_text="Amount paid for this appointment, in cents")
+    series = models.ForeignKey(BookingSeries, on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments')
+    updated_at = models.DateTimeField(auto_now=True) # Only bumped by saves that include it; the change feed (AppointmentChange) is the authoritative history
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stripe_payment_intent_id', 'start'], name='appointment_unique_pi_start'),
+        ]
+        indexes = [
+            models.Index(fields=['lawyer', 'start'], name='appointment_lawyer_start_idx'),
+        ]
 
     def __str__(self):
         # Access usernames through their respective profile linkages
@@ -78,7 +169,11 @@ class SlotReservation(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     reserved_until = models.DateTimeField(db_index=True, help_text="Timestamp when this reservation expires.")
-    stripe_payment_intent_id = models.CharField(max_length=255, unique=True, help_text="Links reservation to a Stripe PaymentIntent.")
+    stripe_payment_intent_id = models.CharField(
+        max_length=255, unique=True, null=True, blank=True,
+        help_text="Links reservation to a Stripe PaymentIntent. Empty for a waitlist offer until the client claims it.",
+    )
+    series = models.ForeignKey(BookingSeries, on_delete=models.CASCADE, null=True, blank=True, related_name='reservations') # Set for series occurrences (paid via the series' PaymentIntent)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -96,3 +191,203 @@ class SlotReservation(models.Model):
         client_username = self.client_profile.user.username
         lawyer_username = self.lawyer.user_profile.user.username
         return f"Reservation for {client_username} with {lawyer_username} [{self.start_time} - {self.end_time}] until {self.reserved_until} ({active_status}) - PI: {self.stripe_payment_intent_id}"
+
+class WaitlistEntry(models.Model):
+    """
+    A client's standing request for any slot with `lawyer` that fits inside [window_start, window_end].
+    Freed slots are matched against waiting entries by the cleanup task (see appointments/waitlist.py);
+    the oldest matching entry gets a short first-refusal SlotReservation (`offer_reservation`).
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('offered', 'Offered'),    # Holds offer_reservation until it expires
+        ('booked', 'Booked'),      # The offer was paid and confirmed
+        ('lapsed', 'Lapsed'),      # The offer expired unclaimed
+        ('expired', 'Expired'),    # window_end passed without a matching slot
+    ]
+    lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='waitlist_entries')
+    client = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='waitlist_entries')
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='waiting')
+    offer_reservation = models.OneToOneField(
+        SlotReservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='waitlist_entry'
+    )
+    offered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id'] # First come, first offered
+        indexes = [
+            models.Index(fields=['lawyer', 'status', 'window_start'], name='waitlist_lawyer_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"Waitlist {self.id}: {self.client.user.username} for {self.lawyer.user_profile.user.username} [{self.window_start} - {self.window_end}] ({self.status})"
+
+class CapacitySnapshot(models.Model):
+    """
+    Firm-wide capacity report (appointments/capacity.py) precomputed daily by build_capacity_snapshot_task
+    for the days from `first_day` to `last_day`, served by the admin capacity API.
+    """
+    date = models.DateField(unique=True) # Day the snapshot was taken
+    first_day = models.DateField()
+    last_day = models.DateField()
+    report = models.JSONField()
+    duration_ms = models.PositiveIntegerField(help_text="Time taken to build the report.")
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Capacity snapshot {self.date} ({self.first_day} - {self.last_day})"
+
+class AppointmentDailyRollup(models.Model):
+    """
+    Appointments per lawyer, local day (of `start`) and status: how many, booked minutes and amount paid.
+    Maintained incrementally (appointments/analytics.py) and reconciled nightly; serves the admin analytics API.
+    """
+    lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='appointment_rollups')
+    date = models.DateField()
+    status = models.CharField(max_length=15)
+    count = models.IntegerField(default=0)
+    booked_minutes = models.BigIntegerField(default=0)
+    amount_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lawyer', 'date', 'status'], name='appointment_rollup_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'status'], name='appointment_rollup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Lawyer {self.lawyer_id} {self.date} {self.status}: {self.count}"
+
+class AppointmentChange(models.Model):
+    """
+    One insert, update or delete of an Appointment with the appointment's values after it, appended in the
+    writing transaction (appointments/changes.py). Read in (transaction_id, id) order by the changes feed.
+    """
+    CHANGE_TYPES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('cancelled', 'Cancelled'), # An update that set the status to cancelled
+        ('deleted', 'Deleted'),
+    ]
+    transaction_id = models.BigIntegerField(default=0) # txid_current() of the writing transaction on PostgreSQL, 0 elsewhere
+    appointment_id = models.BigIntegerField() # Plain id: Appointment is partitioned, and deleted appointments keep their changes
+    change_type = models.CharField(max_length=10, choices=CHANGE_TYPES)
+    changed_fields = models.JSONField(null=True, blank=True) # Fields an update changed; null if the previous values weren't loaded
+    lawyer_id = models.BigIntegerField()
+    client_id = models.BigIntegerField()
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    status = models.CharField(max_length=15)
+    payment_status = models.CharField(max_length=50, blank=True, null=True)
+    stripe_payment_intent_id = models.CharField(max_length=255, blank=True, null=True)
+    amount_cents = models.PositiveIntegerField(null=True, blank=True)
+    series_id = models.BigIntegerField(null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['transaction_id', 'id'], name='appointment_change_cursor_idx'),
+            models.Index(fields=['appointment_id'], name='appointment_change_appt_idx'),
+            models.Index(fields=['changed_at'], name='appointment_change_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"Appointment {self.appointment_id} {self.change_type} at {self.changed_at}"
+
+class CalendarFeed(models.Model):
+    """
+    A lawyer's private iCalendar feed of their appointments (appointments/calendar_feed.py), served at a URL
+    holding `token`. `version` is bumped after every change to the lawyer's appointments, so unchanged polls
+    are answered 304 from this row alone.
+    """
+    lawyer = models.OneToOneField(NewLawyerProfile, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now) # When `version` last moved (Last-Modified)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed of lawyer {self.lawyer_id} (version {self.version})"
+
+class ExternalCalendar(models.Model):
+    """
+    Another calendar of a lawyer (court dates, meetings) whose events block booking: ICS data uploaded by the
+    lawyer, or fetched from `url` in the background. See appointments/external_calendars.py.
+    """
+    lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='external_calendars')
+    name = models.CharField(max_length=100)
+    url = models.CharField(max_length=1000, blank=True) # Empty for uploaded calendars
+    content_hash = models.CharField(max_length=64, blank=True) # Of the last synced data; unchanged downloads aren't parsed
+    synced_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} (lawyer {self.lawyer_id})"
+
+class ExternalBusyEvent(models.Model):
+    """
+    One event of an ExternalCalendar (all its components with that UID), with what a re-sync compares:
+    SEQUENCE and a digest of its content. Recurring events keep their source to be re-expanded as the
+    booking horizon moves.
+    """
+    calendar = models.ForeignKey(ExternalCalendar, on_delete=models.CASCADE, related_name='events')
+    uid = models.CharField(max_length=255)
+    sequence = models.IntegerField(default=0)
+    digest = models.CharField(max_length=40)
+    source = models.TextField(blank=True) # Recurring events only
+    expanded_until = models.DateTimeField(null=True, blank=True) # Recurring events: occurrences are stored up to here
+
+    class Meta:
+        unique_together = ('calendar', 'uid')
+
+    def __str__(self):
+        return f"{self.uid} (calendar {self.calendar_id})"
+
+class ExternalBusyInterval(models.Model):
+    """ A busy period of an ExternalBusyEvent, at most MAX_BUSY_INTERVAL long; read by load_schedule per lawyer. """
+    event = models.ForeignKey(ExternalBusyEvent, on_delete=models.CASCADE, related_name='intervals')
+    lawyer = models.ForeignKey(NewLawyerProfile, on_delete=models.CASCADE, related_name='+', db_index=False) # Denormalized for the index
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lawyer', 'start', 'end'], name='external_busy_lawyer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Lawyer {self.lawyer_id} busy {self.start} - {self.end}"
+
+class AppointmentArchive(models.Model):
+    """
+    Compact copy of appointments from archived (detached) monthly partitions. Ids are kept from the
+    original rows; lawyer/client are plain ids so archived history never blocks or cascades profile deletes.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    lawyer_id = models.BigIntegerField()
+    client_id = models.BigIntegerField()
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    status = models.CharField(max_length=15)
+    created_at = models.DateTimeField()
+    stripe_payment_intent_id = models.CharField(max_length=255, blank=True, null=True)
+    payment_status = models.CharField(max_length=50, blank=True, null=True)
+    amount_cents = models.PositiveIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lawyer_id', 'start'], name='appointmentarchive_lawyer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived appointment {self.id} (lawyer {self.lawyer_id}) at {self.start}"
@@ -0,0 +1,120 @@
+"""
+Monthly range partitioning of the Appointment table on `start` (PostgreSQL only).
+
+Layout: the partitioned parent `appointments_appointment`, one partition per UTC month named
+`appointments_appointment_pYYYY_MM`, and a DEFAULT partition catching rows outside the created months.
+Migration 0007 converts the table; `maintain_appointment_partitions_task` keeps partitions ahead of
+time and archives old months into AppointmentArchive.
+
+Queries should bound `start` from below (see MAX_APPOINTMENT_DURATION) so old partitions are pruned.
+Note that no other table can hold a foreign key to Appointment any more (its key is (id, start)).
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection as default_connection, transaction
+
+from .models import Appointment, AppointmentArchive
+
+TABLE = Appointment._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_TABLE = AppointmentArchive._meta.db_table
+ARCHIVE_COLUMNS = ('id', 'lawyer_id', 'client_id', 'start', '"end"', 'status', 'created_at', 'stripe_payment_intent_id', 'payment_status', 'amount_cents')
+
+
+def month_start(value) -> datetime:
+    """First instant (UTC) of the month containing `value` (a date or datetime)."""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(connection=default_connection) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [TABLE])
+        return cursor.fetchone()[0]
+
+
+def list_month_partitions(connection=default_connection) -> list:
+    """Returns the month (datetime) of every monthly partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    return sorted(
+        datetime.strptime(name[len(prefix):], '%Y_%m').replace(tzinfo=dt_timezone.utc)
+        for name in names if name.startswith(prefix)
+    )
+
+
+def create_month_partition(month: datetime, connection=default_connection):
+    """
+    Creates the partition for `month`. Rows for that month that already landed in the DEFAULT
+    partition are moved into it first (PostgreSQL refuses to attach a range the default still holds).
+    """
+    name = connection.ops.quote_name(partition_name(month))
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat() # Plain literals: older servers reject casts in bounds
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE start >= %s AND start < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lower, upper])
+
+
+def ensure_future_partitions(months_ahead: int, now=None, connection=default_connection) -> list:
+    """Makes sure partitions exist from the current month through `months_ahead` months ahead. Returns created months."""
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    existing = set(list_month_partitions(connection))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            create_month_partition(month, connection)
+            created.append(month)
+    return created
+
+
+def archive_partitions_before(cutoff: datetime, connection=default_connection) -> dict:
+    """
+    Detaches every monthly partition that ends on or before `cutoff` (a month start), copies its rows
+    into AppointmentArchive and drops it. Older rows in the DEFAULT partition are archived as well.
+    Returns {partition name: archived rows}.
+    """
+    columns = ', '.join(ARCHIVE_COLUMNS)
+    archived = {}
+    for month in list_month_partitions(connection):
+        if add_months(month, 1) > cutoff:
+            break
+        name = connection.ops.quote_name(partition_name(month))
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            cursor.execute(
+                f"INSERT INTO {ARCHIVE_TABLE} ({columns}, archived_at) SELECT {columns}, now() FROM {name} "
+                f"ON CONFLICT (id) DO NOTHING"
+            )
+            archived[partition_name(month)] = cursor.rowcount
+            cursor.execute(f"DROP TABLE {name}")
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE start < %s RETURNING {columns}) "
+            f"INSERT INTO {ARCHIVE_TABLE} ({columns}, archived_at) SELECT {columns}, now() FROM moved "
+            f"ON CONFLICT (id) DO NOTHING",
+            [cutoff.isoformat()],
+        )
+        if cursor.rowcount:
+            archived[DEFAULT_PARTITION] = cursor.rowcount
+    return archived
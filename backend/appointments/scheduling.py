@@ -0,0 +1,256 @@
+"""
+Slot computation shared by available_slots, booking validation (AppointmentViewSet._is_slot_available) and
+series checks (availability.find_conflicts): a slot is listed exactly when a booking for it would be accepted.
+
+A lawyer's rules (SchedulingPolicy + WeeklyAvailability) are cached together in Redis as
+`scheduling_rules:<lawyer id>` and invalidated by appointments/signals.py. Date-specific inputs (overrides,
+holiday calendar closures, appointments, reservations, busy time imported from the lawyer's external
+calendars by appointments/external_calendars.py) are loaded once for the whole date range by
+load_schedule(); Schedule.day_candidates() then walks a day's slot grid and the merged busy periods in a
+single pass, with per-day booking counters gathered while loading.
+"""
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import redis
+from django.utils import timezone
+
+from config.redis_client import get_cached, invalidate_cached, set_cached
+from .calendars import closed_dates
+from .models import (
+    Appointment, AvailabilityOverride, ExternalBusyInterval, SchedulingPolicy, SlotReservation, WeeklyAvailability,
+    MAX_APPOINTMENT_DURATION, MAX_BUSY_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+RULES_KEY = 'scheduling_rules:{}'
+RULES_TTL_SECONDS = 24 * 3600
+
+DEFAULT_POLICY = {
+    'slot_minutes': 60,
+    'buffer_before_minutes': 0,
+    'buffer_after_minutes': 0,
+    'max_appointments_per_day': None,
+    'min_notice_minutes': 0,
+}
+
+# Why a candidate slot can't be booked
+OUTSIDE_HOURS = 'outside_hours'  # Not a slot of the lawyer's weekly grid (hours, slot length, buffers)
+BLOCKED = 'blocked'              # An availability override (time off) covers it
+CLOSED = 'closed'                # A subscribed holiday calendar closes that day
+BOOKED = 'booked'                # Overlaps a pending/confirmed appointment
+RESERVED = 'reserved'            # Overlaps someone's active reservation
+BUSY = 'busy'                    # Overlaps an event of the lawyer's external calendars
+BUFFER = 'buffer'                # Too close to another appointment or reservation
+DAILY_LIMIT = 'daily_limit'      # The lawyer's maximum appointments for that day is reached
+NOTICE = 'notice'                # Starts sooner than the lawyer's minimum notice (or in the past)
+
+
+def merge_intervals(intervals):
+    """
+    Merges overlapping (start, end, payload) intervals into disjoint (start, end, [payloads]) blocks,
+    sorted by start. Touching intervals stay separate.
+    """
+    merged = []
+    for start, end, payload in sorted(intervals, key=lambda interval: interval[0]):
+        if merged and start < merged[-1][1]:
+            block = merged[-1]
+            block[1] = max(block[1], end)
+            block[2].append((start, end, payload))
+        else:
+            merged.append([start, end, [(start, end, payload)]])
+    return merged
+
+
+class SchedulingRules:
+    """A lawyer's policy values plus weekly hours as {day_of_week: [(start_time, end_time)]}, merged and sorted."""
+
+    def __init__(self, policy, weekly):
+        self.slot = timedelta(minutes=policy['slot_minutes'])
+        self.buffer_before = timedelta(minutes=policy['buffer_before_minutes'])
+        self.buffer_after = timedelta(minutes=policy['buffer_after_minutes'])
+        self.max_per_day = policy['max_appointments_per_day']
+        self.min_notice = timedelta(minutes=policy['min_notice_minutes'])
+        hours = defaultdict(list)
+        for day_of_week, start_time, end_time in weekly:
+            hours[day_of_week].append((start_time, end_time, None))
+        self.weekly = {day_of_week: [(start, end) for start, end, _ in merge_intervals(blocks)] for day_of_week, blocks in hours.items()}
+
+
+def _load_rules(lawyer_id):
+    policy = SchedulingPolicy.objects.filter(lawyer_id=lawyer_id).values(*DEFAULT_POLICY).first() or DEFAULT_POLICY
+    weekly = [
+        [day_of_week, start_time.isoformat(), end_time.isoformat()]
+        for day_of_week, start_time, end_time in WeeklyAvailability.objects.filter(lawyer_id=lawyer_id).values_list(
+            'day_of_week', 'start_time', 'end_time'
+        )
+    ]
+    return {'policy': policy, 'weekly': weekly}
+
+
+def get_rules(lawyer_id) -> SchedulingRules:
+    """The lawyer's cached rules; loaded with two queries on a cache miss."""
+    key = RULES_KEY.format(lawyer_id)
+    try:
+        [(cached, generation)] = get_cached([key])
+    except redis.RedisError as e:
+        logger.warning("Scheduling rules cache unavailable: %s", e)
+        cached = generation = None
+    if cached is not None:
+        data = json.loads(cached)
+    else:
+        data = _load_rules(lawyer_id)
+        if generation is not None:
+            try:
+                set_cached([(key, json.dumps(data), generation)], RULES_TTL_SECONDS) # Skipped if invalidated meanwhile
+            except redis.RedisError as e:
+                logger.warning("Could not cache scheduling rules for lawyer %s: %s", lawyer_id, e)
+    weekly = [(day_of_week, time.fromisoformat(start), time.fromisoformat(end)) for day_of_week, start, end in data['weekly']]
+    return SchedulingRules(data['policy'], weekly)
+
+
+def invalidate_rules(lawyer_id):
+    try:
+        invalidate_cached(RULES_KEY.format(lawyer_id), RULES_TTL_SECONDS)
+    except redis.RedisError as e:
+        # Stale rules would be served until the TTL runs out
+        logger.warning("Could not invalidate scheduling rules for lawyer %s: %s", lawyer_id, e)
+
+
+def _local_datetime(day, time_of_day):
+    return timezone.make_aware(datetime.combine(day, time_of_day))
+
+
+class Schedule:
+    """A lawyer's rules and everything that blocks time between first_day and last_day (local dates)."""
+
+    def __init__(self, rules, now, notice_from, closed, overrides, busy, booked_per_day):
+        self.rules = rules
+        self.now = now
+        self.earliest_start = notice_from + rules.min_notice
+        self.closed = closed                  # ClosedDates from holiday calendars
+        self.overrides = overrides            # {date: [(start, end) or None for all day]}
+        self.busy = busy                      # {date: [(start, end, reason)]}, by every local day they touch
+        self.booked_per_day = booked_per_day  # {date: appointments + active reservations starting that day}
+        self._days = {}
+
+    def day_candidates(self, day):
+        """[(start, end, reasons)] for every slot of the lawyer's grid on `day`; reasons is empty if bookable."""
+        if day in self._days:
+            return self._days[day]
+        rules = self.rules
+        step = rules.buffer_before + rules.slot + rules.buffer_after
+        candidates = []
+        for open_start, open_end in rules.weekly.get(day.weekday(), ()):
+            start, block_end = _local_datetime(day, open_start), _local_datetime(day, open_end)
+            while start + rules.slot <= block_end:
+                candidates.append((start, start + rules.slot))
+                start += step
+
+        day_reasons = []
+        overrides = self.overrides.get(day, ())
+        if day in self.closed:
+            day_reasons.append(CLOSED)
+        if None in overrides:
+            day_reasons.append(BLOCKED)
+        if rules.max_per_day is not None and self.booked_per_day.get(day, 0) >= rules.max_per_day:
+            day_reasons.append(DAILY_LIMIT)
+
+        blocking = list(self.busy.get(day, ()))
+        blocking.extend((start, end, BLOCKED) for start, end in (override for override in overrides if override is not None))
+        blocks = merge_intervals(blocking)
+
+        # One pass: candidates and merged blocks are both sorted, and blocks are disjoint
+        result = []
+        position = 0
+        for start, end in candidates:
+            window_start, window_end = start - rules.buffer_before, end + rules.buffer_after
+            while position < len(blocks) and blocks[position][1] <= window_start:
+                position += 1
+            reasons = set(day_reasons)
+            if start < self.earliest_start:
+                reasons.add(NOTICE)
+            scan = position
+            while scan < len(blocks) and blocks[scan][0] < window_end:
+                for busy_start, busy_end, reason in blocks[scan][2]:
+                    if busy_start < end and busy_end > start:
+                        reasons.add(reason)
+                    elif reason != BLOCKED and busy_start < window_end and busy_end > window_start:
+                        reasons.add(BUFFER) # Time off needs no buffer; other bookings do
+                scan += 1
+            result.append((start, end, sorted(reasons)))
+        self._days[day] = result
+        return result
+
+    def available_slots(self, days):
+        return [
+            {'start': start, 'end': end}
+            for day in days for start, end, reasons in self.day_candidates(day) if not reasons
+        ]
+
+    def slot_conflicts(self, start, end):
+        """Reasons why [start, end] can't be booked; empty if it can. Off-grid times are OUTSIDE_HOURS."""
+        for candidate_start, candidate_end, reasons in self.day_candidates(timezone.localtime(start).date()):
+            if candidate_start == start and candidate_end == end:
+                return reasons
+        return [OUTSIDE_HOURS]
+
+
+def load_schedule(lawyer, first_day, last_day, now=None, notice_from=None, exclude_reservation_ids=()) -> Schedule:
+    """
+    Loads what Schedule needs for `lawyer` from first_day to last_day (local dates): cached rules plus five
+    queries (overrides, calendar subscriptions, appointments, reservations, external busy time), whatever the range.
+    `notice_from` is when minimum notice is measured from (defaults to now; confirmation uses the reservation time).
+    """
+    now = now or timezone.now()
+    rules = get_rules(lawyer.id)
+    range_start = _local_datetime(first_day, time.min) - rules.buffer_before
+    range_end = _local_datetime(last_day + timedelta(days=1), time.min) + rules.buffer_after
+
+    overrides = defaultdict(list)
+    for day, start_time, end_time, is_all_day in AvailabilityOverride.objects.filter(
+        lawyer=lawyer, date__gte=first_day, date__lte=last_day
+    ).values_list('date', 'start_time', 'end_time', 'is_all_day'):
+        if is_all_day:
+            overrides[day].append(None)
+        elif start_time and end_time:
+            overrides[day].append((_local_datetime(day, start_time), _local_datetime(day, end_time)))
+
+    appointments = Appointment.objects.filter(
+        lawyer=lawyer,
+        start__lt=range_end,
+        end__gt=range_start,
+        start__gt=range_start - MAX_APPOINTMENT_DURATION, # Partition pruning, see MAX_APPOINTMENT_DURATION
+        status__in=['pending', 'confirmed'],
+    ).values_list('start', 'end')
+    reservations = SlotReservation.objects.filter(
+        lawyer=lawyer,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+        reserved_until__gt=now,
+    ).exclude(id__in=list(exclude_reservation_ids)).values_list('start_time', 'end_time')
+    external = ExternalBusyInterval.objects.filter(
+        lawyer=lawyer,
+        start__lt=range_end,
+        end__gt=range_start,
+        start__gt=range_start - MAX_BUSY_INTERVAL, # Bounds the index range scan
+    ).values_list('start', 'end')
+
+    busy = defaultdict(list)
+    booked_per_day = defaultdict(int)
+    for reason, periods in ((BOOKED, appointments), (RESERVED, reservations), (BUSY, external)):
+        for start, end in periods:
+            if reason != BUSY: # External events don't count towards the daily maximum
+                booked_per_day[timezone.localtime(start).date()] += 1
+            # File the period under every local day whose buffered slots it can touch
+            day = timezone.localtime(start - rules.buffer_after).date()
+            last = timezone.localtime(end + rules.buffer_before).date()
+            while day <= last:
+                busy[day].append((start, end, reason))
+                day += timedelta(days=1)
+
+    closed = closed_dates(lawyer)
+    return Schedule(rules, now, notice_from or now, closed, overrides, busy, booked_per_day)
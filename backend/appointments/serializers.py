@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import WeeklyAvailability, Appointment, AvailabilityOverride
+from config.serializers import DirtyFieldsUpdateMixin
+from django.utils import timezone
+from .models import WeeklyAvailability, Appointment, AvailabilityOverride, WaitlistEntry, HolidayCalendar, CalendarClosure, SchedulingPolicy, ExternalCalendar
+from .external_calendars import ExternalCalendarError, check_url, normalize_url
 
 
 class WeeklyAvailabilitySerializer(serializers.ModelSerializer):
@@ -9,7 +12,13 @@ class WeeklyAvailabilitySerializer(serializers.ModelSerializer):
         fields = ['id', 'day_of_week', 'start_time', 'end_time']
 
 
-class AvailabilityOverrideSerializer(serializers.ModelSerializer):
+class SchedulingPolicySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SchedulingPolicy
+        fields = ['slot_minutes', 'buffer_before_minutes', 'buffer_after_minutes', 'max_appointments_per_day', 'min_notice_minutes']
+
+
+class AvailabilityOverrideSerializer(DirtyFieldsUpdateMixin, serializers.ModelSerializer):
     class Meta:
         model = AvailabilityOverride
         fields = ['id', 'lawyer', 'date', 'start_time', 'end_time', 'is_all_day', 'description']
@@ -46,4 +55,57 @@ class AppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = ['id', 'lawyer', 'client', 'start', 'end', 'status', 'created_at']
-        read_only_fields = ['client', 'status', 'created_at'] 
\ No newline at end of file
+        read_only_fields = ['client', 'status', 'created_at'] 
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    offer_start = serializers.DateTimeField(source='offer_reservation.start_time', read_only=True, default=None)
+    offer_end = serializers.DateTimeField(source='offer_reservation.end_time', read_only=True, default=None)
+    offer_reserved_until = serializers.DateTimeField(source='offer_reservation.reserved_until', read_only=True, default=None)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'lawyer', 'window_start', 'window_end', 'status', 'offered_at',
+            'offer_start', 'offer_end', 'offer_reserved_until', 'created_at',
+        ]
+        read_only_fields = ['status', 'offered_at', 'created_at']
+
+    def validate(self, data):
+        if data['window_start'] >= data['window_end']:
+            raise serializers.ValidationError("window_end must be after window_start.")
+        if data['window_end'] <= timezone.now():
+            raise serializers.ValidationError("The waitlist window is already over.")
+        return data
+
+
+class ExternalCalendarSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExternalCalendar
+        fields = ['id', 'name', 'url', 'synced_at', 'last_error', 'created_at']
+        read_only_fields = ['synced_at', 'last_error', 'created_at']
+
+    def validate_url(self, value):
+        if not value:
+            return ''
+        value = normalize_url(value)
+        try:
+            check_url(value)
+        except ExternalCalendarError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+
+class CalendarClosureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CalendarClosure
+        fields = ['date', 'description']
+
+
+class HolidayCalendarSerializer(serializers.ModelSerializer):
+    closures = CalendarClosureSerializer(many=True, read_only=True)
+    subscribed = serializers.BooleanField(read_only=True) # Annotated by HolidayCalendarViewSet
+
+    class Meta:
+        model = HolidayCalendar
+        fields = ['id', 'name', 'kind', 'description', 'subscribed', 'closures']
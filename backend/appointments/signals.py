@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics, calendars, changes, scheduling
+from .models import Appointment, CalendarClosure, HolidayCalendar, SchedulingPolicy, WeeklyAvailability
+
+
+@receiver(post_save, sender=CalendarClosure)
+@receiver(post_delete, sender=CalendarClosure)
+def invalidate_calendar_for_closure(sender, instance, **kwargs):
+    calendar_id = instance.calendar_id
+    transaction.on_commit(lambda: calendars.invalidate_calendar(calendar_id))
+
+
+@receiver(post_delete, sender=HolidayCalendar)
+def invalidate_deleted_calendar(sender, instance, **kwargs):
+    calendar_id = instance.id
+    transaction.on_commit(lambda: calendars.invalidate_calendar(calendar_id))
+
+
+@receiver(post_save, sender=SchedulingPolicy)
+@receiver(post_delete, sender=SchedulingPolicy)
+@receiver(post_save, sender=WeeklyAvailability)
+@receiver(post_delete, sender=WeeklyAvailability)
+def invalidate_scheduling_rules(sender, instance, **kwargs):
+    lawyer_id = instance.lawyer_id
+    transaction.on_commit(lambda: scheduling.invalidate_rules(lawyer_id))
+
+
+# Subscription changes need no handler: closed_dates() reads a lawyer's subscriptions from the database.
+
+
+@receiver(post_init, sender=Appointment)
+def remember_rollup_state(sender, instance, **kwargs):
+    instance._rollup_state = analytics.appointment_state(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    new_state = analytics.appointment_state(instance)
+    old_state = None if created else instance._rollup_state
+    if not created and old_state is None:
+        # Loaded with deferred fields: the previous values are unknown, let reconciliation recompute the day
+        analytics.mark_dirty([(instance.lawyer_id, timezone.localtime(instance.start).date())])
+    elif old_state != new_state:
+        analytics.record_change(old_state, new_state)
+    instance._rollup_state = new_state
+
+
+@receiver(post_delete, sender=Appointment)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    analytics.record_change(instance._rollup_state or analytics.appointment_state(instance), None)
+
+
+@receiver(post_init, sender=Appointment)
+def remember_feed_state(sender, instance, **kwargs):
+    instance._feed_state = changes.tracked_state(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def record_change_on_save(sender, instance, created, **kwargs):
+    changes.record_save(instance, instance._feed_state, created)
+    instance._feed_state = changes.tracked_state(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+def record_change_on_delete(sender, instance, **kwargs):
+    changes.record_delete(instance, instance._feed_state)
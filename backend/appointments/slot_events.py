@@ -0,0 +1,51 @@
+"""
+Publishing side of the real-time slot feed (see appointments/slot_stream.py for the SSE endpoint).
+
+Events go to the Redis pub/sub channel `slot_events:<lawyer_id>` after the surrounding transaction
+commits, so subscribers never hear about changes that were rolled back. Payload:
+    {"type": "reserved" | "freed" | "booked", "lawyer_id": 1, "start": "...", "end": "...", "reserved_until": "..."?}
+Events are hints for the booking page; clients should still rely on `create` returning 409.
+"""
+import json
+import logging
+
+import redis
+from django.db import transaction
+
+from config.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'slot_events:{}'
+CHANNEL_PATTERN = 'slot_events:*'
+
+SLOT_RESERVED = 'reserved'
+SLOT_FREED = 'freed'
+SLOT_BOOKED = 'booked'
+
+
+def publish_slot_event(event_type, lawyer_id, start, end, reserved_until=None):
+    """Queues a slot event for publication once the current transaction (if any) commits."""
+    event = {'type': event_type, 'lawyer_id': lawyer_id, 'start': start.isoformat(), 'end': end.isoformat()}
+    if reserved_until is not None:
+        event['reserved_until'] = reserved_until.isoformat() # Clients can free the slot locally at this time
+    payload = json.dumps(event)
+    transaction.on_commit(lambda: _publish(CHANNEL.format(lawyer_id), payload))
+
+
+def publish_reservation_event(event_type, reservation):
+    publish_slot_event(
+        event_type, reservation.lawyer_id, reservation.start_time, reservation.end_time,
+        reserved_until=reservation.reserved_until if event_type == SLOT_RESERVED else None,
+    )
+
+
+def publish_appointment_event(event_type, appointment):
+    publish_slot_event(event_type, appointment.lawyer_id, appointment.start, appointment.end)
+
+
+def _publish(channel, payload):
+    try:
+        get_redis_client().publish(channel, payload)
+    except redis.RedisError as e:
+        logger.warning("Could not publish slot event on %s: %s", channel, e) # Best effort; never fails a booking
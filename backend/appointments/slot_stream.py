@@ -0,0 +1,205 @@
+"""
+Server-Sent Events feed of slot changes for one lawyer's booking page:
+
+    GET /api/appointments/slot-events/<lawyer_id>/?token=<Cognito JWT>    (or an Authorization header)
+
+Each event is `event: slot` with the JSON payload from appointments/slot_events.py; `event: resync`
+tells a client that fell behind to refetch available_slots. Idle connections get a comment every
+SLOT_EVENTS_HEARTBEAT_SECONDS.
+
+This is a plain ASGI app mounted in config/asgi.py in front of Django, so an idle subscriber costs a
+coroutine and a queue, nothing more. Each process holds one Redis pub/sub connection (SlotEventHub)
+and fans messages out to its local subscribers.
+"""
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework import exceptions
+
+from config.authentication import CognitoAuthentication
+from users.models import LawyerProfile
+from .slot_events import CHANNEL_PATTERN
+
+logger = logging.getLogger(__name__)
+
+PATH_PREFIX = '/api/appointments/slot-events/'
+PATH_RE = re.compile(r'^/api/appointments/slot-events/(\d+)/?$')
+SUBSCRIBER_QUEUE_SIZE = 256
+RECONNECT_DELAY_SECONDS = (0.5, 1, 2, 5)
+RESYNC = object() # Queue marker: send `resync` without waiting for the next event
+
+
+class Subscriber:
+    __slots__ = ('queue', 'overflowed', 'closed')
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        if not self.queue.full():
+            self.queue.put_nowait(None) # Wakes the stream; with a full queue it stops after the next event
+
+    def deliver(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.overflowed = True # The stream sends `resync` once it catches up
+
+    def resync(self):
+        self.overflowed = True
+        if not self.queue.full():
+            self.queue.put_nowait(RESYNC)
+
+
+class SlotEventHub:
+    """Per-process fan-out: one pattern subscription on Redis, local subscribers grouped by lawyer id."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self._listener = None
+
+    def subscribe(self, lawyer_id) -> Subscriber:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+        subscriber = Subscriber()
+        self.subscribers[lawyer_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, lawyer_id, subscriber):
+        subscribers = self.subscribers.get(lawyer_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[lawyer_id]
+
+    @property
+    def subscriber_count(self):
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    def dispatch(self, channel, data):
+        try:
+            lawyer_id = int(channel.rsplit(b':', 1)[1])
+        except (IndexError, ValueError):
+            return
+        for subscriber in self.subscribers.get(lawyer_id, ()):
+            subscriber.deliver(data)
+
+    async def _listen(self):
+        attempt = 0
+        lost = False
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(CHANNEL_PATTERN)
+                    attempt = 0
+                    if lost: # Events published while we were away are gone: have clients refetch now
+                        lost = False
+                        for subscribers in self.subscribers.values():
+                            for subscriber in subscribers:
+                                subscriber.resync()
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            self.dispatch(message['channel'], message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e: # Redis restarts etc.: reconnect, and have clients resync
+                logger.warning("Slot event listener lost Redis (%s); reconnecting.", e)
+                lost = True
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS[min(attempt, len(RECONNECT_DELAY_SECONDS) - 1)])
+                attempt += 1
+            finally:
+                await client.aclose()
+
+
+hub = SlotEventHub()
+
+
+def _authorize(token, lawyer_id):
+    """Returns (status, error message), or None if `token` is valid and the lawyer exists. Runs in a worker thread."""
+    close_old_connections()
+    try:
+        CognitoAuthentication().authenticate_token(token)
+        if not LawyerProfile.objects.filter(id=lawyer_id).exists():
+            return 404, 'Lawyer not found.'
+        return None
+    except exceptions.AuthenticationFailed as e:
+        return 401, str(e.detail)
+    finally:
+        close_old_connections()
+
+
+async def _respond_error(send, status, message, headers):
+    body = ('{"error": "%s"}' % message.replace('"', "'")).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers + [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _cors_headers(scope):
+    origin = dict(scope.get('headers', [])).get(b'origin')
+    if origin and origin.decode('latin-1') in settings.CORS_ALLOWED_ORIGINS:
+        return [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+    return []
+
+
+async def slot_events_app(scope, receive, send):
+    headers = _cors_headers(scope)
+    match = PATH_RE.match(scope['path'])
+    if scope['method'] != 'GET' or not match:
+        return await _respond_error(send, 404, 'Not found.', headers)
+    lawyer_id = int(match.group(1))
+
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    auth_header = dict(scope.get('headers', [])).get(b'authorization', b'').decode('latin-1').split()
+    if len(auth_header) == 2 and auth_header[0].lower() == 'bearer':
+        token = auth_header[1]
+    if not token:
+        return await _respond_error(send, 401, 'Authentication credentials were not provided.', headers)
+    error = await sync_to_async(_authorize)(token, lawyer_id)
+    if error:
+        return await _respond_error(send, error[0], error[1], headers)
+
+    subscriber = hub.subscribe(lawyer_id)
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscriber.close()
+
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers + [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'), # Don't let nginx buffer the stream
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while not subscriber.closed:
+            try:
+                data = await asyncio.wait_for(subscriber.queue.get(), settings.SLOT_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                chunk = b': ping\n\n'
+            else:
+                if data is None:
+                    break
+                chunk = b'' if data is RESYNC else b'event: slot\ndata: ' + data + b'\n\n'
+            if subscriber.overflowed and subscriber.queue.empty():
+                subscriber.overflowed = False
+                chunk += b'event: resync\ndata: {}\n\n'
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    except OSError: # Client went away mid-send
+        pass
+    finally:
+        hub.unsubscribe(lawyer_id, subscriber)
+        watcher.cancel()
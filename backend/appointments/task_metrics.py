@@ -0,0 +1,176 @@
+"""
+Lightweight Celery task telemetry.
+
+Signal handlers record, per task name, the runtime, the time a message spent waiting in the
+queue and whether the run failed. Samples are folded into fixed log-scale histograms kept in
+Redis hashes, one hash per task per hour, so storage stays constant no matter how many tasks run
+and percentiles can be estimated for any window of whole hours.
+
+Cost per task is one pipelined Redis round-trip in task_postrun; the other handlers only
+touch in-process state. Redis failures are logged and swallowed so metrics can never fail a task.
+"""
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from celery.signals import before_task_publish, task_prerun, task_postrun, task_failure
+from django.conf import settings
+
+from config.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'task_metrics'
+TASKS_KEY = f'{KEY_PREFIX}:tasks' # Set of task names that have reported metrics
+PUBLISHED_AT_HEADER = 'published_at' # Message header stamped by before_task_publish
+
+# Upper bounds (milliseconds) of the histogram buckets; the last bucket is open-ended.
+BUCKET_BOUNDS_MS = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500,
+    1000, 2000, 5000, 10000, 30000, 60000, 300000, 900000,
+)
+
+
+def _bucket_index(value_ms: float) -> int:
+    return bisect_left(BUCKET_BOUNDS_MS, value_ms)
+
+
+def _hour_key(task_name: str, moment: datetime) -> str:
+    return f"{KEY_PREFIX}:{task_name}:{moment.strftime('%Y%m%d%H')}"
+
+
+# --- Signal handlers ---
+
+@before_task_publish.connect
+def stamp_publish_time(sender=None, headers=None, **kwargs):
+    """Stamps the wall-clock publish time into the message headers (no I/O)."""
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def mark_task_start(sender=None, task=None, **kwargs):
+    if task is None:
+        return
+    task.request.metrics_started_wall = time.time()
+    task.request.metrics_started = time.perf_counter()
+    task.request.metrics_failed = False
+
+
+@task_failure.connect
+def mark_task_failure(sender=None, **kwargs):
+    # task_failure fires inside the task's request context, just before task_postrun,
+    # so flagging the request lets task_postrun write everything in a single round-trip.
+    if sender is not None:
+        sender.request.metrics_failed = True
+
+
+@task_postrun.connect
+def record_task_metrics(sender=None, task=None, state=None, **kwargs):
+    if task is None or not settings.TASK_METRICS_ENABLED:
+        return
+    started = getattr(task.request, 'metrics_started', None)
+    if started is None:
+        return
+    runtime_ms = (time.perf_counter() - started) * 1000
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    queue_wait_ms = None
+    if published_at:
+        # Wall clocks of publisher and worker may differ slightly; clamp negatives.
+        queue_wait_ms = max(0.0, (task.request.metrics_started_wall - float(published_at)) * 1000)
+    failed = getattr(task.request, 'metrics_failed', False) or state == 'FAILURE'
+    try:
+        _record(task.name, runtime_ms, queue_wait_ms, failed)
+    except Exception as e:
+        logger.debug(f"Could not record metrics for task {task.name}: {e}")
+
+
+def _record(task_name: str, runtime_ms: float, queue_wait_ms, failed: bool, now: datetime = None):
+    now = now or datetime.now(dt_timezone.utc)
+    key = _hour_key(task_name, now)
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.hincrby(key, 'n', 1)
+    pipe.hincrby(key, f'rt:{_bucket_index(runtime_ms)}', 1)
+    pipe.hincrby(key, 'rt_sum', int(runtime_ms))
+    if queue_wait_ms is not None:
+        pipe.hincrby(key, 'qn', 1)
+        pipe.hincrby(key, f'qw:{_bucket_index(queue_wait_ms)}', 1)
+        pipe.hincrby(key, 'qw_sum', int(queue_wait_ms))
+    if failed:
+        pipe.hincrby(key, 'fail', 1)
+    pipe.expire(key, settings.TASK_METRICS_RETENTION_HOURS * 3600)
+    pipe.sadd(TASKS_KEY, task_name)
+    pipe.execute()
+
+
+# --- Reading ---
+
+def _percentile(histogram: list, total: int, fraction: float):
+    """Estimates a percentile from bucket counts, interpolating linearly inside the bucket."""
+    if not total:
+        return None
+    target = total * fraction
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if not count:
+            continue
+        if cumulative + count >= target:
+            lower = BUCKET_BOUNDS_MS[index - 1] if index > 0 else 0
+            upper = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else lower
+            return round(lower + (upper - lower) * ((target - cumulative) / count), 2)
+        cumulative += count
+    return float(BUCKET_BOUNDS_MS[-1])
+
+
+def _summarize(histogram: list, total: int, total_ms: int) -> dict:
+    return {
+        'count': total,
+        'avg': round(total_ms / total, 2) if total else None,
+        'p50': _percentile(histogram, total, 0.50),
+        'p95': _percentile(histogram, total, 0.95),
+        'p99': _percentile(histogram, total, 0.99),
+    }
+
+
+def get_task_names() -> list:
+    return sorted(name.decode() for name in get_redis_client().smembers(TASKS_KEY))
+
+
+def get_task_metrics(task_names: list, window_hours: int = 24) -> list:
+    """
+    Aggregates the hourly buckets of the last `window_hours` hours for each task.
+    Issues a single pipelined round-trip regardless of the number of tasks and hours.
+    """
+    now = datetime.now(dt_timezone.utc)
+    hours = [now - timedelta(hours=offset) for offset in range(window_hours)]
+    pipe = get_redis_client().pipeline(transaction=False)
+    for task_name in task_names:
+        for hour in hours:
+            pipe.hgetall(_hour_key(task_name, hour))
+    raw = pipe.execute()
+
+    bucket_count = len(BUCKET_BOUNDS_MS) + 1
+    results = []
+    for position, task_name in enumerate(task_names):
+        totals = {'n': 0, 'fail': 0, 'rt_sum': 0, 'qn': 0, 'qw_sum': 0}
+        runtime_hist = [0] * bucket_count
+        queue_hist = [0] * bucket_count
+        for bucket in raw[position * window_hours:(position + 1) * window_hours]:
+            for field, value in bucket.items():
+                field, value = field.decode(), int(value)
+                if field.startswith('rt:'):
+                    runtime_hist[int(field[3:])] += value
+                elif field.startswith('qw:'):
+                    queue_hist[int(field[3:])] += value
+                else:
+                    totals[field] = totals.get(field, 0) + value
+        results.append({
+            'task': task_name,
+            'runs': totals['n'],
+            'failures': totals['fail'],
+            'error_rate': round(totals['fail'] / totals['n'], 4) if totals['n'] else None,
+            'runtime_ms': _summarize(runtime_hist, totals['n'], totals['rt_sum']),
+            'queue_wait_ms': _summarize(queue_hist, totals['qn'], totals['qw_sum']),
+        })
+    return results
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from threading import Lock
+
+from celery import current_app
+
+PROGRESS_STATE = 'PROGRESS'
+
+
+@dataclass(frozen=True)
+class TaskRegistrySnapshot:
+    """
+    Immutable view of the registered Celery tasks, sorted once per registry change, so serializers can
+    share it instead of re-sorting the registry per instance.
+    """
+    registry_size: int
+    names: tuple
+
+    def apply_to_choice_field(self, field) -> None:
+        field.choices = self.names # DRF's public setter builds the field's lookups (a few dozen names)
+
+
+_snapshot = None
+_snapshot_lock = Lock()
+
+
+def get_task_registry_snapshot() -> TaskRegistrySnapshot:
+    """
+    Returns the memoized snapshot of registered tasks (Celery's internal `celery.*` tasks excluded).
+    The snapshot is rebuilt when the registry changes size or after invalidate_task_registry().
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.registry_size == len(current_app.tasks):
+        return snapshot
+    with _snapshot_lock:
+        # Web processes never start a worker, so the lazy autodiscovery of `<app>/tasks.py` modules
+        # (config.celery's autodiscover_tasks) has to be triggered explicitly before reading the registry.
+        if _snapshot is None:
+            current_app.loader.import_default_modules()
+        names = tuple(name for name in sorted(current_app.tasks.keys()) if not name.startswith('celery.'))
+        _snapshot = TaskRegistrySnapshot(registry_size=len(current_app.tasks), names=names)
+        return _snapshot
+
+
+def invalidate_task_registry() -> None:
+    """Drops the memoized snapshot; the next read re-imports task modules and rebuilds it."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def get_registered_task_names() -> tuple:
+    """Sorted names of the Celery tasks registered in this process, excluding Celery's internal ones."""
+    return get_task_registry_snapshot().names
+
+
+def report_progress(task, current: int, total: int = None, message: str = '') -> None:
+    """
+    Publishes progress for a running bound task (`@shared_task(bind=True)`) so that admins polling
+    the trigger-task status endpoint can see how far along it is.
+    """
+    meta = {'current': current, 'total': total, 'message': message}
+    if total:
+        meta['percent'] = round(current * 100 / total, 1)
+    task.update_state(state=PROGRESS_STATE, meta=meta)
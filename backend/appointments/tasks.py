@@ -1,7 +1,18 @@
 from celery import shared_task
 from django.utils import timezone
-from .models import SlotReservation
+from django.conf import settings
+from .models import SlotReservation, WaitlistEntry, CapacitySnapshot, ExternalCalendar
+from . import partitions
+from .slot_events import SLOT_FREED, publish_reservation_event
+from . import waitlist
+from . import capacity
+from . import analytics
+from . import exports
+from . import changes
+from . import external_calendars
+from .task_utils import report_progress
 from datetime import timedelta
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +20,8 @@ logger = logging.getLogger(__name__)
 @shared_task(name="appointments.cleanup_expired_reservations_task")
 def cleanup_expired_reservations_task(grace_period_minutes=60):
     """
-    Celery task to delete expired slot reservations older than a grace period.
+    Celery task to delete expired slot reservations older than a grace period, then offer the freed
+    slots (and slots queued by cancellations since the last run) to waitlisted clients in one batch.
     Args:
         grace_period_minutes (int): Delete reservations expired for at least this many minutes.
     """
@@ -25,20 +37,177 @@ def cleanup_expired_reservations_task(grace_period_minutes=60):
 
         if count > 0:
             # Log details before deleting for better traceability if needed
-            for reservation in expired_reservations.iterator(): # Use iterator for potentially large querysets
+            expired = list(expired_reservations)
+            for reservation in expired:
                 logger.warning(
                     f"[Celery Task] Deleting expired reservation ID {reservation.id} for lawyer "
                     f"{reservation.lawyer_id}, client {reservation.client_profile_id} "
                     f"(expired at {reservation.reserved_until.strftime('%Y-%m-%d %H:%M:%S %Z')}). PI: {reservation.stripe_payment_intent_id}"
                 )
             
-            deleted_count, _ = expired_reservations.delete()
+            expired_ids = [reservation.id for reservation in expired]
+            WaitlistEntry.objects.filter(offer_reservation_id__in=expired_ids, status='offered').update(status='lapsed')
+            deleted_count, _ = SlotReservation.objects.filter(id__in=expired_ids).delete()
+            for reservation in expired:
+                publish_reservation_event(SLOT_FREED, reservation) # Booking pages still showing the hold can drop it
             logger.info(f'[Celery Task] Successfully deleted {deleted_count} expired slot reservation(s).')
-            return f'Deleted {deleted_count} reservations.'
+            result = f'Deleted {deleted_count} reservations.'
         else:
+            expired = []
             logger.info('[Celery Task] No expired slot reservations found to delete.')
-            return 'No expired reservations to delete.'
+            result = 'No expired reservations to delete.'
+
+        # Waitlist matching, batched over everything freed since the last run
+        closed = waitlist.expire_waitlist(timezone.now())
+        freed = [(reservation.lawyer_id, reservation.start_time, reservation.end_time) for reservation in expired]
+        freed += waitlist.drain_freed_slots()
+        offers = waitlist.offer_freed_slots(freed)
+        if freed or closed:
+            logger.info(f'[Celery Task] Waitlist: {len(freed)} freed slot(s), {offers} offer(s) made, {closed} entry(ies) expired.')
+        return f'{result} {offers} waitlist offer(s).'
     except Exception as e:
         logger.error(f"[Celery Task] Error during cleanup_expired_reservations_task: {e}", exc_info=True)
         # Reraise the exception so Celery can mark the task as failed
-        raise 
\ No newline at end of file
+        raise 
+
+@shared_task(name="appointments.maintain_appointment_partitions_task")
+def maintain_appointment_partitions_task(months_ahead=None, archive_after_months=None):
+    """
+    Celery task (run daily) that keeps the monthly Appointment partitions in shape on PostgreSQL:
+    pre-creates partitions `months_ahead` months into the future and archives partitions older than
+    `archive_after_months` into AppointmentArchive. Does nothing if the table isn't partitioned.
+    """
+    months_ahead = settings.APPOINTMENT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    archive_after_months = settings.APPOINTMENT_ARCHIVE_AFTER_MONTHS if archive_after_months is None else archive_after_months
+    if not partitions.is_partitioned():
+        logger.info('[Celery Task] Appointment table is not partitioned; nothing to maintain.')
+        return 'Appointment table is not partitioned.'
+
+    created = partitions.ensure_future_partitions(months_ahead)
+    cutoff = partitions.add_months(partitions.month_start(timezone.now()), -archive_after_months)
+    archived = partitions.archive_partitions_before(cutoff)
+    for name, rows in archived.items():
+        logger.info(f'[Celery Task] Archived {rows} appointment(s) from {name}.')
+    logger.info(f"[Celery Task] Created {len(created)} appointment partition(s): {', '.join(f'{m:%Y-%m}' for m in created) or 'none'}.")
+    return f'Created {len(created)} partition(s), archived {len(archived)} partition(s) ({sum(archived.values())} rows).'
+
+@shared_task(name="appointments.build_capacity_snapshot_task")
+def build_capacity_snapshot_task(days=None):
+    """
+    Celery task (run daily) that precomputes the firm-wide capacity report for the next `days` days
+    (settings.CAPACITY_SNAPSHOT_DAYS) into today's CapacitySnapshot, and deletes snapshots older than
+    settings.CAPACITY_SNAPSHOT_RETENTION_DAYS.
+    """
+    days = settings.CAPACITY_SNAPSHOT_DAYS if days is None else days
+    try:
+        today = timezone.localdate()
+        last_day = today + timedelta(days=days - 1)
+        started = time.perf_counter()
+        report = capacity.build_report(today, last_day)
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        CapacitySnapshot.objects.update_or_create(
+            date=today, defaults={'first_day': today, 'last_day': last_day, 'report': report, 'duration_ms': duration_ms}
+        )
+        pruned, _ = CapacitySnapshot.objects.filter(
+            date__lt=today - timedelta(days=settings.CAPACITY_SNAPSHOT_RETENTION_DAYS)
+        ).delete()
+        logger.info(f"[Celery Task] Built capacity snapshot for {report['lawyers']} lawyer(s), {today} - {last_day}, in {duration_ms} ms.")
+        return f"Capacity snapshot for {report['lawyers']} lawyers over {days} days in {duration_ms} ms; pruned {pruned}."
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during build_capacity_snapshot_task: {e}", exc_info=True)
+        raise
+
+@shared_task(name="appointments.reconcile_appointment_rollups_task")
+def reconcile_appointment_rollups_task(full=False):
+    """
+    Celery task (run nightly) that recomputes the appointment rollups of the (lawyer, day) pairs written
+    since the last run. With full=True it rebuilds all rollups instead (run once to backfill).
+    """
+    try:
+        if full:
+            rows = analytics.rebuild_all()
+            logger.info(f'[Celery Task] Rebuilt {rows} appointment rollup row(s).')
+            return f'Rebuilt {rows} rollup rows.'
+        days = analytics.reconcile_dirty_days()
+        logger.info(f'[Celery Task] Reconciled appointment rollups for {days} lawyer day(s).')
+        return f'Reconciled {days} lawyer days.'
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during reconcile_appointment_rollups_task: {e}", exc_info=True)
+        raise
+
+@shared_task(bind=True, name="appointments.export_dataset_task")
+def export_dataset_task(self, dataset, params, output, filename):
+    """
+    Celery task that writes an admin export (appointments/exports.py) as a gzip file into
+    settings.EXPORTS_DIR, reporting progress (uncompressed bytes written), then deletes export files older
+    than settings.EXPORT_FILE_RETENTION_HOURS. The result holds the filename to download.
+    """
+    try:
+        last_report = [0]
+
+        def progress(written):
+            if written - last_report[0] >= 8 * 1024 * 1024: # Every 8 MB
+                last_report[0] = written
+                report_progress(self, written, message='Uncompressed bytes written')
+
+        started = time.perf_counter()
+        written = exports.write_file(dataset, params, output, filename, progress=progress)
+        deleted = exports.delete_expired_files(settings.EXPORT_FILE_RETENTION_HOURS)
+        logger.info(f'[Celery Task] Exported {dataset} to {filename} ({written} bytes uncompressed) in {time.perf_counter() - started:.1f} s.')
+        if deleted:
+            logger.info(f'[Celery Task] Deleted {deleted} expired export file(s).')
+        return {'filename': filename, 'bytes_uncompressed': written}
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during export_dataset_task ({dataset}): {e}", exc_info=True)
+        raise
+
+@shared_task(name="appointments.prune_appointment_changes_task")
+def prune_appointment_changes_task():
+    """
+    Celery task (run daily) that deletes appointment changes older than
+    settings.APPOINTMENT_CHANGES_RETENTION_DAYS. Consumers that hadn't read all the pruned changes get 410
+    from the changes feed and resync from the full appointment list.
+    """
+    try:
+        deleted = changes.prune(timezone.now() - timedelta(days=settings.APPOINTMENT_CHANGES_RETENTION_DAYS))
+        logger.info(f'[Celery Task] Pruned {deleted} appointment change(s).')
+        return f'Pruned {deleted} appointment changes.'
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during prune_appointment_changes_task: {e}", exc_info=True)
+        raise
+
+@shared_task(name="appointments.sync_external_calendar_task")
+def sync_external_calendar_task(calendar_id):
+    """
+    Celery task that downloads one ExternalCalendar's URL and rewrites the events that changed (queued when a
+    lawyer adds a calendar or asks for a sync). Download and parse errors are saved on the calendar.
+    """
+    try:
+        calendar = ExternalCalendar.objects.filter(id=calendar_id).first()
+        if calendar is None:
+            return 'Calendar not found.'
+        counts = external_calendars.sync_calendar(calendar)
+        logger.info(f'[Celery Task] Synced external calendar {calendar_id}: {counts}.')
+        return counts
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during sync_external_calendar_task ({calendar_id}): {e}", exc_info=True)
+        raise
+
+@shared_task(name="appointments.sync_external_calendars_task")
+def sync_external_calendars_task():
+    """
+    Celery task (run hourly) that re-syncs every ExternalCalendar: URL calendars are downloaded again (only
+    changed events are rewritten), and recurring events of uploaded ones are extended as the horizon moves.
+    """
+    try:
+        synced = failed = 0
+        for calendar in ExternalCalendar.objects.order_by('id').iterator():
+            if external_calendars.sync_calendar(calendar) is None:
+                failed += 1
+            else:
+                synced += 1
+        logger.info(f'[Celery Task] Synced {synced} external calendar(s); {failed} failed.')
+        return f'Synced {synced} external calendars, {failed} failed.'
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during sync_external_calendars_task: {e}", exc_info=True)
+        raise
@@ -1,3 +1,516 @@
-from django.test import TestCase
+import socket
+import threading
+import time
+from datetime import date, datetime, time as time_of_day, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.provisioning import provision_user
+from . import analytics, changes, external_calendars, waitlist
+from .models import (
+    Appointment, AppointmentChange, AppointmentDailyRollup, BookingSeries, SlotReservation, WaitlistEntry, WeeklyAvailability,
+)
+
+
+def _event(rule, dtstart='20260105T090000Z', duration='PT30M'):
+    lines = ['BEGIN:VEVENT', 'UID:test@example.test', f'DTSTART:{dtstart}', f'DURATION:{duration}', f'RRULE:{rule}', 'END:VEVENT']
+    return '\r\n'.join(lines)
+
+
+class ExternalCalendarExpandTests(SimpleTestCase):
+    """Expanding an uploaded event's recurrence must stay bounded, whatever the rule."""
+
+    window_start = datetime(2026, 1, 5, tzinfo=dt_timezone.utc)
+    window_end = window_start + timedelta(days=430)
+
+    def expand(self, source):
+        return external_calendars.expand(source, self.window_start, self.window_end)
+
+    def test_weekly_rule_expands_within_window(self):
+        intervals, recurring = self.expand(_event('FREQ=WEEKLY;COUNT=10'))
+        self.assertTrue(recurring)
+        self.assertEqual(len(intervals), 10)
+        self.assertEqual(intervals[1][0] - intervals[0][0], timedelta(weeks=1))
+
+    def test_sub_hourly_frequencies_are_rejected(self):
+        for frequency in ('MINUTELY', 'SECONDLY', 'secondly'):
+            with self.subTest(frequency=frequency), self.assertRaises(ValueError):
+                self.expand(_event(f'FREQ={frequency}'))
+
+    def test_occurrences_are_capped(self):
+        rule = 'FREQ=HOURLY;BYMINUTE=' + ','.join(str(minute) for minute in range(60)) # Every minute, spelled hourly
+        started = time.perf_counter()
+        intervals, _ = self.expand(_event(rule, duration='PT1M'))
+        self.assertEqual(len(intervals), external_calendars.MAX_OCCURRENCES)
+        self.assertLess(time.perf_counter() - started, 5)
+
+    def test_rule_steps_before_the_window_are_capped(self):
+        started = time.perf_counter()
+        intervals, _ = self.expand(_event('FREQ=HOURLY', dtstart='19000101T000000Z'))
+        self.assertEqual(intervals, []) # Gives up before reaching the window
+        self.assertLess(time.perf_counter() - started, 5)
+
+
+class _CalendarHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.headers['Host'], self.path))
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'BEGIN:VCALENDAR')
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS=False)
+class ExternalCalendarFetchTests(SimpleTestCase):
+    """Calendar URLs are fetched from the address check_url() approved, not from a second DNS lookup."""
+
+    def setUp(self):
+        server = HTTPServer(('127.0.0.1', 0), _CalendarHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.port = server.server_address[1]
+        _CalendarHandler.requests = []
+
+    def test_checked_address_is_used(self):
+        getaddrinfo = socket.getaddrinfo
+
+        def resolve(host, *args, **kwargs):
+            self.assertEqual(host, '127.0.0.1') # calendar.example.test must not be looked up again
+            return getaddrinfo(host, *args, **kwargs)
+
+        with mock.patch.object(external_calendars, 'check_url', return_value='127.0.0.1'), \
+                mock.patch('socket.getaddrinfo', side_effect=resolve):
+            data = external_calendars.fetch(f'http://calendar.example.test:{self.port}/busy.ics?token=1')
+        self.assertEqual(data, b'BEGIN:VCALENDAR')
+        self.assertEqual(_CalendarHandler.requests, [(f'calendar.example.test:{self.port}', '/busy.ics?token=1')])
+
+    def test_check_url_resolves_the_scheme_default_port(self):
+        public = [(2, 1, 6, '', ('93.184.216.34', 0))]
+        for url, port in (('http://calendar.example.test/', 80), ('https://calendar.example.test/', 443), ('http://calendar.example.test:8080/', 8080)):
+            with self.subTest(url=url), mock.patch.object(external_calendars.socket, 'getaddrinfo', return_value=public) as getaddrinfo:
+                self.assertEqual(external_calendars.check_url(url), '93.184.216.34')
+                self.assertEqual(getaddrinfo.call_args.args, ('calendar.example.test', port))
+
+    def test_private_addresses_are_rejected(self):
+        private = [(2, 1, 6, '', ('93.184.216.34', 0)), (2, 1, 6, '', ('10.0.0.5', 0))]
+        with mock.patch.object(external_calendars.socket, 'getaddrinfo', return_value=private):
+            with self.assertRaises(external_calendars.ExternalCalendarError):
+                external_calendars.check_url('https://calendar.example.test/')
+
+
+class _FakeRedis:
+    """In-memory stand-in for the Redis commands the tests below reach."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+
+    def sadd(self, key, *members):
+        self.values.setdefault(key, set()).update(member.encode() for member in members)
+
+    def spop(self, key, count):
+        members = self.values.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+
+class ChangeFeedTests(TestCase):
+    """Every appointment write appears once in the change feed, which pages and prunes by (transaction_id, id)."""
+
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch('appointments.changes.get_redis_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _, lawyer_profile = provision_user('feed-lawyer', 'lawyer')
+        _, self.client_profile = provision_user('feed-client', 'client')
+        self.lawyer = lawyer_profile.lawyer_details
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=7)
+
+    def book(self, hours=0, **fields):
+        start = self.start + timedelta(hours=hours)
+        return Appointment.objects.create(lawyer=self.lawyer, client=self.client_profile, start=start, end=start + timedelta(hours=1), **fields)
+
+    def read_all(self, cursor=None, limit=500):
+        result, next_cursor, has_more = changes.changes_since(cursor, limit)
+        self.assertFalse(has_more)
+        return result, next_cursor
+
+    def test_writes_are_recorded_with_the_values_after_them(self):
+        appointment = self.book()
+        appointment.amount_cents = 7550
+        appointment.save()
+        appointment.save() # Nothing changed: no entry
+        appointment.status = 'cancelled'
+        appointment.save()
+        appointment_id = appointment.id
+        appointment.delete()
+
+        feed, _ = self.read_all()
+        self.assertEqual([change['change_type'] for change in feed], ['created', 'updated', 'cancelled', 'deleted'])
+        self.assertEqual({change['appointment_id'] for change in feed}, {appointment_id})
+        self.assertEqual(feed[1]['changed_fields'], ['amount_cents'])
+        self.assertEqual(feed[1]['amount_cents'], 7550)
+        self.assertEqual(feed[2]['changed_fields'], ['status'])
+        self.assertEqual((feed[3]['status'], feed[3]['amount_cents']), ('cancelled', 7550))
+
+    def test_save_with_deferred_fields_records_the_written_values(self):
+        appointment = self.book()
+        loaded = Appointment.objects.only('id').get(id=appointment.id)
+        loaded.status = 'confirmed'
+        loaded.save(update_fields=['status'])
+        change = changes.changes_since(None, 500)[0][-1]
+        self.assertEqual((change['change_type'], change['changed_fields'], change['status']), ('updated', None, 'confirmed'))
+
+    def test_pages_follow_transaction_order(self):
+        created = [self.book(hours=hour) for hour in range(5)]
+        first = AppointmentChange.objects.get(appointment_id=created[0].id)
+        AppointmentChange.objects.filter(id=first.id).update(transaction_id=1) # Committed after the others
+
+        seen, cursor = [], None
+        while True:
+            page, next_cursor, has_more = changes.changes_since(cursor, 2)
+            self.assertLessEqual(len(page), 2)
+            if page:
+                self.assertEqual(next_cursor, page[-1]['cursor'])
+            seen.extend(change['appointment_id'] for change in page)
+            cursor = changes.parse_cursor(next_cursor)
+            if not has_more:
+                break
+        self.assertEqual(seen, [appointment.id for appointment in created[1:] + created[:1]])
+        self.assertEqual(changes.changes_since(cursor, 2), ([], changes.format_cursor(*cursor), False))
+
+    def test_prune_then_resume_from_a_cursor(self):
+        created = [self.book(hours=hour) for hour in range(4)]
+        page, next_cursor, _ = changes.changes_since(None, 2)
+        AppointmentChange.objects.filter(appointment_id__in=[a.id for a in created[:3]]).update(changed_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(changes.prune(timezone.now() - timedelta(days=1)), 3)
+        self.assertTrue(changes.cursor_expired(changes.parse_cursor(next_cursor))) # The third change was pruned unread
+
+        rest, _ = self.read_all()
+        self.assertEqual([change['appointment_id'] for change in rest], [created[3].id])
+        cursor = changes.parse_cursor(changes.changes_since(None, 500)[0][0]['cursor'])
+        self.assertFalse(changes.cursor_expired(cursor))
+
+    def test_cursor_expires_only_once_unread_changes_are_pruned(self):
+        created = [self.book(hours=hour) for hour in range(3)]
+        _, read_through, _ = changes.changes_since(None, 2) # The consumer has read the first two
+        AppointmentChange.objects.filter(appointment_id__in=[a.id for a in created[:2]]).update(changed_at=timezone.now() - timedelta(days=30))
+        changes.prune(timezone.now() - timedelta(days=1))
+
+        cursor = changes.parse_cursor(read_through)
+        self.assertFalse(AppointmentChange.objects.filter(id=cursor[1]).exists())
+        self.assertFalse(changes.cursor_expired(cursor)) # Its change is gone, but nothing unread was pruned
+        self.assertEqual([change['appointment_id'] for change in self.read_all(cursor)[0]], [created[2].id])
+        self.assertTrue(changes.cursor_expired((cursor[0], cursor[1] - 1)))
+
+    def test_cursor_without_pruning_record_is_valid_while_its_change_exists(self):
+        self.book()
+        cursor = changes.parse_cursor(changes.changes_since(None, 500)[1])
+        self.assertFalse(changes.cursor_expired(cursor))
+        AppointmentChange.objects.all().delete()
+        self.assertTrue(changes.cursor_expired(cursor))
+
+    def test_view_pages_and_answers_410_for_expired_cursors(self):
+        admin, _ = provision_user('feed-admin', 'admin')
+        api = APIClient()
+        api.force_authenticate(admin)
+        created = [self.book(hours=hour) for hour in range(3)]
+        url = '/api/admin/appointments/changes/'
+
+        response = api.get(url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['has_more'])
+        stale_cursor = response.data['changes'][0]['cursor']
+        response = api.get(url, {'since': response.data['next_cursor']})
+        self.assertEqual([change['appointment_id'] for change in response.data['changes']], [created[2].id])
+        self.assertFalse(response.data['has_more'])
+
+        AppointmentChange.objects.filter(appointment_id__in=[a.id for a in created[:2]]).update(changed_at=timezone.now() - timedelta(days=30))
+        changes.prune(timezone.now() - timedelta(days=1))
+        self.assertEqual(api.get(url, {'since': stale_cursor}).status_code, 410)
+        self.assertEqual(api.get(url, {'since': 'not-a-cursor'}).status_code, 400)
+
+
+class RollupTests(TestCase):
+    """Incrementally maintained rollups must equal what recompute() derives from Appointment."""
+
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch('appointments.analytics.get_redis_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _, lawyer_profile = provision_user('rollup-lawyer', 'lawyer')
+        _, self.client_profile = provision_user('rollup-client', 'client')
+        self.lawyer = lawyer_profile.lawyer_details
+        self.start = datetime(2026, 3, 10, 23, 0, tzinfo=dt_timezone.utc) # Late: an hour later is the next day
+
+    def book(self, hours=0, minutes=60, **fields):
+        start = self.start + timedelta(hours=hours)
+        return Appointment.objects.create(
+            lawyer=self.lawyer, client=self.client_profile, start=start, end=start + timedelta(minutes=minutes), **fields,
+        )
+
+    def rollups(self):
+        return {
+            (row.lawyer_id, row.date, row.status): (row.count, row.booked_minutes, row.amount_cents)
+            for row in AppointmentDailyRollup.objects.all()
+            if row.count or row.booked_minutes or row.amount_cents # Emptied rows stay until recomputed
+        }
+
+    def assertMatchesRecompute(self):
+        incremental = self.rollups()
+        days = set(AppointmentDailyRollup.objects.values_list('lawyer_id', 'date'))
+        days.update((a.lawyer_id, timezone.localtime(a.start).date()) for a in Appointment.objects.all())
+        analytics.recompute(days)
+        self.assertEqual(incremental, self.rollups())
+        return incremental
+
+    def test_creates_and_status_changes(self):
+        self.book(amount_cents=5000)
+        confirmed = self.book(hours=-2, minutes=30, amount_cents=2500)
+        confirmed.status = 'confirmed'
+        confirmed.save()
+        cancelled = self.book(hours=-4)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        day = self.start.date()
+        self.assertEqual(self.assertMatchesRecompute(), {
+            (self.lawyer.id, day, 'pending'): (1, 60, 5000),
+            (self.lawyer.id, day, 'confirmed'): (1, 30, 2500),
+            (self.lawyer.id, day, 'cancelled'): (1, 60, 0),
+        })
+
+    def test_moves_between_days(self):
+        appointment = self.book(amount_cents=5000)
+        appointment.start += timedelta(hours=2)
+        appointment.end += timedelta(hours=2, minutes=30)
+        appointment.save()
+        self.assertEqual(self.assertMatchesRecompute(), {(self.lawyer.id, self.start.date() + timedelta(days=1), 'pending'): (1, 90, 5000)})
+
+    def test_deletes(self):
+        kept = self.book(amount_cents=1000)
+        self.book(hours=-1, amount_cents=2000).delete()
+        Appointment.objects.get(id=kept.id).delete() # Loaded fresh, as admin actions do
+        self.assertEqual(self.assertMatchesRecompute(), {})
+
+    def test_deferred_field_saves(self):
+        appointment = self.book(amount_cents=5000)
+        loaded = Appointment.objects.only('lawyer_id', 'start', 'end', 'status', 'amount_cents').get(id=appointment.id)
+        loaded.status = 'confirmed'
+        loaded.save() # Every rollup field is loaded: applied as a delta
+        self.assertEqual(self.assertMatchesRecompute(), {(self.lawyer.id, self.start.date(), 'confirmed'): (1, 60, 5000)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded = Appointment.objects.only('id').get(id=appointment.id)
+            loaded.status = 'cancelled'
+            loaded.save(update_fields=['status']) # Previous values unknown: the day is left to reconciliation
+        self.assertEqual(analytics.reconcile_dirty_days(), 1)
+        self.assertEqual(self.assertMatchesRecompute(), {(self.lawyer.id, self.start.date(), 'cancelled'): (1, 60, 5000)})
+
+    def test_bulk_created_appointments(self):
+        self.book(amount_cents=1000)
+        appointments = Appointment.objects.bulk_create([
+            Appointment(
+                lawyer=self.lawyer, client=self.client_profile, start=self.start + timedelta(days=7 * week),
+                end=self.start + timedelta(days=7 * week, minutes=45), amount_cents=3000,
+            )
+            for week in range(3)
+        ])
+        analytics.record_created(appointments)
+        rollups = self.assertMatchesRecompute()
+        self.assertEqual(rollups[(self.lawyer.id, self.start.date(), 'pending')], (2, 105, 4000))
+        self.assertEqual(len(rollups), 3)
+
+
+class WaitlistIndexTests(SimpleTestCase):
+    """pop_first_match hands out the oldest entry whose window contains the slot, each entry once."""
+
+    base = datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc)
+
+    def entry(self, entry_id, start_hours, end_hours):
+        return SimpleNamespace(id=entry_id, window_start=self.base + timedelta(hours=start_hours), window_end=self.base + timedelta(hours=end_hours))
+
+    def slot(self, hours, minutes=60):
+        start = self.base + timedelta(hours=hours)
+        return start, start + timedelta(minutes=minutes)
+
+    def test_oldest_containing_entry_wins(self):
+        index = waitlist.WaitlistIndex([self.entry(5, 0, 8), self.entry(2, 1, 4), self.entry(9, 2, 3), self.entry(7, 6, 9)])
+        self.assertEqual(index.pop_first_match(*self.slot(2)).id, 2)
+        self.assertEqual(index.pop_first_match(*self.slot(2)).id, 5)
+        self.assertEqual(index.pop_first_match(*self.slot(2)).id, 9)
+        self.assertIsNone(index.pop_first_match(*self.slot(2)))
+        self.assertEqual(index.pop_first_match(*self.slot(7)).id, 7)
+
+    def test_slot_must_fit_inside_the_window(self):
+        index = waitlist.WaitlistIndex([self.entry(1, 1, 3)])
+        self.assertIsNone(index.pop_first_match(*self.slot(0, minutes=90))) # Starts before the window
+        self.assertIsNone(index.pop_first_match(*self.slot(2, minutes=90))) # Ends after it
+        self.assertEqual(index.pop_first_match(*self.slot(2)).id, 1) # Ends exactly at window_end
+
+    def test_matches_agree_with_a_linear_scan(self):
+        entries = [self.entry(entry_id, (entry_id * 7) % 23, (entry_id * 7) % 23 + 1 + entry_id % 6) for entry_id in range(1, 60)]
+        index = waitlist.WaitlistIndex(entries)
+        remaining = list(entries)
+        for hours in (3, 3, 10, 15, 4, 20, 3, 12, 0, 22):
+            start, end = self.slot(hours)
+            expected = min(
+                (entry for entry in remaining if entry.window_start <= start and entry.window_end >= end),
+                key=lambda entry: entry.id, default=None,
+            )
+            found = index.pop_first_match(start, end)
+            self.assertIs(found, expected)
+            if expected is not None:
+                remaining.remove(expected)
+
+    def test_empty_index(self):
+        self.assertIsNone(waitlist.WaitlistIndex([]).pop_first_match(*self.slot(0)))
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class WaitlistClaimTests(TestCase):
+    """A freed slot becomes a payment-less hold for the first waiting client, who claims it once."""
+
+    def setUp(self):
+        _, lawyer_profile = provision_user('waitlist-lawyer', 'lawyer')
+        self.client_user, self.client_profile = provision_user('waitlist-client', 'client')
+        self.lawyer = lawyer_profile.lawyer_details
+        self.slot_start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+        self.slot_end = self.slot_start + timedelta(hours=1)
+        self.entry = WaitlistEntry.objects.create(
+            lawyer=self.lawyer, client=self.client_profile,
+            window_start=self.slot_start - timedelta(hours=2), window_end=self.slot_end + timedelta(hours=2),
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def offer(self):
+        return waitlist.offer_freed_slots([(self.lawyer.id, self.slot_start, self.slot_end)])
+
+    def claim(self):
+        return self.api.post(f'/api/waitlist/{self.entry.id}/claim/')
+
+    def test_offer_holds_the_slot_without_a_payment_intent(self):
+        self.assertEqual(self.offer(), 1)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, 'offered')
+        reservation = self.entry.offer_reservation
+        self.assertEqual((reservation.start_time, reservation.end_time), (self.slot_start, self.slot_end))
+        self.assertIsNone(reservation.stripe_payment_intent_id)
+        self.assertEqual(self.offer(), 0) # The slot is held now
+
+    def test_claim_creates_one_payment_intent(self):
+        self.offer()
+        payment_intent = SimpleNamespace(id='pi_waitlist_1', client_secret='secret_1')
+        with mock.patch('appointments.views._create_payment_intent', return_value=payment_intent) as create, \
+                mock.patch('appointments.views.stripe.PaymentIntent.retrieve', return_value=payment_intent) as retrieve:
+            first = self.claim()
+            again = self.claim() # Reloaded page: the same PaymentIntent
+        self.assertEqual((first.status_code, again.status_code), (201, 201))
+        self.assertEqual(first.data['paymentIntentId'], 'pi_waitlist_1')
+        self.assertEqual(again.data['clientSecret'], 'secret_1')
+        create.assert_called_once()
+        retrieve.assert_called_once_with('pi_waitlist_1')
+        self.assertEqual(SlotReservation.objects.get(waitlist_entry=self.entry).stripe_payment_intent_id, 'pi_waitlist_1')
+
+    def test_expired_offer_cannot_be_claimed(self):
+        self.offer()
+        SlotReservation.objects.filter(waitlist_entry=self.entry).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        with mock.patch('appointments.views._create_payment_intent') as create:
+            self.assertEqual(self.claim().status_code, 410)
+        create.assert_not_called()
+
+    def test_expired_hold_on_the_slot_is_replaced(self):
+        SlotReservation.objects.create(
+            lawyer=self.lawyer, client_profile=self.client_profile, start_time=self.slot_start, end_time=self.slot_end,
+            reserved_until=timezone.now() - timedelta(minutes=1), stripe_payment_intent_id='pi_abandoned',
+        )
+        self.assertEqual(self.offer(), 1)
+        self.assertFalse(SlotReservation.objects.filter(stripe_payment_intent_id='pi_abandoned').exists())
+
+
+@override_settings(TIME_ZONE='Europe/Berlin', THROTTLE_ENABLED=False)
+class SeriesBookingTests(TestCase):
+    """Weekly series keep their local time across a DST change, and confirm_series records every occurrence."""
+
+    def setUp(self):
+        _, lawyer_profile = provision_user('series-lawyer', 'lawyer')
+        client_user, self.client_profile = provision_user('series-client', 'client')
+        self.lawyer = lawyer_profile.lawyer_details
+        WeeklyAvailability.objects.create(lawyer=self.lawyer, day_of_week=1, start_time=time_of_day(9), end_time=time_of_day(17))
+        self.api = APIClient()
+        self.api.force_authenticate(client_user)
+        # The Tuesdays around next year's switch to summer time (last Sunday of March): two before, two after
+        year = timezone.now().year + 1
+        switch = max(date(year, 3, day) for day in range(25, 32) if date(year, 3, day).weekday() == 6)
+        self.tuesdays = [switch - timedelta(days=12 - 7 * week) for week in range(4)]
+        self.zone = ZoneInfo('Europe/Berlin')
+
+    def at(self, day, hour):
+        return datetime.combine(day, time_of_day(hour), tzinfo=self.zone)
+
+    def book_series(self):
+        payment_intent = SimpleNamespace(id='pi_series_1', client_secret='secret_series')
+        with mock.patch('appointments.views._create_payment_intent', return_value=payment_intent):
+            return self.api.post('/api/appointments/book-series/', {
+                'lawyer': self.lawyer.id, 'start': self.at(self.tuesdays[0], 10).isoformat(),
+                'end': self.at(self.tuesdays[0], 11).isoformat(), 'count': 4,
+            }, format='json')
+
+    def existing_appointment(self, start):
+        Appointment.objects.create(lawyer=self.lawyer, client=self.client_profile, start=start, end=start + timedelta(hours=1))
+
+    def test_occurrences_keep_local_time_across_dst(self):
+        response = self.book_series()
+        self.assertEqual(response.status_code, 201)
+        starts = list(SlotReservation.objects.filter(series_id=response.data['seriesId']).order_by('start_time').values_list('start_time', flat=True))
+        self.assertEqual([start.astimezone(self.zone).hour for start in starts], [10] * 4)
+        self.assertEqual([start.astimezone(dt_timezone.utc).hour for start in starts], [9, 9, 8, 8])
+
+    def test_conflict_after_dst_is_found_at_local_time(self):
+        self.existing_appointment(self.at(self.tuesdays[2], 10)) # 08:00 UTC, an hour earlier in UTC than the first occurrence
+        response = self.book_series()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([(conflict['index'], conflict['reasons']) for conflict in response.data['conflicts']], [(2, ['booked'])])
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_same_utc_time_after_dst_is_not_a_conflict(self):
+        self.existing_appointment(self.at(self.tuesdays[2], 11)) # 09:00 UTC, like the occurrences before the switch
+        self.assertEqual(self.book_series().status_code, 201)
+
+    def test_confirm_series_records_rollups_and_changes(self):
+        series_id = self.book_series().data['seriesId']
+        payment_intent = SimpleNamespace(id='pi_series_1', status='succeeded', amount=20000)
+        with mock.patch('appointments.views.stripe.PaymentIntent.retrieve', return_value=payment_intent):
+            response = self.api.post('/api/appointments/confirm-series/', {'payment_intent_id': 'pi_series_1'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        appointments = list(Appointment.objects.filter(series_id=series_id).order_by('start'))
+        self.assertEqual([appointment.start.astimezone(self.zone).date() for appointment in appointments], self.tuesdays)
+        feed = AppointmentChange.objects.filter(appointment_id__in=[appointment.id for appointment in appointments])
+        self.assertEqual(sorted(feed.values_list('appointment_id', 'change_type', 'series_id', 'amount_cents')), [
+            (appointment.id, 'created', series_id, 5000) for appointment in appointments
+        ])
+
+        rollups = {row.date: (row.status, row.count, row.booked_minutes, row.amount_cents) for row in AppointmentDailyRollup.objects.all()}
+        self.assertEqual(rollups, {day: ('pending', 1, 60, 5000) for day in self.tuesdays})
+        analytics.recompute({(self.lawyer.id, day) for day in self.tuesdays})
+        recomputed = {row.date: (row.status, row.count, row.booked_minutes, row.amount_cents) for row in AppointmentDailyRollup.objects.all()}
+        self.assertEqual(recomputed, rollups)
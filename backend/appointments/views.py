@@ -1,7 +1,7 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, exceptions
-from .models import WeeklyAvailability, Appointment, AvailabilityOverride, SlotReservation
-from .serializers import WeeklyAvailabilitySerializer, AppointmentSerializer, AvailabilityOverrideSerializer
+from rest_framework import viewsets, permissions, exceptions, mixins
+from .models import WeeklyAvailability, Appointment, AvailabilityOverride, SlotReservation, WaitlistEntry, BookingSeries, HolidayCalendar, SchedulingPolicy, CalendarFeed, ExternalCalendar, MAX_APPOINTMENT_DURATION
+from .serializers import WeeklyAvailabilitySerializer, AppointmentSerializer, AvailabilityOverrideSerializer, WaitlistEntrySerializer, HolidayCalendarSerializer, SchedulingPolicySerializer, ExternalCalendarSerializer
 # Import new profile models and serializers from the 'users' app
 from users.models import UserProfile, LawyerProfile as NewLawyerProfile
 from users.serializers import UserProfileSerializer as NewUserProfileSerializer, LawyerProfileSerializer as NewLawyerProfileSerializer # For ClientAccessibleLawyerListViewSet
@@ -9,6 +9,7 @@ from users.serializers import UserProfileSerializer as NewUserProfileSerializer,
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .permissions import IsLawyer, IsClient # These permissions use the new profile system
 from django.contrib.auth.models import User # May not be directly needed anymore in some places
 import os
@@ -17,6 +18,18 @@ import stripe # Add Stripe import
 from django.conf import settings # Import Django settings
 from datetime import datetime, timedelta # Import datetime and timedelta
 from django.db import transaction, IntegrityError # Import IntegrityError
+from django.db.models import Exists, OuterRef
+from config.db_routers import use_primary
+from config.fast_serializers import FastListMixin
+from .slot_events import SLOT_BOOKED, SLOT_FREED, SLOT_RESERVED, publish_appointment_event, publish_reservation_event
+from .waitlist import queue_freed_slot
+from .availability import find_conflicts, series_occurrences
+from .scheduling import load_schedule
+from . import analytics, calendar_feed, changes, external_calendars
+from .tasks import sync_external_calendar_task
+from users.directory import get_directory_json
+from django.http import HttpResponse
+from django.urls import reverse
 
 # Configure Stripe (replace with your actual secret key, preferably from settings/env vars)
 # stripe.api_key = os.environ.get('STRIPE_SECRET_KEY') 
@@ -25,6 +38,36 @@ stripe.api_key = settings.STRIPE_SECRET_KEY # Assuming you add this to settings.
 # Constants
 RESERVATION_MINUTES = 15 # How long a reservation lasts
 
+
+SERIES_MAX_OCCURRENCES = 52 # Longest series that can be booked (and paid) at once
+
+
+def _create_payment_intent(metadata, occurrences=1, idempotency_key=None):
+    """Creates the Stripe PaymentIntent paying for `occurrences` appointments; confirm endpoints look the booking up by its id."""
+    # 4. Calculate Amount (Example: fixed price per appointment)
+    # You'll need to define how pricing works. Maybe fetch from LawyerProfile?
+    # Using a placeholder amount (e.g., $50.00 = 5000 cents)
+    amount_cents = 5000 * occurrences
+    currency = 'usd' # Or your desired currency
+
+    return stripe.PaymentIntent.create(
+        amount=amount_cents,
+        currency=currency,
+        automatic_payment_methods={'enabled': True},
+        metadata=metadata,
+        idempotency_key=idempotency_key, # Retried creates return the same PaymentIntent
+    )
+
+
+def _reservation_metadata(reservation):
+    return {
+        'lawyer_id': reservation.lawyer_id,
+        'client_profile_id': reservation.client_profile_id, 
+        'appointment_start': reservation.start_time.isoformat(),
+        'appointment_end': reservation.end_time.isoformat(),
+        'reservation_id': reservation.id # Include reservation ID if needed
+    }
+
 # Create your views here.
 
 class WeeklyAvailabilityViewSet(viewsets.ModelViewSet):
@@ -44,6 +87,25 @@ class WeeklyAvailabilityViewSet(viewsets.ModelViewSet):
         else:
             raise exceptions.PermissionDenied("User is not authorized or not a lawyer with complete lawyer details.")
 
+    @action(detail=False, methods=['get', 'put', 'patch'], url_path='policy')
+    def policy(self, request):
+        """
+        The lawyer's SchedulingPolicy (slot length, buffers, daily maximum, minimum notice).
+        GET returns the defaults if none was saved yet; PUT/PATCH create or update it.
+        """
+        user = request.user
+        if not (hasattr(user, 'profile') and user.profile.role == 'lawyer' and hasattr(user.profile, 'lawyer_details')):
+            raise exceptions.PermissionDenied("User is not authorized or not a lawyer with complete lawyer details.")
+        lawyer = user.profile.lawyer_details
+        policy = SchedulingPolicy.objects.filter(lawyer=lawyer).first() or SchedulingPolicy(lawyer=lawyer)
+        if request.method == 'GET':
+            return Response(SchedulingPolicySerializer(policy).data)
+
+        serializer = SchedulingPolicySerializer(policy, data=request.data, partial=request.method == 'PATCH')
+        serializer.is_valid(raise_exception=True)
+        serializer.save() # post_save invalidates the cached rules (appointments/signals.py)
+        return Response(serializer.data)
+
 class AvailabilityOverrideViewSet(viewsets.ModelViewSet):
     serializer_class = AvailabilityOverrideSerializer
     permission_classes = [IsLawyer] # Correctly uses new profile system
@@ -61,8 +123,64 @@ class AvailabilityOverrideViewSet(viewsets.ModelViewSet):
         else:
             raise exceptions.PermissionDenied("User is not authorized or not a lawyer with complete lawyer details.")
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class ExternalCalendarViewSet(viewsets.ModelViewSet):
+    """
+    The lawyer's other calendars whose events block booking (appointments/external_calendars.py). Calendars
+    with a `url` are downloaded in the background after they're saved and hourly; POST an ICS file as the
+    multipart field `file` to .../sync/ to import it directly (or without a file, to re-download the URL now).
+    """
+    serializer_class = ExternalCalendarSerializer
+    permission_classes = [IsLawyer]
+
+    def get_queryset(self):
+        user = self.request.user
+        if hasattr(user, 'profile') and user.profile.role == 'lawyer' and hasattr(user.profile, 'lawyer_details'):
+            return ExternalCalendar.objects.filter(lawyer=user.profile.lawyer_details).order_by('id')
+        return ExternalCalendar.objects.none()
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if hasattr(user, 'profile') and user.profile.role == 'lawyer' and hasattr(user.profile, 'lawyer_details'):
+            calendar = serializer.save(lawyer=user.profile.lawyer_details)
+        else:
+            raise exceptions.PermissionDenied("User is not authorized or not a lawyer with complete lawyer details.")
+        if calendar.url:
+            transaction.on_commit(lambda: sync_external_calendar_task.delay(calendar.id))
+
+    def perform_update(self, serializer):
+        old_url = serializer.instance.url
+        calendar = serializer.save()
+        if calendar.url and calendar.url != old_url:
+            ExternalCalendar.objects.filter(id=calendar.id).update(content_hash='') # Different data: compare every event again
+            transaction.on_commit(lambda: sync_external_calendar_task.delay(calendar.id))
+
+    @action(detail=True, methods=['post'])
+    def sync(self, request, pk=None):
+        calendar = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            if not calendar.url:
+                return Response({'error': 'Upload the calendar as the multipart field "file", or set its url.'}, status=400)
+            sync_external_calendar_task.delay(calendar.id)
+            return Response({'status': 'queued'}, status=202)
+        if upload.size > settings.EXTERNAL_CALENDAR_MAX_BYTES:
+            return Response({'error': f'The calendar is larger than {settings.EXTERNAL_CALENDAR_MAX_BYTES // 2**20} MB.'}, status=400)
+        try:
+            counts = external_calendars.sync_content(calendar, upload.read())
+        except external_calendars.ExternalCalendarError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(counts)
+
+class AppointmentViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
+    # Token-bucket rate limits per action (settings.THROTTLE_RATES, config/throttling.py)
+    throttle_scopes = {
+        'available_slots': 'available_slots',
+        'create': 'booking',
+        'confirm_booking': 'booking',
+        'book_series': 'booking',
+        'confirm_series': 'booking',
+    }
     
     def get_permissions(self):
         if self.action == 'create':
@@ -77,11 +195,25 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if hasattr(user, 'profile'):
             if user.profile.role == 'client':
-                return Appointment.objects.filter(client=user.profile)
+                return Appointment.objects.filter(client=user.profile).order_by('id')
             elif user.profile.role == 'lawyer' and hasattr(user.profile, 'lawyer_details'):
-                return Appointment.objects.filter(lawyer=user.profile.lawyer_details)
+                return Appointment.objects.filter(lawyer=user.profile.lawyer_details).order_by('id')
         return Appointment.objects.none()
 
+    def perform_update(self, serializer):
+        was_active = serializer.instance.status in ['pending', 'confirmed']
+        appointment = serializer.save()
+        if was_active and appointment.status not in ['pending', 'confirmed']:
+            publish_appointment_event(SLOT_FREED, appointment) # e.g. cancelled by the lawyer
+            queue_freed_slot(appointment.lawyer_id, appointment.start, appointment.end)
+
+    def perform_destroy(self, instance):
+        was_active = instance.status in ['pending', 'confirmed']
+        instance.delete()
+        if was_active:
+            publish_appointment_event(SLOT_FREED, instance)
+            queue_freed_slot(instance.lawyer_id, instance.start, instance.end)
+
     @transaction.atomic # Make reservation attempt atomic
     def create(self, request, *args, **kwargs):
         """
@@ -105,10 +237,12 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         try:
             lawyer = NewLawyerProfile.objects.get(id=int(lawyer_id))
-            start_dt = timezone.parse_datetime(start_str)
-            end_dt = timezone.parse_datetime(end_str)
+            start_dt = parse_datetime(start_str)
+            end_dt = parse_datetime(end_str)
             if start_dt >= end_dt or start_dt < timezone.now():
                  raise ValueError("Invalid start/end time.")
+            if end_dt - start_dt > MAX_APPOINTMENT_DURATION:
+                 raise ValueError("Appointment is too long.")
         except (NewLawyerProfile.DoesNotExist, ValueError, TypeError) as e:
              return Response({'error': f'Invalid input: {e}'}, status=400)
         
@@ -124,16 +258,24 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         reservation = None
         temp_payment_intent_id = f"temp_res_{user.id}_{timezone.now().timestamp()}" # Placeholder until real PI is created
         
+        # An expired hold on this exact slot (not yet removed by the cleanup task) would still trip the
+        # unique_together constraint, so clear it first; it no longer blocks anyone.
+        SlotReservation.objects.filter(
+            lawyer=lawyer, start_time=start_dt, end_time=end_dt, reserved_until__lte=timezone.now()
+        ).delete()
+
         try:
-            # Attempt to create the reservation within the transaction
-            reservation = SlotReservation.objects.create(
-                lawyer=lawyer,
-                client_profile=user.profile,
-                start_time=start_dt,
-                end_time=end_dt,
-                reserved_until=reserved_until,
-                stripe_payment_intent_id=temp_payment_intent_id # Use placeholder initially
-            )
+            # Attempt to create the reservation within the transaction.
+            # The savepoint keeps the outer transaction usable if the insert fails.
+            with transaction.atomic():
+                reservation = SlotReservation.objects.create(
+                    lawyer=lawyer,
+                    client_profile=user.profile,
+                    start_time=start_dt,
+                    end_time=end_dt,
+                    reserved_until=reserved_until,
+                    stripe_payment_intent_id=temp_payment_intent_id # Use placeholder initially
+                )
         except IntegrityError: 
              # This catches the unique_together constraint violation, meaning someone *just* reserved it.
              # Or potentially other DB integrity issues.
@@ -150,30 +292,14 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             
         # If reservation succeeded, proceed to payment intent creation
 
-        # 4. Calculate Amount (Example: fixed price per appointment)
-        # You'll need to define how pricing works. Maybe fetch from LawyerProfile?
-        # Using a placeholder amount (e.g., $50.00 = 5000 cents)
-        amount_cents = 5000 
-        currency = 'usd' # Or your desired currency
-
-        # 5. Create Stripe PaymentIntent
+        # 4./5. Calculate the amount and create the Stripe PaymentIntent
         try:
-            payment_intent = stripe.PaymentIntent.create(
-                amount=amount_cents,
-                currency=currency,
-                automatic_payment_methods={'enabled': True},
-                metadata={
-                    'lawyer_id': lawyer.id,
-                    'client_profile_id': user.profile.id, 
-                    'appointment_start': start_dt.isoformat(),
-                    'appointment_end': end_dt.isoformat(),
-                    'reservation_id': reservation.id # Include reservation ID if needed
-                }
-            )
+            payment_intent = _create_payment_intent(_reservation_metadata(reservation))
             
             # Update the reservation with the actual Payment Intent ID
             reservation.stripe_payment_intent_id = payment_intent.id
             reservation.save(update_fields=['stripe_payment_intent_id'])
+            publish_reservation_event(SLOT_RESERVED, reservation) # Sent to booking pages once the transaction commits
             
             # 6. Return Client Secret to Frontend
             return Response({
@@ -192,47 +318,28 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             reservation.delete() 
             return Response({'error': 'Could not initiate payment process.'}, status=500)
 
-    def _is_slot_available(self, lawyer: NewLawyerProfile, start_dt: datetime, end_dt: datetime) -> bool:
+    @use_primary() # Booking decisions must never read stale replica data
+    def _is_slot_available(self, lawyer: NewLawyerProfile, start_dt: datetime, end_dt: datetime, exclude_reservation_id: int = None, notice_from: datetime = None) -> bool:
         """
-        Checks if a specific time slot is available for a given lawyer.
-        Considers:
-        1. Lawyer\'s WeeklyAvailability and AvailabilityOverrides (TODO).
-        2. Existing Confirmed or Pending Appointments.
-        3. Existing *Active* SlotReservations.
+        Checks if a specific time slot is available for a given lawyer, with exactly the rules
+        available_slots lists slots by (appointments/scheduling.py):
+        1. The slot is on the lawyer's grid (WeeklyAvailability, SchedulingPolicy slot length and buffers).
+        2. No AvailabilityOverride or subscribed holiday calendar closes it; the daily maximum isn't reached.
+        3. No overlapping Confirmed or Pending Appointment or *Active* SlotReservation (other than
+           `exclude_reservation_id`, the caller's own hold), including the policy's buffers.
+        4. Minimum notice, measured from `notice_from` (default: now).
         """
-        now = timezone.now()
-
-        # Check 1: Existing Appointments (Confirmed or Pending)
-        overlapping_appointments = Appointment.objects.filter(
-            lawyer=lawyer,
-            start__lt=end_dt, # Starts before the proposed end
-            end__gt=start_dt,   # Ends after the proposed start
-            status__in=['pending', 'confirmed'] 
-        ).exists()
-
-        if overlapping_appointments:
-            return False
-
-        # Check 2: Existing *Active* Reservations
-        overlapping_reservations = SlotReservation.objects.filter(
-            lawyer=lawyer,
-            start_time__lt=end_dt,
-            end_time__gt=start_dt,
-            reserved_until__gt=now # Only consider reservations that haven't expired
-        ).exists()
-
-        if overlapping_reservations:
-            return False
-            
-        # TODO: Check 3: Validate against WeeklyAvailability/Overrides
-        # This is important to ensure the slot wasn't made unavailable by the lawyer 
-        # since the available_slots list was generated.
-
-        return True # Assumes available if no direct conflicts found yet
+        day = timezone.localtime(start_dt).date()
+        schedule = load_schedule(
+            lawyer, day, day, notice_from=notice_from,
+            exclude_reservation_ids=[exclude_reservation_id] if exclude_reservation_id else (),
+        )
+        return not schedule.slot_conflicts(start_dt, end_dt)
 
     # Add the new action for confirming the booking after payment
     @action(detail=False, methods=['post'], url_path='confirm-booking')
     @transaction.atomic # Ensure atomicity for the final check and creation
+    @use_primary()
     def confirm_booking(self, request):
         """
         Confirms and creates the appointment record AFTER successful payment.
@@ -298,9 +405,11 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                  # Delete the reservation as it's linked to a non-succeeded PI.
                  print(f"Deleting reservation {reservation.id} because PI {payment_intent_id} status is {payment_intent.status}")
                  reservation.delete()
+                 publish_reservation_event(SLOT_FREED, reservation)
+                 queue_freed_slot(reservation.lawyer_id, reservation.start_time, reservation.end_time)
                  return Response({'error': f'Payment not successful. Status: {payment_intent.status}'}, status=402)
 
-            metadata = payment_intent.metadata
+            metadata = payment_intent.metadata.to_dict() # StripeObject is not a dict in current stripe-python
             # lawyer_id = metadata.get('lawyer_id') # Can use reservation lawyer
             client_profile_id = metadata.get('client_profile_id') 
             start_str = metadata.get('appointment_start')
@@ -310,6 +419,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                  print(f"Error: Missing metadata in PaymentIntent {payment_intent_id}")
                  # TODO: Initiate Refund?
                  reservation.delete() # Clean up reservation
+                 publish_reservation_event(SLOT_FREED, reservation)
+                 queue_freed_slot(reservation.lawyer_id, reservation.start_time, reservation.end_time)
                  return Response({'error': 'Internal error retrieving booking details from payment.'}, status=500)
             
             # Security check: User profile from reservation vs metadata vs logged in user
@@ -317,6 +428,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 print(f"Security Alert: User/Client mismatch. LoggedIn:{user.profile.id}, Meta:{client_profile_id}, Res:{reservation.client_profile_id}")
                 # TODO: Initiate Refund?
                 reservation.delete() # Clean up reservation
+                publish_reservation_event(SLOT_FREED, reservation)
+                queue_freed_slot(reservation.lawyer_id, reservation.start_time, reservation.end_time)
                 return Response({'error': 'Cannot confirm booking due to user mismatch.'}, status=403) 
 
             # --- Re-fetch Lawyer and Parse Times (Can use reservation data) --- 
@@ -327,12 +440,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             # --- Final Availability Check (Concurrency Check 2 - Still needed!) ---
             # Although we have a reservation, another appointment could have been created
             # through an alternative channel, or lawyer availability might have changed.
-            # _is_slot_available now checks active reservations *excluding the current one implicitly* 
-            # because we will delete it on success.
-            if not self._is_slot_available(lawyer, start_dt, end_dt):
-                 # This check should ideally exclude the *current* reservation if it were more complex.
-                 # However, since we got this far, it implies the conflict is likely a *different* reservation 
-                 # or a new *appointment* that appeared.
+            # The client's own (still active) reservation is excluded, otherwise it would always conflict.
+            # Minimum notice was met when the slot was reserved; don't fail paid bookings on it now.
+            if not self._is_slot_available(lawyer, start_dt, end_dt, exclude_reservation_id=reservation.id, notice_from=reservation.created_at):
+                 # The conflict is a *different* reservation or a new *appointment* that appeared.
                  print(f"Confirm booking failed: Slot conflict detected for PI {payment_intent_id} despite active reservation {reservation.id}")
                  # TODO: Initiate Refund
                  status_message = "Slot became unavailable after payment."
@@ -354,16 +465,20 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 'end': end_dt,
                 'status': 'pending', 
                 'stripe_payment_intent_id': payment_intent_id,
-                'payment_status': payment_intent.status
+                'payment_status': payment_intent.status,
+                'amount_cents': payment_intent.amount,
             }
             
-            serializer = self.get_serializer(data=appointment_data)
-            serializer.is_valid(raise_exception=True)
-            appointment = serializer.save()
+            # The data is server-derived (reservation + PaymentIntent) and includes fields that are read-only
+            # on AppointmentSerializer (client, status, payment info), so create the row directly.
+            appointment = Appointment.objects.create(**appointment_data)
+            serializer = self.get_serializer(appointment)
             
             # --- Delete the Reservation (Success!) --- 
             print(f"Appointment {appointment.id} created. Deleting reservation {reservation.id}.")
+            WaitlistEntry.objects.filter(offer_reservation=reservation).update(status='booked') # If this was a waitlist offer
             reservation.delete()
+            publish_appointment_event(SLOT_BOOKED, appointment)
 
             # --- Return Success Response --- 
             return Response(serializer.data, status=201)
@@ -378,6 +493,183 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             print(f"Unexpected error confirming booking for PI {payment_intent_id}: {e}") 
             return Response({'error': 'Could not confirm booking due to an internal error.'}, status=500)
 
+    @action(detail=False, methods=['post'], url_path='book-series')
+    @transaction.atomic # All occurrences are reserved, or none
+    @use_primary()
+    def book_series(self, request):
+        """
+        Reserves a recurring series (`count` occurrences of `start`/`end`, every `interval_weeks` weeks) and
+        creates one PaymentIntent for all of them. Every occurrence is checked against weekly availability,
+        overrides, appointments and reservations in one batch (appointments/availability.py); if any
+        conflicts, nothing is reserved and the response lists the conflicting occurrences (409).
+        Pay, then call confirm-series with the paymentIntentId.
+        """
+        user = request.user
+        if not (hasattr(user, 'profile') and user.profile.role == 'client'):
+            raise exceptions.PermissionDenied('Only clients can book appointment series.')
+
+        try:
+            lawyer = NewLawyerProfile.objects.get(id=int(request.data.get('lawyer')))
+            start_dt = parse_datetime(request.data.get('start'))
+            end_dt = parse_datetime(request.data.get('end'))
+            count = int(request.data.get('count'))
+            interval_weeks = int(request.data.get('interval_weeks', 1))
+            if start_dt >= end_dt or start_dt < timezone.now():
+                 raise ValueError("Invalid start/end time.")
+            if end_dt - start_dt > MAX_APPOINTMENT_DURATION:
+                 raise ValueError("Appointment is too long.")
+            if not 1 <= count <= SERIES_MAX_OCCURRENCES or interval_weeks < 1:
+                 raise ValueError(f"count must be between 1 and {SERIES_MAX_OCCURRENCES}, interval_weeks at least 1.")
+        except (NewLawyerProfile.DoesNotExist, ValueError, TypeError) as e:
+             return Response({'error': f'Invalid input: {e}'}, status=400)
+
+        occurrences = series_occurrences(start_dt, end_dt, count, interval_weeks)
+        conflicts = find_conflicts(lawyer, occurrences)
+        if conflicts:
+            return self._series_conflict_response(occurrences, conflicts)
+
+        now = timezone.now()
+        reserved_until = now + timedelta(minutes=RESERVATION_MINUTES)
+        try:
+            with transaction.atomic():
+                # Expired holds not yet removed by the cleanup task would trip unique_together (same as in create)
+                SlotReservation.objects.filter(
+                    lawyer=lawyer, start_time__in=[occurrence_start for occurrence_start, _ in occurrences],
+                    reserved_until__lte=now,
+                ).delete()
+                series = BookingSeries.objects.create(
+                    lawyer=lawyer, client=user.profile, first_start=start_dt, first_end=end_dt,
+                    interval_weeks=interval_weeks, count=count,
+                    stripe_payment_intent_id=f"temp_series_{user.id}_{timezone.now().timestamp()}", # Placeholder until the PI exists
+                )
+                reservations = SlotReservation.objects.bulk_create([
+                    SlotReservation(
+                        lawyer=lawyer, client_profile=user.profile, start_time=occurrence_start, end_time=occurrence_end,
+                        reserved_until=reserved_until, series=series,
+                        stripe_payment_intent_id=f"series_{series.id}_{index}", # Unique per row; the series holds the real PI
+                    )
+                    for index, (occurrence_start, occurrence_end) in enumerate(occurrences)
+                ])
+        except IntegrityError:
+            # Someone reserved one of the slots since the check; report which ones
+            return self._series_conflict_response(occurrences, find_conflicts(lawyer, occurrences))
+
+        try:
+            payment_intent = _create_payment_intent({
+                'lawyer_id': lawyer.id,
+                'client_profile_id': user.profile.id,
+                'series_id': series.id,
+                'occurrences': count,
+            }, occurrences=count)
+        except stripe.error.StripeError as e:
+            print(f"Stripe error after series reserved (Series ID: {series.id}). Deleting series.")
+            series.delete() # Cascades to the reservations
+            return Response({'error': f'Stripe error: {e.user_message}'}, status=500)
+        series.stripe_payment_intent_id = payment_intent.id
+        series.save(update_fields=['stripe_payment_intent_id'])
+        for reservation in reservations:
+            publish_reservation_event(SLOT_RESERVED, reservation)
+
+        return Response({
+            'clientSecret': payment_intent.client_secret,
+            'paymentIntentId': payment_intent.id,
+            'seriesId': series.id,
+            'reservedUntil': reserved_until,
+            'occurrences': [{'start': occurrence_start, 'end': occurrence_end} for occurrence_start, occurrence_end in occurrences],
+        }, status=201)
+
+    @staticmethod
+    def _series_conflict_response(occurrences, conflicts):
+        return Response({
+            'error': 'Some occurrences of the series are unavailable.',
+            'conflicts': [
+                {'index': index, 'start': occurrences[index][0], 'end': occurrences[index][1], 'reasons': reasons}
+                for index, reasons in sorted(conflicts.items())
+            ],
+        }, status=409)
+
+    @action(detail=False, methods=['post'], url_path='confirm-series')
+    @transaction.atomic
+    @use_primary()
+    def confirm_series(self, request):
+        """
+        Creates the appointments of a reserved series after its PaymentIntent succeeded. All occurrences are
+        re-checked in one batch; if any became unavailable, the whole payment is refunded and nothing is booked.
+        """
+        user = request.user
+        if not (hasattr(user, 'profile') and user.profile.role == 'client'):
+            raise exceptions.PermissionDenied('Only clients can confirm bookings.')
+
+        payment_intent_id = request.data.get('payment_intent_id')
+        if not payment_intent_id:
+            return Response({'error': 'Missing payment_intent_id.'}, status=400)
+        try:
+            series = BookingSeries.objects.select_for_update().get(
+                stripe_payment_intent_id=payment_intent_id, client=user.profile, status='reserved'
+            )
+        except BookingSeries.DoesNotExist:
+            return Response({'error': 'Booking confirmation failed: Series not found.'}, status=404)
+        reservations = list(series.reservations.select_for_update().order_by('start_time'))
+
+        def release(status_message, status):
+            for reservation in reservations:
+                reservation.delete()
+                publish_reservation_event(SLOT_FREED, reservation)
+                queue_freed_slot(reservation.lawyer_id, reservation.start_time, reservation.end_time)
+            series.status = 'failed'
+            series.save(update_fields=['status'])
+            return Response({'error': status_message}, status=status)
+
+        def refund(status_message):
+            try:
+                stripe.Refund.create(payment_intent=payment_intent_id)
+                return status_message + " Payment has been refunded."
+            except stripe.error.StripeError as refund_error:
+                print(f"CRITICAL ERROR: Failed to refund series PI {payment_intent_id}: {refund_error}")
+                return status_message + " Refund failed, please contact support."
+
+        try:
+            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            if payment_intent.status != 'succeeded':
+                return release(f'Payment not successful. Status: {payment_intent.status}', 402)
+            if len(reservations) != series.count or not all(reservation.is_active() for reservation in reservations):
+                return release(refund("Booking confirmation failed: Your reservation timed out."), 410) # 410 Gone (Reservation Expired)
+
+            occurrences = [(reservation.start_time, reservation.end_time) for reservation in reservations]
+            conflicts = find_conflicts(
+                series.lawyer, occurrences, exclude_reservation_ids=[reservation.id for reservation in reservations],
+                notice_from=series.created_at, # Notice was met when the series was reserved
+            )
+            if conflicts:
+                print(f"Confirm series failed: {len(conflicts)} occurrence(s) of series {series.id} became unavailable")
+                response = release(refund("Some occurrences became unavailable after payment."), 409)
+                response.data['conflicts'] = [
+                    {'index': index, 'start': occurrences[index][0], 'end': occurrences[index][1], 'reasons': reasons}
+                    for index, reasons in sorted(conflicts.items())
+                ]
+                return response
+
+            appointments = Appointment.objects.bulk_create([
+                Appointment(
+                    lawyer_id=series.lawyer_id, client=user.profile, start=start, end=end, status='pending',
+                    stripe_payment_intent_id=payment_intent_id, payment_status=payment_intent.status, series=series,
+                    amount_cents=payment_intent.amount // len(occurrences), # One PaymentIntent pays for the whole series
+                )
+                for start, end in occurrences
+            ])
+            analytics.record_created(appointments) # bulk_create skips the signals that update rollups
+            changes.record_created(appointments) # ... and the changes feed
+            SlotReservation.objects.filter(series=series).delete()
+            series.status = 'booked'
+            series.save(update_fields=['status'])
+            for appointment in appointments:
+                publish_appointment_event(SLOT_BOOKED, appointment)
+            return Response(self.get_serializer(appointments, many=True).data, status=201)
+
+        except stripe.error.StripeError as e:
+             # Don't release here, maybe the Stripe issue is temporary? Let cleanup handle.
+             return Response({'error': f'Stripe error during confirmation: {e.user_message}'}, status=500)
+
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
         lawyer_id_str = request.query_params.get('lawyer_id')
@@ -390,111 +682,144 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Lawyer not found or invalid ID'}, status=404)
         
         now = timezone.now() # Get current time once
-        today = now.date()
+        today = timezone.localdate(now)
         dates_to_check = [today + timedelta(days=i) for i in range(7)]
-        
-        # Fetch relevant data for the lawyer
-        lawyer_overrides = AvailabilityOverride.objects.filter(lawyer=lawyer)
-        lawyer_availabilities = WeeklyAvailability.objects.filter(lawyer=lawyer)
-        # Fetch existing appointments AND active reservations for the check period
-        start_check_dt = timezone.make_aware(datetime.combine(today, datetime.min.time()))
-        end_check_dt = timezone.make_aware(datetime.combine(dates_to_check[-1], datetime.max.time()))
-        
-        booked_periods = list(Appointment.objects.filter(
-            lawyer=lawyer,
-            start__lt=end_check_dt,
-            end__gt=start_check_dt,
-            status__in=['pending', 'confirmed']
-        ).values_list('start', 'end'))
-        
-        reserved_periods = list(SlotReservation.objects.filter(
-            lawyer=lawyer,
-            start_time__lt=end_check_dt,
-            end_time__gt=start_check_dt,
-            reserved_until__gt=now # Only active reservations
-        ).values_list('start_time', 'end_time'))
-        
-        # Combine booked and reserved periods into a single list of unavailable intervals
-        unavailable_intervals = booked_periods + reserved_periods
-        unavailable_intervals.sort() # Sort by start time
 
-        slots = []
-        for specific_date in dates_to_check:
-            day_of_week = specific_date.weekday()
-            
-            # Check for all-day overrides for this specific date
-            if lawyer_overrides.filter(date=specific_date, is_all_day=True).exists():
-                continue # Skip this day entirely
-                
-            # Get time-specific overrides for this date
-            date_specific_time_overrides = lawyer_overrides.filter(date=specific_date, is_all_day=False)
-
-            # Iterate through the lawyer's general weekly availability for this day
-            for avail in lawyer_availabilities.filter(day_of_week=day_of_week):
-                # Define the potential slot start and end times based on weekly availability
-                potential_start_dt = timezone.make_aware(datetime.combine(specific_date, avail.start_time))
-                potential_end_dt = timezone.make_aware(datetime.combine(specific_date, avail.end_time))
-
-                # --- Start Slot Generation within the potential availability block --- 
-                # Assuming 1-hour slots for simplicity; adjust duration as needed
-                slot_duration = timedelta(hours=1)
-                current_slot_start = potential_start_dt
-
-                while current_slot_start + slot_duration <= potential_end_dt:
-                    current_slot_end = current_slot_start + slot_duration
-
-                    # 1. Skip if slot is in the past
-                    if current_slot_start < now:
-                        current_slot_start = current_slot_end
-                        continue
-
-                    slot_is_available = True
-
-                    # 2. Check against time-specific overrides for the day
-                    for override in date_specific_time_overrides:
-                        if override.start_time and override.end_time:
-                            override_start_dt = timezone.make_aware(datetime.combine(specific_date, override.start_time))
-                            override_end_dt = timezone.make_aware(datetime.combine(specific_date, override.end_time))
-                            # Check for overlap: If slot starts before override ends AND slot ends after override starts
-                            if current_slot_start < override_end_dt and current_slot_end > override_start_dt:
-                                slot_is_available = False
-                                break # Overlaps with an override
-                    if not slot_is_available:
-                        # Move to the next potential slot after this override
-                        # This simple increment might skip valid slots if overrides are complex.
-                        # A more robust approach might adjust current_slot_start based on override_end_dt.
-                        current_slot_start = current_slot_end 
-                        continue 
-
-                    # 3. Check against booked appointments and active reservations
-                    for unavailable_start, unavailable_end in unavailable_intervals:
-                        # Check for overlap
-                        if current_slot_start < unavailable_end and current_slot_end > unavailable_start:
-                            slot_is_available = False
-                            break # Overlaps with booked/reserved period
-                    if not slot_is_available:
-                         # Move to the next potential slot after this unavailable period
-                         # Again, simple increment.
-                         current_slot_start = current_slot_end
-                         continue
-
-                    # If we reach here, the slot is available
-                    slots.append({'start': current_slot_start, 'end': current_slot_end})
-                    
-                    # Move to the next slot start time
-                    current_slot_start = current_slot_end
-        
-        # Sort the final list of available slots chronologically
-        slots.sort(key=lambda x: x['start'])
+        # One pass per day over the lawyer's slot grid (weekly hours, SchedulingPolicy slot length, buffers,
+        # daily maximum, minimum notice) against overrides, holiday calendars, appointments and active
+        # reservations, all loaded once for the week. _is_slot_available applies the same rules.
+        schedule = load_schedule(lawyer, dates_to_check[0], dates_to_check[-1], now=now)
+        slots = schedule.available_slots(dates_to_check)
         return Response(slots)
 
-class ClientAccessibleLawyerListViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=['get', 'post', 'delete'], url_path='calendar-feed')
+    @use_primary() # GET may create the feed
+    def calendar_feed(self, request):
+        """
+        The lawyer's private iCalendar feed URL (appointments/calendar_feed.py), for subscribing in a calendar app.
+        GET returns it, creating the feed on first use; POST replaces the token (the old URL stops working);
+        DELETE turns the feed off.
+        """
+        user = request.user
+        if not (hasattr(user, 'profile') and user.profile.role == 'lawyer' and hasattr(user.profile, 'lawyer_details')):
+            raise exceptions.PermissionDenied("User is not authorized or not a lawyer with complete lawyer details.")
+        lawyer = user.profile.lawyer_details
+        if request.method == 'DELETE':
+            CalendarFeed.objects.filter(lawyer=lawyer).delete()
+            return Response(status=204)
+
+        feed, created = CalendarFeed.objects.get_or_create(lawyer=lawyer, defaults={'token': calendar_feed.new_token()})
+        if request.method == 'POST' and not created:
+            feed.token = calendar_feed.new_token()
+            feed.save(update_fields=['token'])
+        return Response({
+            'url': request.build_absolute_uri(reverse('calendar-feed', kwargs={'token': feed.token})),
+            'created_at': feed.created_at,
+        }, status=201 if created else 200)
+
+class HolidayCalendarViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Shared holiday / court-closure calendars (maintained by staff in the admin). Lawyers subscribe to the
+    ones that apply to them; closures then count as all-day time off in available_slots and booking checks.
+    """
+    serializer_class = HolidayCalendarSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        subscriptions = HolidayCalendar.subscribers.through.objects.filter(
+            holidaycalendar_id=OuterRef('pk'), lawyerprofile__user_profile__user=self.request.user
+        )
+        return HolidayCalendar.objects.annotate(subscribed=Exists(subscriptions)).prefetch_related('closures').order_by('name')
+
+    def _lawyer_calendar(self):
+        return self.get_object(), self.request.user.profile.lawyer_details
+
+    @action(detail=True, methods=['post'], permission_classes=[IsLawyer])
+    def subscribe(self, request, pk=None):
+        calendar, lawyer = self._lawyer_calendar()
+        calendar.subscribers.add(lawyer)
+        return Response({'subscribed': True})
+
+    @action(detail=True, methods=['post'], permission_classes=[IsLawyer])
+    def unsubscribe(self, request, pk=None):
+        calendar, lawyer = self._lawyer_calendar()
+        calendar.subscribers.remove(lawyer)
+        return Response({'subscribed': False})
+
+class WaitlistEntryViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    A client's waitlist entries. Freed slots are offered by the cleanup task (appointments/waitlist.py):
+    an offered entry holds a reservation until `offer_reserved_until`, and `claim` starts payment for it.
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsClient]
+
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(client=self.request.user.profile).select_related('offer_reservation').order_by('id')
+
+    def perform_create(self, serializer):
+        serializer.save(client=self.request.user.profile)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        reservation = instance.offer_reservation
+        instance.delete()
+        if instance.status == 'offered' and reservation is not None and reservation.is_active():
+            # Declining an offer hands the slot to the next client in line
+            reservation.delete()
+            publish_reservation_event(SLOT_FREED, reservation)
+            queue_freed_slot(reservation.lawyer_id, reservation.start_time, reservation.end_time)
+
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
+    @use_primary()
+    def claim(self, request, pk=None):
+        """
+        Creates the Stripe PaymentIntent for an offered slot and returns its client secret, like `create`
+        does for a fresh booking. The client then pays and calls confirm-booking as usual.
+        """
+        entry = self.get_object()
+        # Locked so that concurrent claims (double click, two tabs) create one PaymentIntent, not one each
+        reservation = SlotReservation.objects.select_for_update().filter(id=entry.offer_reservation_id).first()
+        if entry.status != 'offered' or reservation is None or not reservation.is_active():
+            return Response({'error': 'This waitlist entry has no active offer.'}, status=410) # 410 Gone (Offer Expired)
+
+        try:
+            if reservation.stripe_payment_intent_id is None:
+                payment_intent = _create_payment_intent(
+                    _reservation_metadata(reservation), idempotency_key=f'waitlist-claim-{reservation.id}'
+                )
+                reservation.stripe_payment_intent_id = payment_intent.id
+                reservation.save(update_fields=['stripe_payment_intent_id'])
+            else: # Claimed before (e.g. the page was reloaded); reuse the PaymentIntent
+                payment_intent = stripe.PaymentIntent.retrieve(reservation.stripe_payment_intent_id)
+        except stripe.error.StripeError as e:
+            print(f"Stripe error claiming waitlist offer {entry.id} (Reservation ID: {reservation.id}): {e}")
+            return Response({'error': f'Stripe error: {e.user_message}'}, status=500)
+
+        return Response({
+            'clientSecret': payment_intent.client_secret,
+            'paymentIntentId': payment_intent.id,
+            'reservedUntil': reservation.reserved_until,
+        }, status=201)
+
+class ClientAccessibleLawyerListViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only endpoint for any authenticated user to list new lawyer profiles (users.models.LawyerProfile).
     Intended for clients to select a lawyer for appointments.
     """
     serializer_class = NewLawyerProfileSerializer # Using the serializer from users.serializers
-    queryset = NewLawyerProfile.objects.all() # Querying new LawyerProfile model
+    queryset = NewLawyerProfile.objects.select_related('user_profile__user').order_by('id') # list() is served by FastListMixin in one query
     permission_classes = [permissions.IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        # Served from the precomputed Redis snapshot (users/directory.py) when it is available;
+        # otherwise FastListMixin builds the same bytes from the database.
+        if getattr(request.accepted_renderer, 'format', None) == 'json':
+            payload = get_directory_json()
+            if payload is not None:
+                return HttpResponse(payload, content_type='application/json')
+        return super().list(request, *args, **kwargs)
+
 # Obsolete LawyerProfileViewSet and ClientProfileViewSet (and its promote_to_lawyer action) were removed previously.
@@ -0,0 +1,207 @@
+"""
+Waitlist matching: hands freed slots to waiting clients as short first-refusal reservations.
+
+Slots are freed by expired reservations (found by cleanup_expired_reservations_task itself) and by
+cancellations / failed confirmations, which queue the slot in Redis (queue_freed_slot). The cleanup task
+matches both in one batch: waiting entries of the affected lawyers are loaded with one query into a
+WaitlistIndex per lawyer, busy periods with two more, and the oldest entry whose window contains a freed
+slot gets a SlotReservation valid for WAITLIST_OFFER_MINUTES. The client pays for it through
+POST /api/waitlist/<id>/claim/ and confirm-booking.
+"""
+import bisect
+import json
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.redis_client import get_redis_client
+from .models import Appointment, SlotReservation, WaitlistEntry, MAX_APPOINTMENT_DURATION
+from .slot_events import SLOT_RESERVED, publish_reservation_event
+
+logger = logging.getLogger(__name__)
+
+FREED_SLOTS_KEY = 'waitlist:freed_slots'
+DRAIN_BATCH_SIZE = 5000
+_REMOVED = -math.inf
+
+
+class WaitlistIndex:
+    """
+    One lawyer's waiting entries sorted by window start, with a segment tree holding the latest window end
+    of each subtree. A lookup bisects to the entries starting at or before the slot and descends only into
+    subtrees that contain a window ending at or after it: O((k + 1) log n) for k matching windows.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda entry: (entry.window_start, entry.id))
+        self.starts = [entry.window_start for entry in self.entries]
+        self.size = 1
+        while self.size < len(self.entries):
+            self.size *= 2
+        self.tree = [_REMOVED] * (2 * self.size)
+        for position, entry in enumerate(self.entries):
+            self.tree[self.size + position] = entry.window_end.timestamp()
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def matches(self, start, end):
+        """Positions of the entries whose window contains [start, end]."""
+        limit = bisect.bisect_right(self.starts, start)
+        found = []
+        if limit:
+            self._collect(1, 0, self.size, limit, end.timestamp(), found)
+        return found
+
+    def _collect(self, node, low, high, limit, end, found):
+        if low >= limit or self.tree[node] < end:
+            return
+        if node >= self.size:
+            found.append(node - self.size)
+            return
+        middle = (low + high) // 2
+        self._collect(2 * node, low, middle, limit, end, found)
+        self._collect(2 * node + 1, middle, high, limit, end, found)
+
+    def remove(self, position):
+        node = self.size + position
+        self.tree[node] = _REMOVED
+        while node > 1:
+            node //= 2
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def pop_first_match(self, start, end):
+        """Removes and returns the oldest (lowest id) entry whose window contains [start, end], or None."""
+        positions = self.matches(start, end)
+        if not positions:
+            return None
+        position = min(positions, key=lambda position: self.entries[position].id)
+        self.remove(position)
+        return self.entries[position]
+
+
+def queue_freed_slot(lawyer_id, start, end):
+    """Queues a slot freed outside the cleanup task for the next waitlist matching run (after commit)."""
+    payload = json.dumps([lawyer_id, start.isoformat(), end.isoformat()])
+    transaction.on_commit(lambda: _push(payload))
+
+
+def _push(payload):
+    try:
+        get_redis_client().rpush(FREED_SLOTS_KEY, payload)
+    except redis.RedisError as e:
+        logger.warning("Could not queue freed slot %s for the waitlist: %s", payload, e)
+
+
+def drain_freed_slots():
+    """Pops up to DRAIN_BATCH_SIZE queued slots as (lawyer_id, start, end) tuples."""
+    try:
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.lrange(FREED_SLOTS_KEY, 0, DRAIN_BATCH_SIZE - 1)
+        pipe.ltrim(FREED_SLOTS_KEY, DRAIN_BATCH_SIZE, -1)
+        raw, _ = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Could not read freed slots for the waitlist: %s", e)
+        return []
+    return [(lawyer_id, parse_datetime(start), parse_datetime(end)) for lawyer_id, start, end in map(json.loads, raw)]
+
+
+def _busy_periods(lawyer_ids, range_start, range_end, now):
+    """{lawyer_id: [(start, end)]} of active appointments and reservations overlapping the range."""
+    busy = defaultdict(list)
+    appointments = Appointment.objects.filter(
+        lawyer_id__in=lawyer_ids,
+        start__lt=range_end,
+        end__gt=range_start,
+        start__gt=range_start - MAX_APPOINTMENT_DURATION, # Partition pruning, see MAX_APPOINTMENT_DURATION
+        status__in=['pending', 'confirmed'],
+    ).values_list('lawyer_id', 'start', 'end')
+    reservations = SlotReservation.objects.filter(
+        lawyer_id__in=lawyer_ids,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+        reserved_until__gt=now,
+    ).values_list('lawyer_id', 'start_time', 'end_time')
+    for lawyer_id, start, end in list(appointments) + list(reservations):
+        busy[lawyer_id].append((start, end))
+    return busy
+
+
+def _offer(entry, start, end, reserved_until, now):
+    """
+    Creates the first-refusal reservation for `entry`. Returns it, or None if the entry was withdrawn
+    meanwhile; raises IntegrityError if someone reserved the slot since the busy periods were loaded.
+    """
+    with transaction.atomic():
+        # An expired hold on this exact slot would trip unique_together (same as in AppointmentViewSet.create)
+        SlotReservation.objects.filter(
+            lawyer_id=entry.lawyer_id, start_time=start, end_time=end, reserved_until__lte=now
+        ).delete()
+        reservation = SlotReservation.objects.create(
+            lawyer_id=entry.lawyer_id,
+            client_profile_id=entry.client_id,
+            start_time=start,
+            end_time=end,
+            reserved_until=reserved_until,
+            stripe_payment_intent_id=None, # Set on claim
+        )
+        offered = WaitlistEntry.objects.filter(id=entry.id, status='waiting').update(
+            status='offered', offer_reservation=reservation, offered_at=now
+        )
+        if not offered:
+            transaction.set_rollback(True)
+            return None
+    publish_reservation_event(SLOT_RESERVED, reservation)
+    return reservation
+
+
+def offer_freed_slots(slots) -> int:
+    """
+    Matches freed (lawyer_id, start, end) slots against the waitlist and creates first-refusal
+    reservations. Returns the number of offers made.
+    """
+    now = timezone.now()
+    slots = sorted({slot for slot in slots if slot[1] > now}) # Deduplicated; past slots can't be offered
+    if not slots:
+        return 0
+    lawyer_ids = {lawyer_id for lawyer_id, _, _ in slots}
+    range_start = min(start for _, start, _ in slots)
+    range_end = max(end for _, _, end in slots)
+
+    entries = defaultdict(list)
+    for entry in WaitlistEntry.objects.filter(
+        lawyer_id__in=lawyer_ids, status='waiting', window_start__lte=max(start for _, start, _ in slots), window_end__gte=now,
+    ):
+        entries[entry.lawyer_id].append(entry)
+    if not entries:
+        return 0
+    indexes = {lawyer_id: WaitlistIndex(lawyer_entries) for lawyer_id, lawyer_entries in entries.items()}
+    busy = _busy_periods(indexes.keys(), range_start, range_end, now)
+    reserved_until = now + timedelta(minutes=settings.WAITLIST_OFFER_MINUTES)
+
+    offers = 0
+    for lawyer_id, start, end in slots:
+        index = indexes.get(lawyer_id)
+        if index is None or any(busy_start < end and busy_end > start for busy_start, busy_end in busy[lawyer_id]):
+            continue
+        while (entry := index.pop_first_match(start, end)) is not None:
+            try:
+                if _offer(entry, start, end, reserved_until, now) is None:
+                    continue # Withdrawn; next in line
+            except IntegrityError:
+                break # Slot was taken meanwhile
+            busy[lawyer_id].append((start, end))
+            offers += 1
+            break
+    return offers
+
+
+def expire_waitlist(now):
+    """Closes waiting entries whose window has passed. Returns how many were closed."""
+    return WaitlistEntry.objects.filter(status='waiting', window_end__lte=now).update(status='expired')
@@ -0,0 +1,111 @@
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from users.models import LawyerProfile, UserProfile
+from .seeding import USERNAME_PREFIX, client_username
+
+STEPS = ('auth', 'available_slots', 'create', 'confirm_booking')
+
+
+class StepRecorder:
+    """Collects latency, status code and query count per step; one instance per worker thread."""
+
+    def __init__(self):
+        self.latencies_ms = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+
+    def call(self, step, method, *args, **kwargs):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = method(*args, **kwargs)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.latencies_ms[step].append(elapsed_ms)
+        self.queries[step].append(len(captured.captured_queries))
+        self.status_codes[step][response.status_code] += 1
+        return response
+
+    def merge(self, other):
+        for step in other.latencies_ms:
+            self.latencies_ms[step].extend(other.latencies_ms[step])
+            self.queries[step].extend(other.queries[step])
+            for code, count in other.status_codes[step].items():
+                self.status_codes[step][code] += count
+
+
+def run_booking_flows(services, flows, concurrency=1, seed=0):
+    """
+    Runs `flows` complete bookings (auth -> available_slots -> create -> confirm-booking) through the
+    full Django stack, spread over `concurrency` threads. Returns (merged StepRecorder, completed flows, wall seconds).
+    """
+    lawyer_ids = list(
+        LawyerProfile.objects.filter(user_profile__user__username__startswith=USERNAME_PREFIX).values_list('id', flat=True)
+    )
+    client_count = UserProfile.objects.filter(user__username__startswith=f'{USERNAME_PREFIX}client_').count()
+    if not lawyer_ids or not client_count:
+        raise RuntimeError('No benchmark data found; run `manage.py seed_benchmark_data` first.')
+
+    flows_per_worker = [flows // concurrency + (1 if i < flows % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(
+            lambda args: _worker(services, lawyer_ids, client_count, *args),
+            [(count, seed + worker) for worker, count in enumerate(flows_per_worker)],
+        ))
+    wall_seconds = time.perf_counter() - started
+
+    recorder = StepRecorder()
+    completed = 0
+    for worker_recorder, worker_completed in results:
+        recorder.merge(worker_recorder)
+        completed += worker_completed
+    return recorder, completed, wall_seconds
+
+
+def _worker(services, lawyer_ids, client_count, flows, seed):
+    rng = random.Random(seed)
+    recorder = StepRecorder()
+    completed = 0
+    try:
+        for _ in range(flows):
+            token = services.cognito.issue_token(client_username(rng.randrange(client_count)), groups=['clients'])
+            # Server errors are recorded as 500s instead of aborting the run
+            client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Bearer {token}')
+            if _run_flow(client, services, rng.choice(lawyer_ids), rng, recorder):
+                completed += 1
+    finally:
+        connections.close_all() # Each worker thread owns its own DB connection
+    return recorder, completed
+
+
+def _run_flow(client, services, lawyer_id, rng, recorder):
+    response = recorder.call('auth', client.get, '/api/users/profile/')
+    if response.status_code != 200:
+        return False
+
+    response = recorder.call('available_slots', client.get, '/api/appointments/available_slots/', {'lawyer_id': lawyer_id})
+    if response.status_code != 200 or not response.json():
+        return False
+    slot = rng.choice(response.json())
+
+    response = recorder.call(
+        'create', client.post, '/api/appointments/',
+        {'lawyer': lawyer_id, 'start': slot['start'], 'end': slot['end']}, content_type='application/json',
+    )
+    if response.status_code != 201:
+        return False
+    payment_intent_id = response.json()['paymentIntentId']
+
+    services.stripe.confirm_payment(payment_intent_id) # What Stripe.js does in the browser
+
+    response = recorder.call(
+        'confirm_booking', client.post, '/api/appointments/confirm-booking/',
+        {'payment_intent_id': payment_intent_id}, content_type='application/json',
+    )
+    return response.status_code == 201
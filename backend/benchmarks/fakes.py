@@ -0,0 +1,249 @@
+"""
+Local stand-ins for the external services used by the booking flow, so benchmarks run offline:
+
+- FakeCognito: an RS256 key pair that mints Cognito-style ID tokens and publishes the matching JWKS.
+- FakeStripe: an in-memory PaymentIntent/Refund store speaking the subset of the Stripe REST API we use.
+- FakeCognitoIdp: an in-process stand-in for the boto3 `cognito-idp` client's admin user calls.
+
+Both are served by one threaded HTTP server on 127.0.0.1 (LocalServiceStack), so JWKS fetches and
+Stripe calls still pay a real HTTP round-trip, as they would in production.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+FAKE_USER_POOL_ID = 'local_BenchmarkPool'
+FAKE_APP_CLIENT_ID = 'benchmark-app-client'
+FAKE_REGION = 'us-east-1'
+
+
+class FakeCognito:
+    """Issues ID tokens that CognitoAuthentication accepts when pointed at this instance's JWKS."""
+
+    def __init__(self, user_pool_id=FAKE_USER_POOL_ID, app_client_id=FAKE_APP_CLIENT_ID, region=FAKE_REGION):
+        self.user_pool_id = user_pool_id
+        self.app_client_id = app_client_id
+        self.region = region
+        self.kid = uuid.uuid4().hex
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        public_jwk = jwk.construct(public_pem, 'RS256').to_dict()
+        public_jwk.update({'kid': self.kid, 'use': 'sig', 'alg': 'RS256'})
+        self.jwks = {'keys': [public_jwk]}
+
+    @property
+    def issuer(self):
+        return f"https://cognito-idp.{self.region}.amazonaws.com/{self.user_pool_id}"
+
+    def issue_token(self, username, groups=(), email=None, ttl_seconds=3600):
+        now = int(time.time())
+        claims = {
+            'sub': str(uuid.uuid5(uuid.NAMESPACE_DNS, username)),
+            'cognito:username': username,
+            'cognito:groups': list(groups),
+            'email': email or f'{username}@example.test',
+            'aud': self.app_client_id,
+            'iss': self.issuer,
+            'token_use': 'id',
+            'iat': now,
+            'exp': now + ttl_seconds,
+        }
+        return jwt.encode(claims, self._private_pem, algorithm='RS256', headers={'kid': self.kid})
+
+
+class FakeStripe:
+    """Keeps PaymentIntents in memory. confirm_payment() stands in for the client-side card confirmation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.payment_intents = {}
+        self.refunds = {}
+
+    def create_payment_intent(self, params):
+        payment_intent_id = f"pi_{uuid.uuid4().hex[:24]}"
+        payment_intent = {
+            'id': payment_intent_id,
+            'object': 'payment_intent',
+            'amount': int(params.get('amount', 0)),
+            'currency': params.get('currency', 'usd'),
+            'status': 'requires_payment_method',
+            'client_secret': f"{payment_intent_id}_secret_{uuid.uuid4().hex[:16]}",
+            'metadata': params.get('metadata', {}),
+            'created': int(time.time()),
+        }
+        with self._lock:
+            self.payment_intents[payment_intent_id] = payment_intent
+        return payment_intent
+
+    def confirm_payment(self, payment_intent_id, status='succeeded'):
+        with self._lock:
+            self.payment_intents[payment_intent_id]['status'] = status
+
+    def create_refund(self, params):
+        refund = {
+            'id': f"re_{uuid.uuid4().hex[:24]}",
+            'object': 'refund',
+            'payment_intent': params.get('payment_intent'),
+            'status': 'succeeded',
+        }
+        with self._lock:
+            self.refunds[refund['id']] = refund
+        return refund
+
+
+class FakeCognitoIdp:
+    """
+    Mimics the boto3 `cognito-idp` client calls made by users.cognito_admin_actions.create_lawyer_cognito_user,
+    sleeping `latency_seconds` per call like a network round-trip. Usernames in `fail_usernames` raise an error.
+    """
+
+    class exceptions:
+        class UsernameExistsException(Exception):
+            pass
+
+        class TooManyRequestsException(Exception):
+            pass
+
+        class UserNotFoundException(Exception):
+            pass
+
+    def __init__(self, latency_seconds=0.02, fail_usernames=()):
+        self.latency_seconds = latency_seconds
+        self.fail_usernames = set(fail_usernames)
+        self._lock = threading.Lock()
+        self.users = {}
+        self.calls = 0
+
+    def _call(self, username):
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            self.calls += 1
+        if username in self.fail_usernames:
+            raise RuntimeError(f'Simulated Cognito failure for {username}')
+
+    def admin_create_user(self, UserPoolId, Username, UserAttributes=(), **kwargs):
+        self._call(Username)
+        with self._lock:
+            if Username in self.users:
+                raise self.exceptions.UsernameExistsException(f'User account already exists: {Username}')
+            self.users[Username] = {'attributes': {a['Name']: a['Value'] for a in UserAttributes}, 'groups': set()}
+
+    def admin_get_user(self, UserPoolId, Username):
+        self._call(Username)
+        with self._lock:
+            if Username not in self.users:
+                raise self.exceptions.UserNotFoundException(f'User does not exist: {Username}')
+            attributes = self.users[Username]['attributes']
+        return {'Username': Username, 'UserAttributes': [{'Name': name, 'Value': value} for name, value in attributes.items()]}
+
+    def admin_add_user_to_group(self, UserPoolId, Username, GroupName):
+        self._call(Username)
+        with self._lock:
+            if Username not in self.users:
+                raise self.exceptions.UserNotFoundException(f'User does not exist: {Username}')
+            self.users[Username]['groups'].add(GroupName)
+
+
+def _parse_stripe_form(body: str) -> dict:
+    """Decodes Stripe's form encoding, e.g. `metadata[lawyer_id]=3` -> {'metadata': {'lawyer_id': '3'}}."""
+    params = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        if '[' in key:
+            outer, inner = key.split('[', 1)
+            params.setdefault(outer, {})[inner.rstrip(']')] = value
+        else:
+            params[key] = value
+    return params
+
+
+class LocalServiceStack:
+    """
+    Runs FakeCognito's JWKS endpoint and FakeStripe's API on one local HTTP server in a daemon thread.
+    Use as a context manager; `cognito_settings()` and `stripe_api_base` say how to point the app at it.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.cognito = FakeCognito()
+        self.stripe = FakeStripe()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='benchmark-fakes', daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stripe_api_base(self):
+        return self.base_url
+
+    def cognito_settings(self) -> dict:
+        """Settings overrides that make CognitoAuthentication trust tokens from self.cognito."""
+        return {
+            'COGNITO_USER_POOL_ID': self.cognito.user_pool_id,
+            'COGNITO_APP_CLIENT_ID': self.cognito.app_client_id,
+            'COGNITO_REGION': self.cognito.region,
+            'COGNITO_JWKS_URL': f"{self.base_url}/{self.cognito.user_pool_id}/.well-known/jwks.json",
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stack = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass # Keep benchmark output clean
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_form(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return _parse_stripe_form(self.rfile.read(length).decode())
+
+            def do_GET(self):
+                if self.path.endswith('/.well-known/jwks.json'):
+                    return self._send_json(stack.cognito.jwks)
+                if self.path.startswith('/v1/payment_intents/'):
+                    payment_intent_id = self.path.rsplit('/', 1)[-1].split('?', 1)[0]
+                    payment_intent = stack.stripe.payment_intents.get(payment_intent_id)
+                    if payment_intent is None:
+                        return self._send_json({'error': {'type': 'invalid_request_error', 'message': 'No such payment_intent'}}, 404)
+                    return self._send_json(payment_intent)
+                return self._send_json({'error': {'message': 'Not found'}}, 404)
+
+            def do_POST(self):
+                if self.path == '/v1/payment_intents':
+                    return self._send_json(stack.stripe.create_payment_intent(self._read_form()))
+                if self.path == '/v1/refunds':
+                    return self._send_json(stack.stripe.create_refund(self._read_form()))
+                return self._send_json({'error': {'message': 'Not found'}}, 404)
+
+        return Handler
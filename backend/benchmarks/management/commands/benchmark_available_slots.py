@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from appointments.models import SchedulingPolicy
+from appointments.scheduling import invalidate_rules
+from benchmarks.fakes import LocalServiceStack
+from benchmarks.stats import summarize_latencies, run_metadata, write_results
+from users.models import LawyerProfile
+
+URL = '/api/appointments/available_slots/?lawyer_id={}'
+
+# Rules applied to every lawyer in the `policies` mode (rolled back afterwards)
+BENCHMARK_POLICY = {
+    'slot_minutes': 45,
+    'buffer_before_minutes': 10,
+    'buffer_after_minutes': 15,
+    'max_appointments_per_day': 4,
+    'min_notice_minutes': 24 * 60,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures GET /api/appointments/available_slots/ (latency, queries per request, slots returned) across '
+        'the seeded lawyers, with their current scheduling rules and, with --with-policies, with buffers, daily '
+        'caps, minimum notice and 45-minute slots applied to every lawyer. Seed data first with '
+        '`manage.py seed_benchmark_data`. Requires Redis (scheduling rules are cached there).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lawyers', type=int, default=50, help='Lawyers queried per round.')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--with-policies', action='store_true')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/available-slots-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyer_ids = list(LawyerProfile.objects.order_by('id').values_list('id', flat=True)[:options['lawyers']])
+        if not lawyer_ids:
+            raise CommandError('No lawyers found; load data first (e.g. manage.py seed_benchmark_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"available-slots-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+
+        # THROTTLE_ENABLED off: this measures the endpoints, not the rate limits (see throttle_load_test)
+        with LocalServiceStack() as services, override_settings(**services.cognito_settings(), THROTTLE_ENABLED=False):
+            token = services.cognito.issue_token('bench_slots_reader', groups=['clients'])
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            client.get('/api/users/profile/') # Provision the reader outside the measurements
+
+            modes = {'current': self.measure(client, lawyer_ids, options['rounds'])}
+            if options['with_policies']:
+                with transaction.atomic():
+                    SchedulingPolicy.objects.filter(lawyer_id__in=lawyer_ids).delete()
+                    SchedulingPolicy.objects.bulk_create([
+                        SchedulingPolicy(lawyer_id=lawyer_id, **BENCHMARK_POLICY) for lawyer_id in lawyer_ids
+                    ])
+                    # bulk_create skips the signals that invalidate cached rules
+                    for lawyer_id in lawyer_ids:
+                        invalidate_rules(lawyer_id)
+                    modes['policies'] = self.measure(client, lawyer_ids, options['rounds'])
+                    transaction.set_rollback(True)
+                for lawyer_id in lawyer_ids:
+                    invalidate_rules(lawyer_id)
+
+        results = {
+            'benchmark': 'available_slots',
+            'metadata': run_metadata(),
+            'config': {'lawyers': len(lawyer_ids), 'rounds': options['rounds'], 'policy': BENCHMARK_POLICY if options['with_policies'] else None},
+            'modes': modes,
+        }
+        write_results(output, results)
+        for mode, stats in modes.items():
+            self.stdout.write(
+                f"  {mode:<9} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  max {stats['max_ms']} ms  "
+                f"queries/req {stats['queries_per_request']}  slots/req {stats['slots_per_request']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def measure(self, client, lawyer_ids, rounds):
+        for lawyer_id in lawyer_ids: # Warm-up (also fills the rules cache)
+            client.get(URL.format(lawyer_id))
+        latencies, queries, slots = [], [], []
+        for _ in range(rounds):
+            for lawyer_id in lawyer_ids:
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(URL.format(lawyer_id))
+                    latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{URL.format(lawyer_id)} returned {response.status_code}.')
+                queries.append(len(captured.captured_queries))
+                slots.append(len(response.json()))
+        return {
+            **summarize_latencies(latencies),
+            'queries_per_request': round(sum(queries) / len(queries), 1),
+            'slots_per_request': round(sum(slots) / len(slots), 1),
+        }
@@ -0,0 +1,108 @@
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from appointments import calendar_feed
+from appointments.models import Appointment, CalendarFeed
+from benchmarks.stats import run_metadata, summarize_latencies, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures GET /api/calendar-feeds/<token>.ics for the --lawyers lawyers with the most appointments, on '
+        'whatever data is loaded (e.g. `generate_synthetic_data`): full generation (time, bytes, events, peak '
+        'traced memory while consuming the stream) and --rounds conditional polls with If-None-Match, which '
+        'should be 304s costing one query. Feeds created for the run are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lawyers', type=int, default=20)
+        parser.add_argument('--rounds', type=int, default=20, help='Conditional polls per lawyer.')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/calendar-feed-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyer_ids = list(
+            Appointment.objects.values('lawyer_id').annotate(appointments=Count('id'))
+            .order_by('-appointments').values_list('lawyer_id', flat=True)[:options['lawyers']]
+        )
+        if not lawyer_ids:
+            raise CommandError('No appointments found; load data first (e.g. manage.py generate_synthetic_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"calendar-feed-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        existing = set(CalendarFeed.objects.filter(lawyer_id__in=lawyer_ids).values_list('lawyer_id', flat=True))
+        CalendarFeed.objects.bulk_create([
+            CalendarFeed(lawyer_id=lawyer_id, token=calendar_feed.new_token()) for lawyer_id in lawyer_ids if lawyer_id not in existing
+        ])
+        feeds = CalendarFeed.objects.filter(lawyer_id__in=lawyer_ids).values_list('lawyer_id', 'token')
+
+        client = Client()
+        full_runs, conditional_ms, conditional_queries = [], [], []
+        try:
+            for lawyer_id, token in feeds:
+                url = reverse('calendar-feed', kwargs={'token': token})
+                run, etag = self.measure_full(client, url)
+                full_runs.append({'lawyer_id': lawyer_id, **run})
+                for _ in range(options['rounds']):
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                        conditional_ms.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 304:
+                        raise CommandError(f'Conditional GET {url} returned {response.status_code}, expected 304.')
+                    conditional_queries.append(len(captured.captured_queries))
+        finally:
+            CalendarFeed.objects.filter(lawyer_id__in=lawyer_ids).exclude(lawyer_id__in=existing).delete()
+
+        full_ms = [run['ms'] for run in full_runs]
+        results = {
+            'benchmark': 'calendar_feed',
+            'metadata': run_metadata(),
+            'config': {'lawyers': len(full_runs), 'rounds': options['rounds']},
+            'full': {
+                'latency_ms': summarize_latencies(full_ms),
+                'max_events': max(run['events'] for run in full_runs),
+                'max_bytes': max(run['bytes'] for run in full_runs),
+                'max_peak_traced_kb': max(run['peak_traced_kb'] for run in full_runs),
+                'runs': full_runs,
+            },
+            'not_modified': {
+                'latency_ms': summarize_latencies(conditional_ms),
+                'max_queries': max(conditional_queries, default=0),
+            },
+        }
+        full, not_modified = results['full'], results['not_modified']
+        self.stdout.write(
+            f"  full feed     p50 {full['latency_ms']['p50_ms']} ms  p95 {full['latency_ms']['p95_ms']} ms  "
+            f"up to {full['max_events']:,} events / {full['max_bytes']:,} bytes  peak traced {full['max_peak_traced_kb']:,} KB"
+        )
+        self.stdout.write(
+            f"  304 poll      p50 {not_modified['latency_ms']['p50_ms']} ms  p95 {not_modified['latency_ms']['p95_ms']} ms  "
+            f"{not_modified['max_queries']} query(ies)"
+        )
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def measure_full(self, client, url):
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get(url)
+        if response.status_code != 200:
+            tracemalloc.stop()
+            raise CommandError(f'{url} returned {response.status_code}.')
+        size = events = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            events += chunk.count(b'BEGIN:VEVENT')
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {'ms': round(elapsed_ms, 3), 'events': events, 'bytes': size, 'peak_traced_kb': peak // 1024}, response['ETag']
@@ -0,0 +1,95 @@
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments.capacity import build_report
+from appointments.scheduling import load_schedule
+from benchmarks.stats import summarize_latencies, run_metadata, write_results
+from users.models import LawyerProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the firm-wide capacity report (appointments/capacity.py) over --days days on whatever data '
+        'is loaded, e.g. `generate_synthetic_data --lawyers 10000 --users 1000`: duration, queries and peak '
+        'traced memory per build. Compares it with the per-lawyer alternative (one load_schedule() per '
+        'lawyer, as available_slots does), timed on a sample and extrapolated to all lawyers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--rounds', type=int, default=3)
+        parser.add_argument('--per-lawyer-sample', type=int, default=200, help='Lawyers timed for the per-lawyer comparison (0 to skip).')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/capacity-report-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyers = LawyerProfile.objects.count()
+        if not lawyers:
+            raise CommandError('No lawyers found; load data first (e.g. manage.py generate_synthetic_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"capacity-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        first_day = timezone.localdate()
+        last_day = first_day + timedelta(days=options['days'] - 1)
+
+        durations, queries = [], []
+        for _ in range(options['rounds']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                report = build_report(first_day, last_day)
+                durations.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+
+        # Separate build for memory: tracemalloc slows allocation-heavy code down too much to time it
+        tracemalloc.start()
+        build_report(first_day, last_day)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results = {
+            'benchmark': 'capacity_report',
+            'metadata': run_metadata(),
+            'config': {'lawyers': lawyers, 'days': options['days'], 'rounds': options['rounds']},
+            'report': {
+                **summarize_latencies(durations),
+                'queries': max(queries),
+                'peak_traced_mb': round(peak_bytes / 2**20, 1),
+                'utilization': report['totals']['utilization'],
+            },
+        }
+
+        sample = options['per_lawyer_sample']
+        if sample:
+            sample_lawyers = list(LawyerProfile.objects.order_by('id')[:sample])
+            days = [first_day + timedelta(days=i) for i in range(options['days'])]
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                for lawyer in sample_lawyers:
+                    load_schedule(lawyer, first_day, last_day).available_slots(days)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            results['per_lawyer'] = {
+                'sampled_lawyers': len(sample_lawyers),
+                'sample_ms': round(elapsed_ms, 1),
+                'queries_per_lawyer': round(len(captured.captured_queries) / len(sample_lawyers), 1),
+                'extrapolated_ms': round(elapsed_ms / len(sample_lawyers) * lawyers, 1),
+            }
+        write_results(output, results)
+
+        stats = results['report']
+        self.stdout.write(
+            f"{lawyers} lawyers x {options['days']} days: p50 {stats['p50_ms']} ms  max {stats['max_ms']} ms  "
+            f"queries {stats['queries']}  peak traced {stats['peak_traced_mb']} MB"
+        )
+        if sample:
+            per_lawyer = results['per_lawyer']
+            self.stdout.write(
+                f"  per-lawyer load_schedule: {per_lawyer['queries_per_lawyer']} queries/lawyer, "
+                f"~{per_lawyer['extrapolated_ms']} ms for all lawyers (from {per_lawyer['sampled_lawyers']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
@@ -0,0 +1,74 @@
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from benchmarks.stats import run_metadata, write_results
+
+URL = '/api/admin/exports/{}/?output={}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams GET /api/admin/exports/<dataset>/ for appointments and users, as CSV and NDJSON, on whatever '
+        'data is loaded (e.g. `generate_synthetic_data`), and reports rows/s, bytes and the peak traced memory '
+        'while consuming the stream. Peak memory should not grow with the number of rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datasets', nargs='+', default=['appointments', 'users'])
+        parser.add_argument('--outputs', nargs='+', default=['csv', 'ndjson'])
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/exports-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        if not Appointment.objects.exists():
+            raise CommandError('No appointments found; load data first (e.g. manage.py generate_synthetic_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"exports-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        admin, _ = User.objects.get_or_create(username='bench_export_admin', defaults={'is_staff': True})
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        runs = []
+        for dataset in options['datasets']:
+            for export_output in options['outputs']:
+                runs.append(self.measure(client, dataset, export_output))
+                run = runs[-1]
+                self.stdout.write(
+                    f"  {dataset:<12} {export_output:<6} {run['rows']:>9,} rows  {run['seconds']:>7} s  "
+                    f"{run['rows_per_second']:>9,} rows/s  {run['bytes']:>12,} bytes  peak traced {run['peak_traced_kb']:,} KB"
+                )
+
+        write_results(output, {'benchmark': 'exports', 'metadata': run_metadata(), 'runs': runs})
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def measure(self, client, dataset, export_output):
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.get(URL.format(dataset, export_output))
+        if response.status_code != 200:
+            tracemalloc.stop()
+            raise CommandError(f'{URL.format(dataset, export_output)} returned {response.status_code}.')
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows = lines - 1 if export_output == 'csv' else lines # CSV has a header line
+        return {
+            'dataset': dataset,
+            'output': export_output,
+            'rows': rows,
+            'bytes': size,
+            'seconds': round(seconds, 2),
+            'rows_per_second': int(rows / seconds) if seconds else None,
+            'peak_traced_kb': peak // 1024,
+        }
@@ -0,0 +1,147 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from appointments import external_calendars
+from appointments.models import ExternalBusyInterval, ExternalCalendar
+from appointments.scheduling import load_schedule
+from benchmarks.stats import run_metadata, summarize_latencies, write_results
+from users.models import LawyerProfile
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Syncs a synthetic external calendar (--events events, --recurring-percent of them weekly) from a local '
+        'HTTP file server into the first lawyer and times: the first sync, an unchanged re-download, a re-sync '
+        'with --changed-percent of the events moved (only those are rewritten), and load_schedule() over a week '
+        'with the imported busy time. The calendar is deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--recurring-percent', type=float, default=10)
+        parser.add_argument('--changed-percent', type=float, default=2)
+        parser.add_argument('--rounds', type=int, default=50, help='load_schedule() calls measured.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/external-calendars-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyer = LawyerProfile.objects.order_by('id').first()
+        if lawyer is None:
+            raise CommandError('No lawyers found; load data first (e.g. manage.py seed_benchmark_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"external-calendars-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        rng = random.Random(options['seed'])
+        events = self.build_events(options['events'], options['recurring_percent'], rng)
+        changed = rng.sample(range(len(events)), int(len(events) * options['changed_percent'] / 100))
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'calendar.ics')
+        server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=directory))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        calendar = ExternalCalendar.objects.create(
+            lawyer=lawyer, name='Benchmark', url=f'http://127.0.0.1:{server.server_port}/calendar.ics'
+        )
+        phases = {}
+        try:
+            with override_settings(EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS=True):
+                with open(path, 'wb') as file:
+                    file.write(self.render(events))
+                phases['first_sync'] = self.measure(calendar)
+                phases['unchanged_sync'] = self.measure(calendar)
+                for index in changed:
+                    uid, start, minutes, weekly, sequence = events[index]
+                    events[index] = (uid, start + timedelta(hours=1), minutes, weekly, sequence + 1)
+                with open(path, 'wb') as file:
+                    file.write(self.render(events))
+                phases['changed_sync'] = self.measure(calendar)
+
+            today = timezone.localdate()
+            days = [today + timedelta(days=i) for i in range(7)]
+            latencies = []
+            for _ in range(options['rounds']):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    load_schedule(lawyer, days[0], days[-1]).available_slots(days)
+                    latencies.append((time.perf_counter() - started) * 1000)
+            stored_intervals = ExternalBusyInterval.objects.filter(event__calendar=calendar).count()
+        finally:
+            server.shutdown()
+            calendar.delete()
+
+        results = {
+            'benchmark': 'external_calendars',
+            'metadata': run_metadata(),
+            'config': {
+                'events': options['events'],
+                'recurring_percent': options['recurring_percent'],
+                'changed_events': len(changed),
+                'bytes': os.path.getsize(path),
+            },
+            'phases': phases,
+            'stored_intervals': stored_intervals,
+            'week_schedule': {'latency_ms': summarize_latencies(latencies), 'queries': len(captured.captured_queries)},
+        }
+        for name, phase in phases.items():
+            self.stdout.write(f"  {name:<15} {phase['seconds']:>7.3f} s  {phase['queries']:>5} queries  {phase['counts']}")
+        self.stdout.write(
+            f"  {stored_intervals:,} busy intervals stored; week schedule p50 {results['week_schedule']['latency_ms']['p50_ms']} ms "
+            f"({results['week_schedule']['queries']} queries)"
+        )
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def measure(self, calendar):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            counts = external_calendars.sync_calendar(calendar)
+            seconds = time.perf_counter() - started
+        if counts is None:
+            raise CommandError(f'Sync failed: {ExternalCalendar.objects.get(id=calendar.id).last_error}')
+        return {'seconds': round(seconds, 3), 'queries': len(captured.captured_queries), 'counts': counts}
+
+    def build_events(self, count, recurring_percent, rng):
+        """[(uid, local start, minutes, weekly, sequence)] spread over the next 180 days during working hours."""
+        today = timezone.localdate()
+        events = []
+        for index in range(count):
+            day = today + timedelta(days=rng.randrange(180))
+            start = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(8, 17), minutes=rng.choice((0, 30)))
+            weekly = rng.random() * 100 < recurring_percent
+            events.append((f'benchmark-{index}@example.test', start, rng.choice((30, 60, 90, 120)), weekly, 0))
+        return events
+
+    def render(self, events):
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ') # Differs on every export, like real servers
+        lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Benchmark//EN']
+        for uid, start, minutes, weekly, sequence in events:
+            lines += [
+                'BEGIN:VEVENT',
+                f'UID:{uid}',
+                f'DTSTAMP:{stamp}',
+                f'SEQUENCE:{sequence}',
+                f'DTSTART:{start:%Y%m%dT%H%M%S}',
+                f'DURATION:PT{minutes}M',
+                'SUMMARY:Busy',
+            ]
+            if weekly:
+                lines.append('RRULE:FREQ=WEEKLY;COUNT=26')
+            lines.append('END:VEVENT')
+        lines.append('END:VCALENDAR')
+        return ('\r\n'.join(lines) + '\r\n').encode()
@@ -0,0 +1,86 @@
+import os
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from benchmarks.fakes import LocalServiceStack
+from benchmarks.stats import summarize_latencies, run_metadata, write_results
+from users.directory import rebuild_directory
+from users.models import LawyerProfile
+
+URL = '/api/client/lawyers/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures GET /api/client/lawyers/ served from the database vs. from the Redis directory snapshot '
+        '(latency, queries per request, payload size) on whatever data is loaded, e.g. '
+        '`generate_synthetic_data --lawyers 100000 --users 1000`. Requires Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='Measured requests per mode.')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/directory-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyers = LawyerProfile.objects.count()
+        if not lawyers:
+            raise CommandError('No lawyers found; load data first (e.g. manage.py generate_synthetic_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"directory-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+
+        with LocalServiceStack() as services, override_settings(**services.cognito_settings()):
+            token = services.cognito.issue_token('bench_directory_reader', groups=['clients'])
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+            client.get('/api/users/profile/') # Provision the reader outside the measurements
+
+            with override_settings(LAWYER_DIRECTORY_SNAPSHOT_ENABLED=False):
+                database = self.measure(client, options['requests'])
+
+            started = time.perf_counter()
+            rebuild_directory()
+            rebuild_seconds = time.perf_counter() - started
+            snapshot = self.measure(client, options['requests'])
+
+        if database.pop('body') != snapshot.pop('body'):
+            raise CommandError('Snapshot response differs from the database response.')
+
+        results = {
+            'benchmark': 'lawyer_directory',
+            'metadata': run_metadata(),
+            'config': {'requests': options['requests'], 'lawyers': lawyers},
+            'rebuild_seconds': round(rebuild_seconds, 3),
+            'modes': {'database': database, 'snapshot': snapshot},
+        }
+        write_results(output, results)
+
+        self.stdout.write(f'{lawyers} lawyers, full snapshot rebuild {rebuild_seconds:.2f} s')
+        for mode, stats in results['modes'].items():
+            self.stdout.write(
+                f"  {mode:<9} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  max {stats['max_ms']} ms  "
+                f"queries/req {stats['queries_per_request']}  {stats['payload_bytes']:,} bytes"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Responses are identical. Results written to {output}'))
+
+    def measure(self, client, requests):
+        client.get(URL) # Warm-up
+        latencies, queries = [], []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(URL)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{URL} returned {response.status_code}.')
+            queries.append(len(captured.captured_queries))
+        return {
+            **summarize_latencies(latencies),
+            'queries_per_request': max(queries),
+            'payload_bytes': len(response.content),
+            'body': response.content,
+        }
@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.fakes import FakeCognitoIdp
+from benchmarks.stats import run_metadata, write_results
+from benchmarks.synthetic import PRACTICE_AREAS, TEMPLATE_WEIGHTS, USERNAME_PREFIX, WEEKLY_TEMPLATES, delete_synthetic_data
+from users import bulk_import, cognito_admin_actions
+from users.models import LawyerImport
+
+DAY_ABBREVIATIONS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports --lawyers synthetic lawyers with weekly availability through users/bulk_import.py and times '
+        'each phase: parse, validate, load (COPY on PostgreSQL, bulk_create elsewhere) and Cognito provisioning '
+        'against an in-process FakeCognitoIdp with --cognito-latency-ms per call. The imported accounts are '
+        'deleted afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lawyers', type=int, default=10_000)
+        parser.add_argument('--input', choices=bulk_import.INPUTS, default='csv')
+        parser.add_argument('--cognito-latency-ms', type=float, default=20)
+        parser.add_argument('--cognito-rate', type=float, default=0, help='Cognito users per second (0 = unlimited).')
+        parser.add_argument('--cognito-concurrency', type=int, default=32)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the imported accounts.')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/lawyer-import-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"lawyer-import-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        prefix = f'{USERNAME_PREFIX}import_{uuid.uuid4().hex[:6]}_'
+        content = self.build_file(prefix, options['lawyers'], options['input'], random.Random(options['seed']))
+        phases = {}
+
+        started = time.perf_counter()
+        rows = bulk_import.parse(content, options['input'])
+        phases['parse_s'] = time.perf_counter() - started
+
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            lawyers, errors, error_count = bulk_import.validate(rows)
+            phases['validate_s'] = time.perf_counter() - started
+        validate_queries = len(captured.captured_queries)
+        if error_count:
+            raise CommandError(f'{error_count} generated row(s) are invalid, e.g. {errors[0]}')
+
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            lawyer_import = bulk_import.load(lawyers, source_name=f'benchmark.{options["input"]}')
+            phases['load_s'] = time.perf_counter() - started
+        load_queries = len(captured.captured_queries)
+
+        cognito = FakeCognitoIdp(latency_seconds=options['cognito_latency_ms'] / 1000)
+        try:
+            with mock.patch.object(cognito_admin_actions, 'cognito_client', cognito):
+                started = time.perf_counter()
+                lawyer_import = bulk_import.provision_cognito(
+                    lawyer_import.id, rate=options['cognito_rate'], concurrency=options['cognito_concurrency']
+                )
+                phases['cognito_s'] = time.perf_counter() - started
+        finally:
+            if not options['keep']:
+                LawyerImport.objects.filter(id=lawyer_import.id).delete()
+                delete_synthetic_data(prefix)
+
+        database_s = phases['parse_s'] + phases['validate_s'] + phases['load_s']
+        results = {
+            'benchmark': 'lawyer_import',
+            'metadata': run_metadata(),
+            'config': {
+                'lawyers': options['lawyers'],
+                'input': options['input'],
+                'bytes': len(content),
+                'method': bulk_import.default_method(),
+                'cognito_latency_ms': options['cognito_latency_ms'],
+                'cognito_rate': options['cognito_rate'],
+                'cognito_concurrency': options['cognito_concurrency'],
+            },
+            'phases': {name: round(seconds, 3) for name, seconds in phases.items()},
+            'queries': {'validate': validate_queries, 'load': load_queries},
+            'database_lawyers_per_second': int(options['lawyers'] / database_s) if database_s else None,
+            'cognito': {
+                'created': lawyer_import.cognito_created,
+                'failed': lawyer_import.cognito_failed,
+                'calls': cognito.calls,
+                'users_per_second': int(lawyer_import.cognito_created / phases['cognito_s']) if phases['cognito_s'] else None,
+            },
+        }
+        for name, seconds in phases.items():
+            self.stdout.write(f"  {name[:-2]:<9} {seconds:>8.2f} s")
+        self.stdout.write(
+            f"  {options['lawyers']:,} lawyers in the database in {database_s:.2f} s "
+            f"({validate_queries} validation + {load_queries} load queries); "
+            f"{lawyer_import.cognito_created:,} Cognito users in {phases['cognito_s']:.2f} s"
+        )
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def build_file(self, prefix, count, input_format, rng):
+        lawyers = []
+        for i in range(count):
+            _, template = rng.choices(WEEKLY_TEMPLATES, weights=TEMPLATE_WEIGHTS)[0]
+            availability = '; '.join(
+                f'{DAY_ABBREVIATIONS[day]} {start:02d}:00-{end:02d}:00'
+                for day, hours in sorted(template.items()) for start, end in hours
+            )
+            lawyers.append({
+                'username': f'{prefix}{i}',
+                'email': f'{prefix}{i}@example.test',
+                'first_name': 'Imported',
+                'last_name': f'Lawyer {i}',
+                'phone_number': f'+1555{i:07d}',
+                'bio': f'Imported lawyer {i}',
+                'areas_of_practice': ', '.join(rng.sample(PRACTICE_AREAS, 2)),
+                'years_of_experience': str(rng.randint(1, 40)),
+                'consultation_fee': rng.choice(('50.00', '75.00', '100.00', '150.00', '250.00')),
+                'availability': availability,
+            })
+        if input_format == 'json':
+            return json.dumps(lawyers).encode()
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(lawyers[0]))
+        writer.writeheader()
+        writer.writerows(lawyers)
+        return buffer.getvalue().encode()
@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from appointments.models import Appointment
+from appointments.serializers import AppointmentSerializer
+from config.fast_serializers import ValuesSerializer
+from config.renderers import FastJSONRenderer
+from users.models import UserProfile, LawyerProfile
+from users.serializers import LawyerProfileSerializer
+
+
+def _lawyers(count, rng):
+    """Unsaved LawyerProfiles with their UserProfile/User attached, as list() would load them."""
+    lawyers = []
+    for i in range(count):
+        user = User(id=i + 1, username=f'lawyer_{i}', email=f'lawyer_{i}@example.test', first_name='Åsa', last_name=f'Lawyer {i}')
+        profile = UserProfile(id=i + 1, user=user, role='lawyer')
+        lawyers.append(LawyerProfile(
+            id=i + 1, user_profile=profile, bio='Handles family law — and mediation.' * 3,
+            areas_of_practice='Family, Immigration', years_of_experience=rng.randint(1, 40),
+            consultation_fee=Decimal(rng.choice(['50', '75.5', '150'])), website_url='https://example.test/',
+            is_lawyer_specific_profile_complete=True,
+        ))
+    return lawyers
+
+
+def _appointments(count, rng):
+    base = datetime(2026, 1, 1, 9, tzinfo=dt_timezone.utc)
+    appointments = []
+    for i in range(count):
+        start = base + timedelta(hours=rng.randrange(24 * 365))
+        appointments.append(Appointment(
+            id=i + 1, lawyer_id=rng.randint(1, 500), client_id=rng.randint(1, 5000), start=start,
+            end=start + timedelta(hours=1), status=rng.choice(['pending', 'confirmed', 'cancelled']),
+            created_at=start - timedelta(days=3, microseconds=rng.randrange(10 ** 6)),
+        ))
+    return appointments
+
+
+def _row(instance, path):
+    """What values_list(path) returns for `instance`: related objects are followed, a trailing relation gives its id."""
+    value = instance
+    *relations, last = path.split('__')
+    for attr in relations:
+        value = getattr(value, attr)
+    field = value._meta.get_field(last) if last != 'pk' else value._meta.pk
+    return getattr(value, field.attname)
+
+
+class Command(BaseCommand):
+    help = (
+        'Microbenchmark of list serialization and JSON rendering on in-memory payloads (no database): '
+        'ModelSerializer vs ValuesSerializer and DRF JSONRenderer vs FastJSONRenderer. Also checks the outputs are byte-identical.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions; the best one is reported.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        rows = options['rows']
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        cases = [
+            ('client/lawyers', LawyerProfileSerializer, _lawyers(rows, rng)),
+            ('appointments', AppointmentSerializer, _appointments(rows, rng)),
+        ]
+        slots_start = datetime(2026, 1, 5, 9, tzinfo=dt_timezone.utc)
+        slots = [{'start': slots_start + timedelta(hours=i), 'end': slots_start + timedelta(hours=i + 1)} for i in range(rows)]
+
+        self.stdout.write(f'{rows} rows per payload, best of {options["repeat"]}:')
+        for name, serializer_class, instances in cases:
+            values_serializer = ValuesSerializer(serializer_class)
+            tuples = [tuple(_row(instance, path) for path in values_serializer.paths) for instance in instances]
+
+            model_data, model_s = self.best(options['repeat'], lambda: serializer_class(instances, many=True).data)
+            values_data, values_s = self.best(options['repeat'], lambda: values_serializer.serialize_rows(tuples))
+            drf_bytes, drf_s = self.best(options['repeat'], lambda: drf_renderer.render(model_data))
+            fast_bytes, fast_s = self.best(options['repeat'], lambda: fast_renderer.render(values_data))
+            if drf_bytes != fast_bytes:
+                raise CommandError(f'{name}: fast path output differs from ModelSerializer + JSONRenderer.')
+            self.report(name, 'serialize', model_s, values_s, rows)
+            self.report(name, 'render', drf_s, fast_s, rows)
+            self.report(name, 'total', model_s + drf_s, values_s + fast_s, rows)
+
+        drf_bytes, drf_s = self.best(options['repeat'], lambda: drf_renderer.render(slots))
+        fast_bytes, fast_s = self.best(options['repeat'], lambda: fast_renderer.render(slots))
+        if drf_bytes != fast_bytes:
+            raise CommandError('available_slots: FastJSONRenderer output differs from JSONRenderer.')
+        self.report('available_slots', 'render', drf_s, fast_s, rows)
+        self.stdout.write(self.style.SUCCESS('All fast-path outputs are byte-identical.'))
+
+    def best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return result, min(timings)
+
+    def report(self, name, stage, baseline_s, fast_s, rows):
+        self.stdout.write(
+            f'  {name:<16} {stage:<10} DRF {baseline_s * 1000:8.1f} ms ({rows / baseline_s:>10,.0f} rows/s)   '
+            f'fast {fast_s * 1000:8.1f} ms ({rows / fast_s:>10,.0f} rows/s)   x{baseline_s / fast_s:.1f}'
+        )
@@ -0,0 +1,60 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.synthetic import SyntheticDataGenerator, delete_synthetic_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a large, deterministic dataset (users, lawyers, weekly rules, overrides, years of appointment and '
+        'reservation history with skewed lawyer popularity) for scale testing. Same --seed and --anchor-date give the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help='Number of client accounts.')
+        parser.add_argument('--lawyers', type=int, default=2_000, help='Number of lawyer accounts.')
+        parser.add_argument('--years', type=int, default=2, help='Years of appointment history.')
+        parser.add_argument('--horizon-days', type=int, default=30, help='Days of future bookings.')
+        parser.add_argument('--occupancy', type=float, default=0.35, help='Mean fraction of available slots that are booked.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for lawyer popularity (0 = uniform).')
+        parser.add_argument('--reservation-days', type=int, default=30, help='Days of (mostly expired) slot reservation history.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor-date', type=date.fromisoformat, default=None, help='"Today" for the dataset (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--method', choices=['auto', 'copy', 'bulk_create'], default='auto', help='auto uses COPY on PostgreSQL.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--reset', action='store_true', help='Delete previously generated synthetic data first.')
+
+    def handle(self, *args, **options):
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('--method copy requires PostgreSQL.')
+
+        if options['reset']:
+            deleted = delete_synthetic_data()
+            self.stdout.write(f'Deleted {sum(deleted.values())} rows of previous synthetic data.')
+
+        generator = SyntheticDataGenerator(
+            users=options['users'],
+            lawyers=options['lawyers'],
+            years=options['years'],
+            horizon_days=options['horizon_days'],
+            occupancy=options['occupancy'],
+            skew=options['skew'],
+            reservation_days=options['reservation_days'],
+            seed=options['seed'],
+            anchor_date=options['anchor_date'],
+            method=options['method'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        started = time.perf_counter()
+        counts = generator.generate()
+        elapsed = time.perf_counter() - started
+
+        total = sum(counts.values())
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {summary} ({total} rows in {elapsed:.1f} s, {total / elapsed:,.0f} rows/s via {generator.method}).'
+        ))
@@ -0,0 +1,86 @@
+import os
+from datetime import datetime
+from statistics import mean
+
+import stripe
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from benchmarks.booking_flow import STEPS, run_booking_flows
+from benchmarks.fakes import LocalServiceStack
+from benchmarks.stats import summarize_latencies, run_metadata, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        'End-to-end booking benchmark: drives auth -> available_slots -> create -> confirm-booking through the '
+        'full Django stack against local fakes for Cognito (JWKS/tokens) and Stripe, and writes the results as JSON. '
+        'Seed data first with `manage.py seed_benchmark_data` (use --reset between runs: booked slots stay booked).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flows', type=int, default=200, help='Number of complete booking flows to run.')
+        parser.add_argument('--warmup', type=int, default=10, help='Flows run (and discarded) before measuring.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Worker threads running flows in parallel.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Result file path. Defaults to benchmark-results/booking-<timestamp>.json.',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"booking-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+
+        # THROTTLE_ENABLED off: this measures the endpoints, not the rate limits (see throttle_load_test)
+        with LocalServiceStack() as services, override_settings(**services.cognito_settings(), THROTTLE_ENABLED=False):
+            previous_stripe = (stripe.api_base, stripe.api_key)
+            stripe.api_base, stripe.api_key = services.stripe_api_base, 'sk_test_benchmark'
+            try:
+                if options['warmup']:
+                    run_booking_flows(services, options['warmup'], concurrency=1, seed=options['seed'] + 10_000)
+                recorder, completed, wall_seconds = run_booking_flows(
+                    services, options['flows'], concurrency=options['concurrency'], seed=options['seed']
+                )
+            finally:
+                stripe.api_base, stripe.api_key = previous_stripe
+
+        total_requests = sum(len(samples) for samples in recorder.latencies_ms.values())
+        results = {
+            'benchmark': 'booking_flow',
+            'metadata': run_metadata(),
+            'config': {key: options[key] for key in ('flows', 'warmup', 'concurrency', 'seed')},
+            'summary': {
+                'wall_seconds': round(wall_seconds, 3),
+                'completed_flows': completed,
+                'flows_per_second': round(completed / wall_seconds, 2) if wall_seconds else None,
+                'requests': total_requests,
+                'requests_per_second': round(total_requests / wall_seconds, 2) if wall_seconds else None,
+            },
+            'steps': {},
+        }
+        for step in STEPS:
+            samples = recorder.latencies_ms.get(step, [])
+            queries = recorder.queries.get(step, [])
+            results['steps'][step] = {
+                **summarize_latencies(samples),
+                'queries_per_request_mean': round(mean(queries), 2) if queries else None,
+                'queries_per_request_max': max(queries) if queries else None,
+                'status_codes': dict(recorder.status_codes.get(step, {})),
+            }
+
+        write_results(output, results)
+
+        summary = results['summary']
+        self.stdout.write(
+            f"{summary['completed_flows']}/{options['flows']} flows in {summary['wall_seconds']} s "
+            f"({summary['flows_per_second']} flows/s, {summary['requests_per_second']} req/s)"
+        )
+        for step, stats in results['steps'].items():
+            self.stdout.write(
+                f"  {step:<16} p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms  "
+                f"queries/req {stats['queries_per_request_mean']}  status {stats['status_codes']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.seeding import seed_booking_dataset, delete_benchmark_data
+
+
+class Command(BaseCommand):
+    help = 'Seeds a deterministic booking dataset (lawyers, weekly rules, overrides, appointment history, live reservations) for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lawyers', type=int, default=50)
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--history-days', type=int, default=180, help='Days of past appointments to generate.')
+        parser.add_argument('--booked-ratio', type=float, default=0.3, help='Fraction of hourly slots that are booked.')
+        parser.add_argument('--reservations', type=int, default=100, help='Number of active slot reservations.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--reset', action='store_true', help='Delete previously seeded benchmark data first.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted = delete_benchmark_data()
+            self.stdout.write(f'Deleted {deleted} rows of previous benchmark data.')
+
+        counts = seed_booking_dataset(
+            lawyers=options['lawyers'],
+            clients=options['clients'],
+            history_days=options['history_days'],
+            booked_ratio=options['booked_ratio'],
+            live_reservations=options['reservations'],
+            seed=options['seed'],
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}.'))
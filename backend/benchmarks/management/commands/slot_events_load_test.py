@@ -0,0 +1,198 @@
+import asyncio
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from appointments.slot_events import SLOT_RESERVED, publish_slot_event
+from appointments.slot_stream import hub, slot_events_app
+from benchmarks.fakes import LocalServiceStack
+from benchmarks.stats import summarize_latencies, run_metadata, write_results
+from users.models import LawyerProfile
+
+EVENT_MARKER = b'event: slot\n'
+
+
+class InProcessConnection:
+    """Drives appointments.slot_stream.slot_events_app directly with ASGI receive/send callables."""
+
+    def __init__(self, lawyer_id, token, on_event):
+        self.scope = {
+            'type': 'http', 'method': 'GET', 'path': f'/api/appointments/slot-events/{lawyer_id}/',
+            'query_string': f'token={token}'.encode(), 'headers': [],
+        }
+        self.on_event = on_event
+        self.opened = asyncio.get_running_loop().create_future()
+        self._disconnected = asyncio.Event()
+        self._task = None
+
+    async def open(self):
+        self._task = asyncio.ensure_future(slot_events_app(self.scope, self._receive, self._send))
+        await self.opened
+
+    async def _receive(self):
+        await self._disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def _send(self, message):
+        if message['type'] == 'http.response.start':
+            if message['status'] != 200:
+                self.opened.set_exception(CommandError(f"Stream returned {message['status']}."))
+        elif not self.opened.done():
+            self.opened.set_result(None)
+        elif EVENT_MARKER in message.get('body', b''):
+            self.on_event()
+
+    async def close(self):
+        self._disconnected.set()
+        await self._task
+
+
+class SocketConnection:
+    """A real HTTP/1.1 connection to a running ASGI server (--url)."""
+
+    def __init__(self, url, lawyer_id, token, on_event):
+        self.parts = urlsplit(url)
+        self.path = f'{self.parts.path.rstrip("/")}/api/appointments/slot-events/{lawyer_id}/'
+        self.token = token
+        self.on_event = on_event
+        self._reader_task = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.parts.hostname, self.parts.port or 80)
+        self.writer.write(
+            f'GET {self.path} HTTP/1.1\r\nHost: {self.parts.netloc}\r\nAuthorization: Bearer {self.token}\r\n'
+            f'Accept: text/event-stream\r\n\r\n'.encode()
+        )
+        status_line = await self.reader.readline()
+        if b' 200 ' not in status_line:
+            raise CommandError(f'Stream returned {status_line.decode().strip()!r}.')
+        self._reader_task = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line == EVENT_MARKER:
+                self.on_event()
+
+    async def close(self):
+        self._reader_task.cancel()
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test for the slot event stream (appointments/slot_stream.py): opens idle subscribers on one '
+        'lawyer in steps, and at each step publishes slot events through Redis and measures publish-to-delivery '
+        'latency and memory per connection. Reports the largest step whose p95 latency stays within the budget. '
+        'By default the ASGI app runs in this process (one worker, no socket overhead); --url/--token test a '
+        'running server instead. Requires Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-subscribers', type=int, default=10000)
+        parser.add_argument('--step', type=int, default=1000, help='Subscribers added per step.')
+        parser.add_argument('--events', type=int, default=20, help='Events published (one at a time) per step.')
+        parser.add_argument('--latency-budget-ms', type=float, default=250, help='p95 publish-to-delivery budget.')
+        parser.add_argument('--lawyer-id', type=int, default=None, help='Defaults to the first lawyer.')
+        parser.add_argument('--url', default=None, help='Base URL of a running ASGI server, e.g. http://127.0.0.1:8000.')
+        parser.add_argument('--token', default=None, help='Cognito token accepted by the --url server.')
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/slot-events-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        if options['url'] and not options['token']:
+            raise CommandError('--url needs --token (a Cognito token the server accepts).')
+        lawyer = LawyerProfile.objects.filter(**({'id': options['lawyer_id']} if options['lawyer_id'] else {})).order_by('id').first()
+        if lawyer is None:
+            raise CommandError('No lawyer found; load data first (e.g. manage.py seed_benchmark_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"slot-events-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+
+        if options['url']:
+            steps = asyncio.run(self.run_steps(lawyer.id, options['token'], options))
+        else:
+            with LocalServiceStack() as services, override_settings(**services.cognito_settings()):
+                token = services.cognito.issue_token('bench_slot_subscriber', groups=['clients'])
+                steps = asyncio.run(self.run_steps(lawyer.id, token, options))
+
+        within_budget = [step for step in steps if step['p95_ms'] is not None and step['p95_ms'] <= options['latency_budget_ms']]
+        results = {
+            'benchmark': 'slot_events',
+            'metadata': run_metadata(),
+            'config': {key: options[key] for key in ('max_subscribers', 'step', 'events', 'latency_budget_ms', 'url')},
+            'sustained_subscribers': within_budget[-1]['subscribers'] if within_budget else 0,
+            'steps': steps,
+        }
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(
+            f"Sustained {results['sustained_subscribers']} subscribers within a p95 of {options['latency_budget_ms']} ms. "
+            f'Results written to {output}'
+        ))
+
+    async def run_steps(self, lawyer_id, token, options):
+        state = {'pending': 0, 'published_at': 0.0, 'latencies': [], 'done': None}
+
+        def on_event():
+            state['latencies'].append((time.perf_counter() - state['published_at']) * 1000)
+            state['pending'] -= 1
+            if state['pending'] == 0:
+                state['done'].set()
+
+        def connect():
+            if options['url']:
+                return SocketConnection(options['url'], lawyer_id, token, on_event)
+            return InProcessConnection(lawyer_id, token, on_event)
+
+        connections, steps = [], []
+        start = datetime.now(dt_timezone.utc).replace(microsecond=0) + timedelta(days=365)
+        try:
+            while len(connections) < options['max_subscribers']:
+                batch = [connect() for _ in range(min(options['step'], options['max_subscribers'] - len(connections)))]
+                tracemalloc.start()
+                started = time.perf_counter()
+                await asyncio.gather(*(connection.open() for connection in batch))
+                connect_seconds = time.perf_counter() - started
+                traced_bytes = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                connections.extend(batch)
+                await asyncio.sleep(0.2) # Let the hub's subscription settle before publishing
+
+                state['latencies'] = []
+                timeouts = 0
+                for index in range(options['events']):
+                    state['pending'], state['done'] = len(connections), asyncio.Event()
+                    slot_start = start + timedelta(hours=index)
+                    state['published_at'] = time.perf_counter()
+                    await asyncio.to_thread(publish_slot_event, SLOT_RESERVED, lawyer_id, slot_start, slot_start + timedelta(hours=1))
+                    try:
+                        await asyncio.wait_for(state['done'].wait(), timeout=10)
+                    except asyncio.TimeoutError:
+                        timeouts += 1
+                latencies = summarize_latencies(state['latencies'])
+                step = {
+                    'subscribers': len(connections),
+                    'connect_seconds': round(connect_seconds, 3),
+                    'bytes_per_connection': round(traced_bytes / len(batch)) if not options['url'] else None,
+                    'deliveries': latencies['count'],
+                    'timed_out_events': timeouts,
+                    **{key: latencies[key] for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')},
+                }
+                steps.append(step)
+                self.stdout.write(
+                    f"  {step['subscribers']:>6} subscribers  p50 {step['p50_ms']} ms  p95 {step['p95_ms']} ms  "
+                    f"max {step['max_ms']} ms  {step['bytes_per_connection'] or '-'} B/conn  timeouts {timeouts}"
+                )
+                if timeouts or step['p95_ms'] is None or step['p95_ms'] > options['latency_budget_ms']:
+                    break
+        finally:
+            await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+            if hub._listener is not None:
+                hub._listener.cancel()
+        return steps
@@ -0,0 +1,128 @@
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings
+
+from benchmarks.fakes import LocalServiceStack
+from benchmarks.stats import run_metadata, summarize_latencies, write_results
+from users.models import LawyerProfile
+
+URL = '/api/appointments/available_slots/?lawyer_id={}'
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Overloads GET /api/appointments/available_slots/ on a local threaded WSGI server (the full middleware '
+        'and DRF stack, Cognito tokens from a local fake) with --clients closed-loop clients for --seconds, '
+        'twice: without protection, then with the token buckets (settings.THROTTLE_RATES) and the concurrency '
+        'limit (--max-concurrent). Reports throughput and the latency of admitted requests, and how many were '
+        'shed with 429/503. Half of the traffic targets one hot lawyer. Requires Redis and seeded lawyers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=64)
+        parser.add_argument('--users', type=int, default=16, help='Distinct users the clients sign in as.')
+        parser.add_argument('--seconds', type=float, default=15)
+        parser.add_argument('--max-concurrent', type=int, default=4, help='ADMISSION_MAX_CONCURRENT while protected.')
+        parser.add_argument('--queue-timeout-ms', type=float, default=100)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Defaults to benchmark-results/throttle-load-<timestamp>.json.')
+
+    def handle(self, *args, **options):
+        lawyer_ids = list(LawyerProfile.objects.order_by('id').values_list('id', flat=True)[:50])
+        if not lawyer_ids:
+            raise CommandError('No lawyers found; load data first (e.g. manage.py seed_benchmark_data).')
+        output = options['output'] or os.path.join(
+            'benchmark-results', f"throttle-load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        )
+
+        phases = {}
+        with LocalServiceStack() as services, override_settings(**services.cognito_settings()):
+            tokens = [services.cognito.issue_token(f'bench_throttle_{i}', groups=['clients']) for i in range(options['users'])]
+            unprotected = {'THROTTLE_ENABLED': False, 'ADMISSION_MAX_CONCURRENT': 0}
+            protected = {
+                'THROTTLE_ENABLED': True,
+                'ADMISSION_MAX_CONCURRENT': options['max_concurrent'],
+                'ADMISSION_QUEUE_TIMEOUT_MS': options['queue_timeout_ms'],
+            }
+            for name, overrides in (('unprotected', unprotected), ('protected', protected)):
+                with override_settings(**overrides):
+                    phases[name] = self.run_phase(tokens, lawyer_ids, options)
+                phase = phases[name]
+                self.stdout.write(
+                    f"  {name:<12} {phase['admitted_per_second']:>7} ok/s  p50 {phase['latency_ms']['p50_ms']} ms  "
+                    f"p95 {phase['latency_ms']['p95_ms']} ms  p99 {phase['latency_ms']['p99_ms']} ms  statuses {phase['statuses']}"
+                )
+
+        results = {
+            'benchmark': 'throttle_load',
+            'metadata': run_metadata(),
+            'config': {key: options[key] for key in ('clients', 'users', 'seconds', 'max_concurrent', 'queue_timeout_ms')},
+            'phases': phases,
+        }
+        write_results(output, results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def run_phase(self, tokens, lawyer_ids, options):
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        server.set_app(get_wsgi_application()) # A new handler loads the middleware with this phase's settings
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        for token in tokens: # Sign everyone in (provisions the users) outside the measurement
+            requests.get(f'{base_url}/api/users/profile/', headers={'Authorization': f'Bearer {token}'})
+
+        latencies, statuses, retry_after = [], Counter(), Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+
+        def client(index):
+            rng = random.Random(options['seed'] + index)
+            session = requests.Session()
+            session.headers['Authorization'] = f'Bearer {tokens[index % len(tokens)]}'
+            while time.perf_counter() < deadline:
+                lawyer_id = lawyer_ids[0] if rng.random() < 0.5 else rng.choice(lawyer_ids) # One hot lawyer
+                started = time.perf_counter()
+                response = session.get(base_url + URL.format(lawyer_id))
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    statuses[response.status_code] += 1
+                    if response.status_code == 200:
+                        latencies.append(elapsed_ms)
+                    elif 'Retry-After' in response.headers:
+                        retry_after[response.status_code] += 1
+                if response.status_code in (429, 503): # Well-behaved clients back off
+                    time.sleep(min(float(response.headers.get('Retry-After', 1)), 1) * rng.random())
+
+        clients = [threading.Thread(target=client, args=(index,)) for index in range(options['clients'])]
+        started = time.perf_counter()
+        for worker in clients:
+            worker.start()
+        for worker in clients:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+        connections.close_all()
+        return {
+            'seconds': round(elapsed, 2),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'with_retry_after': {str(status): count for status, count in sorted(retry_after.items())},
+            'admitted_per_second': int(len(latencies) / elapsed) if elapsed else None,
+            'latency_ms': summarize_latencies(latencies),
+        }
@@ -0,0 +1,143 @@
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from appointments.models import WeeklyAvailability, AvailabilityOverride, Appointment, SlotReservation
+from users.models import UserProfile, LawyerProfile
+
+USERNAME_PREFIX = 'bench_'
+BATCH_SIZE = 2000
+
+# Two blocks per weekday, as most lawyers configure them (morning / afternoon).
+WORKDAY_BLOCKS = ((time(9, 0), time(12, 0)), (time(13, 0), time(17, 0)))
+
+
+def lawyer_username(index):
+    return f'{USERNAME_PREFIX}lawyer_{index}'
+
+
+def client_username(index):
+    return f'{USERNAME_PREFIX}client_{index}'
+
+
+def delete_benchmark_data():
+    """Removes every row created by seed_booking_dataset (profiles, appointments etc. cascade from User)."""
+    deleted, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+    return deleted
+
+
+@transaction.atomic
+def seed_booking_dataset(lawyers=50, clients=500, history_days=180, booked_ratio=0.3,
+                         override_ratio=0.05, live_reservations=100, seed=42):
+    """
+    Seeds a deterministic booking dataset: lawyers with weekday availability and some days off,
+    clients, `history_days` of past appointments, a partly booked upcoming week and a number of
+    active SlotReservations. Rows are inserted with bulk_create in batches.
+    Returns a dict of row counts.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+
+    users = [User(username=lawyer_username(i), email=f'{lawyer_username(i)}@example.test', password='!') for i in range(lawyers)]
+    users += [User(username=client_username(i), email=f'{client_username(i)}@example.test', password='!') for i in range(clients)]
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+    lawyer_users = [u for u in users if u.username.startswith(f'{USERNAME_PREFIX}lawyer_')]
+    client_users = [u for u in users if u.username.startswith(f'{USERNAME_PREFIX}client_')]
+
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=u, role='lawyer', is_initial_profile_complete=True) for u in lawyer_users]
+        + [UserProfile(user=u, role='client', is_initial_profile_complete=True) for u in client_users],
+        batch_size=BATCH_SIZE,
+    )
+    profiles = {p.user_id: p for p in UserProfile.objects.filter(user__in=users)}
+    LawyerProfile.objects.bulk_create(
+        [LawyerProfile(
+            user_profile=profiles[u.id],
+            bio=f'Benchmark lawyer {u.username}',
+            areas_of_practice=rng.choice(['Family', 'Immigration', 'Corporate', 'Criminal', 'Real Estate']),
+            years_of_experience=rng.randint(1, 35),
+            consultation_fee=rng.choice([50, 75, 100, 150]),
+            is_lawyer_specific_profile_complete=True,
+        ) for u in lawyer_users],
+        batch_size=BATCH_SIZE,
+    )
+    lawyer_profiles = list(LawyerProfile.objects.filter(user_profile__user__in=lawyer_users).order_by('id'))
+    client_profiles = [profiles[u.id] for u in client_users]
+
+    WeeklyAvailability.objects.bulk_create(
+        [WeeklyAvailability(lawyer=lawyer, day_of_week=day, start_time=start, end_time=end)
+         for lawyer in lawyer_profiles for day in range(5) for start, end in WORKDAY_BLOCKS],
+        batch_size=BATCH_SIZE,
+    )
+
+    overrides = []
+    for lawyer in lawyer_profiles:
+        for offset in range(60):
+            if rng.random() < override_ratio:
+                overrides.append(AvailabilityOverride(lawyer=lawyer, date=today + timedelta(days=offset), is_all_day=True, description='Day off'))
+    AvailabilityOverride.objects.bulk_create(overrides, batch_size=BATCH_SIZE)
+
+    appointments = []
+    reservations = []
+    now = timezone.now()
+    for lawyer in lawyer_profiles:
+        for offset in range(-history_days, 8):
+            day = today + timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            for block_start, block_end in WORKDAY_BLOCKS:
+                for hour in range(block_start.hour, block_end.hour):
+                    if rng.random() >= booked_ratio:
+                        continue
+                    start = timezone.make_aware(datetime.combine(day, time(hour, 0)))
+                    if offset < 0:
+                        status = rng.choices(['confirmed', 'cancelled'], weights=[85, 15])[0]
+                    elif start <= now:
+                        continue
+                    else:
+                        status = rng.choice(['pending', 'confirmed'])
+                    appointments.append(Appointment(
+                        lawyer=lawyer,
+                        client=rng.choice(client_profiles),
+                        start=start,
+                        end=start + timedelta(hours=1),
+                        status=status,
+                        stripe_payment_intent_id=f'pi_seed_{len(appointments)}',
+                        payment_status='succeeded',
+                    ))
+    Appointment.objects.bulk_create(appointments, batch_size=BATCH_SIZE)
+
+    booked = {(a.lawyer_id, a.start) for a in appointments if a.status != 'cancelled'}
+    attempts = 0
+    while len(reservations) < live_reservations and attempts < live_reservations * 20:
+        attempts += 1
+        lawyer = rng.choice(lawyer_profiles)
+        day = today + timedelta(days=rng.randint(1, 7))
+        if day.weekday() >= 5:
+            continue
+        start = timezone.make_aware(datetime.combine(day, time(rng.choice([9, 10, 11, 13, 14, 15, 16]), 0)))
+        if (lawyer.id, start) in booked:
+            continue
+        booked.add((lawyer.id, start))
+        reservations.append(SlotReservation(
+            lawyer=lawyer,
+            client_profile=rng.choice(client_profiles),
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            reserved_until=now + timedelta(minutes=rng.randint(1, 15)),
+            stripe_payment_intent_id=f'pi_seed_res_{len(reservations)}',
+        ))
+    SlotReservation.objects.bulk_create(reservations, batch_size=BATCH_SIZE)
+
+    return {
+        'lawyers': len(lawyer_profiles),
+        'clients': len(client_profiles),
+        'weekly_availabilities': len(lawyer_profiles) * 5 * len(WORKDAY_BLOCKS),
+        'availability_overrides': len(overrides),
+        'appointments': len(appointments),
+        'slot_reservations': len(reservations),
+    }
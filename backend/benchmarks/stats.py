@@ -0,0 +1,59 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+from statistics import mean
+
+from django.db import connection
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def summarize_latencies(samples_ms) -> dict:
+    samples = sorted(samples_ms)
+    return {
+        'count': len(samples),
+        'mean_ms': round(mean(samples), 3) if samples else None,
+        'p50_ms': _round(percentile(samples, 0.50)),
+        'p95_ms': _round(percentile(samples, 0.95)),
+        'p99_ms': _round(percentile(samples, 0.99)),
+        'max_ms': _round(samples[-1] if samples else None),
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def run_metadata() -> dict:
+    """Context stored with every result file so runs can be compared over time."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'database_vendor': connection.vendor,
+    }
+
+
+def write_results(path, payload: dict) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as results_file:
+        json.dump(payload, results_file, indent=2, default=str)
+    return path
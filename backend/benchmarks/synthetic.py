@@ -0,0 +1,246 @@
+"""
+Deterministic, scale-oriented synthetic data for index/cache/engine experiments.
+
+Rows are generated lazily and streamed to the database in batches, either with PostgreSQL
+`COPY ... FROM STDIN` (fastest, default on PostgreSQL) or with bulk_create (any backend).
+Given the same seed and anchor date the generated data is identical, so different runs and
+branches can be measured on the same dataset.
+"""
+import random
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate
+from bisect import bisect_left
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from appointments.models import WeeklyAvailability, AvailabilityOverride, Appointment, SlotReservation, AppointmentDailyRollup
+from config.bulk_load import BatchWriter, default_method
+from users.models import UserProfile, LawyerProfile, LawyerImportRow
+
+USERNAME_PREFIX = 'synth_'
+
+# Weekly availability templates: {day_of_week: [(start_hour, end_hour), ...]}
+WEEKLY_TEMPLATES = (
+    ('full_time', {day: [(9, 12), (13, 17)] for day in range(5)}),
+    ('part_time', {0: [(10, 16)], 2: [(10, 16)], 4: [(10, 16)]}),
+    ('evenings', {1: [(17, 20)], 3: [(17, 20)], 5: [(10, 14)]}),
+    ('compressed', {day: [(8, 18)] for day in range(4)}),
+)
+TEMPLATE_WEIGHTS = (60, 20, 10, 10)
+PRACTICE_AREAS = ('Family', 'Immigration', 'Corporate', 'Criminal', 'Real Estate', 'Employment', 'Tax', 'IP')
+
+
+class SyntheticDataGenerator:
+    """
+    Generates `users` client accounts and `lawyers` lawyer accounts with weekly rules, overrides,
+    `years` of appointment history (plus `horizon_days` of future bookings) and slot reservations.
+    Lawyer popularity follows a Zipf-like distribution controlled by `skew` (0 = uniform).
+    """
+
+    def __init__(self, users, lawyers, years=2, horizon_days=30, occupancy=0.35, skew=1.1,
+                 reservation_days=30, seed=42, anchor_date=None, method='auto', batch_size=10_000, log=None):
+        self.users = users
+        self.lawyers = lawyers
+        self.years = years
+        self.horizon_days = horizon_days
+        self.occupancy = occupancy
+        self.skew = skew
+        self.reservation_days = reservation_days
+        self.rng = random.Random(seed)
+        self.anchor_date = anchor_date or date.today()
+        if method == 'auto':
+            method = default_method()
+        self.method = method
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def writer(self, model, field_names):
+        return BatchWriter(model, field_names, self.method, self.batch_size)
+
+    @transaction.atomic
+    def generate(self):
+        client_profile_ids, lawyer_ids = self._generate_accounts()
+        lawyer_templates = self._generate_weekly_rules(lawyer_ids)
+        blocked_days = self._generate_overrides(lawyer_ids)
+        self._generate_bookings(lawyer_ids, lawyer_templates, blocked_days, client_profile_ids)
+        return self.counts
+
+    # --- Accounts ---
+
+    def _generate_accounts(self):
+        joined = datetime.combine(self.anchor_date, time(0), tzinfo=dt_timezone.utc) - timedelta(days=365 * self.years)
+        usernames = [f'{USERNAME_PREFIX}lawyer_{i}' for i in range(self.lawyers)]
+        usernames += [f'{USERNAME_PREFIX}client_{i}' for i in range(self.users)]
+
+        users = self.writer(User, ['username', 'email', 'password', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'is_active', 'date_joined'])
+        for username in usernames:
+            users.add((username, f'{username}@example.test', '!', '', '', False, False, True, joined.isoformat()))
+        users.flush()
+        user_ids = dict(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('username', 'id'))
+        self.log(f'{users.written} users')
+
+        profiles = self.writer(UserProfile, ['user_id', 'role', 'is_initial_profile_complete'])
+        for username in usernames:
+            profiles.add((user_ids[username], 'lawyer' if '_lawyer_' in username else 'client', True))
+        profiles.flush()
+        profile_ids = dict(UserProfile.objects.filter(user__username__startswith=USERNAME_PREFIX).values_list('user__username', 'id'))
+
+        lawyer_profiles = self.writer(LawyerProfile, ['user_profile_id', 'bio', 'areas_of_practice', 'years_of_experience', 'consultation_fee', 'is_lawyer_specific_profile_complete'])
+        for username in usernames[:self.lawyers]:
+            lawyer_profiles.add((
+                profile_ids[username],
+                f'Synthetic lawyer {username}',
+                ', '.join(self.rng.sample(PRACTICE_AREAS, 2)),
+                self.rng.randint(1, 40),
+                self.rng.choice(('50.00', '75.00', '100.00', '150.00', '250.00')),
+                True,
+            ))
+        lawyer_profiles.flush()
+        lawyer_ids = list(
+            LawyerProfile.objects.filter(user_profile__user__username__startswith=USERNAME_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+        client_profile_ids = [profile_ids[username] for username in usernames[self.lawyers:]]
+        self.counts.update(users=users.written, user_profiles=profiles.written, lawyer_profiles=lawyer_profiles.written)
+        return client_profile_ids, lawyer_ids
+
+    # --- Availability ---
+
+    def _generate_weekly_rules(self, lawyer_ids):
+        rules = self.writer(WeeklyAvailability, ['lawyer_id', 'day_of_week', 'start_time', 'end_time'])
+        lawyer_templates = {}
+        for lawyer_id in lawyer_ids:
+            _, template = self.rng.choices(WEEKLY_TEMPLATES, weights=TEMPLATE_WEIGHTS)[0]
+            lawyer_templates[lawyer_id] = template
+            for day_of_week, blocks in template.items():
+                for start_hour, end_hour in blocks:
+                    rules.add((lawyer_id, day_of_week, time(start_hour).isoformat(), time(end_hour).isoformat()))
+        rules.flush()
+        self.counts['weekly_availabilities'] = rules.written
+        return lawyer_templates
+
+    def _generate_overrides(self, lawyer_ids):
+        """Vacations (1-2 weeks a year), sick days and partial-day court blocks. Returns {lawyer_id: set(all-day dates)}."""
+        overrides = self.writer(AvailabilityOverride, ['lawyer_id', 'date', 'start_time', 'end_time', 'is_all_day', 'description'])
+        first_day = self.anchor_date - timedelta(days=365 * self.years)
+        total_days = 365 * self.years + self.horizon_days + 1 # Inclusive of the last horizon day; never empty
+        blocked_days = {}
+        for lawyer_id in lawyer_ids:
+            days_off = set()
+            for year in range(self.years + 1):
+                vacation_start = first_day + timedelta(days=365 * year + self.rng.randrange(365))
+                for offset in range(self.rng.choice((7, 14))):
+                    days_off.add(vacation_start + timedelta(days=offset))
+            for _ in range(self.rng.randint(2, 6) * (self.years + 1)):
+                days_off.add(first_day + timedelta(days=self.rng.randrange(total_days)))
+            for day in sorted(days_off):
+                if day <= self.anchor_date + timedelta(days=self.horizon_days):
+                    overrides.add((lawyer_id, day.isoformat(), None, None, True, 'Out of office'))
+            partial_days = set()
+            for _ in range(self.rng.randint(3, 10) * (self.years + 1)):
+                day = first_day + timedelta(days=self.rng.randrange(total_days))
+                if day not in days_off and day not in partial_days:
+                    partial_days.add(day)
+                    overrides.add((lawyer_id, day.isoformat(), time(9).isoformat(), time(11).isoformat(), False, 'Court'))
+            blocked_days[lawyer_id] = days_off
+        overrides.flush()
+        self.counts['availability_overrides'] = overrides.written
+        return blocked_days
+
+    # --- Appointments and reservations ---
+
+    def _popularity(self, lawyer_count):
+        """Per-lawyer booking probability: Zipf-like weights rescaled so the mean occupancy is self.occupancy."""
+        weights = [1 / ((rank + 1) ** self.skew) for rank in range(lawyer_count)]
+        self.rng.shuffle(weights) # Popularity should not correlate with lawyer id
+        mean_weight = sum(weights) / lawyer_count
+        return [min(0.95, self.occupancy * weight / mean_weight) for weight in weights]
+
+    def _generate_bookings(self, lawyer_ids, lawyer_templates, blocked_days, client_profile_ids):
+        appointments = self.writer(Appointment, ['lawyer_id', 'client_id', 'start', 'end', 'status', 'created_at', 'updated_at', 'stripe_payment_intent_id', 'payment_status'])
+        reservations = self.writer(SlotReservation, ['lawyer_id', 'client_profile_id', 'start_time', 'end_time', 'reserved_until', 'stripe_payment_intent_id', 'created_at'])
+        probabilities = self._popularity(len(lawyer_ids))
+        # Clients are skewed too: a minority of clients book repeatedly.
+        client_cumulative = list(accumulate(1 / ((rank + 1) ** 0.8) for rank in range(len(client_profile_ids))))
+        now = datetime.combine(self.anchor_date, time(12), tzinfo=dt_timezone.utc) # Fixed reference keeps runs identical
+        first_day = self.anchor_date - timedelta(days=365 * self.years)
+        reservation_window_start = self.anchor_date - timedelta(days=self.reservation_days)
+        hour = timedelta(hours=1)
+        rng = self.rng
+
+        for position, lawyer_id in enumerate(lawyer_ids):
+            template = lawyer_templates[lawyer_id]
+            days_off = blocked_days[lawyer_id]
+            probability = probabilities[position]
+            for offset in range(365 * self.years + self.horizon_days + 1):
+                day = first_day + timedelta(days=offset)
+                blocks = template.get(day.weekday())
+                if not blocks or day in days_off:
+                    continue
+                for start_hour, end_hour in blocks:
+                    for slot_hour in range(start_hour, end_hour):
+                        start = datetime.combine(day, time(slot_hour), tzinfo=dt_timezone.utc)
+                        roll = rng.random()
+                        if roll < probability:
+                            client_id = client_profile_ids[bisect_left(client_cumulative, rng.random() * client_cumulative[-1])]
+                            if start < now:
+                                status = 'cancelled' if roll < probability * 0.12 else 'confirmed'
+                            else:
+                                status = 'pending' if roll < probability * 0.3 else 'confirmed'
+                            created_at = start - timedelta(days=rng.randint(1, 21))
+                            appointments.add((
+                                lawyer_id, client_id, start.isoformat(), (start + hour).isoformat(), status,
+                                created_at.isoformat(), created_at.isoformat(), f'pi_synth_{appointments.written + len(appointments.rows)}', 'succeeded',
+                            ))
+                        elif roll < probability + 0.02 and day >= reservation_window_start:
+                            # Abandoned checkouts: holds that expired (or, for upcoming slots, are still active).
+                            client_id = client_profile_ids[rng.randrange(len(client_profile_ids))]
+                            created_at = min(start, now) - timedelta(minutes=rng.randint(16, 600))
+                            reserved_until = created_at + timedelta(minutes=15)
+                            if rng.random() < 0.1 and start > now:
+                                created_at = now - timedelta(minutes=rng.randint(0, 10))
+                                reserved_until = created_at + timedelta(minutes=15)
+                            reservations.add((
+                                lawyer_id, client_id, start.isoformat(), (start + hour).isoformat(),
+                                reserved_until.isoformat(), f'pi_synth_res_{reservations.written + len(reservations.rows)}',
+                                created_at.isoformat(),
+                            ))
+            if (position + 1) % 1000 == 0:
+                self.log(f'{position + 1}/{len(lawyer_ids)} lawyers, {appointments.written + len(appointments.rows)} appointments')
+        appointments.flush()
+        reservations.flush()
+        self.counts.update(appointments=appointments.written, slot_reservations=reservations.written)
+
+
+def delete_synthetic_data(prefix=USERNAME_PREFIX):
+    """
+    Deletes all synthetic rows (accounts whose username starts with `prefix`) with one DELETE per table,
+    children first. The ORM's cascade collector would load millions of rows into memory, which is exactly
+    what this data set is too big for.
+    Returns the number of deleted rows per table.
+    """
+    quote = connection.ops.quote_name
+    users_subquery = f"SELECT id FROM {quote(User._meta.db_table)} WHERE username LIKE %s ESCAPE '\\'"
+    profiles_subquery = f"SELECT id FROM {quote(UserProfile._meta.db_table)} WHERE user_id IN ({users_subquery})"
+    lawyers_subquery = f"SELECT id FROM {quote(LawyerProfile._meta.db_table)} WHERE user_profile_id IN ({profiles_subquery})"
+    statements = (
+        (Appointment, f"lawyer_id IN ({lawyers_subquery})"),
+        (Appointment, f"client_id IN ({profiles_subquery})"),
+        (SlotReservation, f"lawyer_id IN ({lawyers_subquery})"),
+        (SlotReservation, f"client_profile_id IN ({profiles_subquery})"),
+        (AvailabilityOverride, f"lawyer_id IN ({lawyers_subquery})"),
+        (WeeklyAvailability, f"lawyer_id IN ({lawyers_subquery})"),
+        (AppointmentDailyRollup, f"lawyer_id IN ({lawyers_subquery})"),
+        (LawyerImportRow, f"user_id IN ({users_subquery})"),
+        (LawyerProfile, f"user_profile_id IN ({profiles_subquery})"),
+        (UserProfile, f"user_id IN ({users_subquery})"),
+        (User, "username LIKE %s ESCAPE '\\'"),
+    )
+    deleted = {}
+    pattern = prefix.replace('_', '\\_') + '%'
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model, where in statements:
+            cursor.execute(f"DELETE FROM {quote(model._meta.db_table)} WHERE {where}", [pattern])
+            deleted[model._meta.label] = deleted.get(model._meta.label, 0) + cursor.rowcount
+    return deleted
@@ -2,6 +2,10 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the slot event stream are answered by appointments/slot_stream.py directly, so long-lived
+SSE connections don't hold a Django request thread; everything else goes to Django. This is the
+entry point the Dockerfile and docker-compose serve (uvicorn config.asgi:application); under
+`manage.py runserver` (WSGI) the slot event stream is not available.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -9,8 +13,20 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+if settings.DEBUG:
+    django_application = ASGIStaticFilesHandler(django_application) # What runserver did for the admin's assets
+
+from appointments.slot_stream import PATH_PREFIX, slot_events_app  # noqa: E402 (needs the app registry)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(PATH_PREFIX):
+        return await slot_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,16 +1,64 @@
-import os
+import logging
+import threading
+import time
+
 import requests
 from django.conf import settings
-from django.contrib.auth.models import User
 from rest_framework import authentication, exceptions
 from jose import jwk, jwt
 from jose.exceptions import JWTError
-# Import the new UserProfile and LawyerProfile from the users app
-from users.models import UserProfile, LawyerProfile as NewLawyerProfile
+from users.provisioning import provision_user, role_from_cognito_groups
 
 # Comment out or remove old profile imports if they are fully replaced
 # from appointments.models import LawyerProfile as OldLawyerProfile, ClientProfile
 
+logger = logging.getLogger(__name__)
+
+JWKS_MIN_REFRESH_SECONDS = 60 # A token with an unknown kid refetches the JWKS at most this often
+
+
+class JWKSCache:
+    """
+    Cognito's signing keys ({kid: JWK}), fetched once per process and reused for COGNITO_JWKS_CACHE_SECONDS,
+    instead of one HTTP call per authenticated request. Threads that miss together wait for a single fetch.
+    Keys rotate rarely: an unknown kid refetches at most every JWKS_MIN_REFRESH_SECONDS (so forged kids can't
+    flood Cognito), and if a refresh fails the previous keys stay in use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._url = None
+        self._keys = None
+        self._fetched_at = 0.0
+
+    def _fresh(self, url, max_age):
+        return self._keys is not None and self._url == url and time.monotonic() - self._fetched_at < max_age
+
+    def keys(self, url, refresh=False):
+        max_age = JWKS_MIN_REFRESH_SECONDS if refresh else settings.COGNITO_JWKS_CACHE_SECONDS
+        if self._fresh(url, max_age):
+            return self._keys
+        with self._lock:
+            if self._fresh(url, max_age): # Fetched by another thread meanwhile
+                return self._keys
+            try:
+                jwks = requests.get(url, timeout=settings.COGNITO_JWKS_TIMEOUT_SECONDS).json()
+            except Exception as e:
+                if self._url == url and self._keys is not None:
+                    logger.warning("JWKS refresh failed, keeping the cached keys: %s", e)
+                    self._fetched_at = time.monotonic() # Retry after another max_age
+                    return self._keys
+                logger.error("JWKS fetch error: %s", e)
+                raise exceptions.AuthenticationFailed('Error fetching JWKS. Please try again later.')
+            # Ensure jwks has 'keys' array
+            if not isinstance(jwks, dict) or not isinstance(jwks.get('keys'), list):
+                raise exceptions.AuthenticationFailed('Invalid JWKS format: missing or invalid \'keys\' array.')
+            self._url, self._keys, self._fetched_at = url, {key.get('kid'): key for key in jwks['keys']}, time.monotonic()
+            return self._keys
+
+
+jwks_cache = JWKSCache()
+
 
 class CognitoAuthentication(authentication.BaseAuthentication):
     """
@@ -23,29 +71,24 @@ class CognitoAuthentication(authentication.BaseAuthentication):
         parts = auth_header.split()
         if parts[0].lower() != 'bearer' or len(parts) != 2:
             raise exceptions.AuthenticationFailed('Invalid Authorization header')
-        token = parts[1]
-
-        # Fetch JWKS from Cognito
-        try:
-            jwks = requests.get(settings.COGNITO_JWKS_URL).json()
-        except Exception as e:
-            # It's good practice to log the original error for debugging
-            # import logging; logger = logging.getLogger(__name__); logger.error(f'JWKS fetch error: {e}', exc_info=True)
-            raise exceptions.AuthenticationFailed(f'Error fetching JWKS. Please try again later.')
+        return self.authenticate_token(parts[1])
 
-        # Get the signing key
+    def authenticate_token(self, token):
+        """
+        Verifies a Cognito JWT and returns (user, None). Also used by endpoints that can't receive an
+        Authorization header (e.g. EventSource streams, which pass the token as a query parameter).
+        """
+        # Get the signing key (JWKS cached in-process, see JWKSCache)
         try:
             unverified_header = jwt.get_unverified_header(token)
             kid = unverified_header['kid']
-            # Ensure jwks has 'keys' array
-            if 'keys' not in jwks or not isinstance(jwks['keys'], list):
-                raise exceptions.AuthenticationFailed('Invalid JWKS format: missing or invalid \'keys\' array.')
-            key = next((k for k in jwks['keys'] if k['kid'] == kid), None)
-            if key is None:
-                 raise exceptions.AuthenticationFailed('Public key not found in JWKS for the given kid.')
         except Exception as e:
-            # import logging; logger = logging.getLogger(__name__); logger.error(f'JWKS key error: {e}', exc_info=True)
             raise exceptions.AuthenticationFailed(f'Error processing JWKS. {str(e)}')
+        key = jwks_cache.keys(settings.COGNITO_JWKS_URL).get(kid)
+        if key is None: # Possibly a key Cognito rotated in since the last fetch
+            key = jwks_cache.keys(settings.COGNITO_JWKS_URL, refresh=True).get(kid)
+        if key is None:
+            raise exceptions.AuthenticationFailed('Public key not found in JWKS for the given kid.')
 
         # Verify token
         try:
@@ -64,56 +107,14 @@ class CognitoAuthentication(authentication.BaseAuthentication):
         if not username:
             raise exceptions.AuthenticationFailed('JWT contained no username or sub claim')
         
-        user, created_django_user = User.objects.get_or_create(
-            username=username,
-            defaults={
-                'email': claims.get('email', ''),
-                'first_name': claims.get('given_name', ''),
-                'last_name': claims.get('family_name', ''),
-            }
+        # Create or sync the Django User, UserProfile (and LawyerProfile) from the token claims.
+        # Writes only happen when something actually changed (first login, Cognito group change).
+        user, _ = provision_user(
+            username,
+            role=role_from_cognito_groups(claims.get('cognito:groups')),
+            email=claims.get('email', ''),
+            first_name=claims.get('given_name', ''),
+            last_name=claims.get('family_name', ''),
         )
-
-        # Get or create our application UserProfile (signal in users.models handles creation if user is new)
-        # This ensures UserProfile exists before we try to access or modify it.
-        user_profile, created_app_profile = UserProfile.objects.get_or_create(user=user)
-
-        # Sync role based on Cognito groups
-        groups = claims.get('cognito:groups', []) or []
-        
-        # Determine the new role based on Cognito groups - using os.getenv for group names
-        admin_group = os.getenv('COGNITO_ADMINS_GROUP_NAME', 'admins')
-        lawyer_group = os.getenv('COGNITO_LAWYERS_GROUP_NAME', 'lawyers')
-        # client_group = os.getenv('COGNITO_CLIENTS_GROUP_NAME', 'clients') # Not strictly needed if client is default
-
-        new_role = 'client' # Default role
-        user_is_staff_updated = False
-
-        if admin_group in groups:
-            new_role = 'admin'
-            if not user.is_staff or not user.is_superuser:
-                user.is_staff = True
-                user.is_superuser = True
-                user_is_staff_updated = True
-        elif lawyer_group in groups:
-            new_role = 'lawyer'
-            if user.is_staff or user.is_superuser: # Demote from admin if only lawyer
-                user.is_staff = False
-                user.is_superuser = False
-                user_is_staff_updated = True
-            NewLawyerProfile.objects.get_or_create(user_profile=user_profile)
-        else: # Default to client if not in admin or lawyer group
-            new_role = 'client'
-            if user.is_staff or user.is_superuser: # Demote from admin if only client
-                user.is_staff = False
-                user.is_superuser = False
-                user_is_staff_updated = True
-        
-        # Update UserProfile role if it has changed or if the app profile was just created (to override default)
-        if user_profile.role != new_role or created_app_profile:
-            user_profile.role = new_role
-            user_profile.save()
-        
-        if user_is_staff_updated: # Save user only if staff/superuser status actually changed
-            user.save()
             
         return (user, None) 
\ No newline at end of file
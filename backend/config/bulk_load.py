@@ -0,0 +1,61 @@
+"""
+Batched bulk loading shared by the synthetic data generator (benchmarks/synthetic.py) and the bulk lawyer
+import (users/bulk_import.py): rows are written with PostgreSQL `COPY ... FROM STDIN` or, on other
+backends, with bulk_create. Neither path sends model signals or applies field defaults for COPY, so callers
+pass every NOT NULL column explicitly.
+"""
+import csv
+import io
+
+from django.db import connection
+
+COPY_NULL = '\\N'
+
+
+def default_method():
+    """'copy' on PostgreSQL, 'bulk_create' elsewhere."""
+    return 'copy' if connection.vendor == 'postgresql' else 'bulk_create'
+
+
+class BatchWriter:
+    """
+    Buffers row tuples for one model and flushes them with COPY (PostgreSQL) or bulk_create.
+    Note that bulk_create applies auto_now_add, so generated created_at values only survive with COPY.
+    """
+
+    def __init__(self, model, field_names, method, batch_size):
+        self.model = model
+        self.field_names = field_names
+        self.method = method
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+        if method == 'copy':
+            columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in field_names)
+            self.copy_sql = (
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+            )
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.method == 'copy':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in self.rows:
+                writer.writerow([COPY_NULL if value is None else value for value in row])
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.cursor.copy_expert(self.copy_sql, buffer) # psycopg2's raw cursor
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**dict(zip(self.field_names, row))) for row in self.rows], batch_size=self.batch_size
+            )
+        self.written += len(self.rows)
+        self.rows = []
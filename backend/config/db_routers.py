@@ -0,0 +1,92 @@
+import contextvars
+import hashlib
+import logging
+import random
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+from django.db import connections
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Where reads go for the current request/task: 'replica' only when explicitly enabled
+# (see config.middleware.ReplicaRoutingMiddleware); anything else reads from the primary.
+_read_target = contextvars.ContextVar('db_read_target', default='primary')
+
+
+@contextmanager
+def use_replicas():
+    """Routes reads inside the block to a replica (writes always go to the primary)."""
+    token = _read_target.set('replica')
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Forces reads inside the block to the primary, e.g. for availability checks right before a booking.
+    Also usable as a decorator: @use_primary().
+    """
+    token = _read_target.set('primary')
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a random alias in settings.DATABASE_REPLICAS when the current context opted in
+    via use_replicas() and the primary isn't inside a transaction; everything else uses 'default'.
+    All aliases hold the same data, so relations between them are allowed; only 'default' is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or _read_target.get() != 'replica':
+            return 'default'
+        if connections['default'].in_atomic_block: # Reads inside a transaction must see its writes
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+# --- Read-your-writes pinning ---
+
+PIN_KEY = 'db_pin:{}'
+
+
+def client_key(request):
+    """Identifies the caller across requests (hash of the bearer token or session cookie), or None."""
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode()).hexdigest()[:32]
+
+
+def pin_to_primary(key):
+    """After a write, keep this client's reads on the primary for READ_YOUR_WRITES_SECONDS."""
+    try:
+        get_redis_client().set(PIN_KEY.format(key), 1, ex=settings.READ_YOUR_WRITES_SECONDS)
+    except redis.RedisError as e:
+        logger.warning("Could not pin client to primary database: %s", e)
+
+
+def is_pinned_to_primary(key) -> bool:
+    try:
+        return bool(get_redis_client().exists(PIN_KEY.format(key)))
+    except redis.RedisError:
+        return True # When in doubt, read from the primary
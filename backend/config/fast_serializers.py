@@ -0,0 +1,117 @@
+"""
+Read-only "fast path" for list endpoints: builds exactly the dicts a ModelSerializer would return, but
+from a single `.values_list()` query instead of model instances, related-object lookups and DRF's
+per-field attribute resolution.
+
+The plan is derived from the serializer's own fields, so output stays identical as long as the
+serializer only uses plain model fields, primary-key relations and nested serializers of those.
+"""
+from datetime import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() is a no-op for the values the database returns.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+_plans = {}
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation for ISO-8601 output without the per-call settings lookups:
+    aware values are converted to the field's timezone and formatted exactly like DRF does.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if not isinstance(output_format, str) or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        if field_timezone is None or not isinstance(value, datetime) or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _build_plan(serializer, prefix, paths):
+    """Returns [(field_name, step)]: ('column', index into paths, converter or None) or ('nested', plan)."""
+    plan = []
+    for field in serializer._readable_fields:
+        if field.source == '*' or isinstance(field, (serializers.SerializerMethodField, serializers.HiddenField)):
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{field.field_name} cannot be built from values().')
+        path = prefix + list(field.source_attrs)
+        if isinstance(field, serializers.ListSerializer):
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{field.field_name}: to-many relations are not supported.')
+        if isinstance(field, serializers.BaseSerializer):
+            plan.append((field.field_name, ('nested', _build_plan(field, path, paths))))
+            continue
+        paths.append('__'.join(path))
+        index = len(paths) - 1
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            converter = None if field.pk_field is None else field.pk_field.to_representation
+        elif isinstance(field, IDENTITY_FIELDS):
+            converter = None
+        elif isinstance(field, serializers.DateTimeField):
+            converter = _datetime_converter(field)
+        else:
+            converter = field.to_representation
+        plan.append((field.field_name, ('column', index, converter)))
+    return plan
+
+
+def _render_row(plan, row):
+    data = {}
+    for field_name, step in plan:
+        if step[0] == 'nested':
+            nested = _render_row(step[1], row)
+            # A missing related object shows up as all-None columns; the serializer renders it as None
+            data[field_name] = nested if any(value is not None for value in nested.values()) else None
+        else:
+            value = row[step[1]]
+            data[field_name] = value if value is None or step[2] is None else step[2](value)
+    return data
+
+
+class ValuesSerializer:
+    """
+    `ValuesSerializer(LawyerProfileSerializer).serialize(queryset)` returns the same list of dicts as
+    `LawyerProfileSerializer(queryset, many=True).data`, using one query. Plans are cached per serializer class.
+    """
+
+    def __init__(self, serializer_class):
+        if serializer_class not in _plans:
+            paths = []
+            plan = _build_plan(serializer_class(), [], paths)
+            _plans[serializer_class] = (plan, paths)
+        self.plan, self.paths = _plans[serializer_class]
+
+    def serialize_rows(self, rows):
+        """Renders tuples ordered like `self.paths` (e.g. from values_list(*self.paths))."""
+        plan = self.plan
+        return [_render_row(plan, row) for row in rows]
+
+    def iter_rows(self, rows):
+        """Lazy serialize_rows(), for large querysets read with .iterator()."""
+        plan = self.plan
+        for row in rows:
+            yield _render_row(plan, row)
+
+    def serialize(self, queryset):
+        return self.serialize_rows(queryset.values_list(*self.paths))
+
+
+class FastListMixin:
+    """
+    ViewSet mixin that serves the `list` action through ValuesSerializer when the response is plain
+    JSON (no pagination). Other actions, and the browsable API, use the regular serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None or getattr(request.accepted_renderer, 'format', None) != 'json':
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(ValuesSerializer(self.get_serializer_class()).serialize(queryset))
@@ -0,0 +1,117 @@
+import logging
+import threading
+
+import redis
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import db_routers, profiling
+from .authentication import CognitoAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load before it reaches the database: at most ADMISSION_MAX_CONCURRENT API requests run at once in
+    this process. Beyond that, a request waits up to ADMISSION_QUEUE_TIMEOUT_MS for a slot, then gets 503 with
+    Retry-After, so an overload turns into fast rejections instead of every request queueing on the database.
+    Streaming responses release their slot once the view returns. Per-client fairness is left to the token
+    buckets of config/throttling.py (429).
+    """
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_MAX_CONCURRENT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slots = threading.BoundedSemaphore(settings.ADMISSION_MAX_CONCURRENT)
+        self.timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+
+    def __call__(self, request):
+        if not request.path.startswith(settings.ADMISSION_CONTROL_PATHS):
+            return self.get_response(request)
+        if not self.slots.acquire(timeout=self.timeout):
+            response = JsonResponse({'error': 'The server is busy. Please retry shortly.'}, status=503)
+            response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+            response._has_been_logged = True # Expected under overload; don't log an error per shed request
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+
+class RequestProfilerMiddleware:
+    """
+    Opt-in per-request profiling for staff. A staff request that sends the X-Profile-Request header (or
+    the `_profile` query flag) runs under a sampling profiler plus SQL capture; the profile is stored for
+    a short time and its id returned in the X-Profile-Id response header (fetch it from
+    /api/admin/profiles/<id>/).
+
+    Requests without the flag only pay for the two lookups below. Flagged requests are authenticated here,
+    before a profiling slot is taken (Cognito authentication otherwise happens inside DRF), so other
+    users' flags are ignored and can't use up the slots.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def is_staff(self, request):
+        user = getattr(request, 'user', None) # Set from the session by AuthenticationMiddleware (admin site)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            authenticated = CognitoAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False # The view rejects the request as usual
+        return authenticated is not None and authenticated[0].is_staff
+
+    def __call__(self, request):
+        if 'HTTP_X_PROFILE_REQUEST' not in request.META and '_profile' not in request.GET:
+            return self.get_response(request)
+        if not self.is_staff(request): # Non-staff opt-ins are silently ignored
+            return self.get_response(request)
+        if not profiling.acquire_profiling_slot(): # Already profiling enough requests in this process
+            return self.get_response(request)
+
+        try:
+            with profiling.RequestProfile() as profile:
+                response = self.get_response(request)
+        finally:
+            profiling.release_profiling_slot()
+
+        try:
+            response['X-Profile-Id'] = profiling.save_profile(profile.as_dict(request, response))
+        except redis.RedisError as e:
+            logger.warning("Could not store request profile: %s", e)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes reads of safe (GET/HEAD/OPTIONS) requests to the read replicas. After a client sends a
+    write request, its reads stay on the primary for READ_YOUR_WRITES_SECONDS so it sees its own
+    changes despite replication lag. Disabled when no replicas are configured.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = db_routers.client_key(request)
+        if request.method not in self.SAFE_METHODS:
+            response = self.get_response(request)
+            if key:
+                db_routers.pin_to_primary(key)
+            return response
+        if key and db_routers.is_pinned_to_primary(key):
+            return self.get_response(request)
+        with db_routers.use_replicas():
+            return self.get_response(request)
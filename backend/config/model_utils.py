@@ -0,0 +1,30 @@
+def assign_changed_fields(instance, values: dict) -> list:
+    """
+    Assigns each value in `values` to `instance` only if it differs from the current attribute,
+    and returns the names of the fields that actually changed (in `values` order).
+    Foreign keys are compared by id, so checking them never loads the related object.
+    """
+    changed_fields = []
+    for field_name, value in values.items():
+        field = instance._meta.get_field(field_name)
+        if field.many_to_one or (field.one_to_one and field.concrete):
+            current = getattr(instance, field.attname)
+            new = value.pk if value is not None else None
+        else:
+            current = getattr(instance, field_name)
+            new = value
+        if current != new:
+            setattr(instance, field_name, value)
+            changed_fields.append(field_name)
+    return changed_fields
+
+
+def save_changed_fields(instance, values: dict) -> list:
+    """
+    Dirty-tracked save: applies `values` and issues a single UPDATE limited to the changed columns,
+    or no query at all when nothing changed. Returns the changed field names.
+    """
+    changed_fields = assign_changed_fields(instance, values)
+    if changed_fields:
+        instance.save(update_fields=changed_fields)
+    return changed_fields
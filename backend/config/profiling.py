@@ -0,0 +1,164 @@
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .redis_client import get_redis_client
+
+PROFILE_KEY = 'request_profile:{}'
+MAX_STACK_DEPTH = 200
+MAX_STORED_QUERIES = 500
+
+# Caps how many requests a process profiles at once; further opt-in requests simply run unprofiled.
+_profiling_slots = threading.BoundedSemaphore(2)
+
+
+class StackSampler(threading.Thread):
+    """
+    Wall-clock sampling profiler for a single thread: every `interval` seconds it grabs the target
+    thread's current frame and counts the stack in folded form ("module:func;module:func ...",
+    root first), which flamegraph.pl, speedscope and similar tools read directly.
+    """
+
+    def __init__(self, target_thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class QueryRecorder:
+    """execute_wrapper that records every SQL statement with its duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params)[:500],
+                'many': many,
+                'alias': context['connection'].alias,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+    def summary(self):
+        """
+        Totals plus two groupings: `duplicates` (same SQL and params, i.e. repeated identical queries)
+        and `similar` (same SQL with different params, the usual N+1 signature).
+        """
+        exact = defaultdict(list)
+        similar = defaultdict(list)
+        for query in self.queries:
+            exact[(query['sql'], query['params'])].append(query['duration_ms'])
+            similar[query['sql']].append(query['duration_ms'])
+
+        def repeated(groups, key_to_sql):
+            return sorted(
+                (
+                    {'sql': key_to_sql(key), 'count': len(durations), 'total_ms': round(sum(durations), 3)}
+                    for key, durations in groups.items() if len(durations) > 1
+                ),
+                key=lambda group: group['total_ms'], reverse=True,
+            )
+
+        return {
+            'count': len(self.queries),
+            'total_ms': round(sum(query['duration_ms'] for query in self.queries), 3),
+            'duplicates': repeated(exact, lambda key: key[0]),
+            'similar': repeated(similar, lambda key: key),
+        }
+
+
+class RequestProfile:
+    """Runs the sampler and SQL capture around one request: `with RequestProfile() as profile: ...`."""
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.REQUEST_PROFILING_SAMPLE_INTERVAL_MS / 1000
+        self.sampler = StackSampler(threading.get_ident(), self.interval)
+        self.queries = QueryRecorder()
+        self._wrappers = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._wrappers.enter_context(connection.execute_wrapper(self.queries))
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+        self._wrappers.close()
+        return False
+
+    def as_dict(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status_code': response.status_code,
+            'user': request.user.get_username(),
+            'recorded_at': time.time(),
+            'duration_ms': self.duration_ms,
+            'sample_interval_ms': round(self.interval * 1000, 3),
+            'samples': self.sampler.samples,
+            'folded_stacks': dict(self.sampler.stacks.most_common()),
+            'sql': {
+                **self.queries.summary(),
+                'queries': self.queries.queries[:MAX_STORED_QUERIES],
+            },
+        }
+
+
+def save_profile(data) -> str:
+    """Stores a profile in Redis for REQUEST_PROFILING_TTL_SECONDS and returns its id."""
+    profile_id = uuid.uuid4().hex
+    get_redis_client().set(PROFILE_KEY.format(profile_id), json.dumps(data), ex=settings.REQUEST_PROFILING_TTL_SECONDS)
+    return profile_id
+
+
+def load_profile(profile_id):
+    raw = get_redis_client().get(PROFILE_KEY.format(profile_id))
+    return json.loads(raw) if raw else None
+
+
+def folded_text(profile) -> str:
+    """Renders a stored profile in the folded format ("stack count" per line) used by flamegraph tools."""
+    return ''.join(f'{stack} {count}\n' for stack, count in profile['folded_stacks'].items())
+
+
+def acquire_profiling_slot() -> bool:
+    return _profiling_slots.acquire(blocking=False)
+
+
+def release_profiling_slot():
+    _profiling_slots.release()
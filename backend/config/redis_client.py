@@ -0,0 +1,57 @@
+import redis
+from django.conf import settings
+
+# Single lazily-created client per process. redis-py keeps its own connection pool,
+# so sharing one client is both thread-safe and the cheapest option.
+_redis_client = None
+
+def get_redis_client() -> redis.Redis:
+    """Returns the shared Redis client configured by settings.REDIS_URL."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _redis_client
+
+
+# Read-through caching without stale sets. Invalidating a key also bumps its generation
+# (`<key>:generation`); a reader that missed remembers the generation it saw before loading from the
+# database and only stores its result if no invalidation happened meanwhile. Otherwise a reader that
+# loaded old rows just before a write committed could cache them after the invalidation ran.
+GENERATION_KEY = '{}:generation'
+SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[2] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+end
+"""
+_set_if_generation = None
+
+
+def get_cached(keys):
+    """[(value or None, generation)] for `keys`, in one round trip. Pass the generation to set_cached()."""
+    values = get_redis_client().mget(list(keys) + [GENERATION_KEY.format(key) for key in keys])
+    return [(value, (generation or b'').decode()) for value, generation in zip(values[:len(keys)], values[len(keys):])]
+
+
+def set_cached(entries, ttl):
+    """Stores each (key, value, generation) for `ttl` seconds unless the key was invalidated since that generation was read."""
+    global _set_if_generation
+    client = get_redis_client()
+    if _set_if_generation is None or _set_if_generation.registered_client is not client:
+        _set_if_generation = client.register_script(SET_IF_GENERATION_SCRIPT)
+    pipe = client.pipeline(transaction=False)
+    for key, value, generation in entries:
+        _set_if_generation(keys=[key, GENERATION_KEY.format(key)], args=[value, generation, ttl], client=pipe)
+    pipe.execute()
+
+
+def invalidate_cached(key, ttl):
+    """Deletes `key` and bumps its generation; the generation outlives any value cached for `ttl`."""
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.delete(key)
+    pipe.incr(GENERATION_KEY.format(key))
+    pipe.expire(GENERATION_KEY.format(key), 2 * ttl)
+    pipe.execute()
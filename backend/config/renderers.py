@@ -0,0 +1,98 @@
+"""
+orjson-backed drop-in replacements for DRF's JSONRenderer/JSONParser.
+
+The output is byte-for-byte what DRF's JSONRenderer produces with the default settings (compact,
+UTF-8, UTC datetimes as "...Z", U+2028/U+2029 escaped). Types orjson doesn't handle natively
+(Decimal, lazy strings, querysets, ...) go through DRF's own encoder. When orjson isn't installed,
+or an indented response is requested, both classes fall back to the stock DRF implementation.
+
+orjson writes some values differently from the json module: floats in exponent notation (1e16 rather
+than 1e+16, 0.00001 rather than 1e-05) and NaN/Infinity (null, where DRF's strict mode raises), and it
+can't encode integers wider than 64 bits. Data holding such floats (found by _needs_json_module, which
+costs about as much as the orjson call) or that orjson refuses is rendered by DRF instead.
+"""
+import datetime
+import math
+import uuid
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError: # Optional dependency
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+# Types orjson writes like the json module (or via the encoder), skipped without further checks
+SCALAR_TYPES = frozenset((str, int, bool, type(None), datetime.datetime, datetime.date, datetime.time, uuid.UUID))
+
+
+def _needs_json_module(value):
+    """Whether `value` holds a float that orjson would write differently from the json module."""
+    if isinstance(value, float):
+        return not (math.isfinite(value) and 'e' not in repr(value))
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        return False # Other types are converted by the encoder's default(), which is checked too
+    for item in value:
+        if type(item) not in SCALAR_TYPES and _needs_json_module(item):
+            return True
+    return False
+
+
+class _JSONModuleRequired(Exception):
+    pass
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that serializes with orjson when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not settings.FAST_JSON_ENABLED or not (self.compact and not self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None or _needs_json_module(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder_default = self.encoder_class().default
+
+        def default(obj):
+            converted = encoder_default(obj)
+            if _needs_json_module(converted): # E.g. a Decimal the encoder turned into 1e+16
+                raise _JSONModuleRequired
+            return converted
+
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError: # Also integers wider than 64 bits; DRF renders them or raises its own error
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same JavaScript-subset escaping as DRF
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that parses with orjson when available. Like DRF's strict mode, NaN/Infinity are rejected."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not settings.FAST_JSON_ENABLED:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            raw = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                raw = raw.decode(encoding)
+            return orjson.loads(raw)
+        except (ValueError, UnicodeDecodeError) as exc: # orjson.JSONDecodeError subclasses ValueError
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,33 @@
+from rest_framework import serializers
+from rest_framework.utils import model_meta
+
+from .model_utils import save_changed_fields
+
+
+class DirtyFieldsUpdateMixin:
+    """
+    ModelSerializer mixin whose update() writes only the columns whose values actually changed,
+    using save(update_fields=...), and skips the UPDATE entirely when nothing changed.
+    The changed field names are available as `serializer.changed_fields` after save().
+    """
+    changed_fields = ()
+
+    def update(self, instance, validated_data):
+        serializers.raise_errors_on_nested_writes('update', self, validated_data)
+        info = model_meta.get_field_info(instance)
+
+        m2m_fields = []
+        values = {}
+        for attr, value in validated_data.items():
+            if attr in info.relations and info.relations[attr].to_many:
+                m2m_fields.append((attr, value))
+            else:
+                values[attr] = value
+
+        self.changed_fields = save_changed_fields(instance, values)
+
+        # As in ModelSerializer.update, many-to-many fields are set after the instance is saved.
+        for attr, value in m2m_fields:
+            getattr(instance, attr).set(value)
+
+        return instance
@@ -51,18 +51,22 @@ INSTALLED_APPS = [
     'rest_framework',
     'appointments',
     'users',
+    'benchmarks',
     'django_celery_beat',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.AdmissionControlMiddleware', # Caps concurrent API requests; 503 beyond that
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware', # Safe requests read from replicas, if configured
+    'config.middleware.RequestProfilerMiddleware', # Opt-in staff profiling; no-op for other requests
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -100,6 +104,23 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated hosts in DB_REPLICA_HOSTS become aliases replica_1, replica_2, ...
+# (same credentials as the primary). Pointing a replica at the primary host, or DB_REPLICA_NAME at a
+# second local database, is enough to exercise the routing locally.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': replica_host.strip(),
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['config.db_routers.PrimaryReplicaRouter']
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '5')) # Reads stay on the primary this long after a client writes
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -158,6 +179,8 @@ COGNITO_JWKS_URL = (
     f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/"
     f"{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
 )
+COGNITO_JWKS_CACHE_SECONDS = int(os.getenv('COGNITO_JWKS_CACHE_SECONDS', '3600')) # Signing keys are fetched once per process per hour
+COGNITO_JWKS_TIMEOUT_SECONDS = float(os.getenv('COGNITO_JWKS_TIMEOUT_SECONDS', '5'))
 
 # DRF settings to use Cognito JWT authentication
 REST_FRAMEWORK = {
@@ -167,7 +190,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON (byte-identical output, see config/renderers.py); DRF's defaults otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Redis token buckets for views with a throttle scope (THROTTLE_RATES below, config/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'config.throttling.TokenBucketThrottle',
+    ],
 }
+FAST_JSON_ENABLED = os.getenv('FAST_JSON_ENABLED', '1') == '1' # Set to 0 to fall back to DRF's json module
 
 # Celery Configuration Options
 # ------------------------------------------------------------------------------
@@ -185,6 +223,77 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE # Use Django's timezone
+CELERY_TASK_TRACK_STARTED = True # Report STARTED so triggered tasks can be told apart from queued ones
 
 # django-celery-beat configuration
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+
+# Redis used directly by the app (task metrics, caches). Defaults to the broker instance.
+REDIS_URL = os.environ.get("REDIS_URL", CELERY_BROKER_URL)
+REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "0.5")) # Seconds; keep short so Redis hiccups don't stall requests/tasks
+
+# Celery task telemetry (see appointments/task_metrics.py)
+TASK_METRICS_ENABLED = os.environ.get("TASK_METRICS_ENABLED", "1") == "1"
+TASK_METRICS_RETENTION_HOURS = int(os.environ.get("TASK_METRICS_RETENTION_HOURS", "168")) # Keep 7 days of hourly buckets
+
+# Opt-in per-request profiling for staff (see config/middleware.py)
+REQUEST_PROFILING_ENABLED = os.environ.get("REQUEST_PROFILING_ENABLED", "1") == "1"
+REQUEST_PROFILING_SAMPLE_INTERVAL_MS = float(os.environ.get("REQUEST_PROFILING_SAMPLE_INTERVAL_MS", "1"))
+REQUEST_PROFILING_TTL_SECONDS = int(os.environ.get("REQUEST_PROFILING_TTL_SECONDS", "900")) # Profiles expire after 15 minutes
+
+# Appointment table partitioning (PostgreSQL; see appointments/partitions.py)
+APPOINTMENT_PARTITION_MONTHS_AHEAD = int(os.environ.get("APPOINTMENT_PARTITION_MONTHS_AHEAD", "3")) # Monthly partitions created ahead of time
+APPOINTMENT_ARCHIVE_AFTER_MONTHS = int(os.environ.get("APPOINTMENT_ARCHIVE_AFTER_MONTHS", "24")) # Months older than this move to AppointmentArchive
+
+# Precomputed lawyer directory in Redis (see users/directory.py)
+LAWYER_DIRECTORY_SNAPSHOT_ENABLED = os.environ.get("LAWYER_DIRECTORY_SNAPSHOT_ENABLED", "1") == "1"
+
+# Real-time slot events over SSE (see appointments/slot_stream.py)
+SLOT_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("SLOT_EVENTS_HEARTBEAT_SECONDS", "15")) # Keeps idle connections open through proxies
+
+# Waitlist first-refusal offers (see appointments/waitlist.py)
+WAITLIST_OFFER_MINUTES = int(os.environ.get("WAITLIST_OFFER_MINUTES", "15")) # How long an offered slot is held for the waitlisted client
+
+# Capacity reports (see appointments/capacity.py)
+CAPACITY_SNAPSHOT_DAYS = int(os.environ.get("CAPACITY_SNAPSHOT_DAYS", "28")) # Days ahead covered by the daily snapshot
+CAPACITY_REPORT_MAX_DAYS = int(os.environ.get("CAPACITY_REPORT_MAX_DAYS", "90")) # Longest range the live report endpoint accepts
+CAPACITY_SNAPSHOT_RETENTION_DAYS = int(os.environ.get("CAPACITY_SNAPSHOT_RETENTION_DAYS", "90")) # Older snapshots are deleted
+
+# Admin data exports (see appointments/exports.py)
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000")) # Rows fetched per server-side cursor round trip
+EXPORTS_DIR = os.environ.get("EXPORTS_DIR", str(BASE_DIR / 'exports')) # Where export_dataset_task writes gzip files
+EXPORT_FILE_RETENTION_HOURS = int(os.environ.get("EXPORT_FILE_RETENTION_HOURS", "48")) # Older export files are deleted
+
+# Bulk lawyer onboarding (see users/bulk_import.py)
+LAWYER_IMPORT_MAX_ROWS = int(os.environ.get("LAWYER_IMPORT_MAX_ROWS", "50000")) # Largest file accepted in one import
+LAWYER_IMPORT_COGNITO_RATE = float(os.environ.get("LAWYER_IMPORT_COGNITO_RATE", "10")) # Cognito users created per second (two API calls each); keep under the user pool's quotas
+LAWYER_IMPORT_COGNITO_CONCURRENCY = int(os.environ.get("LAWYER_IMPORT_COGNITO_CONCURRENCY", "8")) # Parallel Cognito calls
+
+# Appointment changes feed (see appointments/changes.py)
+APPOINTMENT_CHANGES_PAGE_SIZE = int(os.environ.get("APPOINTMENT_CHANGES_PAGE_SIZE", "500")) # Default and maximum changes per page
+APPOINTMENT_CHANGES_RETENTION_DAYS = int(os.environ.get("APPOINTMENT_CHANGES_RETENTION_DAYS", "30")) # Older changes are pruned; consumers further behind resync
+
+# Lawyer iCalendar feeds (see appointments/calendar_feed.py)
+CALENDAR_FEED_PAST_DAYS = int(os.environ.get("CALENDAR_FEED_PAST_DAYS", "90")) # Appointments this far back stay in the feed
+CALENDAR_FEED_FUTURE_DAYS = int(os.environ.get("CALENDAR_FEED_FUTURE_DAYS", "365"))
+CALENDAR_FEED_MAX_AGE_SECONDS = int(os.environ.get("CALENDAR_FEED_MAX_AGE_SECONDS", "900")) # Suggested polling interval; also Cache-Control max-age
+CALENDAR_FEED_UID_DOMAIN = os.environ.get("CALENDAR_FEED_UID_DOMAIN", "aavukat-pro") # Right-hand side of event UIDs
+
+# External calendar busy time (see appointments/external_calendars.py)
+EXTERNAL_CALENDAR_HORIZON_DAYS = int(os.environ.get("EXTERNAL_CALENDAR_HORIZON_DAYS", "400")) # Busy time is stored this far ahead (covers year-long booking series)
+EXTERNAL_CALENDAR_MAX_BYTES = int(os.environ.get("EXTERNAL_CALENDAR_MAX_BYTES", str(10 * 2**20))) # Largest ICS file uploaded or downloaded
+EXTERNAL_CALENDAR_FETCH_TIMEOUT_SECONDS = float(os.environ.get("EXTERNAL_CALENDAR_FETCH_TIMEOUT_SECONDS", "20"))
+EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS = os.environ.get("EXTERNAL_CALENDAR_ALLOW_PRIVATE_URLS", "0") == "1" # Allow URLs on private/loopback addresses (local testing only)
+
+# Rate limits and admission control (see config/throttling.py and config/middleware.py)
+THROTTLE_ENABLED = os.environ.get("THROTTLE_ENABLED", "1") == "1"
+# Scope -> {bucket: (tokens per second, burst)}; `user` buckets are per user, `lawyer` buckets per targeted lawyer
+THROTTLE_RATES = {
+    'available_slots': {'user': (2, 20), 'lawyer': (20, 100)},
+    'booking': {'user': (0.2, 5), 'lawyer': (2, 20)},
+    'auth': {'user': (0.5, 10)},
+}
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", "32")) # API requests handled at once per process (0 disables); keep within the database connection budget
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", "200")) # How long a request may wait for a slot before 503
+ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+ADMISSION_CONTROL_PATHS = ('/api/',)
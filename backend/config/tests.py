@@ -0,0 +1,43 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer, orjson
+
+
+@skipIf(orjson is None, 'orjson is not installed')
+class FastJSONRendererTests(SimpleTestCase):
+    """FastJSONRenderer must render exactly what DRF's JSONRenderer does, or fail the same way."""
+
+    def assertSameAsDRF(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_common_payload(self):
+        self.assertSameAsDRF([{
+            'id': 1, 'price': '75.50', 'ratio': 0.25, 'big': 1000000000000000.0, 'tiny': 0.0001, 'ok': True,
+            'none': None, 'at': datetime(2026, 1, 1, 9, 30, tzinfo=dt_timezone.utc), 'text': 'Åsa   line',
+        }])
+
+    def test_exponent_floats(self):
+        for value in (1e16, 1.5e-7, 1e-05, -2.5e300, 5e-324):
+            with self.subTest(value=value):
+                self.assertSameAsDRF({'nested': [{'value': value}]})
+
+    def test_exponent_float_from_encoder(self):
+        self.assertSameAsDRF({'decimal': Decimal('1e16'), 'small': [Decimal('0.00001')]}) # DRF's encoder makes floats of them
+
+    def test_non_finite_floats_raise_like_drf(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'value': value})
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'value': value})
+
+    def test_integers_wider_than_64_bits(self):
+        for value in (2 ** 64, -(2 ** 63) - 1, 10 ** 30):
+            with self.subTest(value=value):
+                self.assertSameAsDRF([{'value': value}])
@@ -0,0 +1,136 @@
+"""
+Token-bucket rate limits for expensive endpoints (available_slots, booking), checked by DRF's throttling hook.
+
+A view opts in with `throttle_scope` (or `throttle_scopes`, {action: scope}, on viewsets).
+settings.THROTTLE_RATES gives each scope its buckets as {kind: (tokens per second, burst)}:
+- `user` is keyed by the authenticated user (the client's address for anonymous requests);
+- `lawyer` by the lawyer a request targets (`lawyer_id` query parameter or `lawyer` in the body), so one
+  popular lawyer's calendar can't be hammered by many users together.
+
+All buckets of a request are checked and charged by one Lua script, in one Redis round trip: either every
+bucket has a token and all are charged, or none is and the request gets 429 with Retry-After (the time until
+the emptiest bucket refills). Redis' clock is used, so app servers' clocks don't matter. If Redis is
+unavailable, requests are let through: the concurrency limit (config/middleware.py) still protects the database.
+"""
+import logging
+import math
+
+import redis
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'throttle:{}:{}:{}' # scope, kind, identity
+
+# KEYS: the buckets. ARGV: rate (tokens per second) and burst of each bucket, in order.
+# Returns 0 if the request is admitted (one token taken from every bucket), else milliseconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tokens = {}
+local wait_ms = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'at')
+    local available = tonumber(state[1]) or burst
+    local elapsed = math.max(0, now_ms - (tonumber(state[2]) or now_ms))
+    available = math.min(burst, available + elapsed * rate / 1000)
+    tokens[i] = available
+    if available < 1 then
+        wait_ms = math.max(wait_ms, math.ceil((1 - available) * 1000 / rate))
+    end
+end
+if wait_ms > 0 then
+    return wait_ms
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'at', now_ms)
+    redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000) -- A full bucket needs no state
+end
+return 0
+"""
+
+_script = None
+
+
+def _token_bucket():
+    global _script
+    client = get_redis_client()
+    if _script is None or _script.registered_client is not client:
+        _script = client.register_script(TOKEN_BUCKET_SCRIPT) # EVALSHA, loading the script on first use
+    return _script
+
+
+def take(buckets):
+    """
+    Takes a token from every (key, rate, burst) bucket if each has one. Returns 0 when admitted, else the
+    seconds until the request would be; 0 as well if Redis is unavailable.
+    """
+    if not buckets:
+        return 0
+    keys = [key for key, _, _ in buckets]
+    args = [value for _, rate, burst in buckets for value in (rate, burst)]
+    try:
+        wait_ms = _token_bucket()(keys=keys, args=args)
+    except redis.RedisError as e:
+        logger.warning("Rate limiting unavailable: %s", e)
+        return 0
+    return wait_ms / 1000
+
+
+def _lawyer_id(request):
+    value = request.query_params.get('lawyer_id')
+    if value is None and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        try:
+            value = request.data.get('lawyer')
+        except Exception: # Unparseable or non-dict body: the view reports it
+            value = None
+    value = str(value) if value is not None else ''
+    return value if value.isdigit() else None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle applying settings.THROTTLE_RATES to views that declare a throttle scope."""
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes and getattr(view, 'action', None) in scopes:
+            return scopes[view.action]
+        return getattr(view, 'throttle_scope', None)
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(view)
+        limits = settings.THROTTLE_RATES.get(scope) if scope else None
+        if not limits:
+            return True
+        buckets = []
+        for kind, (rate, burst) in limits.items():
+            if kind == 'user':
+                user = request.user
+                identity = f'u{user.pk}' if user and user.is_authenticated else f'ip{self.get_ident(request)}'
+            elif kind == 'lawyer':
+                identity = _lawyer_id(request)
+                if identity is None:
+                    continue # Not targeting a lawyer (or invalid): the view rejects it
+            else:
+                continue
+            buckets.append((BUCKET_KEY.format(scope, kind, identity), rate, burst))
+        wait = take(buckets)
+        if wait:
+            self.wait_seconds = wait
+            return False
+        return True
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds else None
@@ -21,18 +21,39 @@ from appointments.views import (
     WeeklyAvailabilityViewSet, 
     AppointmentViewSet, 
     ClientAccessibleLawyerListViewSet,
-    AvailabilityOverrideViewSet
+    AvailabilityOverrideViewSet,
+    ExternalCalendarViewSet,
+    WaitlistEntryViewSet,
+    HolidayCalendarViewSet
 )
+from appointments.analytics_views import AppointmentAnalyticsView, LawyerAnalyticsView
+from appointments.calendar_feed_views import calendar_feed_view
+from appointments.changes_views import AppointmentChangesView
+from appointments.capacity_views import CapacityReportView, CapacitySnapshotView
+from appointments.export_views import ExportView, ExportFileView
+from .views import RequestProfileView
 
 router = DefaultRouter()
 router.register('availabilities', WeeklyAvailabilityViewSet, basename='availability')
 router.register('availability-overrides', AvailabilityOverrideViewSet, basename='availability-override')
+router.register('external-calendars', ExternalCalendarViewSet, basename='external-calendar')
 router.register('appointments', AppointmentViewSet, basename='appointment')
 router.register('client/lawyers', ClientAccessibleLawyerListViewSet, basename='client-lawyer-list')
+router.register('waitlist', WaitlistEntryViewSet, basename='waitlist')
+router.register('holiday-calendars', HolidayCalendarViewSet, basename='holiday-calendar')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/users/', include('users.urls')),
+    path('api/calendar-feeds/<slug:token>.ics', calendar_feed_view, name='calendar-feed'),
     path('api/admin/tasks/', include('appointments.admin_task_urls')),
+    path('api/admin/profiles/<str:profile_id>/', RequestProfileView.as_view(), name='request-profile'),
+    path('api/admin/capacity/', CapacityReportView.as_view(), name='capacity-report'),
+    path('api/admin/capacity/snapshot/', CapacitySnapshotView.as_view(), name='capacity-snapshot'),
+    path('api/admin/analytics/appointments/', AppointmentAnalyticsView.as_view(), name='appointment-analytics'),
+    path('api/admin/analytics/lawyers/', LawyerAnalyticsView.as_view(), name='lawyer-analytics'),
+    path('api/admin/appointments/changes/', AppointmentChangesView.as_view(), name='appointment-changes'),
+    path('api/admin/exports/files/<str:filename>/', ExportFileView.as_view(), name='export-file'),
+    path('api/admin/exports/<str:dataset>/', ExportView.as_view(), name='export'),
 ]
@@ -0,0 +1,22 @@
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import profiling
+
+
+class RequestProfileView(APIView):
+    """
+    Returns a stored request profile (see config.middleware.RequestProfilerMiddleware) as JSON,
+    or as folded stacks for flamegraph tools with ?output=folded.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, profile_id, *args, **kwargs):
+        profile = profiling.load_profile(profile_id)
+        if profile is None:
+            return Response({'error': 'Profile not found or expired.'}, status=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get('output') == 'folded':
+            return HttpResponse(profiling.folded_text(profile), content_type='text/plain; charset=utf-8')
+        return Response(profile)
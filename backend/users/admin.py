@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, LawyerProfile
+from .models import UserProfile, LawyerProfile, LawyerImport, LawyerImportRow
 
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'phone_number', 'is_initial_profile_complete')
@@ -14,4 +14,18 @@ class LawyerProfileAdmin(admin.ModelAdmin):
     raw_id_fields = ('user_profile',)
 
 admin.site.register(UserProfile, UserProfileAdmin)
-admin.site.register(LawyerProfile, LawyerProfileAdmin) 
\ No newline at end of file
+admin.site.register(LawyerProfile, LawyerProfileAdmin)
+
+class LawyerImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'source_name', 'status', 'row_count', 'cognito_created', 'cognito_failed', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('created_by',)
+
+class LawyerImportRowAdmin(admin.ModelAdmin):
+    list_display = ('lawyer_import', 'row_number', 'username', 'cognito_status')
+    list_filter = ('cognito_status',)
+    search_fields = ('username',)
+    raw_id_fields = ('lawyer_import', 'user')
+
+admin.site.register(LawyerImport, LawyerImportAdmin)
+admin.site.register(LawyerImportRow, LawyerImportRowAdmin)
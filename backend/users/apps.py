@@ -5,7 +5,5 @@ class UsersConfig(AppConfig):
     name = 'users'
 
     def ready(self):
-        # If you create a signals.py file in the users app and want to connect signals there,
-        # import them here. For example:
-        # import users.signals
-        pass # Placeholder, signals in models.py are registered on model import 
\ No newline at end of file
+        # Connects the signal handlers that keep the lawyer directory snapshot up to date.
+        import users.signals  # noqa: F401
\ No newline at end of file
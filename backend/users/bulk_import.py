@@ -0,0 +1,379 @@
+"""
+Bulk lawyer onboarding: a CSV or JSON file of lawyers and their weekly availability becomes Django users,
+profiles and WeeklyAvailability rows in one transaction, and Cognito accounts in the background.
+
+1. parse() reads the file and validate() checks every row in memory (plus one query per QUERY_CHUNK_SIZE
+   usernames/emails for clashes with existing accounts), reporting every problem by row number. Nothing is
+   written unless the whole file is valid.
+2. load() writes User, UserProfile, LawyerProfile, WeeklyAvailability and LawyerImportRow rows with COPY on
+   PostgreSQL or batched bulk_create (config/bulk_load.py) in one transaction. Model signals are bypassed,
+   so callers rebuild the lawyer directory afterwards (users.rebuild_lawyer_directory_task).
+3. provision_cognito() (users.provision_lawyer_import_task) creates the Cognito users from a thread pool,
+   at most settings.LAWYER_IMPORT_COGNITO_RATE per second, and records each row's outcome on its
+   LawyerImportRow. Running it again retries only the rows that are still pending or failed.
+
+File format: one lawyer per CSV line (with a header line) or per object of a JSON array. Columns are
+COLUMNS; `username` and `email` are required. `availability` lists weekly hours as `mon 09:00-12:00;
+mon 13:00-17:00; wed 10:00-16:00` (day names or 0-6 for Monday-Sunday); in JSON it may also be a list
+of {"day_of_week", "start_time", "end_time"} objects, as the availability API takes them.
+"""
+import csv
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from appointments.models import WeeklyAvailability
+from config.bulk_load import BatchWriter, default_method
+from . import cognito_admin_actions
+from .models import UserProfile, LawyerProfile, LawyerImport, LawyerImportRow
+
+COLUMNS = (
+    'username', 'email', 'first_name', 'last_name', 'phone_number', 'bio', 'areas_of_practice',
+    'office_location_address', 'years_of_experience', 'consultation_fee', 'languages_spoken', 'website_url',
+    'availability',
+)
+INPUTS = ('csv', 'json')
+# 'monday'/'mon' -> 0 ... 'sunday'/'sun' -> 6
+DAY_NAMES = {
+    key: day for day, name in WeeklyAvailability.DAY_CHOICES for key in (name.lower(), name[:3].lower())
+}
+QUERY_CHUNK_SIZE = 2000
+LOAD_BATCH_SIZE = 5000
+RESULT_BATCH_SIZE = 500 # Cognito outcomes saved (and import counts refreshed) this many rows at a time
+MAX_REPORTED_ERRORS = 500
+
+validate_username = UnicodeUsernameValidator()
+validate_url = URLValidator()
+
+
+class LawyerImportError(ValueError):
+    """The file can't be imported as a whole (unreadable, unknown columns, too many rows)."""
+
+
+def parse(content: bytes, input_format: str):
+    """The file's rows as dicts of strings (JSON values are kept as given)."""
+    if input_format not in INPUTS:
+        raise LawyerImportError(f"input must be one of {', '.join(INPUTS)}.")
+    try:
+        text = content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise LawyerImportError('The file must be UTF-8 encoded.')
+    if input_format == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        fieldnames = reader.fieldnames or []
+        rows = list(reader)
+    else:
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise LawyerImportError(f'Invalid JSON: {e}')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise LawyerImportError('The JSON file must be an array of objects.')
+        fieldnames = {name for row in rows for name in row}
+
+    unknown = sorted(set(fieldnames) - set(COLUMNS))
+    if unknown:
+        raise LawyerImportError(f"Unknown column(s): {', '.join(unknown)}. Allowed: {', '.join(COLUMNS)}.")
+    if not rows:
+        raise LawyerImportError('The file has no lawyers.')
+    if len(rows) > settings.LAWYER_IMPORT_MAX_ROWS:
+        raise LawyerImportError(f'At most {settings.LAWYER_IMPORT_MAX_ROWS} lawyers can be imported at once.')
+    return rows
+
+
+def _text(row, name, errors, model=LawyerProfile):
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    max_length = model._meta.get_field(name).max_length
+    if max_length and len(value) > max_length:
+        errors.append(f'{name} is longer than {max_length} characters.')
+    return value
+
+
+def _parse_availability(value, errors):
+    """[(day_of_week, start_time, end_time)] from the `availability` column."""
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        entries = []
+        for entry in filter(None, (part.strip() for part in value.split(';'))):
+            day, _, hours = entry.partition(' ')
+            start, _, end = hours.strip().partition('-')
+            entries.append((day, start, end))
+    elif isinstance(value, list) and all(isinstance(entry, dict) for entry in value):
+        entries = [(entry.get('day_of_week'), entry.get('start_time'), entry.get('end_time')) for entry in value]
+    else:
+        errors.append('availability must be text like "mon 09:00-12:00; wed 10:00-16:00" or a list of objects.')
+        return []
+
+    availability = []
+    for day, start, end in entries:
+        day_key = str(day).strip().lower()
+        day_of_week = int(day_key) if day_key.isdigit() else DAY_NAMES.get(day_key)
+        try:
+            start_time, end_time = parse_time(str(start).strip()), parse_time(str(end).strip())
+        except ValueError: # Well formed but invalid, e.g. 25:00
+            start_time = end_time = None
+        if day_of_week not in range(7) or start_time is None or end_time is None:
+            errors.append(f'Invalid availability entry "{day} {start}-{end}".')
+        elif start_time >= end_time:
+            errors.append(f'Availability {day} {start}-{end} ends before it starts.')
+        else:
+            availability.append((day_of_week, start_time, end_time))
+
+    availability.sort()
+    for (day, start, end), (next_day, next_start, _) in zip(availability, availability[1:]):
+        if day == next_day and next_start < end:
+            errors.append(f'Availability overlaps on {WeeklyAvailability.DAY_CHOICES[day][1]}.')
+            break
+    return availability
+
+
+def _validate_row(row):
+    """(lawyer dict, [error messages]) for one file row."""
+    errors = []
+    lawyer = {name: _text(row, name, errors, User) for name in ('username', 'email', 'first_name', 'last_name')}
+    lawyer['phone_number'] = _text(row, 'phone_number', errors, UserProfile)
+    for name in ('bio', 'areas_of_practice', 'office_location_address', 'languages_spoken', 'website_url'):
+        lawyer[name] = _text(row, name, errors)
+
+    if not lawyer['username']:
+        errors.append('username is required.')
+    else:
+        try:
+            validate_username(lawyer['username'])
+        except ValidationError:
+            errors.append('username may only contain letters, digits and @/./+/-/_ characters.')
+    if not lawyer['email']:
+        errors.append('email is required.')
+    else:
+        lawyer['email'] = User.objects.normalize_email(lawyer['email'])
+        try:
+            validate_email(lawyer['email'])
+        except ValidationError:
+            errors.append('email is not a valid email address.')
+    if lawyer['website_url']:
+        try:
+            validate_url(lawyer['website_url'])
+        except ValidationError:
+            errors.append('website_url is not a valid URL.')
+
+    years = row.get('years_of_experience')
+    lawyer['years_of_experience'] = None
+    if years not in (None, ''):
+        if str(years).strip().isdigit():
+            lawyer['years_of_experience'] = int(str(years).strip())
+        else:
+            errors.append('years_of_experience must be a whole number.')
+
+    fee = row.get('consultation_fee')
+    lawyer['consultation_fee'] = None
+    if fee not in (None, ''):
+        try:
+            fee = Decimal(str(fee).strip())
+        except InvalidOperation:
+            fee = None
+        if fee is None or not fee.is_finite() or fee < 0 or fee.as_tuple().exponent < -2 or fee >= 10 ** 8:
+            errors.append('consultation_fee must be a non-negative amount with at most 2 decimals.')
+        else:
+            lawyer['consultation_fee'] = fee
+
+    lawyer['availability'] = _parse_availability(row.get('availability'), errors)
+    return lawyer, errors
+
+
+def _existing(field, values):
+    """The subset of `values` (lowercased) already used by a User in `field`, compared case-insensitively."""
+    found = set()
+    values = sorted({value.lower() for value in values})
+    users = User.objects.annotate(key=Lower(field))
+    for index in range(0, len(values), QUERY_CHUNK_SIZE):
+        found.update(users.filter(key__in=values[index:index + QUERY_CHUNK_SIZE]).values_list('key', flat=True))
+    return found
+
+
+def validate(rows):
+    """
+    (lawyers, errors, error_count): normalized lawyer dicts, [{'row', 'username', 'errors'}] for the first
+    MAX_REPORTED_ERRORS invalid rows, and the number of invalid rows. Rows are numbered from 1.
+    """
+    lawyers, row_errors = [], {}
+    for row_number, row in enumerate(rows, start=1):
+        lawyer, errors = _validate_row(row)
+        lawyers.append(lawyer)
+        if errors:
+            row_errors[row_number] = errors
+
+    # Cognito usernames and emails are case-insensitive, so duplicates and clashes with existing users are too
+    seen = {}
+    for row_number, lawyer in enumerate(lawyers, start=1):
+        for field in ('username', 'email'):
+            if not lawyer[field]:
+                continue
+            key = (field, lawyer[field].lower())
+            if key in seen:
+                row_errors.setdefault(row_number, []).append(f'Duplicate {field}; also on row {seen[key]}.')
+            else:
+                seen[key] = row_number
+    taken = {field: _existing(field, {lawyer[field] for lawyer in lawyers if lawyer[field]}) for field in ('username', 'email')}
+    for row_number, lawyer in enumerate(lawyers, start=1):
+        for field in ('username', 'email'):
+            if lawyer[field] and lawyer[field].lower() in taken[field]:
+                row_errors.setdefault(row_number, []).append(f'A user with this {field} already exists.')
+
+    errors = [
+        {'row': row_number, 'username': lawyers[row_number - 1]['username'], 'errors': messages}
+        for row_number, messages in sorted(row_errors.items())[:MAX_REPORTED_ERRORS]
+    ]
+    return lawyers, errors, len(row_errors)
+
+
+def _ids_by(queryset, field, keys):
+    ids = {}
+    keys = list(keys)
+    for index in range(0, len(keys), QUERY_CHUNK_SIZE):
+        ids.update(queryset.filter(**{f'{field}__in': keys[index:index + QUERY_CHUNK_SIZE]}).values_list(field, 'id'))
+    return ids
+
+
+def load(lawyers, created_by=None, source_name='', method=None, batch_size=LOAD_BATCH_SIZE):
+    """
+    Writes validated lawyers in one transaction and returns the LawyerImport, whose rows are pending Cognito
+    provisioning. Accounts start with an unusable password (sign-in goes through Cognito) and incomplete profiles.
+    """
+    method = method or default_method()
+    started = time.perf_counter()
+    joined = timezone.now()
+    with transaction.atomic():
+        lawyer_import = LawyerImport.objects.create(created_by=created_by, source_name=source_name[:255], row_count=len(lawyers))
+
+        users = BatchWriter(User, ['username', 'email', 'password', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'is_active', 'date_joined'], method, batch_size)
+        for lawyer in lawyers:
+            users.add((lawyer['username'], lawyer['email'], make_password(None), lawyer['first_name'], lawyer['last_name'], False, False, True, joined))
+        users.flush()
+        user_ids = _ids_by(User.objects, 'username', [lawyer['username'] for lawyer in lawyers])
+
+        profiles = BatchWriter(UserProfile, ['user_id', 'role', 'phone_number', 'is_initial_profile_complete'], method, batch_size)
+        for lawyer in lawyers:
+            profiles.add((user_ids[lawyer['username']], 'lawyer', lawyer['phone_number'] or None, False))
+        profiles.flush()
+        profile_ids = _ids_by(UserProfile.objects, 'user_id', user_ids.values())
+
+        lawyer_profiles = BatchWriter(LawyerProfile, [
+            'user_profile_id', 'bio', 'areas_of_practice', 'office_location_address', 'years_of_experience',
+            'consultation_fee', 'languages_spoken', 'website_url', 'is_lawyer_specific_profile_complete',
+        ], method, batch_size)
+        for lawyer in lawyers:
+            lawyer_profiles.add((
+                profile_ids[user_ids[lawyer['username']]],
+                lawyer['bio'] or None,
+                lawyer['areas_of_practice'] or None,
+                lawyer['office_location_address'] or None,
+                lawyer['years_of_experience'],
+                lawyer['consultation_fee'],
+                lawyer['languages_spoken'] or None,
+                lawyer['website_url'] or None,
+                False,
+            ))
+        lawyer_profiles.flush()
+        lawyer_ids = _ids_by(LawyerProfile.objects, 'user_profile_id', profile_ids.values())
+
+        rules = BatchWriter(WeeklyAvailability, ['lawyer_id', 'day_of_week', 'start_time', 'end_time'], method, batch_size)
+        import_rows = BatchWriter(LawyerImportRow, ['lawyer_import_id', 'row_number', 'user_id', 'username', 'cognito_status', 'error'], method, batch_size)
+        for row_number, lawyer in enumerate(lawyers, start=1):
+            user_id = user_ids[lawyer['username']]
+            lawyer_id = lawyer_ids[profile_ids[user_id]]
+            for day_of_week, start_time, end_time in lawyer['availability']:
+                rules.add((lawyer_id, day_of_week, start_time, end_time))
+            import_rows.add((lawyer_import.id, row_number, user_id, lawyer['username'], 'pending', ''))
+        rules.flush()
+        import_rows.flush()
+
+        lawyer_import.load_ms = int((time.perf_counter() - started) * 1000)
+        lawyer_import.save(update_fields=['load_ms'])
+    return lawyer_import
+
+
+class RateLimiter:
+    """Spaces calls across threads to at most `rate` per second (no bursts). A rate of 0 means unlimited."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            scheduled = max(self.next_at, now)
+            self.next_at = scheduled + self.interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+def _save_results(lawyer_import_id, rows):
+    if rows:
+        LawyerImportRow.objects.bulk_update(rows, ['cognito_status', 'error'])
+    counts = dict(
+        LawyerImportRow.objects.filter(lawyer_import_id=lawyer_import_id)
+        .values_list('cognito_status').annotate(Count('id')).order_by()
+    )
+    LawyerImport.objects.filter(id=lawyer_import_id).update(
+        cognito_created=counts.get('created', 0) + counts.get('exists', 0),
+        cognito_failed=counts.get('failed', 0),
+    )
+
+
+def provision_cognito(lawyer_import_id, rate=None, concurrency=None):
+    """
+    Creates the Cognito users of the import's pending and failed rows, `concurrency` at a time and at most
+    `rate` per second, saving each row's outcome as it goes. Returns the updated LawyerImport.
+    """
+    rate = settings.LAWYER_IMPORT_COGNITO_RATE if rate is None else rate
+    concurrency = concurrency or settings.LAWYER_IMPORT_COGNITO_CONCURRENCY
+    rows = list(
+        LawyerImportRow.objects.filter(lawyer_import_id=lawyer_import_id, cognito_status__in=('pending', 'failed'))
+        .select_related('user').order_by('row_number')
+    )
+    LawyerImport.objects.filter(id=lawyer_import_id).update(status='provisioning', finished_at=None)
+    limiter = RateLimiter(rate)
+
+    def provision(row): # Runs in the pool; only talks to Cognito, never to the database
+        if row.user is None:
+            return row, ('failed', 'The Django user was deleted before its Cognito account was created.')
+        limiter.wait()
+        return row, cognito_admin_actions.create_lawyer_cognito_user(row.username, row.user.email, row.user.first_name, row.user.last_name)
+
+    finished = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for row, (cognito_status, error) in executor.map(provision, rows):
+                row.cognito_status, row.error = cognito_status, error
+                finished.append(row)
+                if len(finished) >= RESULT_BATCH_SIZE:
+                    _save_results(lawyer_import_id, finished)
+                    finished = []
+    except Exception:
+        _save_results(lawyer_import_id, finished)
+        LawyerImport.objects.filter(id=lawyer_import_id).update(status='failed', finished_at=timezone.now())
+        raise
+    _save_results(lawyer_import_id, finished)
+    LawyerImport.objects.filter(id=lawyer_import_id).update(status='completed', finished_at=timezone.now())
+    return LawyerImport.objects.get(id=lawyer_import_id)
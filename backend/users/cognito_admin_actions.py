@@ -1,4 +1,5 @@
 import boto3
+import time
 import os
 import logging
 
@@ -141,4 +142,44 @@ def disable_cognito_user(username: str) -> bool:
         return False # Or True if "not found" means no action needed
     except Exception as e:
         logger.error(f"Error disabling user {username} in Cognito: {str(e)}", exc_info=True)
-        return False 
\ No newline at end of file
+        return False 
+
+def create_lawyer_cognito_user(username: str, email: str, first_name: str = '', last_name: str = '', max_attempts: int = 4):
+    """
+    Creates a user in Cognito (Cognito emails them a temporary password) and adds it to the lawyers group.
+    Throttled calls are retried with exponential backoff. Returns (status, error): status is 'created',
+    'exists' (an account with this username and email was already there, e.g. from an earlier attempt; it is
+    still added to the group) or 'failed', also when the username belongs to someone else's account.
+    """
+    client = _get_cognito_client()
+    attributes = [{'Name': 'email', 'Value': email}, {'Name': 'email_verified', 'Value': 'true'}] # The firm vouches for the address
+    if first_name:
+        attributes.append({'Name': 'given_name', 'Value': first_name})
+    if last_name:
+        attributes.append({'Name': 'family_name', 'Value': last_name})
+
+    def call(method, **kwargs):
+        for attempt in range(max_attempts):
+            try:
+                return method(UserPoolId=COGNITO_USER_POOL_ID, Username=username, **kwargs)
+            except client.exceptions.TooManyRequestsException:
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+
+    status = 'created'
+    try:
+        try:
+            call(client.admin_create_user, UserAttributes=attributes, DesiredDeliveryMediums=['EMAIL'])
+        except client.exceptions.UsernameExistsException:
+            # Only take over our own account; anyone else's (a client's, say) must not become a lawyer
+            existing = call(client.admin_get_user)
+            existing_email = next((a['Value'] for a in existing.get('UserAttributes', ()) if a['Name'] == 'email'), '')
+            if existing_email.lower() != email.lower():
+                return 'failed', 'A different Cognito account already uses this username.'
+            status = 'exists'
+        call(client.admin_add_user_to_group, GroupName=LAWYERS_GROUP_NAME)
+    except Exception as e:
+        logger.warning(f"Could not create Cognito lawyer {username}: {str(e)}")
+        return 'failed', str(e)
+    return status, ''
@@ -0,0 +1,135 @@
+"""
+Precomputed lawyer directory (the `client/lawyers/` list) kept in Redis.
+
+Layout:
+    lawyer_directory:fragments  hash  lawyer id -> that lawyer's JSON object, exactly as the API renders it
+    lawyer_directory:index      zset  lawyer ids, scored by id (the list order)
+    lawyer_directory:ready      set once a full build has completed
+    lawyer_directory:dirty      lawyers refreshed while a full build was running (re-applied after the swap)
+
+The list response is '[' + ','.join(fragments in index order) + ']', byte-identical to rendering the
+list with LawyerProfileSerializer. Signals (users/signals.py) refresh single lawyers after commit;
+rebuild_lawyer_directory_task rebuilds everything (needed after bulk writes, which bypass signals).
+"""
+import logging
+
+import redis
+from django.conf import settings
+
+from config.db_routers import use_primary
+from config.fast_serializers import ValuesSerializer
+from config.redis_client import get_redis_client
+from config.renderers import FastJSONRenderer
+from .models import LawyerProfile
+from .serializers import LawyerProfileSerializer
+
+logger = logging.getLogger(__name__)
+
+FRAGMENTS_KEY = 'lawyer_directory:fragments'
+INDEX_KEY = 'lawyer_directory:index'
+READY_KEY = 'lawyer_directory:ready'
+DIRTY_KEY = 'lawyer_directory:dirty'
+BUILDING_KEY = 'lawyer_directory:building'
+BUILD_SUFFIX = ':build'
+BUILD_TIMEOUT_SECONDS = 3600
+CHUNK_SIZE = 5000
+
+_renderer = FastJSONRenderer()
+
+
+def _fragments(queryset):
+    """Yields (lawyer id, JSON bytes) for every lawyer in `queryset`, one values_list() query per chunk."""
+    values_serializer = ValuesSerializer(LawyerProfileSerializer)
+    with use_primary(): # Replica lag would put stale rows into the snapshot
+        rows = queryset.order_by('id').values_list(*values_serializer.paths).iterator(chunk_size=CHUNK_SIZE)
+        for data in values_serializer.iter_rows(rows):
+            yield data['id'], _renderer.render(data)
+
+
+def rebuild_directory() -> int:
+    """
+    Builds the whole snapshot under temporary keys and swaps it in atomically, so readers never see a
+    half-built directory. Returns the number of lawyers.
+    """
+    client = get_redis_client()
+    fragments_build, index_build = FRAGMENTS_KEY + BUILD_SUFFIX, INDEX_KEY + BUILD_SUFFIX
+    client.delete(fragments_build, index_build, DIRTY_KEY)
+    client.set(BUILDING_KEY, 1, ex=BUILD_TIMEOUT_SECONDS)
+    count = 0
+    pipe = client.pipeline(transaction=False)
+    for lawyer_id, fragment in _fragments(LawyerProfile.objects.all()):
+        pipe.hset(fragments_build, lawyer_id, fragment)
+        pipe.zadd(index_build, {lawyer_id: lawyer_id})
+        count += 1
+        if count % CHUNK_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+
+    pipe = client.pipeline(transaction=True)
+    if count:
+        pipe.rename(fragments_build, FRAGMENTS_KEY)
+        pipe.rename(index_build, INDEX_KEY)
+    else:
+        pipe.delete(FRAGMENTS_KEY, INDEX_KEY)
+    pipe.set(READY_KEY, 1)
+    pipe.delete(BUILDING_KEY)
+    pipe.smembers(DIRTY_KEY)
+    pipe.delete(DIRTY_KEY)
+    dirty = pipe.execute()[-2]
+    # Lawyers changed while we were reading may have been built from older rows
+    refresh_lawyers(int(lawyer_id) for lawyer_id in dirty)
+    return count
+
+
+def refresh_lawyers(lawyer_ids):
+    """Re-renders the given lawyers (or removes them if they no longer exist). No-op until the first full build."""
+    lawyer_ids = set(lawyer_ids)
+    if not lawyer_ids or not settings.LAWYER_DIRECTORY_SNAPSHOT_ENABLED:
+        return
+    try:
+        client = get_redis_client()
+        ready, building = client.exists(READY_KEY), client.exists(BUILDING_KEY)
+        if building:
+            client.sadd(DIRTY_KEY, *lawyer_ids)
+        if not ready:
+            return
+        fresh = dict(_fragments(LawyerProfile.objects.filter(id__in=lawyer_ids)))
+        pipe = client.pipeline(transaction=True)
+        for lawyer_id in lawyer_ids:
+            if lawyer_id in fresh:
+                pipe.hset(FRAGMENTS_KEY, lawyer_id, fresh[lawyer_id])
+                pipe.zadd(INDEX_KEY, {lawyer_id: lawyer_id})
+            else:
+                pipe.zrem(INDEX_KEY, lawyer_id)
+                pipe.hdel(FRAGMENTS_KEY, lawyer_id)
+        pipe.execute()
+    except redis.RedisError as e:
+        # A stale entry is worse than none: drop the ready flag so reads fall back to the database
+        # until the next full rebuild.
+        logger.warning("Lawyer directory refresh failed for %s: %s", sorted(lawyer_ids), e)
+        try:
+            get_redis_client().delete(READY_KEY)
+        except redis.RedisError:
+            pass
+
+
+def get_directory_json():
+    """Returns the directory as JSON bytes, or None if the snapshot isn't available (use the database then)."""
+    if not settings.LAWYER_DIRECTORY_SNAPSHOT_ENABLED:
+        return None
+    try:
+        client = get_redis_client()
+        pipe = client.pipeline(transaction=True)
+        pipe.exists(READY_KEY)
+        pipe.zrange(INDEX_KEY, 0, -1)
+        ready, lawyer_ids = pipe.execute()
+        if not ready:
+            return None
+        pipe = client.pipeline(transaction=False)
+        for start in range(0, len(lawyer_ids), CHUNK_SIZE):
+            pipe.hmget(FRAGMENTS_KEY, lawyer_ids[start:start + CHUNK_SIZE])
+        fragments = [fragment for chunk in pipe.execute() for fragment in chunk if fragment is not None] # None: deleted meanwhile
+    except redis.RedisError as e:
+        logger.warning("Lawyer directory snapshot unavailable: %s", e)
+        return None
+    return b'[' + b','.join(fragments) + b']'
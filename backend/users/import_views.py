@@ -0,0 +1,89 @@
+import os
+
+from django.urls import reverse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import bulk_import
+from .models import LawyerImport, LawyerImportRow
+from .tasks import provision_lawyer_import_task, rebuild_lawyer_directory_task
+
+MAX_LISTED_ROWS = 500
+IMPORT_FIELDS = ('id', 'source_name', 'status', 'row_count', 'cognito_created', 'cognito_failed', 'load_ms', 'created_at', 'finished_at')
+
+
+def _summary(lawyer_import):
+    data = {field: getattr(lawyer_import, field) for field in IMPORT_FIELDS}
+    data['status_url'] = reverse('lawyer-import-detail', kwargs={'import_id': lawyer_import.id})
+    return data
+
+
+class LawyerImportView(APIView):
+    """
+    Bulk lawyer onboarding (users/bulk_import.py). POST a CSV or JSON file as the multipart field `file`
+    (`?input=csv|json`, default from the file extension). The whole file is validated first: any invalid row
+    returns 400 with the errors per row and nothing is imported. Otherwise every account, profile and weekly
+    availability is written in one transaction and Cognito accounts are created in the background; follow
+    them at `status_url`. `?dry_run=1` only validates.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the lawyers file as the multipart field "file".'}, status=status.HTTP_400_BAD_REQUEST)
+        input_format = request.query_params.get('input') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+        try:
+            rows = bulk_import.parse(upload.read(), input_format)
+        except bulk_import.LawyerImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        lawyers, errors, error_count = bulk_import.validate(rows)
+        if error_count:
+            return Response({
+                'error': f'{error_count} of {len(rows)} row(s) are invalid; nothing was imported.',
+                'invalid_rows': error_count,
+                'rows': errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get('dry_run') == '1':
+            return Response({'valid_rows': len(lawyers)})
+
+        lawyer_import = bulk_import.load(lawyers, created_by=request.user, source_name=upload.name)
+        rebuild_lawyer_directory_task.delay() # The bulk load bypassed the directory's signals
+        provision_lawyer_import_task.delay(lawyer_import.id)
+        return Response(_summary(lawyer_import), status=status.HTTP_201_CREATED)
+
+
+class LawyerImportDetailView(APIView):
+    """
+    GET: the import's progress and its rows with `?cognito_status=` (default failed; at most 500, from
+    `?after=<row number>`). POST: queues Cognito provisioning again for the rows that failed
+    (or are still pending, e.g. after a worker crash); a username Cognito already has is reported as `exists`.
+    """
+    permission_classes = [permissions.IsAdminUser] # Only allow admin users
+
+    def get(self, request, import_id, *args, **kwargs):
+        lawyer_import = LawyerImport.objects.filter(id=import_id).first()
+        if lawyer_import is None:
+            return Response({'error': 'Import not found.'}, status=status.HTTP_404_NOT_FOUND)
+        cognito_status = request.query_params.get('cognito_status', 'failed')
+        statuses = [choice for choice, _ in LawyerImportRow.COGNITO_STATUS_CHOICES]
+        if cognito_status not in statuses:
+            return Response({'error': f"cognito_status must be one of {', '.join(statuses)}."}, status=status.HTTP_400_BAD_REQUEST)
+        after = request.query_params.get('after', '0')
+        if not after.isdigit():
+            return Response({'error': 'after must be a row number.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            lawyer_import.rows.filter(cognito_status=cognito_status, row_number__gt=int(after))
+            .order_by('row_number').values('row_number', 'username', 'user_id', 'cognito_status', 'error')[:MAX_LISTED_ROWS]
+        )
+        return Response({**_summary(lawyer_import), 'rows': list(rows)})
+
+    def post(self, request, import_id, *args, **kwargs):
+        lawyer_import = LawyerImport.objects.filter(id=import_id).first()
+        if lawyer_import is None:
+            return Response({'error': 'Import not found.'}, status=status.HTTP_404_NOT_FOUND)
+        provision_lawyer_import_task.delay(lawyer_import.id)
+        return Response(_summary(lawyer_import), status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0002_userprofile_date_of_birth_userprofile_home_address_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LawyerImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('provisioning', 'Provisioning Cognito accounts'), ('completed', 'Completed'), ('failed', 'Failed')], default='provisioning', max_length=20)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('cognito_created', models.PositiveIntegerField(default=0)),
+                ('cognito_failed', models.PositiveIntegerField(default=0)),
+                ('load_ms', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lawyer_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LawyerImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('username', models.CharField(max_length=150)),
+                ('cognito_status', models.CharField(choices=[('pending', 'Pending'), ('created', 'Created'), ('exists', 'Already existed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True, default='')),
+                ('lawyer_import', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='users.lawyerimport')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lawyer_import', 'cognito_status'], name='users_lawye_lawyer__c81008_idx')],
+                'unique_together': {('lawyer_import', 'row_number')},
+            },
+        ),
+    ]
@@ -1,7 +1,5 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -29,16 +27,9 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile ({self.get_role_display()})"
 
-@receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-    # Ensure profile is saved if user is updated, though often not strictly necessary
-    # if profile fields aren't derived from user fields being changed post-creation.
-    # However, if user's email/name changes, profile might want to reflect or log that.
-    # For now, a simple save() is okay, or it could be more conditional.
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+# User/UserProfile/LawyerProfile rows are provisioned explicitly by users.provisioning.provision_user
+# (called from CognitoAuthentication). The former post_save signal on User re-saved every
+# UserProfile column on each User save and has been retired.
 
 class LawyerProfile(models.Model):
     user_profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, related_name='lawyer_details')
@@ -64,4 +55,48 @@ class LawyerProfile(models.Model):
 # @receiver(post_save, sender=UserProfile)
 # def create_lawyer_profile_on_role_change(sender, instance, created, **kwargs):
 #     if not created and instance.role == 'lawyer':
-#         LawyerProfile.objects.get_or_create(user_profile=instance) 
\ No newline at end of file
+#         LawyerProfile.objects.get_or_create(user_profile=instance) 
+
+class LawyerImport(models.Model):
+    """A bulk lawyer onboarding file (see users/bulk_import.py); the Cognito outcome of each row is a LawyerImportRow."""
+    STATUS_CHOICES = [
+        ('provisioning', 'Provisioning Cognito accounts'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='lawyer_imports')
+    source_name = models.CharField(max_length=255, blank=True) # Uploaded file name
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='provisioning')
+    row_count = models.PositiveIntegerField(default=0)
+    cognito_created = models.PositiveIntegerField(default=0) # Rows whose Cognito user exists and is in the lawyers group
+    cognito_failed = models.PositiveIntegerField(default=0)
+    load_ms = models.PositiveIntegerField(default=0) # Time spent writing the database rows
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Lawyer import #{self.id} ({self.row_count} rows, {self.get_status_display()})"
+
+
+class LawyerImportRow(models.Model):
+    COGNITO_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('created', 'Created'),
+        ('exists', 'Already existed'), # Our account (same username and email) was already in Cognito; it was still added to the lawyers group
+        ('failed', 'Failed'),
+    ]
+    lawyer_import = models.ForeignKey(LawyerImport, on_delete=models.CASCADE, related_name='rows')
+    row_number = models.PositiveIntegerField() # 1 is the first lawyer in the file
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    username = models.CharField(max_length=150)
+    cognito_status = models.CharField(max_length=10, choices=COGNITO_STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('lawyer_import', 'row_number')
+        indexes = [
+            models.Index(fields=['lawyer_import', 'cognito_status']),
+        ]
+
+    def __str__(self):
+        return f"Import #{self.lawyer_import_id} row {self.row_number} ({self.username}): {self.cognito_status}"
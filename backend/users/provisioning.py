@@ -0,0 +1,75 @@
+import os
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from config.model_utils import save_changed_fields
+from .models import UserProfile, LawyerProfile
+
+# Django staff/superuser flags implied by each application role.
+ROLE_STAFF_FLAGS = {
+    'admin': {'is_staff': True, 'is_superuser': True},
+    'lawyer': {'is_staff': False, 'is_superuser': False}, # Lawyers are not staff unless also admin
+    'client': {'is_staff': False, 'is_superuser': False},
+}
+
+def role_from_cognito_groups(groups) -> str:
+    """Maps the `cognito:groups` claim to an application role. Admin wins over lawyer; client is the default."""
+    groups = groups or []
+    if os.getenv('COGNITO_ADMINS_GROUP_NAME', 'admins') in groups:
+        return 'admin'
+    if os.getenv('COGNITO_LAWYERS_GROUP_NAME', 'lawyers') in groups:
+        return 'lawyer'
+    return 'client'
+
+def provision_user(username: str, role: str, email: str = '', first_name: str = '', last_name: str = ''):
+    """
+    Ensures a Django User, its UserProfile and (for lawyers) a LawyerProfile exist and agree with `role`.
+
+    Replaces the post_save signal that re-saved every UserProfile column on each User save.
+    The common case (returning user, nothing changed) costs one SELECT and no writes; otherwise the
+    missing rows are created and only the changed columns are updated, all in one transaction.
+    email/first_name/last_name only seed a newly created User.
+
+    Returns (user, user_profile); `user.profile` and `user.profile.lawyer_details` are already loaded.
+    """
+    user = (
+        User.objects.select_related('profile', 'profile__lawyer_details')
+        .filter(username=username)
+        .first()
+    )
+    if user is not None and _is_in_sync(user, role):
+        return user, user.profile
+
+    with transaction.atomic():
+        if user is None:
+            user, _ = User.objects.get_or_create(
+                username=username,
+                defaults={
+                    'email': email,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    **ROLE_STAFF_FLAGS[role],
+                },
+            )
+        save_changed_fields(user, ROLE_STAFF_FLAGS[role])
+
+        if hasattr(user, 'profile'):
+            user_profile = user.profile
+            save_changed_fields(user_profile, {'role': role})
+        else:
+            user_profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': role})
+            save_changed_fields(user_profile, {'role': role})
+            user.profile = user_profile
+
+        if role == 'lawyer' and not hasattr(user_profile, 'lawyer_details'):
+            user_profile.lawyer_details, _ = LawyerProfile.objects.get_or_create(user_profile=user_profile)
+
+    return user, user_profile
+
+def _is_in_sync(user: User, role: str) -> bool:
+    if not hasattr(user, 'profile') or user.profile.role != role:
+        return False
+    if any(getattr(user, flag) != value for flag, value in ROLE_STAFF_FLAGS[role].items()):
+        return False
+    return role != 'lawyer' or hasattr(user.profile, 'lawyer_details')
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from config.model_utils import save_changed_fields
+from config.serializers import DirtyFieldsUpdateMixin
 from .models import UserProfile, LawyerProfile
 
 class UserSerializer(serializers.ModelSerializer):
@@ -7,7 +9,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active'] # Added is_active
 
-class LawyerProfileSerializer(serializers.ModelSerializer):
+class LawyerProfileSerializer(DirtyFieldsUpdateMixin, serializers.ModelSerializer):
     user = UserSerializer(source='user_profile.user', read_only=True)
     # The default primary key (id) for LawyerProfile will be included automatically by ModelSerializer
     # if not explicitly excluded and 'id' is not used for something else.
@@ -33,7 +35,7 @@ class LawyerProfileSerializer(serializers.ModelSerializer):
             'is_lawyer_specific_profile_complete',
         ]
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DirtyFieldsUpdateMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     lawyer_details = LawyerProfileSerializer(required=False, allow_null=True)
 
@@ -59,45 +61,30 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'role'] 
 
     def update(self, instance, validated_data):
-        # Update direct UserProfile fields
-        instance.phone_number = validated_data.get('phone_number', instance.phone_number)
-        instance.date_of_birth = validated_data.get('date_of_birth', instance.date_of_birth)
-        instance.nationality = validated_data.get('nationality', instance.nationality)
-        instance.home_address = validated_data.get('home_address', instance.home_address)
-        instance.spoken_language = validated_data.get('spoken_language', instance.spoken_language)
-        instance.preferred_communication_method = validated_data.get('preferred_communication_method', instance.preferred_communication_method)
-        instance.time_zone = validated_data.get('time_zone', instance.time_zone)
-        instance.is_initial_profile_complete = validated_data.get('is_initial_profile_complete', instance.is_initial_profile_complete)
-        
-        instance.save() # Save UserProfile changes first
+        # Nested and User-level data are handled separately below; the DirtyFieldsUpdateMixin
+        # writes only the UserProfile columns that changed (or nothing at all).
+        lawyer_data = validated_data.pop('lawyer_details', None)
+        user_data = {
+            field_name: validated_data.pop(field_name)
+            for field_name in ('first_name', 'last_name') if field_name in validated_data
+        }
+        instance = super().update(instance, validated_data)
 
         # Update User model's first_name and last_name if provided
-        user_data_updated = False
-        if 'first_name' in validated_data:
-            instance.user.first_name = validated_data.get('first_name')
-            user_data_updated = True
-        
-        if 'last_name' in validated_data:
-            instance.user.last_name = validated_data.get('last_name')
-            user_data_updated = True
-
-        if user_data_updated:
-            instance.user.save()
-
-        # Handle nested update for lawyer_details
-        # Use .get() as lawyer_details might not be in the payload for all partial updates
-        lawyer_data = validated_data.get('lawyer_details', None)
+        if user_data:
+            save_changed_fields(instance.user, user_data)
 
+        # Handle nested update for lawyer_details.
+        # lawyer_details is usually already loaded (provision_user select_related / list prefetch),
+        # so the LawyerProfile row is only queried or created when it is actually missing.
         if instance.role == 'lawyer' and lawyer_data is not None:
-            # Get or create the LawyerProfile instance associated with the UserProfile
-            lawyer_profile_instance, created = LawyerProfile.objects.get_or_create(user_profile=instance)
-            
-            # Use the LawyerProfileSerializer to validate and save the nested lawyer data
-            # Pass partial=True because the incoming request is a PATCH and might not contain all fields
-            lawyer_serializer = LawyerProfileSerializer(instance=lawyer_profile_instance, data=lawyer_data, partial=True)
-            if lawyer_serializer.is_valid(raise_exception=True):
-                lawyer_serializer.save() # This saves the changes to the lawyer_profile_instance
+            try:
+                lawyer_profile_instance = instance.lawyer_details
+            except LawyerProfile.DoesNotExist:
+                lawyer_profile_instance, created = LawyerProfile.objects.get_or_create(user_profile=instance)
+
+            # lawyer_data was already validated by the nested LawyerProfileSerializer field,
+            # so apply it directly; its update() only writes the changed columns as well.
+            LawyerProfileSerializer().update(lawyer_profile_instance, lawyer_data)
         
-        # The instance (UserProfile) is already partially saved. 
-        # Re-serializing it after potential lawyer_profile update will reflect changes.
-        return instance 
\ No newline at end of file
+        return instance
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import directory
+from .models import LawyerProfile
+
+# User fields that appear in the lawyer directory (LawyerProfileSerializer.user)
+DIRECTORY_USER_FIELDS = {'username', 'email', 'first_name', 'last_name', 'is_active'}
+
+
+def _refresh_after_commit(lawyer_ids):
+    transaction.on_commit(lambda: directory.refresh_lawyers(lawyer_ids))
+
+
+@receiver(post_save, sender=LawyerProfile)
+@receiver(post_delete, sender=LawyerProfile)
+def refresh_directory_for_lawyer_profile(sender, instance, **kwargs):
+    _refresh_after_commit([instance.id])
+
+
+@receiver(post_save, sender=User)
+def refresh_directory_for_user(sender, instance, created, update_fields=None, **kwargs):
+    # Logins save last_login only; skip the lookup for saves that can't change a directory entry.
+    if created or (update_fields is not None and not DIRECTORY_USER_FIELDS.intersection(update_fields)):
+        return
+    lawyer_ids = list(LawyerProfile.objects.filter(user_profile__user_id=instance.id).values_list('id', flat=True))
+    if lawyer_ids:
+        _refresh_after_commit(lawyer_ids)
+
+# UserProfile saves need no handler: none of its columns are part of a directory entry, and deleting
+# a UserProfile cascades to its LawyerProfile, which fires post_delete above.
@@ -0,0 +1,38 @@
+from celery import shared_task
+import logging
+
+from . import bulk_import, directory
+
+logger = logging.getLogger(__name__)
+
+@shared_task(name="users.rebuild_lawyer_directory_task")
+def rebuild_lawyer_directory_task():
+    """
+    Celery task that rebuilds the Redis lawyer directory snapshot from the database.
+    Run it periodically (e.g. hourly) and after bulk imports, which bypass the incremental signals.
+    """
+    try:
+        count = directory.rebuild_directory()
+        logger.info(f'[Celery Task] Rebuilt lawyer directory snapshot with {count} lawyer(s).')
+        return f'Rebuilt lawyer directory with {count} lawyers.'
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during rebuild_lawyer_directory_task: {e}", exc_info=True)
+        raise
+
+@shared_task(name="users.provision_lawyer_import_task")
+def provision_lawyer_import_task(lawyer_import_id):
+    """
+    Celery task that creates the Cognito accounts of a bulk lawyer import (users/bulk_import.py), in parallel
+    and rate limited, recording each row's outcome. Queued by the import endpoint; queue it again to retry
+    the rows that failed.
+    """
+    try:
+        lawyer_import = bulk_import.provision_cognito(lawyer_import_id)
+        logger.info(
+            f'[Celery Task] Lawyer import #{lawyer_import_id}: {lawyer_import.cognito_created} Cognito account(s) ready, '
+            f'{lawyer_import.cognito_failed} failed.'
+        )
+        return {'created': lawyer_import.cognito_created, 'failed': lawyer_import.cognito_failed}
+    except Exception as e:
+        logger.error(f"[Celery Task] Error during provision_lawyer_import_task ({lawyer_import_id}): {e}", exc_info=True)
+        raise
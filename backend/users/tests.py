@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from config.authentication import CognitoAuthentication
+from .models import UserProfile, LawyerProfile
+
+
+def _write_queries(captured):
+    return [q['sql'] for q in captured.captured_queries if q['sql'].split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+
+class CognitoLoginWriteCountTests(TestCase):
+    """Logging in must not rewrite User/UserProfile rows that are already in sync."""
+
+    def login(self, groups):
+        claims = {'cognito:username': 'jane', 'email': 'jane@example.com', 'cognito:groups': groups}
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer token')
+        with mock.patch('config.authentication.requests.get') as jwks_get, \
+                mock.patch('config.authentication.jwt.get_unverified_header', return_value={'kid': 'k1'}), \
+                mock.patch('config.authentication.jwt.decode', return_value=claims):
+            jwks_get.return_value.json.return_value = {'keys': [{'kid': 'k1'}]}
+            with CaptureQueriesContext(connection) as captured:
+                user, _ = CognitoAuthentication().authenticate(request)
+        return user, _write_queries(captured)
+
+    def test_first_login_provisions_user_and_profile(self):
+        user, _ = self.login(['lawyers'])
+        self.assertEqual(user.profile.role, 'lawyer')
+        self.assertTrue(LawyerProfile.objects.filter(user_profile__user=user).exists())
+
+    def test_repeat_login_writes_at_most_once(self):
+        for groups in (['clients'], ['lawyers'], ['admins']):
+            self.login(groups)
+            _, writes = self.login(groups)
+            self.assertLessEqual(len(writes), 1, writes)
+
+    def test_staff_flag_sync_updates_only_changed_columns(self):
+        self.login(['admins'])
+        user, writes = self.login(['clients'])
+        self.assertFalse(user.is_staff)
+        self.assertEqual(UserProfile.objects.get(user=user).role, 'client')
+        profile_updates = [sql for sql in writes if 'users_userprofile' in sql]
+        self.assertEqual(len(profile_updates), 1)
+        self.assertNotIn('phone_number', profile_updates[0])
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import PostCognitoSignUpHandlerView, UserProfileDetailView, AdminUserProfileViewSet
+from .import_views import LawyerImportView, LawyerImportDetailView
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -9,6 +10,8 @@ router.register(r'admin/user-profiles', AdminUserProfileViewSet, basename='admin
 urlpatterns = [
     path('post-signup/', PostCognitoSignUpHandlerView.as_view(), name='post_signup_handler'),
     path('profile/', UserProfileDetailView.as_view(), name='user_profile_detail'),
+    path('admin/lawyer-imports/', LawyerImportView.as_view(), name='lawyer-import'),
+    path('admin/lawyer-imports/<int:import_id>/', LawyerImportDetailView.as_view(), name='lawyer-import-detail'),
     # Include the router URLs
     path('', include(router.urls)),
 ] 
\ No newline at end of file
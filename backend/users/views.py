@@ -28,6 +28,7 @@ logger = logging.getLogger(__name__)
 class PostCognitoSignUpHandlerView(APIView): # Inherit from APIView
     authentication_classes = [CognitoAuthentication] # Explicitly set CognitoAuthentication
     permission_classes = [IsAuthenticated] # Require token authentication
+    throttle_scope = 'auth' # Calls Cognito's admin API (settings.THROTTLE_RATES)
 
     def post(self, request, *args, **kwargs):
         cognito_username = request.user.username
@@ -82,7 +83,7 @@ class PostCognitoSignUpHandlerView(APIView): # Inherit from APIView
             user_cognito_groups = get_user_cognito_groups(cognito_username, user_pool_id, cognito_region) # Refresh groups
 
         try:
-            # Django User and UserProfile are ensured by CognitoAuthentication and signals
+            # Django User and UserProfile are ensured by CognitoAuthentication (users.provisioning)
             # No need to explicitly get_or_create User or old ClientProfile here.
             logger.info(f"User '{cognito_username}' processed. Action: {action_taken}. Final groups: {user_cognito_groups}")
             return JsonResponse({
@@ -104,10 +105,16 @@ class UserProfileDetailView(generics.RetrieveUpdateAPIView):
     # Ensure this uses the correct CognitoAuthentication from your project structure if it's not default
     # authentication_classes = [CognitoAuthentication] # Already set globally in REST_FRAMEWORK settings
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'auth' # Fetched on every sign-in (settings.THROTTLE_RATES)
 
     def get_object(self):
-        # UserProfile is created by a signal when User is created.
-        # self.request.user will be the Django User model instance from CognitoAuthentication
+        # UserProfile is provisioned by CognitoAuthentication on login; get_or_create covers users created elsewhere.
+        # self.request.user will be the Django User model instance from CognitoAuthentication,
+        # with profile (and lawyer_details) already loaded, so reuse it instead of querying again.
+        try:
+            return self.request.user.profile
+        except UserProfile.DoesNotExist:
+            pass
         profile, created = UserProfile.objects.get_or_create(user=self.request.user)
         # No need to save here if defaults are set in model and signal handles creation properly.
         # if created: profile.save() 
@@ -187,8 +194,8 @@ class AdminUserProfileViewSet(viewsets.ModelViewSet):
                     user.is_staff = False
                     user.is_superuser = False
                 
-                user_profile.save()
-                user.save()
+                user_profile.save(update_fields=['role'])
+                user.save(update_fields=['is_staff', 'is_superuser'])
 
                 # Update Cognito groups
                 success_cognito = cognito_admin_actions.update_user_cognito_role(user.username, new_role)
@@ -227,7 +234,7 @@ class AdminUserProfileViewSet(viewsets.ModelViewSet):
         try:
             with transaction.atomic():
                 user.is_active = is_active_status
-                user.save()
+                user.save(update_fields=['is_active'])
 
                 # Update Cognito user status
                 if is_active_status: